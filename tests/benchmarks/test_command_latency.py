@@ -0,0 +1,52 @@
+"""Latency benchmark of the TMC Low observation commands, run with
+BENCHMARK_RUNS set to the number of runs."""
+import pytest
+from ska_control_model import ObsState
+
+from tests.resources.test_harness.central_node_low import CentralNodeWrapperLow
+from tests.resources.test_harness.command_benchmark import (
+    BENCHMARK_REPORT,
+    BENCHMARK_RUNS,
+    CommandLatencyBenchmark,
+    simulation_mode,
+    write_report,
+)
+from tests.resources.test_harness.subarray_node_low import (
+    SubarrayNodeWrapperLow,
+)
+from tests.resources.test_harness.utils.common_utils import JsonFactory
+from tests.resources.test_support.common_utils.tmc_helpers import (
+    prepare_json_args_for_centralnode_commands,
+    prepare_json_args_for_commands,
+)
+
+
+@pytest.mark.SKA_low
+@pytest.mark.benchmark
+@pytest.mark.skipif(not BENCHMARK_RUNS, reason="BENCHMARK_RUNS is not set")
+def test_command_latency(
+    central_node_low: CentralNodeWrapperLow,
+    subarray_node_low: SubarrayNodeWrapperLow,
+    command_input_factory: JsonFactory,
+):
+    """Measure the latency of the observation commands over BENCHMARK_RUNS
+    runs and write their percentiles to BENCHMARK_REPORT"""
+    central_node_low.move_to_on()
+    assert subarray_node_low.subarray_node.obsState == ObsState.EMPTY
+    benchmark = CommandLatencyBenchmark(central_node_low, subarray_node_low)
+    inputs = (
+        prepare_json_args_for_centralnode_commands(
+            "assign_resources_low", command_input_factory
+        ),
+        prepare_json_args_for_commands("configure_low", command_input_factory),
+        prepare_json_args_for_commands("scan_low", command_input_factory),
+        prepare_json_args_for_centralnode_commands(
+            "release_resources_low", command_input_factory
+        ),
+    )
+    for _ in range(BENCHMARK_RUNS):
+        benchmark.run(*inputs)
+    report = write_report(
+        benchmark.latencies, simulation_mode(), BENCHMARK_REPORT
+    )
+    assert report[simulation_mode()]["Restart"]
@@ -0,0 +1,54 @@
+"""Soak run of long observing sequences, run with SOAK_DURATION set to the
+number of seconds to run for."""
+import json
+import os
+
+import pytest
+from ska_control_model import ObsState
+
+from tests.resources.test_harness.central_node_low import CentralNodeWrapperLow
+from tests.resources.test_harness.soak_runner import (
+    SOAK_DURATION,
+    SOAK_REPORT,
+    SoakRunner,
+)
+from tests.resources.test_harness.subarray_node_low import (
+    SubarrayNodeWrapperLow,
+)
+from tests.resources.test_harness.utils.common_utils import JsonFactory
+from tests.resources.test_support.common_utils.tmc_helpers import (
+    prepare_json_args_for_centralnode_commands,
+    prepare_json_args_for_commands,
+)
+
+
+@pytest.mark.SKA_low
+@pytest.mark.soak
+@pytest.mark.skipif(not SOAK_DURATION, reason="SOAK_DURATION is not set")
+def test_soak(
+    central_node_low: CentralNodeWrapperLow,
+    subarray_node_low: SubarrayNodeWrapperLow,
+    command_input_factory: JsonFactory,
+):
+    """Repeat observing blocks for SOAK_DURATION seconds, failing on a
+    latency or memory trend, and write the report to SOAK_REPORT"""
+    central_node_low.move_to_on()
+    assert subarray_node_low.subarray_node.obsState == ObsState.EMPTY
+    runner = SoakRunner(central_node_low, subarray_node_low)
+    report = runner.run(
+        SOAK_DURATION,
+        prepare_json_args_for_centralnode_commands(
+            "assign_resources_low", command_input_factory
+        ),
+        prepare_json_args_for_commands("configure_low", command_input_factory),
+        prepare_json_args_for_commands("scan_low", command_input_factory),
+        prepare_json_args_for_centralnode_commands(
+            "release_resources_low", command_input_factory
+        ),
+    )
+    directory = os.path.dirname(SOAK_REPORT)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(SOAK_REPORT, "w", encoding="UTF-8") as report_file:
+        json.dump(report, report_file, indent=4)
+    assert not report["failures"], report["failures"]
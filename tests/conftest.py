@@ -4,7 +4,7 @@ import logging
 import os
 import time
 from os.path import dirname, join
-from typing import Generator
+from typing import Generator, Optional
 
 import pytest
 import tango
@@ -17,13 +17,42 @@ from ska_tango_testing.mock.tango.event_callback import (
 )
 from tango import DevState
 
+from tests.resources.test_harness.async_wrappers import (
+    AsyncCentralNodeWrapperLow,
+    AsyncSubarrayNodeWrapperLow,
+)
 from tests.resources.test_harness.central_node_low import CentralNodeWrapperLow
 from tests.resources.test_harness.central_node_with_csp_low import (
     CentralNodeCspWrapperLow,
 )
-from tests.resources.test_harness.event_recorder import EventRecorder
-from tests.resources.test_harness.helpers import set_admin_mode_values_mccs
+from tests.resources.test_harness.dirty_tracker import (
+    DIRTY_TRACKER,
+    DIRTY_TRACKING,
+    DirtyTracker,
+)
+from tests.resources.test_harness.event_journal import (
+    EVENT_JOURNAL_DIR,
+    EventJournal,
+    journal_path,
+)
+from tests.resources.test_harness.event_recorder import (
+    EventRecorder,
+    IndexedEventRecorder,
+)
+from tests.resources.test_harness.event_tracer import SharedEventTracer
+from tests.resources.test_harness.helpers import (
+    KEEP_TELESCOPE_ON,
+    set_admin_mode_values_mccs,
+)
 from tests.resources.test_harness.simulator_factory import SimulatorFactory
+from tests.resources.test_harness.subarray_lease import (
+    LEASED_SUBARRAY_ID,
+    SUBARRAY_LEASE_MANAGER,
+    TELESCOPE_LOCK,
+    SubarrayLeaseError,
+    with_leased_resources,
+    xdist_worker_index,
+)
 from tests.resources.test_harness.subarray_node_low import (
     SubarrayNodeWrapperLow,
 )
@@ -32,6 +61,10 @@ from tests.resources.test_harness.subarray_node_with_csp_low import (
 )
 from tests.resources.test_harness.tmc_low import TMCLow
 from tests.resources.test_harness.utils.common_utils import JsonFactory
+from tests.resources.test_support.common_utils.event_hub import (
+    CHANGE_EVENT_HUB,
+    ChangeEventHub,
+)
 
 configure_logging(logging.DEBUG)
 LOGGER = logging.getLogger(__name__)
@@ -47,6 +80,47 @@ def pytest_sessionstart(session):
     print(tango.utils.info())
 
 
+def pytest_configure(config):
+    """
+    Pytest hook; leases the subarray of the pytest-xdist worker, held until
+    the worker exits.
+    :param config: the pytest config
+    :type config: :py:class:`pytest.Config`
+    """
+    try:
+        SUBARRAY_LEASE_MANAGER.lease_for_worker(xdist_worker_index())
+    except SubarrayLeaseError as exception:
+        raise pytest.UsageError(str(exception)) from exception
+
+
+def pytest_unconfigure(config):
+    """
+    Pytest hook; releases the subarray leased by pytest_configure.
+    :param config: the pytest config
+    :type config: :py:class:`pytest.Config`
+    """
+    SUBARRAY_LEASE_MANAGER.release(LEASED_SUBARRAY_ID)
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_collection_modifyitems(config, items):
+    """
+    Pytest hook; marks the power_cycle tests telescope_wide, and groups the
+    telescope wide tests on one pytest-xdist worker with --dist loadgroup.
+    Runs before the -m selection so that it sees the added markers.
+    :param config: the pytest config
+    :type config: :py:class:`pytest.Config`
+    :param items: the collected tests
+    :type items: list
+    """
+    group_on_worker = config.pluginmanager.hasplugin("xdist")
+    for item in items:
+        if item.get_closest_marker("power_cycle"):
+            item.add_marker(pytest.mark.telescope_wide)
+        if group_on_worker and item.get_closest_marker("telescope_wide"):
+            item.add_marker(pytest.mark.xdist_group("telescope"))
+
+
 def pytest_addoption(parser):
     """
     Pytest hook; implemented to add the `--true-context` option, used to
@@ -83,7 +157,9 @@ def json_factory():
     """
 
     def _get_json(slug):
-        return get_input_str(join(dirname(__file__), "data", f"{slug}.json"))
+        return with_leased_resources(
+            get_input_str(join(dirname(__file__), "data", f"{slug}.json"))
+        )
 
     return _get_json
 
@@ -138,32 +214,110 @@ def change_event_callbacks() -> MockTangoEventCallbackGroup:
     )
 
 
+@pytest.fixture(autouse=True)
+def telescope_lock(request) -> Generator[None, None, None]:
+    """Keep the telescope wide tests apart from the tests of the subarrays
+    leased by the other pytest-xdist workers: a telescope wide test waits
+    for the running tests to end and holds the others off until it ends.
+    Set up before and torn down after the other fixtures of the test."""
+    if xdist_worker_index() is None:
+        yield
+    elif request.node.get_closest_marker("telescope_wide"):
+        with TELESCOPE_LOCK.exclusive():
+            yield
+    else:
+        with TELESCOPE_LOCK.shared():
+            yield
+
+
+@pytest.fixture(autouse=True)
+def dirty_tracker() -> Generator[DirtyTracker, None, None]:
+    """Track the simulator states changed by the test, so that the tear
+    downs skip resetting the others. Set up before and torn down after the
+    node wrappers."""
+    if DIRTY_TRACKING:
+        DIRTY_TRACKER.install()
+    yield DIRTY_TRACKER
+    DIRTY_TRACKER.uninstall()
+
+
 @pytest.fixture()
-def tmc_low() -> Generator[TMCLow, None, None]:
+def keep_telescope_on(request) -> bool:
+    """Whether the Telescope is kept ON after the test. The Telescope state
+    outlives the test processes, so once a test powered it on the next ones
+    find it ON and only the changes made by a test are undone by the tear
+    downs. Tests marked power_cycle opt out: they start and end with the
+    Telescope powered down. Tests distributed over pytest-xdist workers
+    always keep it ON, powering it down being left to the telescope wide
+    tests."""
+    return (
+        KEEP_TELESCOPE_ON or xdist_worker_index() is not None
+    ) and request.node.get_closest_marker("power_cycle") is None
+
+
+def prepare_central_node(
+    central_node: CentralNodeWrapperLow, keep_on: bool
+) -> None:
+    """Apply the keep ON policy, powering down a Telescope left ON by a
+    previous test if the test opted out"""
+    central_node.keep_telescope_on = keep_on
+    if not keep_on and central_node.is_telescope_on():
+        LOGGER.info("Powering down the Telescope left ON")
+        central_node.power_down()
+
+
+# pylint: disable=redefined-outer-name
+@pytest.fixture()
+def tmc_low(keep_telescope_on: bool) -> Generator[TMCLow, None, None]:
     """Return TMC Low object"""
     tmc = TMCLow()
+    prepare_central_node(tmc.central_node, keep_telescope_on)
     yield tmc
     tmc.tear_down()
 
 
 @pytest.fixture()
-def central_node_low() -> Generator[CentralNodeWrapperLow, None, None]:
+def central_node_low(
+    keep_telescope_on: bool,
+) -> Generator[CentralNodeWrapperLow, None, None]:
     """Return CentralNode for Low Telescope and calls tear down"""
     central_node = CentralNodeWrapperLow()
+    prepare_central_node(central_node, keep_telescope_on)
     yield central_node
     # this will call after test complete
     central_node.tear_down()
 
 
 @pytest.fixture()
-def subarray_node_low() -> Generator[SubarrayNodeWrapperLow, None, None]:
+def subarray_node_low(
+    keep_telescope_on: bool,
+) -> Generator[SubarrayNodeWrapperLow, None, None]:
     """Return SubarrayNode and calls tear down"""
     subarray = SubarrayNodeWrapperLow()
+    subarray.keep_telescope_on = keep_telescope_on
     yield subarray
     # this will call after test complete
     subarray.tear_down()
 
 
+@pytest.fixture()
+def async_central_node_low(
+    central_node_low: CentralNodeWrapperLow,
+) -> AsyncCentralNodeWrapperLow:
+    """Return awaitable CentralNode commands, tear down is done by the
+    central_node_low fixture"""
+    return AsyncCentralNodeWrapperLow(central_node_low)
+
+
+@pytest.fixture()
+def async_subarray_node_low(
+    subarray_node_low: SubarrayNodeWrapperLow,
+) -> AsyncSubarrayNodeWrapperLow:
+    """Return awaitable SubarrayNode commands, tear down is done by the
+    subarray_node_low fixture"""
+    return AsyncSubarrayNodeWrapperLow(subarray_node_low)
+
+
 @pytest.fixture()
 def subarray_node_real_csp_low() -> Generator[
     SubarrayNodeCspWrapperLow, None, None
@@ -210,19 +364,45 @@ def stored_unique_id():
 @pytest.fixture()
 def event_recorder() -> Generator[EventRecorder, None, None]:
     """Return EventRecorder and clear events"""
-    event_rec = EventRecorder()
+    event_rec = IndexedEventRecorder()
     yield event_rec
     event_rec.clear_events()
 
 
 @pytest.fixture
-def event_tracer():
-    """Returns a TangoEventTracer instance."""
-    tracer = TangoEventTracer()
+def event_tracer() -> Generator[TangoEventTracer, None, None]:
+    """Returns a TangoEventTracer instance sharing subscriptions through
+    the change event hub."""
+    tracer = SharedEventTracer()
     yield tracer
+    tracer.unsubscribe_all()
     tracer.clear_events()
 
 
+@pytest.fixture(scope="session", autouse=True)
+def change_event_hub() -> Generator[ChangeEventHub, None, None]:
+    """Returns the change event hub shared by all event consumers and
+    removes the remaining subscriptions at the end of the session."""
+    yield CHANGE_EVENT_HUB
+    CHANGE_EVENT_HUB.close()
+
+
+@pytest.fixture(autouse=True)
+def event_journal(request) -> Generator[Optional[EventJournal], None, None]:
+    """Journals the change events received during the test to a msgpack
+    file in EVENT_JOURNAL_DIR, returns None if journaling is disabled."""
+    if not EVENT_JOURNAL_DIR:
+        yield None
+        return
+    journal = EventJournal(
+        journal_path(EVENT_JOURNAL_DIR, request.node.nodeid)
+    )
+    tap_handle = CHANGE_EVENT_HUB.add_tap(journal.tap)
+    yield journal
+    CHANGE_EVENT_HUB.remove_tap(tap_handle)
+    journal.close()
+
+
 @pytest.fixture(scope="session", autouse=True)
 def set_admin_mode_mccs():
     """Fixture to set admin mode values"""
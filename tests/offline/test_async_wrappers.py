@@ -0,0 +1,196 @@
+"""Offline tests of the asyncio wrappers, the devices being served by the
+ReplayBackend."""
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+from ska_control_model import ObsState
+
+from tests.resources.test_harness.async_wrappers import (
+    AsyncCentralNodeWrapperLow,
+    AsyncProxies,
+    AsyncSubarrayNodeWrapperLow,
+)
+from tests.resources.test_harness.constant import device_dict_low
+from tests.resources.test_harness.event_replay import ReplayBackend, ReplayStep
+from tests.resources.test_harness.helpers import SIMULATED_DEVICES_DICT
+from tests.resources.test_support.common_utils.result_code import ResultCode
+
+# (device key, obsState attribute) of the waits of AssignResources
+OBS_STATE_ATTRIBUTES = (
+    ("csp_subarray_leaf_node", "cspSubarrayObsState"),
+    ("sdp_subarray_leaf_node", "sdpSubarrayObsState"),
+    ("mccs_subarray_leaf_node", "obsState"),
+    ("csp_subarray", "obsState"),
+    ("sdp_subarray", "obsState"),
+    ("tmc_subarraynode", "obsState"),
+)
+
+
+class AsyncReplayDeviceProxy:
+    """Asyncio proxy stand in, commands are recorded by the backend and
+    answered as queued, and may start a replay script"""
+
+    def __init__(self, backend: ReplayBackend, device_name: str, scripts):
+        self.backend = backend
+        self.proxy = backend.proxy(device_name)
+        self.scripts = scripts
+
+    async def command_inout(self, command_name: str, *args):
+        """Record the command and replay its script, if any"""
+        self.proxy.command_inout(command_name, *args)
+        if command_name in self.scripts:
+            self.backend.start(self.scripts[command_name])
+        return [ResultCode.QUEUED], [f"1_{command_name}"]
+
+    def __getattr__(self, command_name: str):
+        async def command(*args):
+            return await self.command_inout(command_name, *args)
+
+        return command
+
+
+def push_obs_states(backend: ReplayBackend, obs_state: ObsState) -> None:
+    """Push the obsState of every device waited for"""
+    for device_key, attribute_name in OBS_STATE_ATTRIBUTES:
+        backend.push(device_dict_low[device_key], attribute_name, obs_state)
+
+
+def async_subarray_node(backend: ReplayBackend, scripts: dict):
+    """AsyncSubarrayNodeWrapperLow of replayed devices"""
+
+    async def proxy_factory(device_name):
+        return AsyncReplayDeviceProxy(backend, device_name, scripts)
+
+    return AsyncSubarrayNodeWrapperLow(
+        SimpleNamespace(
+            central_node=device_dict_low["central_node"],
+            subarray_node=device_dict_low["tmc_subarraynode"],
+        ),
+        proxies=AsyncProxies(proxy_factory),
+    )
+
+
+def async_central_node(
+    backend: ReplayBackend, scripts: dict, telescope_on: bool
+) -> AsyncCentralNodeWrapperLow:
+    """AsyncCentralNodeWrapperLow of replayed devices, keeping the Telescope
+    ON between tests"""
+
+    async def proxy_factory(device_name):
+        return AsyncReplayDeviceProxy(backend, device_name, scripts)
+
+    return AsyncCentralNodeWrapperLow(
+        SimpleNamespace(
+            central_node=device_dict_low["central_node"],
+            keep_telescope_on=True,
+            is_telescope_on=lambda: telescope_on,
+        ),
+        proxies=AsyncProxies(proxy_factory),
+    )
+
+
+def invoked_commands(backend: ReplayBackend) -> list:
+    """Commands invoked through the wrapper"""
+    return [command_name for _, command_name, _ in backend.commands]
+
+
+@pytest.mark.offline
+def test_store_resources_awaits_idle():
+    """AssignResources is invoked from EMPTY and awaited until IDLE"""
+    backend = ReplayBackend()
+    idle_script = [
+        ReplayStep(0.05, device_dict_low[device_key], attribute_name, 2)
+        for device_key, attribute_name in OBS_STATE_ATTRIBUTES
+    ]
+    with backend.install():
+        push_obs_states(backend, ObsState.EMPTY)
+        subarray_node = async_subarray_node(
+            backend, {"AssignResources": idle_script}
+        )
+        result = asyncio.run(subarray_node.store_resources("{}"))
+    assert result == ([ResultCode.QUEUED], ["1_AssignResources"])
+    assert invoked_commands(backend) == ["AssignResources"]
+
+
+@pytest.mark.offline
+def test_store_resources_requires_empty():
+    """AssignResources is not invoked on a subarray which is not EMPTY, as
+    for the sync wrapper"""
+    backend = ReplayBackend()
+    with backend.install():
+        push_obs_states(backend, ObsState.IDLE)
+        subarray_node = async_subarray_node(backend, {})
+        with pytest.raises(Exception, match="to be EMPTY"):
+            asyncio.run(subarray_node.store_resources("{}"))
+    assert not invoked_commands(backend)
+
+
+@pytest.mark.offline
+def test_end_observation_times_out_in_seconds(monkeypatch):
+    """The timeouts of the awaited waits are in seconds"""
+    backend = ReplayBackend()
+    timeouts = []
+
+    async def wait_async(waiter, timeout, resolution):
+        timeouts.append(timeout * resolution)
+
+    monkeypatch.setattr(
+        "tests.resources.test_harness.utils.wait_helpers.Waiter.wait_async",
+        wait_async,
+    )
+    with backend.install():
+        push_obs_states(backend, ObsState.READY)
+        subarray_node = async_subarray_node(backend, {})
+        asyncio.run(subarray_node.end_observation())
+    assert timeouts == [pytest.approx(20)]
+    assert invoked_commands(backend) == ["End"]
+
+
+@pytest.mark.offline
+def test_telescope_on_kept_on_is_not_invoked():
+    """TelescopeOn is not invoked on a Telescope kept ON, as for the sync
+    wrapper"""
+    backend = ReplayBackend()
+    with backend.install():
+        central_node = async_central_node(backend, {}, telescope_on=True)
+        asyncio.run(central_node._telescope_on())
+    assert not invoked_commands(backend)
+
+
+@pytest.mark.offline
+def test_telescope_on_completion_pushed_before_return(monkeypatch):
+    """The completion of TelescopeOn is received even when pushed before the
+    command returns, and is no longer the current value"""
+    for deployment in SIMULATED_DEVICES_DICT:
+        monkeypatch.setitem(SIMULATED_DEVICES_DICT, deployment, False)
+    backend = ReplayBackend()
+    lrcr_steps = [
+        ReplayStep(
+            0,
+            device_dict_low["central_node"],
+            "longRunningCommandResult",
+            (unique_id, json.dumps((int(result_code), message))),
+        )
+        for unique_id, result_code, message in (
+            ("1_TelescopeOn", ResultCode.OK, "Command Completed"),
+            ("2_LoadDishCfg", ResultCode.QUEUED, ""),
+        )
+    ]
+
+    class CompletingDeviceProxy(AsyncReplayDeviceProxy):
+        """Commands push their results before returning"""
+
+        async def command_inout(self, command_name: str, *args):
+            self.backend.play(lrcr_steps)
+            return await super().command_inout(command_name, *args)
+
+    async def proxy_factory(device_name):
+        return CompletingDeviceProxy(backend, device_name, {})
+
+    with backend.install():
+        central_node = async_central_node(backend, {}, telescope_on=False)
+        central_node.proxies = AsyncProxies(proxy_factory)
+        asyncio.run(asyncio.wait_for(central_node._telescope_on(), 5))
+    assert invoked_commands(backend) == ["TelescopeOn"]
@@ -0,0 +1,137 @@
+"""Offline tests of the AttributeWatcher waits, the devices being served by
+the ReplayBackend."""
+import threading
+import time
+
+import pytest
+from tango import DevFailed, Except
+
+from tests.resources.test_harness.event_replay import (
+    ReplayBackend,
+    ReplayDeviceProxy,
+    ReplayStep,
+)
+from tests.resources.test_support.common_utils.common_helpers import (
+    EVENTS_NOT_PUSHED_REASONS,
+    AttributeWatcher,
+    Resource,
+)
+from tests.resources.test_support.common_utils.device_proxy_pool import (
+    DEVICE_PROXY_POOL,
+)
+from tests.resources.test_support.common_utils.event_hub import (
+    CHANGE_EVENT_HUB,
+)
+
+SUBARRAY_NODE = "ska_low/tm_subarray_node/1"
+
+
+@pytest.fixture()
+def replay_backend():
+    """ReplayBackend serving the pooled proxies, with an EMPTY subarray"""
+    backend = ReplayBackend()
+    with backend.install():
+        backend.push(SUBARRAY_NODE, "obsState", 0)
+        yield backend
+
+
+def obs_state_watcher(**kwargs) -> AttributeWatcher:
+    """AttributeWatcher of the SubarrayNode obsState"""
+    return AttributeWatcher(Resource(SUBARRAY_NODE), "obsState", **kwargs)
+
+
+@pytest.mark.offline
+def test_wait_returns_once_the_value_is_pushed(replay_backend):
+    """The wait returns as soon as the desired value is pushed"""
+    watcher = obs_state_watcher(desired="2", require_transition=True)
+    replay_backend.start([ReplayStep(0.05, SUBARRAY_NODE, "obsState", 2)])
+    watcher.wait_until_conditions_met(timeout=5)
+    assert watcher.current_value == "2"
+    assert not watcher.polled
+    assert CHANGE_EVENT_HUB.subscription_count() == 0
+
+
+@pytest.mark.offline
+def test_timeout_without_signals(replay_backend):
+    """The deadline is a threading.Event wait, so that a wait times out on
+    time from any thread, where SIGALRM could not be used"""
+    errors = []
+
+    def wait_in_thread():
+        watcher = obs_state_watcher(desired="2", require_transition=True)
+        try:
+            watcher.wait_until_conditions_met(timeout=0.2)
+        # pylint: disable=broad-exception-caught
+        except Exception as exception:
+            errors.append(exception)
+
+    started_at = time.monotonic()
+    waiting_thread = threading.Thread(target=wait_in_thread)
+    waiting_thread.start()
+    waiting_thread.join(timeout=5)
+    assert not waiting_thread.is_alive()
+    assert 0.2 <= time.monotonic() - started_at < 2
+    assert len(errors) == 1
+    assert "Timed out" in str(errors[0])
+    assert CHANGE_EVENT_HUB.subscription_count() == 0
+
+
+@pytest.mark.offline
+def test_stop_listening_is_idempotent(replay_backend):
+    """Stopping a watcher more than once releases its subscription once"""
+    watcher = obs_state_watcher()
+    other_watcher = obs_state_watcher()
+    watcher.stop_listening()
+    watcher.stop_listening()
+    watcher.stop()
+    assert watcher.current_subscription is None
+    # the subscription shared with the other watcher is kept
+    assert CHANGE_EVENT_HUB.subscription_count() == 1
+    other_watcher.stop()
+    assert CHANGE_EVENT_HUB.subscription_count() == 0
+
+
+class EventlessDeviceProxy(ReplayDeviceProxy):
+    """Proxy of a device pushing no change events, its subscriptions fail
+    with given reason"""
+
+    def __init__(self, device_name: str, backend: ReplayBackend, reason):
+        super().__init__(device_name, backend)
+        self.reason = reason
+
+    def subscribe_event(self, attribute_name, event_type, callback, *args):
+        Except.throw_exception(
+            self.reason,
+            f"{attribute_name} does not push events",
+            "EventlessDeviceProxy.subscribe_event",
+        )
+
+
+def install_eventless_proxies(backend: ReplayBackend, reason: str) -> None:
+    """Serve the pooled proxies with EventlessDeviceProxy objects"""
+    DEVICE_PROXY_POOL.set_proxy_factory(
+        lambda device_name: EventlessDeviceProxy(device_name, backend, reason)
+    )
+
+
+@pytest.mark.offline
+@pytest.mark.parametrize("reason", EVENTS_NOT_PUSHED_REASONS)
+def test_falls_back_to_client_side_polling(replay_backend, reason):
+    """Attributes without change events are polled from the client side"""
+    install_eventless_proxies(replay_backend, reason)
+    watcher = obs_state_watcher(desired="2", require_transition=True)
+    assert watcher.polled
+    assert CHANGE_EVENT_HUB.subscription_count() == 0
+    replay_backend.start([ReplayStep(0.05, SUBARRAY_NODE, "obsState", 2)])
+    watcher.wait_until_conditions_met(timeout=5)
+    assert watcher.current_value == "2"
+    watcher.stop()
+    assert watcher.current_subscription is None
+
+
+@pytest.mark.offline
+def test_other_subscription_errors_are_raised(replay_backend):
+    """Only the reasons of devices not pushing events are polled"""
+    install_eventless_proxies(replay_backend, "API_DeviceTimedOut")
+    with pytest.raises(DevFailed):
+        obs_state_watcher()
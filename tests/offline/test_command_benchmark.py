@@ -0,0 +1,92 @@
+"""Offline tests of the command latency benchmark, the devices being served
+by the ReplayBackend."""
+import json
+
+import pytest
+from ska_control_model import ObsState
+
+from tests.resources.test_harness.command_benchmark import (
+    LRCR_SOURCE,
+    CommandLatencies,
+    CommandLatencyBenchmark,
+    percentile,
+    simulation_mode,
+    write_report,
+)
+from tests.resources.test_harness.event_replay import ReplayBackend, ReplayStep
+from tests.resources.test_support.common_utils.result_code import ResultCode
+
+CENTRAL_NODE = "ska_low/tm_central/central_node"
+SUBARRAY_NODE = "ska_low/tm_subarray_node/1"
+SDP_SUBARRAY = "low-sdp/subarray/01"
+
+
+class ReplayedNodes:
+    """Devices of the node wrappers used by the benchmark"""
+
+    def __init__(self, backend: ReplayBackend):
+        self.central_node = backend.proxy(CENTRAL_NODE)
+        self.subarray_node = backend.proxy(SUBARRAY_NODE)
+        self.subarray_devices = {"sdp_subarray": backend.proxy(SDP_SUBARRAY)}
+
+
+@pytest.mark.offline
+def test_percentiles_and_report(tmp_path):
+    """Percentiles interpolate between ranks, the report keeps the other
+    simulation modes"""
+    assert percentile([4.0, 1.0, 3.0, 2.0], 50) == 2.5
+    assert percentile([1.0], 99) == 1.0
+    assert simulation_mode({"csp_and_sdp": False, "all_mocks": True}) == (
+        "all_mocks"
+    )
+    assert simulation_mode({"all_mocks": False}) == "no_mocks"
+    latencies = CommandLatencies()
+    for latency in range(1, 101):
+        latencies.add("End", LRCR_SOURCE, float(latency))
+    path = tmp_path / "latency.json"
+    path.write_text(json.dumps({"csp_and_sdp": {"End": {}}}))
+    write_report(latencies, "all_mocks", str(path))
+    report = json.loads(path.read_text())
+    assert report["csp_and_sdp"] == {"End": {}}
+    assert report["all_mocks"]["End"][LRCR_SOURCE] == {
+        "count": 100,
+        "p50": 50.5,
+        "p95": pytest.approx(95.05),
+        "p99": pytest.approx(99.01),
+        "max": 100.0,
+    }
+
+
+@pytest.mark.offline
+def test_measure_records_result_and_obs_state_latencies():
+    """The latency of the command result and of each obsState event is
+    recorded"""
+    backend = ReplayBackend()
+    with backend.install():
+        for device_name in (SUBARRAY_NODE, SDP_SUBARRAY):
+            backend.push(device_name, "obsState", ObsState.READY)
+        for device_name in (CENTRAL_NODE, SUBARRAY_NODE):
+            backend.push(device_name, "longRunningCommandResult", ("", ""))
+        benchmark = CommandLatencyBenchmark(
+            ReplayedNodes(backend), ReplayedNodes(backend), timeout=5
+        )
+
+        def invoke_end():
+            backend.start(
+                [
+                    ReplayStep(0.05, SDP_SUBARRAY, "obsState", ObsState.IDLE),
+                    ReplayStep(0.05, SUBARRAY_NODE, "obsState", ObsState.IDLE),
+                    ReplayStep(
+                        0.05,
+                        SUBARRAY_NODE,
+                        "longRunningCommandResult",
+                        ("1_End", json.dumps((int(ResultCode.OK), ""))),
+                    ),
+                ]
+            )
+            return [ResultCode.QUEUED], ["1_End"]
+
+        benchmark.measure("End", "IDLE", invoke_end)
+    latencies = benchmark.latencies.samples["End"]
+    assert set(latencies) == {LRCR_SOURCE, "tmc_subarraynode", "sdp_subarray"}
+    assert 0.04 < latencies["sdp_subarray"][0] < latencies[LRCR_SOURCE][0]
@@ -0,0 +1,116 @@
+"""Offline tests of the vectorised delay model analysis."""
+import json
+
+import numpy as np
+import pytest
+
+from tests.resources.test_harness.delay_model_analyser import (
+    DelayModelAnalyser,
+    DelayModelSeries,
+    analyse,
+)
+
+CADENCE = 10.0
+
+
+def delay_model(start: float, coefficients, offsets=None) -> dict:
+    """Delay model of one station per row of coefficients"""
+    offsets = offsets if offsets is not None else [0.0] * len(coefficients)
+    return {
+        "start_validity_sec": start,
+        "cadence_sec": CADENCE,
+        "validity_period_sec": CADENCE * 2,
+        "station_beam_delays": [
+            {
+                "station_id": station,
+                "substation_id": 1,
+                "xypol_coeffs_ns": list(xypol_coeffs),
+                "ypol_offset_ns": offset,
+            }
+            for station, (xypol_coeffs, offset) in enumerate(
+                zip(coefficients, offsets), start=1
+            )
+        ],
+    }
+
+
+def linear_models(station_count: int, model_count: int) -> list:
+    """Continuous models of delays drifting linearly, station n drifting by
+    n ns/s"""
+    rates = np.arange(1, station_count + 1, dtype=float)
+    return [
+        delay_model(
+            index * CADENCE,
+            np.stack([rates * index * CADENCE, rates], axis=1),
+        )
+        for index in range(model_count)
+    ]
+
+
+@pytest.mark.offline
+def test_continuous_models_are_ok():
+    """Linearly drifting delays are continuous, their drift is reported"""
+    analysis = analyse([json.dumps(model) for model in linear_models(3, 4)])
+    assert analysis.ok
+    assert analysis.max_drift_rate == 3.0
+    assert analysis.as_dict()["stations"] == 3
+
+
+@pytest.mark.offline
+def test_discontinuities_gaps_and_non_finite_values():
+    """A delay jump, a gap in the validity and a NaN are flagged"""
+    models = linear_models(2, 3)
+    models[2]["start_validity_sec"] = 35.0
+    models[2]["station_beam_delays"][0]["xypol_coeffs_ns"] = [35.0, 1.0]
+    models[2]["station_beam_delays"][1]["xypol_coeffs_ns"] = [75.0, 2.0]
+    models[1]["station_beam_delays"][0]["ypol_offset_ns"] = float("nan")
+    analysis = analyse(models)
+    assert not analysis.ok
+    assert analysis.non_finite == [(1, (1, 1))]
+    assert analysis.discontinuities == [(1, (2, 1), pytest.approx(5.0))]
+    assert analysis.coverage_gaps == [(1, 5.0)]
+    with pytest.raises(ValueError, match="not of the stations"):
+        DelayModelSeries.from_payloads(
+            [delay_model(0.0, [[1.0]]), delay_model(10.0, [[1.0], [2.0]])]
+        )
+
+
+@pytest.mark.offline
+def test_analyser_checks_each_model_against_the_previous_one():
+    """Problems are accumulated, a change of stations starts over"""
+    analyser = DelayModelAnalyser()
+    for model in linear_models(2, 2):
+        assert analyser.add(model).ok
+    assert analyser.add(delay_model(20.0, [[20.0, 1.0], [40.0, 2.0]])).ok
+    assert not analyser.add(delay_model(30.0, [[0.0, 1.0], [60.0, 2.0]])).ok
+    assert analyser.add(delay_model(40.0, [[0.0]])).ok
+    assert analyser.model_count == 5
+    assert len(analyser.problems) == 1
+
+
+@pytest.mark.offline
+def test_full_array_station_count():
+    """Full array models are analysed at once"""
+    series = DelayModelSeries.from_payloads(linear_models(512, 30))
+    assert series.coefficients.shape == (512, 2, 30)
+    assert np.allclose(series.boundary_jumps(), 0.0)
+    assert series.offset_drift_rates().shape == (512, 29)
+
+
+@pytest.mark.offline
+def test_repeated_stations_are_rejected():
+    """A station appearing twice in a model is not silently overwritten"""
+    first, second = linear_models(2, 2)
+    repeated = json.loads(json.dumps(second))
+    repeated["station_beam_delays"][1]["station_id"] = 1
+    with pytest.raises(ValueError, match="model 1 repeats stations"):
+        DelayModelSeries.from_payloads([first, repeated])
+    with pytest.raises(ValueError, match="model 0 repeats stations"):
+        DelayModelSeries.from_payloads([repeated, first])
+    # the analyser records such a model as invalid, without raising
+    analyser = DelayModelAnalyser()
+    assert analyser.add(first).ok
+    assert analyser.add(repeated) is None
+    assert len(analyser.problems) == 1
+    assert "repeats stations" in analyser.problems[0]["invalid_model"]
+    assert analyser.add(first).ok
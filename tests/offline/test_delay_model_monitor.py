@@ -0,0 +1,109 @@
+"""Offline tests of the delay model publication monitor, the delay models
+being pushed by the ReplayBackend."""
+import json
+
+import pytest
+
+from tests.resources.test_harness.delay_model_monitor import (
+    DelayModelMonitor,
+    DelayModelReport,
+    DelayModelSample,
+    histogram,
+    ska_epoch_seconds,
+    wait_for_delay_model,
+)
+from tests.resources.test_harness.event_replay import ReplayBackend, ReplayStep
+
+CSP_SUBARRAY_LEAF_NODE = "ska_low/tm_leaf_node/csp_subarray01"
+
+
+def sample(timestamp: float, lead_time: float = 1.0) -> DelayModelSample:
+    """Delay model of cadence 1s received at timestamp"""
+    return DelayModelSample(
+        timestamp, 100, 1.0, ska_epoch_seconds(timestamp) + lead_time
+    )
+
+
+@pytest.mark.offline
+def test_report_measures_jitter_missed_and_late_models():
+    """An interval of three cadences misses two models, a negative lead
+    time is late"""
+    report = DelayModelReport(
+        "delayModel",
+        [sample(0.0), sample(1.2), sample(2.2, -0.5), sample(5.2)],
+        window=6.0,
+    )
+    assert report.intervals == pytest.approx([1.2, 1.0, 3.0])
+    assert report.missed_updates == 2
+    assert report.late_count == 1
+    summary = report.as_dict()
+    assert summary["expected"] == 6
+    assert summary["jitter_sec"]["max_abs"] == pytest.approx(2.0)
+    assert summary["interval_histogram"] == {
+        "<0.5": 0,
+        "0.5-0.9": 0,
+        "0.9-1.1": 1,
+        "1.1-1.5": 1,
+        "1.5-2.5": 0,
+        ">=2.5": 1,
+    }
+    assert summary["lead_time_sec"]["min"] == pytest.approx(-0.5)
+    assert histogram([-1.0, 10.0], (0.0, 1.0)) == {
+        "<0.0": 1,
+        "0.0-1.0": 0,
+        ">=1.0": 1,
+    }
+    assert DelayModelReport("delayModel", [], 1.0).as_dict()["received"] == 0
+
+
+@pytest.mark.offline
+def test_monitor_records_models_published_in_the_window():
+    """The model held when subscribing and invalid payloads are not
+    samples"""
+    backend = ReplayBackend()
+    delay_model = json.dumps(
+        {"cadence_sec": 0.5, "start_validity_sec": 1.0, "config_id": ""}
+    )
+    with backend.install():
+        backend.push(CSP_SUBARRAY_LEAF_NODE, "delayModel", delay_model)
+        with DelayModelMonitor(CSP_SUBARRAY_LEAF_NODE) as monitor:
+            backend.push(CSP_SUBARRAY_LEAF_NODE, "delayModel", delay_model)
+            backend.push(CSP_SUBARRAY_LEAF_NODE, "delayModel", "not json")
+            report = monitor.report()
+    assert len(report.samples) == 1
+    assert report.invalid_count == 1
+    assert report.samples[0].payload_size == len(delay_model)
+    assert report.samples[0].lead_time < 0
+
+
+@pytest.mark.offline
+def test_wait_for_delay_model_skips_the_initial_model():
+    """Only a model other than the initial one ends the wait"""
+    initial = {"interface": "initial", "station_beam_delays": []}
+    generated = {"interface": "generated", "station_beam_delays": []}
+    backend = ReplayBackend()
+    with backend.install():
+        backend.push(CSP_SUBARRAY_LEAF_NODE, "delayModel", json.dumps(initial))
+        with pytest.raises(AssertionError, match="No delayModel generated"):
+            wait_for_delay_model(
+                CSP_SUBARRAY_LEAF_NODE, initial=initial, timeout=0.1
+            )
+        backend.start(
+            [
+                ReplayStep(
+                    0.05, CSP_SUBARRAY_LEAF_NODE, "delayModel", "not json"
+                ),
+                ReplayStep(
+                    0.05,
+                    CSP_SUBARRAY_LEAF_NODE,
+                    "delayModel",
+                    json.dumps(generated),
+                ),
+            ]
+        )
+        assert (
+            wait_for_delay_model(
+                CSP_SUBARRAY_LEAF_NODE, initial=initial, timeout=5
+            )
+            == generated
+        )
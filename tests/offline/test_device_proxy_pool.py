@@ -0,0 +1,141 @@
+"""Offline tests of the DeviceProxyPool and the PooledProxy attributes, the
+proxies being created by a fake factory."""
+from types import SimpleNamespace
+
+import pytest
+from tango import DevFailed, Except
+
+from tests.resources.test_support.common_utils.device_proxy_pool import (
+    DeviceProxyPool,
+    PooledProxy,
+)
+
+SUBARRAY_NODE = "ska_low/tm_subarray_node/1"
+
+
+class FakeDeviceProxy:
+    """Proxy stand in whose reads fail with the queued reasons first"""
+
+    def __init__(self, device_name: str, failures=()):
+        self.device_name = device_name
+        self.failures = list(failures)
+        self.timeout_millis = None
+        self.config_queries = 0
+
+    def dev_name(self) -> str:
+        """Return the device name"""
+        return self.device_name
+
+    def set_timeout_millis(self, timeout_millis: int) -> None:
+        """Record the timeout"""
+        self.timeout_millis = timeout_millis
+
+    def read_attribute(self, attribute_name: str):
+        """Fail with the next queued reason, if any"""
+        if self.failures:
+            Except.throw_exception(
+                self.failures.pop(0),
+                f"Read of {attribute_name} failed",
+                "FakeDeviceProxy.read_attribute",
+            )
+        return SimpleNamespace(name=attribute_name, value=self)
+
+    def attribute_list_query_ex(self) -> list:
+        """Configuration of the obsState attribute"""
+        self.config_queries += 1
+        return [SimpleNamespace(name="obsState")]
+
+
+class FakeProxyFactory:
+    """Creates FakeDeviceProxy objects, the first one failing its reads"""
+
+    def __init__(self, failures=()):
+        self.failures = failures
+        self.proxies = []
+
+    def __call__(self, device_name: str) -> FakeDeviceProxy:
+        failures = () if self.proxies else self.failures
+        self.proxies.append(FakeDeviceProxy(device_name, failures))
+        return self.proxies[-1]
+
+
+@pytest.mark.offline
+def test_one_proxy_per_device():
+    """Device names are normalised, a single proxy is created per device"""
+    factory = FakeProxyFactory()
+    pool = DeviceProxyPool(factory)
+    proxy = pool.get_proxy(SUBARRAY_NODE.upper())
+    assert pool.get_proxy(proxy) is proxy
+    assert pool.get_proxy(SUBARRAY_NODE) is proxy
+    assert len(factory.proxies) == 1
+    assert proxy.timeout_millis == 5000
+
+
+@pytest.mark.offline
+def test_read_retries_once_after_a_restart():
+    """A restart invalidates the proxy, the read succeeding on a new one"""
+    factory = FakeProxyFactory(["API_DeviceNotExported"])
+    pool = DeviceProxyPool(factory)
+    attribute = pool.read_attribute(SUBARRAY_NODE, "obsState")
+    assert len(factory.proxies) == 2
+    assert attribute.value is factory.proxies[1]
+    assert pool.get_proxy(SUBARRAY_NODE) is factory.proxies[1]
+
+
+@pytest.mark.offline
+@pytest.mark.parametrize("reason", ["API_AttrNotFound", "API_DeviceTimedOut"])
+def test_read_errors_other_than_restarts_are_raised(reason):
+    """Errors not caused by a restart keep the pooled proxy"""
+    factory = FakeProxyFactory([reason])
+    pool = DeviceProxyPool(factory)
+    with pytest.raises(DevFailed):
+        pool.read_attribute(SUBARRAY_NODE, "obsState")
+    assert len(factory.proxies) == 1
+    assert pool.read_attribute(SUBARRAY_NODE, "obsState")
+
+
+@pytest.mark.offline
+def test_invalidate_drops_proxy_and_attribute_config():
+    """The attribute configuration is queried once per proxy"""
+    factory = FakeProxyFactory()
+    pool = DeviceProxyPool(factory)
+    assert pool.get_attribute_config(SUBARRAY_NODE, "OBSSTATE").name == (
+        "obsState"
+    )
+    assert pool.get_attribute_config(SUBARRAY_NODE, "healthState") is None
+    assert factory.proxies[0].config_queries == 1
+    pool.invalidate(SUBARRAY_NODE)
+    assert pool.get_attribute_config(SUBARRAY_NODE, "obsState")
+    assert len(factory.proxies) == 2
+    assert factory.proxies[1].config_queries == 1
+
+
+@pytest.mark.offline
+def test_pooled_proxy_attribute(monkeypatch):
+    """PooledProxy resolves to the pooled proxy on every access, unless
+    overridden on the instance"""
+    factory = FakeProxyFactory()
+    pool = DeviceProxyPool(factory)
+    monkeypatch.setattr(
+        "tests.resources.test_support.common_utils.device_proxy_pool."
+        "DEVICE_PROXY_POOL",
+        pool,
+    )
+
+    class Wrapper:
+        """Wrapper with a pooled device"""
+
+        subarray_node = PooledProxy(SUBARRAY_NODE)
+
+    assert isinstance(Wrapper.subarray_node, PooledProxy)
+    wrapper, other_wrapper = Wrapper(), Wrapper()
+    assert not factory.proxies
+    assert wrapper.subarray_node is factory.proxies[0]
+    pool.invalidate(SUBARRAY_NODE)
+    assert wrapper.subarray_node is factory.proxies[1]
+    wrapper.subarray_node = "ska_low/tm_subarray_node/2"
+    assert wrapper.subarray_node.dev_name() == "ska_low/tm_subarray_node/2"
+    assert other_wrapper.subarray_node is factory.proxies[1]
+    device = FakeDeviceProxy("low-csp/subarray/01")
+    wrapper.subarray_node = device
+    assert wrapper.subarray_node is device
@@ -0,0 +1,107 @@
+"""Offline tests of the tracking of the simulator states changed by a
+test."""
+import pytest
+from tango import DeviceProxy
+
+from tests.resources.test_harness.dirty_tracker import (
+    COMMAND_CALL_INFO,
+    DEFECTS,
+    DELAY_INFO,
+    HEALTH_STATE,
+    TRANSITIONS,
+    DirtyTracker,
+)
+
+CSP_SUBARRAY = "low-csp/subarray/01"
+SDP_SUBARRAY = "low-sdp/subarray/01"
+
+
+class NamedDevice:
+    """Stands for a DeviceProxy, only its name being read"""
+
+    def __init__(self, device_name):
+        self.device_name = device_name
+
+    def dev_name(self):
+        """Return the device name"""
+        return self.device_name
+
+
+@pytest.fixture()
+def tracker():
+    """Installed DirtyTracker"""
+    dirty_tracker = DirtyTracker()
+    dirty_tracker.install()
+    yield dirty_tracker
+    dirty_tracker.uninstall()
+
+
+@pytest.mark.offline
+def test_setters_dirty_their_simulator_only(tracker):
+    """A setter dirties its state and the command call data of the
+    simulator it is invoked on"""
+    tracker.record(CSP_SUBARRAY, "SetDirectHealthState")
+    assert tracker.needs_reset(CSP_SUBARRAY, HEALTH_STATE)
+    assert tracker.needs_reset(CSP_SUBARRAY, COMMAND_CALL_INFO)
+    assert not tracker.needs_reset(CSP_SUBARRAY, DEFECTS)
+    assert not tracker.needs_reset(CSP_SUBARRAY, DELAY_INFO)
+    assert not tracker.needs_reset(SDP_SUBARRAY, HEALTH_STATE)
+    assert not tracker.needs_reset(SDP_SUBARRAY, TRANSITIONS)
+
+
+@pytest.mark.offline
+def test_tmc_commands_dirty_forwarded_data(tracker):
+    """TMC commands dirty the data TMC forwards to every simulator, not
+    healthState or defects"""
+    tracker.record(CSP_SUBARRAY, "ResetDelayInfo")
+    assert not tracker.needs_reset(CSP_SUBARRAY, COMMAND_CALL_INFO)
+    tracker.record("ska_low/tm_subarray_node/1", "AssignResources")
+    for state in (DELAY_INFO, COMMAND_CALL_INFO, TRANSITIONS):
+        assert tracker.needs_reset(SDP_SUBARRAY, state)
+    assert not tracker.needs_reset(SDP_SUBARRAY, HEALTH_STATE)
+    tracker.reset()
+    assert not tracker.needs_reset(SDP_SUBARRAY, DELAY_INFO)
+
+
+@pytest.mark.offline
+def test_commands_are_intercepted(tracker):
+    """Commands invoked through DeviceProxy are recorded"""
+    assert (
+        DeviceProxy.command_inout
+        is not tracker._original_methods["command_inout"]
+    )
+    calls = []
+    intercepted = tracker._intercept(
+        lambda proxy, command_name, *args: calls.append(command_name)
+    )
+    intercepted(NamedDevice(SDP_SUBARRAY), "SetDefective", "{}")
+    assert calls == ["SetDefective"]
+    assert tracker.needs_reset(NamedDevice(SDP_SUBARRAY), DEFECTS)
+
+
+@pytest.mark.offline
+def test_everything_is_reset_when_not_installed():
+    """Without tracking the tear downs read the device or reset it"""
+    original = DeviceProxy.command_inout
+    tracker = DirtyTracker()
+    tracker.install()
+    tracker.uninstall()
+    assert DeviceProxy.command_inout is original
+    assert tracker.needs_reset(CSP_SUBARRAY, DELAY_INFO)
+    assert not tracker.needs_reset(
+        CSP_SUBARRAY, HEALTH_STATE, lambda device: False
+    )
+
+
+@pytest.mark.offline
+def test_device_names_are_normalised(tracker):
+    """Commands recorded under any spelling of the device name are found by
+    is_dirty"""
+    tracker.record(NamedDevice(CSP_SUBARRAY.upper()), "SetDefective")
+    assert tracker.is_dirty(CSP_SUBARRAY, DEFECTS)
+    assert tracker.is_dirty(NamedDevice(CSP_SUBARRAY), DEFECTS)
+    tracker.record(SDP_SUBARRAY.upper(), "SetDelayInfo")
+    assert tracker.is_dirty(SDP_SUBARRAY, DELAY_INFO)
+    assert not tracker.tmc_command_invoked
+    tracker.record("SKA_LOW/TM_SUBARRAY_NODE/1", "Configure")
+    assert tracker.tmc_command_invoked
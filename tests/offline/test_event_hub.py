@@ -0,0 +1,178 @@
+"""Offline tests of the shared change event subscriptions of the
+ChangeEventHub, the devices being served by the ReplayBackend."""
+import functools
+import threading
+
+import pytest
+
+from tests.resources.test_harness.event_replay import (
+    ReplayBackend,
+    ReplayDeviceProxy,
+)
+from tests.resources.test_support.common_utils.device_proxy_pool import (
+    DEVICE_PROXY_POOL,
+)
+from tests.resources.test_support.common_utils.event_hub import (
+    CHANGE_EVENT_HUB,
+    ChangeEventHub,
+)
+
+SUBARRAY_NODE = "ska_low/tm_subarray_node/1"
+
+
+class BlockingDeviceProxy(ReplayDeviceProxy):
+    """Proxy whose unsubscribe_event waits for a Tango callback using the
+    hub from the event thread, as Tango does when it delivers a pending
+    event"""
+
+    callback_completed = False
+
+    def unsubscribe_event(self, event_id: int) -> None:
+        event_thread = threading.Thread(
+            target=CHANGE_EVENT_HUB.subscription_count
+        )
+        event_thread.start()
+        event_thread.join(timeout=2)
+        BlockingDeviceProxy.callback_completed = not event_thread.is_alive()
+        super().unsubscribe_event(event_id)
+
+
+@pytest.mark.offline
+def test_unsubscribe_releases_the_hub_lock():
+    """The Tango subscription is removed without holding the hub lock"""
+    backend = ReplayBackend()
+    with backend.install():
+        DEVICE_PROXY_POOL.set_proxy_factory(
+            lambda device_name: BlockingDeviceProxy(device_name, backend)
+        )
+        backend.push(SUBARRAY_NODE, "obsState", 0)
+        events = []
+        handles = [
+            CHANGE_EVENT_HUB.subscribe(
+                SUBARRAY_NODE, "obsState", events.append
+            )
+            for _ in range(2)
+        ]
+        CHANGE_EVENT_HUB.unsubscribe(handles[0])
+        assert CHANGE_EVENT_HUB.subscription_count() == 1
+        CHANGE_EVENT_HUB.unsubscribe(handles[1])
+        assert BlockingDeviceProxy.callback_completed
+        assert CHANGE_EVENT_HUB.subscription_count() == 0
+        with pytest.raises(KeyError):
+            CHANGE_EVENT_HUB.unsubscribe(handles[1])
+    assert len(events) == 2
+
+
+class SlowSubscribingDeviceProxy(ReplayDeviceProxy):
+    """Proxy whose subscribe_event lets another thread use the hub before
+    subscribing, as a concurrent subscription or event dispatch would"""
+
+    hub_usable = False
+    concurrent_action = None
+    join_timeout = 2.0
+
+    def subscribe_event(self, attribute_name, event_type, callback, *args):
+        other_thread = threading.Thread(
+            target=SlowSubscribingDeviceProxy.concurrent_action
+        )
+        other_thread.start()
+        other_thread.join(SlowSubscribingDeviceProxy.join_timeout)
+        SlowSubscribingDeviceProxy.hub_usable = not other_thread.is_alive()
+        return super().subscribe_event(
+            attribute_name, event_type, callback, *args
+        )
+
+
+@pytest.mark.offline
+def test_subscribe_releases_the_hub_lock():
+    """The Tango subscription is made without holding the hub lock"""
+    backend = ReplayBackend()
+    with backend.install():
+        DEVICE_PROXY_POOL.set_proxy_factory(
+            lambda device_name: SlowSubscribingDeviceProxy(
+                device_name, backend
+            )
+        )
+        backend.push(SUBARRAY_NODE, "obsState", 0)
+        backend.push(SUBARRAY_NODE, "healthState", 0)
+        SlowSubscribingDeviceProxy.concurrent_action = (
+            CHANGE_EVENT_HUB.subscription_count
+        )
+        SlowSubscribingDeviceProxy.join_timeout = 2.0
+        events = []
+        handle = CHANGE_EVENT_HUB.subscribe(
+            SUBARRAY_NODE, "obsState", events.append
+        )
+        assert SlowSubscribingDeviceProxy.hub_usable
+        assert len(events) == 1
+        CHANGE_EVENT_HUB.unsubscribe(handle)
+        assert CHANGE_EVENT_HUB.subscription_count() == 0
+
+
+@pytest.mark.offline
+def test_consumers_joining_a_pending_subscription():
+    """A consumer joining while the subscription is made waits for it and
+    gets the first event"""
+    backend = ReplayBackend()
+    with backend.install():
+        DEVICE_PROXY_POOL.set_proxy_factory(
+            lambda device_name: SlowSubscribingDeviceProxy(
+                device_name, backend
+            )
+        )
+        backend.push(SUBARRAY_NODE, "obsState", 0)
+        joined_events = []
+        joined_handles = []
+
+        def join():
+            joined_handles.append(
+                CHANGE_EVENT_HUB.subscribe(
+                    SUBARRAY_NODE, "obsState", joined_events.append
+                )
+            )
+
+        SlowSubscribingDeviceProxy.concurrent_action = join
+        SlowSubscribingDeviceProxy.join_timeout = 0.2
+        events = []
+        handle = CHANGE_EVENT_HUB.subscribe(
+            SUBARRAY_NODE, "obsState", events.append
+        )
+        # the joining thread waits for the subscription to be made
+        assert not SlowSubscribingDeviceProxy.hub_usable
+        for _ in range(100):
+            if joined_handles:
+                break
+            threading.Event().wait(0.01)
+        assert len(events) == 1
+        assert len(joined_events) == 1
+        assert CHANGE_EVENT_HUB.subscription_count() == 1
+        CHANGE_EVENT_HUB.unsubscribe(handle)
+        CHANGE_EVENT_HUB.unsubscribe(joined_handles[0])
+        assert CHANGE_EVENT_HUB.subscription_count() == 0
+
+
+@pytest.mark.offline
+def test_subscription_left_while_pending_is_removed():
+    """A subscription whose consumers all left while it was made is
+    removed once made"""
+    backend = ReplayBackend()
+    hub = ChangeEventHub()
+    with backend.install():
+        DEVICE_PROXY_POOL.set_proxy_factory(
+            lambda device_name: SlowSubscribingDeviceProxy(
+                device_name, backend
+            )
+        )
+        backend.push(SUBARRAY_NODE, "obsState", 0)
+        SlowSubscribingDeviceProxy.join_timeout = 2.0
+        # the first handle of a hub is 1
+        SlowSubscribingDeviceProxy.concurrent_action = functools.partial(
+            hub.unsubscribe, 1
+        )
+        events = []
+        assert hub.subscribe(SUBARRAY_NODE, "obsState", events.append) == 1
+        assert SlowSubscribingDeviceProxy.hub_usable
+        assert hub.subscription_count() == 0
+        backend.push(SUBARRAY_NODE, "obsState", 1)
+    # the consumer left before the first event
+    assert not events
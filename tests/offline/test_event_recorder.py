@@ -0,0 +1,146 @@
+"""Offline tests of the consuming semantics of the IndexedEventRecorder,
+the events being pushed by the ReplayBackend."""
+import json
+
+import pytest
+from ska_control_model import ObsState
+from ska_tango_testing.mock.placeholders import Anything
+
+from tests.resources.test_harness.event_recorder import (
+    EventStore,
+    IndexedEventRecorder,
+)
+from tests.resources.test_harness.event_replay import ReplayBackend
+from tests.resources.test_support.common_utils.result_code import ResultCode
+
+SUBARRAY_NODE = "ska_low/tm_subarray_node/1"
+
+
+@pytest.fixture()
+def replay_backend():
+    """ReplayBackend serving the pooled proxies, with an EMPTY subarray"""
+    backend = ReplayBackend()
+    with backend.install():
+        backend.push(SUBARRAY_NODE, "obsState", ObsState.EMPTY)
+        backend.push(SUBARRAY_NODE, "longRunningCommandResult", ("", ""))
+        yield backend
+
+
+@pytest.fixture()
+def event_recorder(replay_backend):
+    """IndexedEventRecorder subscribed to the subarray obsState and
+    longRunningCommandResult"""
+    recorder = IndexedEventRecorder()
+    device = replay_backend.proxy(SUBARRAY_NODE)
+    recorder.subscribe_event(device, "obsState", timeout=0.1)
+    recorder.subscribe_event(device, "longRunningCommandResult", timeout=0.1)
+    yield recorder
+    recorder.clear_events()
+
+
+def result(unique_id: str, result_code: ResultCode) -> tuple:
+    """longRunningCommandResult value of a command"""
+    return unique_id, json.dumps((int(result_code), ""))
+
+
+@pytest.mark.offline
+def test_out_of_order_waits_consume_only_the_matched_event(
+    replay_backend, event_recorder
+):
+    """Waiting for IDLE before RESOURCING finds both, each event matching
+    once"""
+    device = replay_backend.proxy(SUBARRAY_NODE)
+    for obs_state in (ObsState.RESOURCING, ObsState.IDLE):
+        replay_backend.push(SUBARRAY_NODE, "obsState", obs_state)
+    assert event_recorder.has_change_event_occurred(
+        device, "obsState", ObsState.IDLE
+    )
+    assert event_recorder.cursor(device, "obsState") == 0
+    assert event_recorder.has_change_event_occurred(
+        device, "obsState", ObsState.RESOURCING
+    )
+    assert not event_recorder.has_change_event_occurred(
+        device, "obsState", ObsState.IDLE
+    )
+    assert not event_recorder.has_change_event_occurred(
+        device, "obsState", ObsState.RESOURCING
+    )
+    assert event_recorder.has_change_event_occurred(
+        device, "obsState", ObsState.EMPTY
+    )
+    assert event_recorder.cursor(device, "obsState") == 3
+
+
+@pytest.mark.offline
+def test_streaming_and_lookahead_skip_consumed_events(
+    replay_backend, event_recorder
+):
+    """Anything streams the events not consumed in arrival order, lookahead
+    counts the events not consumed"""
+    device = replay_backend.proxy(SUBARRAY_NODE)
+    for obs_state in (
+        ObsState.RESOURCING,
+        ObsState.IDLE,
+        ObsState.CONFIGURING,
+        ObsState.READY,
+    ):
+        replay_backend.push(SUBARRAY_NODE, "obsState", obs_state)
+    assert event_recorder.has_change_event_occurred(
+        device, "obsState", ObsState.IDLE
+    )
+    assert event_recorder.has_change_event_occurred(
+        device, "obsState", ObsState.CONFIGURING, lookahead=3
+    )
+    assert not event_recorder.has_change_event_occurred(
+        device, "obsState", ObsState.READY, lookahead=2
+    )
+    streamed = [
+        event_recorder.has_change_event_occurred(
+            device, "obsState", Anything, lookahead=1
+        )["attribute_value"]
+        for _ in range(3)
+    ]
+    assert streamed == [ObsState.EMPTY, ObsState.RESOURCING, ObsState.READY]
+    assert not event_recorder.has_change_event_occurred(
+        device, "obsState", Anything, lookahead=1
+    )
+
+
+@pytest.mark.offline
+def test_command_results_are_consumed_once(replay_backend, event_recorder):
+    """Command results are found whatever the order of the waits, each one
+    once, within lookahead events not consumed"""
+    device = replay_backend.proxy(SUBARRAY_NODE)
+    for value in (
+        result("1_AssignResources", ResultCode.OK),
+        result("2_Configure", ResultCode.OK),
+        result("3_Configure", ResultCode.FAILED),
+    ):
+        replay_backend.push(SUBARRAY_NODE, "longRunningCommandResult", value)
+    assert event_recorder.wait_for_command_result(
+        device, command_name="Configure", result_code=ResultCode.FAILED
+    )
+    assert not event_recorder.wait_for_command_result(
+        device, command_name="Configure", lookahead=2
+    )
+    assert event_recorder.wait_for_command_result(
+        device, command_name="Configure", lookahead=3
+    )
+    assert not event_recorder.wait_for_command_result(
+        device, command_name="Configure"
+    )
+    assert event_recorder.wait_for_command_result(
+        device, unique_id="1_AssignResources"
+    )
+    # the value held when subscribing is the only event left
+    assert event_recorder.has_change_event_occurred(
+        device, "longRunningCommandResult", Anything, lookahead=1
+    )["attribute_value"] == ("", "")
+    assert event_recorder.cursor(device, "longRunningCommandResult") == 4
+
+
+@pytest.mark.offline
+def test_lookahead_stop_counts_positions_not_skipped():
+    """The lookahead window grows by the skipped positions it contains"""
+    assert EventStore.lookahead_stop(2, 3) == 5
+    assert EventStore.lookahead_stop(2, 3, {0, 3, 5, 9}) == 7
@@ -0,0 +1,175 @@
+"""Offline tests of the waits, event recorder and assertions of the test
+harness, fed by the ReplayBackend instead of a deployment."""
+import json
+import os
+
+import pytest
+from assertpy import assert_that
+from ska_control_model import ObsState
+
+from tests.resources.test_harness.event_journal import EventJournal
+from tests.resources.test_harness.event_recorder import IndexedEventRecorder
+from tests.resources.test_harness.event_replay import (
+    ReplayBackend,
+    ReplayStep,
+    steps_from_journal,
+)
+from tests.resources.test_harness.event_tracer import SharedEventTracer
+from tests.resources.test_harness.utils.common_utils import (
+    check_configure_successful,
+)
+from tests.resources.test_harness.utils.wait_helpers import Waiter
+from tests.resources.test_support.common_utils.event_hub import (
+    CHANGE_EVENT_HUB,
+)
+from tests.resources.test_support.common_utils.result_code import ResultCode
+
+SUBARRAY_NODE = "ska_low/tm_subarray_node/1"
+SDP_SUBARRAY = "low-sdp/subarray/01"
+COMMAND_COMPLETED = json.dumps((int(ResultCode.OK), "Command Completed"))
+
+
+class ReplayedSubarrayNode:
+    """Devices of the subarray node wrapper used by the checks"""
+
+    def __init__(self, backend: ReplayBackend):
+        self.subarray_node = backend.proxy(SUBARRAY_NODE)
+        self.subarray_devices = {"sdp_subarray": backend.proxy(SDP_SUBARRAY)}
+
+
+def configure_script(unique_id: str):
+    """Events of a successful Configure"""
+    return [
+        ReplayStep(0.05, SDP_SUBARRAY, "obsState", ObsState.CONFIGURING),
+        ReplayStep(0.05, SUBARRAY_NODE, "obsState", ObsState.CONFIGURING),
+        ReplayStep(0.05, SDP_SUBARRAY, "scanType", "target:a"),
+        ReplayStep(0.05, SDP_SUBARRAY, "obsState", ObsState.READY),
+        ReplayStep(0.05, SUBARRAY_NODE, "obsState", ObsState.READY),
+        ReplayStep(
+            0.05,
+            SUBARRAY_NODE,
+            "longRunningCommandResult",
+            (unique_id, COMMAND_COMPLETED),
+        ),
+    ]
+
+
+@pytest.fixture()
+def replay_backend():
+    """ReplayBackend serving the pooled proxies, with idle devices"""
+    backend = ReplayBackend()
+    with backend.install():
+        for device_name in (SUBARRAY_NODE, SDP_SUBARRAY):
+            backend.push(device_name, "obsState", ObsState.IDLE)
+        backend.push(SDP_SUBARRAY, "scanType", "")
+        backend.push(SUBARRAY_NODE, "longRunningCommandResult", ("", ""))
+        yield backend
+
+
+@pytest.mark.offline
+def test_waiter_waits_for_replayed_obs_state(replay_backend):
+    """Waiter completes on replayed obsState changes and times out when the
+    expected change is not replayed"""
+    replay_backend.start(configure_script("1_Configure"))
+    the_waiter = Waiter()
+    the_waiter.set_wait_for_specific_obsstate("READY", [SUBARRAY_NODE])
+    outcomes = the_waiter.wait(50)
+    assert outcomes[0].completed
+
+    the_waiter.set_wait_for_specific_obsstate("SCANNING", [SUBARRAY_NODE])
+    with pytest.raises(Exception, match="timed out"):
+        the_waiter.wait(3)
+
+
+@pytest.mark.offline
+def test_check_configure_successful_on_replayed_events(replay_backend):
+    """check_configure_successful passes on the events of a Configure"""
+    subarray_node = ReplayedSubarrayNode(replay_backend)
+    event_recorder = IndexedEventRecorder()
+    event_recorder.subscribe_event(subarray_node.subarray_node, "obsState")
+    event_recorder.subscribe_event(
+        subarray_node.subarray_node, "longRunningCommandResult"
+    )
+    event_recorder.subscribe_event(
+        subarray_node.subarray_devices["sdp_subarray"], "scanType"
+    )
+    replay_backend.start(configure_script("2_Configure"))
+    try:
+        check_configure_successful(
+            subarray_node, event_recorder, ["2_Configure"], "target:a", ""
+        )
+        # the completion was consumed by check_configure_successful
+        assert not event_recorder.wait_for_command_result(
+            subarray_node.subarray_node,
+            command_name="Configure",
+            result_code=ResultCode.OK,
+            since=0,
+            timeout=0,
+        )
+    finally:
+        event_recorder.clear_events()
+    assert CHANGE_EVENT_HUB.subscription_count() == 0
+
+
+@pytest.mark.offline
+def test_lrcr_assertion_on_replayed_events(replay_backend):
+    """The LRCR assertion of the tracer finds a replayed failure"""
+    tracer = SharedEventTracer()
+    tracer.subscribe_event(SUBARRAY_NODE, "longRunningCommandResult")
+    replay_backend.start(
+        [
+            ReplayStep(
+                0.05,
+                SUBARRAY_NODE,
+                "longRunningCommandResult",
+                ("3_Configure", json.dumps([3, "Timeout has occurred"])),
+            )
+        ]
+    )
+    try:
+        assert_that(tracer).within_timeout(
+            2
+        ).has_desired_result_code_message_in_lrcr_event(
+            SUBARRAY_NODE, ["Timeout"], "3_Configure", ResultCode.FAILED
+        )
+    finally:
+        tracer.unsubscribe_all()
+        tracer.clear_events()
+
+
+@pytest.mark.offline
+def test_replay_of_journaled_events(replay_backend, tmp_path):
+    """Events journaled during a run are replayed in order"""
+    journal_file = os.path.join(tmp_path, "run.msgpack")
+    journal = EventJournal(journal_file)
+    tap_handle = CHANGE_EVENT_HUB.add_tap(journal.tap)
+    event_recorder = IndexedEventRecorder()
+    event_recorder.subscribe_event(
+        replay_backend.proxy(SUBARRAY_NODE), "obsState"
+    )
+    replay_backend.play(configure_script("4_Configure"))
+    CHANGE_EVENT_HUB.remove_tap(tap_handle)
+    journal.close()
+    event_recorder.clear_events()
+
+    replayed = ReplayBackend()
+    with replayed.install():
+        event_recorder = IndexedEventRecorder()
+        event_recorder.subscribe_event(
+            replayed.proxy(SUBARRAY_NODE), "obsState"
+        )
+        replayed.play(steps_from_journal(journal_file))
+        try:
+            for obs_state in (
+                ObsState.IDLE,
+                ObsState.CONFIGURING,
+                ObsState.READY,
+            ):
+                assert event_recorder.has_change_event_occurred(
+                    replayed.proxy(SUBARRAY_NODE),
+                    "obsState",
+                    obs_state,
+                    timeout=0,
+                )
+        finally:
+            event_recorder.clear_events()
@@ -0,0 +1,87 @@
+"""Offline tests of the bounded mode of the SharedEventTracer, the events
+being pushed by the ReplayBackend."""
+import time
+
+import pytest
+from ska_control_model import ObsState
+
+from tests.resources.test_harness.event_replay import ReplayBackend
+from tests.resources.test_harness.event_tracer import SharedEventTracer
+
+SUBARRAY_NODE = "ska_low/tm_subarray_node/1"
+SDP_SUBARRAY = "low-sdp/subarray/01"
+OBS_STATE_KEY = (SUBARRAY_NODE, "obsstate")
+
+
+@pytest.fixture()
+def replay_backend():
+    """ReplayBackend serving the pooled proxies, with EMPTY subarrays"""
+    backend = ReplayBackend()
+    with backend.install():
+        for device_name in (SUBARRAY_NODE, SDP_SUBARRAY):
+            backend.push(device_name, "obsState", ObsState.EMPTY)
+        yield backend
+
+
+def traced_tracer(**bounds) -> SharedEventTracer:
+    """SharedEventTracer of the obsState of the subarrays"""
+    tracer = SharedEventTracer(**bounds)
+    for device_name in (SUBARRAY_NODE, SDP_SUBARRAY):
+        tracer.subscribe_event(device_name, "obsState")
+    return tracer
+
+
+@pytest.mark.offline
+def test_max_events_is_per_attribute(replay_backend):
+    """Only the last max_events events of each attribute are kept"""
+    tracer = traced_tracer(max_events=2)
+    try:
+        for obs_state in (ObsState.RESOURCING, ObsState.IDLE):
+            replay_backend.push(SUBARRAY_NODE, "obsState", obs_state)
+        values = [
+            (event.device_name, event.attribute_value)
+            for event in tracer.events
+        ]
+        assert values == [
+            (SDP_SUBARRAY, ObsState.EMPTY),
+            (SUBARRAY_NODE, ObsState.RESOURCING),
+            (SUBARRAY_NODE, ObsState.IDLE),
+        ]
+        assert tracer.dropped_events == {OBS_STATE_KEY: 1}
+    finally:
+        tracer.unsubscribe_all()
+        tracer.clear_events()
+
+
+@pytest.mark.offline
+def test_max_age_evicts_on_read(replay_backend):
+    """Events older than max_age are evicted when read or queried, without
+    waiting for another event of the attribute"""
+    tracer = traced_tracer(max_age=0.2)
+    try:
+        replay_backend.push(SUBARRAY_NODE, "obsState", ObsState.IDLE)
+        assert len(tracer.events) == 3
+        time.sleep(0.3)
+        assert not tracer.query_events(lambda event: True, timeout=0)
+        assert not tracer.events
+        assert tracer.dropped_events == {
+            OBS_STATE_KEY: 2,
+            (SDP_SUBARRAY, "obsstate"): 1,
+        }
+    finally:
+        tracer.unsubscribe_all()
+        tracer.clear_events()
+
+
+@pytest.mark.offline
+def test_unbounded_tracer_keeps_all_events(replay_backend):
+    """Without bounds no event is evicted"""
+    tracer = traced_tracer(max_events=None, max_age=None)
+    try:
+        for obs_state in (ObsState.RESOURCING, ObsState.IDLE):
+            replay_backend.push(SUBARRAY_NODE, "obsState", obs_state)
+        assert len(tracer.events) == 4
+        assert not tracer.dropped_events
+    finally:
+        tracer.unsubscribe_all()
+        tracer.clear_events()
@@ -0,0 +1,50 @@
+"""Offline tests of the lazy proxies of the node wrappers, the devices being
+served by the ReplayBackend."""
+import pytest
+
+from tests.resources.test_harness.central_node_low import CentralNodeWrapperLow
+from tests.resources.test_harness.event_replay import ReplayBackend
+from tests.resources.test_harness.tmc_low import TMCLow
+from tests.resources.test_support.common_utils.device_proxy_pool import (
+    DEVICE_PROXY_POOL,
+)
+
+
+@pytest.fixture()
+def created_proxies():
+    """Names of the devices whose proxy is created by the pool"""
+    backend = ReplayBackend()
+    created = []
+
+    def proxy_factory(device_name):
+        created.append(device_name)
+        return backend.proxy(device_name)
+
+    with backend.install():
+        DEVICE_PROXY_POOL.set_proxy_factory(proxy_factory)
+        yield created
+
+
+@pytest.mark.offline
+def test_proxies_are_created_on_first_use(created_proxies):
+    """Building the wrappers creates no proxy, wrappers share the pooled
+    proxy of a device"""
+    tmc = TMCLow()
+    assert not created_proxies
+    assert tmc.central_node.central_node is tmc.subarray_node.central_node
+    assert created_proxies == ["ska_low/tm_central/central_node"]
+
+
+@pytest.mark.offline
+def test_subarray_id_overrides_devices_per_wrapper(created_proxies):
+    """Switching subarray changes the devices of one wrapper only"""
+    central_node = CentralNodeWrapperLow()
+    central_node.set_subarray_id(2)
+    assert (
+        central_node.csp_subarray_leaf_node.dev_name()
+        == "ska_low/tm_leaf_node/csp_subarray02"
+    )
+    assert (
+        CentralNodeWrapperLow().csp_subarray_leaf_node.dev_name()
+        == "ska_low/tm_leaf_node/csp_subarray01"
+    )
@@ -0,0 +1,89 @@
+"""Offline tests of the LrcrIndex lookups of longRunningCommandResult
+values."""
+import json
+
+import pytest
+
+from tests.resources.test_harness.lrcr_index import LrcrIndex, parse_lrcr_value
+from tests.resources.test_support.common_utils.result_code import ResultCode
+
+
+def result(unique_id: str, result_code: ResultCode, message="") -> tuple:
+    """longRunningCommandResult value of a command"""
+    return unique_id, json.dumps((int(result_code), message))
+
+
+@pytest.mark.offline
+def test_parse_lrcr_value():
+    """Result codes are decoded, values without unique id are skipped"""
+    assert parse_lrcr_value(("", "")) is None
+    assert parse_lrcr_value(None) is None
+    assert parse_lrcr_value(result("1_End", ResultCode.OK, "done")) == (
+        "1_End",
+        ResultCode.OK,
+        "done",
+    )
+    assert parse_lrcr_value(("1_End", "3")) == ("1_End", 3, "")
+    assert parse_lrcr_value(("1_End", "not json")) == (
+        "1_End",
+        None,
+        "not json",
+    )
+
+
+@pytest.mark.offline
+def test_command_name_matches_as_endswith():
+    """Command names are matched as unique_id.endswith(command_name), not
+    only on underscore boundaries"""
+    index = LrcrIndex()
+    index.add(("", ""))
+    index.add(result("1_AssignResources", ResultCode.OK))
+    index.add(result("2_ReleaseAllResources", ResultCode.OK))
+    assert index.unique_ids("Resources") == [
+        "1_AssignResources",
+        "2_ReleaseAllResources",
+    ]
+    assert index.unique_ids("AllResources") == ["2_ReleaseAllResources"]
+    # ids received after the first lookup are matched as well
+    index.add(result("3_AssignResources", ResultCode.FAILED))
+    assert index.unique_ids("Resources") == [
+        "1_AssignResources",
+        "2_ReleaseAllResources",
+        "3_AssignResources",
+    ]
+    assert index.unique_ids("Configure") == []
+
+
+@pytest.mark.offline
+def test_find_first_matching_record():
+    """find returns the earliest record matching the result code and
+    messages, at or after since and not excluded"""
+    index = LrcrIndex()
+    index.add(result("1_Configure", ResultCode.STARTED, "started"))
+    index.add(result("2_Configure", ResultCode.FAILED, "bad scan id"))
+    index.add(result("1_Configure", ResultCode.OK, "done"))
+    assert index.find(command_name="Configure").position == 0
+    assert (
+        index.find(
+            command_name="Configure", result_code=ResultCode.OK
+        ).unique_id
+        == "1_Configure"
+    )
+    assert (
+        index.find(command_name="Configure", messages=["scan id"]).position
+        == 1
+    )
+    assert index.find(command_name="Configure", since=1).position == 1
+    assert index.find(command_name="Configure", exclude={0, 1}).position == 2
+    assert index.find(unique_id="1_Configure", since=3) is None
+    with pytest.raises(ValueError):
+        index.find()
+
+
+@pytest.mark.offline
+def test_wait_for_times_out():
+    """wait_for returns None once the timeout elapsed"""
+    index = LrcrIndex()
+    assert index.wait_for(command_name="End", timeout=0.05) is None
+    index.add(result("1_End", ResultCode.OK))
+    assert index.wait_for(command_name="End", timeout=0.05).position == 0
@@ -0,0 +1,132 @@
+"""Offline tests of the obsState planner used by the ObsStateResetter and
+the tear downs."""
+from types import SimpleNamespace
+
+import pytest
+from ska_control_model import ObsState
+
+from tests.resources.test_harness.event_replay import ReplayBackend
+from tests.resources.test_harness.utils.obs_state_planner import (
+    ObsStatePlanner,
+    ObsStateTransition,
+    plan_obs_state_change,
+)
+from tests.resources.test_harness.utils.obs_state_resetter_low import (
+    EmptyObsStateResetter,
+)
+
+SUBARRAY_NODE = "ska_low/tm_subarray_node/1"
+CSP_SUBARRAY = "low-csp/subarray/01"
+
+
+def commands(plan):
+    """Commands of a plan"""
+    return [transition.command for transition in plan]
+
+
+@pytest.mark.offline
+@pytest.mark.parametrize(
+    "source, destination, expected_commands",
+    [
+        ("READY", "IDLE", ["End"]),
+        ("READY", "EMPTY", ["End", "ReleaseAllResources"]),
+        ("SCANNING", "IDLE", ["EndScan", "End"]),
+        ("IDLE", "READY", ["Configure"]),
+        ("EMPTY", "SCANNING", ["AssignResources", "Configure", "Scan"]),
+        ("RESOURCING", "EMPTY", ["Abort", "Restart"]),
+        ("ABORTING", "IDLE", [None, "Restart", "AssignResources"]),
+        ("FAULT", "EMPTY", ["Restart"]),
+        ("RESTARTING", "EMPTY", [None]),
+        ("RESTARTING", "IDLE", [None, "AssignResources"]),
+        ("RESETTING", "IDLE", [None]),
+        ("RESETTING", "EMPTY", [None, "ReleaseAllResources"]),
+        ("IDLE", "IDLE", []),
+        ("IDLE", "CONFIGURING", ["Configure"]),
+        ("IDLE", "ABORTED", ["Abort"]),
+    ],
+)
+def test_plan_is_cheapest_command_sequence(
+    source, destination, expected_commands
+):
+    """The planner picks the cheapest commands between two obsStates"""
+    plan = ObsStatePlanner().plan(source, destination)
+    assert commands(plan) == expected_commands
+    if plan:
+        assert plan[-1].destination == destination
+    assert all(
+        transition.wait_for_completion for transition in plan[:-1]
+    ), "only the last transition may end in a transient obsState"
+
+
+@pytest.mark.offline
+def test_plan_invokes_required_commands():
+    """Commands given an input are invoked even if the subarray already is
+    in the destination obsState"""
+    planner = ObsStatePlanner()
+    assert commands(planner.plan("READY", "READY", ["Configure"])) == [
+        "Configure"
+    ]
+    assert commands(planner.plan("READY", "IDLE", ["AssignResources"])) == [
+        "End",
+        "ReleaseAllResources",
+        "AssignResources",
+    ]
+
+
+@pytest.mark.offline
+def test_plan_recovers_inconsistent_subarray():
+    """A subarray whose devices disagree is aborted and restarted"""
+    planner = ObsStatePlanner()
+    assert commands(planner.plan("READY", "IDLE", consistent=False)) == [
+        "Abort",
+        "Restart",
+        "AssignResources",
+    ]
+    # nothing to recover with from EMPTY
+    assert commands(planner.plan("EMPTY", "EMPTY", consistent=False)) == []
+
+
+@pytest.mark.offline
+def test_plan_uses_latency_weights():
+    """Edge weights decide between the candidate sequences"""
+    planner = ObsStatePlanner(latencies={"End": 100.0})
+    assert commands(planner.plan("READY", "EMPTY")) == ["Abort", "Restart"]
+
+
+@pytest.mark.offline
+def test_plan_from_device_obs_states():
+    """The plan starts from the obsState read from the devices"""
+    backend = ReplayBackend()
+    with backend.install():
+        backend.push(SUBARRAY_NODE, "obsState", ObsState.READY)
+        backend.push(CSP_SUBARRAY, "obsState", ObsState.READY)
+        assert commands(
+            plan_obs_state_change(SUBARRAY_NODE, "EMPTY", [CSP_SUBARRAY])
+        ) == ["End", "ReleaseAllResources"]
+
+        backend.push(CSP_SUBARRAY, "obsState", ObsState.FAULT)
+        assert commands(
+            plan_obs_state_change(SUBARRAY_NODE, "EMPTY", [CSP_SUBARRAY])
+        ) == ["Abort", "Restart"]
+
+
+@pytest.mark.offline
+@pytest.mark.parametrize(
+    "source, destination", [("RESTARTING", "EMPTY"), ("RESETTING", "IDLE")]
+)
+def test_plan_waits_for_ongoing_restart_and_reset(source, destination):
+    """A subarray restarting or resetting has its command waited for, even
+    when its devices disagree meanwhile"""
+    plan = ObsStatePlanner().plan(source, "EMPTY", consistent=False)
+    assert plan[0].command is None
+    assert plan[0].destination == destination
+    assert plan[0].wait_for_completion
+
+
+@pytest.mark.offline
+def test_resetter_rejects_unexpected_command():
+    """A transition the resetter cannot execute is not silently skipped"""
+    device = SimpleNamespace()
+    resetter = EmptyObsStateResetter("EMPTY", device)
+    with pytest.raises(ValueError, match="Unexpected"):
+        resetter.execute(ObsStateTransition("IDLE", "ObsReset", "IDLE", 1.0))
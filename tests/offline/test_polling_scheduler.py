@@ -0,0 +1,114 @@
+"""Offline tests of the batched polling of the PollingScheduler, the devices
+being served by the ReplayBackend."""
+import time
+
+import pytest
+from tango import DevFailed, Except
+
+from tests.resources.test_harness.event_replay import (
+    ReplayBackend,
+    ReplayDeviceProxy,
+    ReplayStep,
+)
+from tests.resources.test_support.common_utils.device_proxy_pool import (
+    DEVICE_PROXY_POOL,
+)
+from tests.resources.test_support.common_utils.polling_scheduler import (
+    ClientSidePoller,
+    PolledEvent,
+    PollingScheduler,
+)
+
+SUBARRAY_NODE = "ska_low/tm_subarray_node/1"
+
+
+class Monitor:
+    """Attribute watched by a Monitor"""
+
+    def __init__(self, device_name: str, attr: str):
+        self.device_name = device_name
+        self.attr = attr
+
+
+class FailingDeviceProxy(ReplayDeviceProxy):
+    """Proxy whose asynchronous read replies fail with given reason"""
+
+    def __init__(self, device_name: str, backend: ReplayBackend, reason):
+        super().__init__(device_name, backend)
+        self.reason = reason
+
+    def read_attributes_reply(self, request_id: int, timeout: int = 0):
+        Except.throw_exception(
+            self.reason,
+            f"Reply of {self.dev_name()} failed",
+            "FailingDeviceProxy.read_attributes_reply",
+        )
+
+
+@pytest.mark.offline
+@pytest.mark.parametrize(
+    ("reason", "recovered"),
+    [("API_DeviceNotExported", True), ("API_DeviceTimedOut", False)],
+)
+def test_sample_retries_restarted_devices(reason, recovered):
+    """A device restart is recovered with a fresh proxy within the sample,
+    other failures are recorded for every attribute of the device"""
+    backend = ReplayBackend()
+    proxies = []
+
+    def proxy_factory(device_name):
+        if proxies:
+            proxies.append(ReplayDeviceProxy(device_name, backend))
+        else:
+            proxies.append(FailingDeviceProxy(device_name, backend, reason))
+        return proxies[-1]
+
+    with backend.install():
+        backend.push(SUBARRAY_NODE, "obsState", 2)
+        backend.push(SUBARRAY_NODE, "healthState", 0)
+        DEVICE_PROXY_POOL.set_proxy_factory(proxy_factory)
+        samples = PollingScheduler().sample(
+            [
+                Monitor(SUBARRAY_NODE, "obsState"),
+                Monitor(SUBARRAY_NODE, "healthState"),
+            ]
+        )
+    if recovered:
+        assert len(proxies) == 2
+        assert samples[(SUBARRAY_NODE, "obsstate")].value == 2
+        assert samples[(SUBARRAY_NODE, "healthstate")].value == 0
+    else:
+        assert len(proxies) == 1
+        assert all(
+            isinstance(sample, DevFailed) for sample in samples.values()
+        )
+
+
+@pytest.mark.offline
+def test_client_side_poller_emits_polled_events():
+    """The poller pushes the current value, then a PolledEvent per change,
+    and its thread ends with the last watch"""
+    backend = ReplayBackend()
+    events = []
+    poller = ClientSidePoller(period=0.02)
+    with backend.install():
+        backend.push(SUBARRAY_NODE, "obsState", 0)
+        handle = poller.watch(SUBARRAY_NODE, "obsState", events.append)
+        assert [event.attr_value.value for event in events] == [0]
+        backend.play(
+            [
+                ReplayStep(0.1, SUBARRAY_NODE, "obsState", 1),
+                ReplayStep(0.1, SUBARRAY_NODE, "obsState", 2),
+            ],
+            time_scale=1.0,
+        )
+        time.sleep(0.1)
+        poller.unwatch(handle)
+        time.sleep(0.1)
+        assert poller._thread is None
+        backend.push(SUBARRAY_NODE, "obsState", 3)
+        time.sleep(0.1)
+    assert all(isinstance(event, PolledEvent) for event in events)
+    assert not any(event.err for event in events)
+    assert [event.attr_value.value for event in events] == [0, 1, 2]
+    assert events[0].attr_name == f"{SUBARRAY_NODE}/obsState"
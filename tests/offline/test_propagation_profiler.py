@@ -0,0 +1,129 @@
+"""Offline tests of the obsState propagation timeline, the devices being
+served by the ReplayBackend."""
+import json
+
+import pytest
+from ska_control_model import ObsState
+
+from tests.resources.test_harness.event_replay import ReplayBackend, ReplayStep
+from tests.resources.test_harness.propagation_profiler import (
+    PropagationProfiler,
+    PropagationTimeline,
+    TimelineEvent,
+)
+
+DEVICE_DICT = {
+    "tmc_subarraynode": "ska_low/tm_subarray_node/1",
+    "csp_subarray_leaf_node": "ska_low/tm_leaf_node/csp_subarray01",
+    "sdp_subarray_leaf_node": "ska_low/tm_leaf_node/sdp_subarray01",
+    "csp_subarray": "low-csp/subarray/01",
+    "sdp_subarray": "low-sdp/subarray/01",
+}
+
+
+def timeline_event(timestamp, device_key, attribute_name, value):
+    """Event received timestamp seconds after the invocation"""
+    return TimelineEvent(100.0 + timestamp, device_key, attribute_name, value)
+
+
+@pytest.mark.offline
+def test_hops_and_critical_path():
+    """The chain whose leaf node reports last is the critical path, each
+    hop ending with the first matching event"""
+    timeline = PropagationTimeline(
+        "Configure",
+        "READY",
+        100.0,
+        [
+            timeline_event(
+                0.05, "csp_subarray_leaf_node", "longRunningCommandResult", 1
+            ),
+            timeline_event(
+                0.15, "sdp_subarray_leaf_node", "longRunningCommandResult", 1
+            ),
+            timeline_event(0.1, "csp_subarray", "obsState", 2),
+            timeline_event(0.2, "sdp_subarray", "obsState", 2),
+            timeline_event(0.5, "csp_subarray", "obsState", 4),
+            timeline_event(
+                0.6, "csp_subarray_leaf_node", "cspSubarrayObsState", 4
+            ),
+            timeline_event(1.2, "sdp_subarray", "obsState", 4),
+            timeline_event(
+                1.4, "sdp_subarray_leaf_node", "sdpSubarrayObsState", 4
+            ),
+            timeline_event(2.0, "tmc_subarraynode", "obsState", 4),
+            timeline_event(
+                2.1, "tmc_subarraynode", "longRunningCommandResult", "done"
+            ),
+        ],
+    )
+    hops = timeline.hops()
+    assert set(hops) == {"csp", "sdp"}
+    assert hops["sdp"] == pytest.approx(
+        {
+            "TMC->leaf node": 0.15,
+            "dispatch": 0.05,
+            "subsystem": 1.0,
+            "leaf node": 0.2,
+            "aggregation": 0.6,
+            "result": 0.1,
+        }
+    )
+    assert hops["csp"]["TMC->leaf node"] == pytest.approx(0.05)
+    assert hops["csp"]["dispatch"] == pytest.approx(0.05)
+    assert hops["csp"]["aggregation"] == pytest.approx(1.4)
+    assert timeline.critical_path() == "sdp"
+    assert json.loads(json.dumps(timeline.as_dict()))["critical_path"] == (
+        "sdp"
+    )
+    assert "* sdp" in timeline.render()
+
+
+@pytest.mark.offline
+def test_profiler_records_events_since_invocation():
+    """Events are timestamped from the subscription on, the values held
+    when subscribing being ignored"""
+    backend = ReplayBackend()
+    with backend.install():
+        for key in ("tmc_subarraynode", "csp_subarray"):
+            backend.push(DEVICE_DICT[key], "obsState", ObsState.IDLE)
+        backend.push(
+            DEVICE_DICT["csp_subarray_leaf_node"],
+            "cspSubarrayObsState",
+            ObsState.IDLE,
+        )
+        with PropagationProfiler(DEVICE_DICT, "End", "IDLE") as profiler:
+            backend.play(
+                [
+                    ReplayStep(
+                        0,
+                        DEVICE_DICT["csp_subarray_leaf_node"],
+                        "longRunningCommandResult",
+                        ("1_End", "1"),
+                    ),
+                    ReplayStep(0, DEVICE_DICT["csp_subarray"], "obsState", 0),
+                    ReplayStep(
+                        0,
+                        DEVICE_DICT["csp_subarray"],
+                        "obsState",
+                        ObsState.IDLE,
+                    ),
+                    ReplayStep(
+                        0,
+                        DEVICE_DICT["csp_subarray_leaf_node"],
+                        "cspSubarrayObsState",
+                        ObsState.IDLE,
+                    ),
+                    ReplayStep(
+                        0,
+                        DEVICE_DICT["tmc_subarraynode"],
+                        "obsState",
+                        ObsState.IDLE,
+                    ),
+                ]
+            )
+    timeline = profiler.timeline()
+    assert len(timeline.events) == 5
+    assert timeline.critical_path() == "csp"
+    assert timeline.hops()["csp"]["TMC->leaf node"] is not None
+    assert timeline.hops()["csp"]["result"] is None
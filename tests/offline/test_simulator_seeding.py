@@ -0,0 +1,159 @@
+"""Offline tests of the seeding of simulator states, the helper devices
+being served by the ReplayBackend."""
+import pytest
+from ska_control_model import ObsState
+from tango import DevState
+
+from tests.resources.test_harness import simulator_seeding
+from tests.resources.test_harness.event_replay import ReplayBackend, ReplayStep
+from tests.resources.test_harness.simulator_seeding import (
+    seed_subarray_obs_state,
+)
+from tests.resources.test_harness.utils.common_utils import JsonFactory
+
+SUBARRAY_NODE = "ska_low/tm_subarray_node/1"
+SUBSYSTEM_SUBARRAYS = {
+    "csp_subarray": "low-csp/subarray/01",
+    "sdp_subarray": "low-sdp/subarray/01",
+    "mccs_subarray": "low-mccs/subarray/01",
+}
+
+
+@pytest.fixture()
+def replay_backend(monkeypatch):
+    """ReplayBackend with an empty subarray, seeding enabled"""
+    monkeypatch.setattr(simulator_seeding, "SEED_SIMULATOR_STATES", True)
+    monkeypatch.setitem(
+        simulator_seeding.SIMULATED_DEVICES_DICT, "all_mocks", True
+    )
+    backend = ReplayBackend()
+    with backend.install():
+        backend.push(SUBARRAY_NODE, "State", DevState.ON)
+        for device_name in [SUBARRAY_NODE, *SUBSYSTEM_SUBARRAYS.values()]:
+            backend.push(device_name, "obsState", ObsState.EMPTY)
+        yield backend
+
+
+def obs_states(backend):
+    """obsState of the subsystem subarrays"""
+    return [
+        backend.read(device_name, "obsState").value
+        for device_name in SUBSYSTEM_SUBARRAYS.values()
+    ]
+
+
+@pytest.mark.offline
+def test_seed_subarray_in_idle(replay_backend):
+    """Simulators are seeded with resources then obsState, SubarrayNode
+    following them"""
+    replay_backend.start(
+        [ReplayStep(0.2, SUBARRAY_NODE, "obsState", ObsState.IDLE)]
+    )
+    assert seed_subarray_obs_state(
+        SUBARRAY_NODE,
+        SUBSYSTEM_SUBARRAYS,
+        "IDLE",
+        JsonFactory().create_assign_resources_configuration(
+            "assign_resources_low"
+        ),
+    )
+    assert obs_states(replay_backend) == [ObsState.IDLE] * 3
+    commands = [command for _, command, _ in replay_backend.commands]
+    assert commands[:2] == [
+        "SetDirectreceiveAddresses",
+        "SetDirectassignedResources",
+    ]
+    assert commands[2:] == ["SetDirectObsState"] * 3
+
+
+@pytest.mark.offline
+def test_seed_is_undone_when_subarray_node_does_not_follow(replay_backend):
+    """Simulators are seeded back when SubarrayNode keeps its obsState"""
+    assert not seed_subarray_obs_state(
+        SUBARRAY_NODE, SUBSYSTEM_SUBARRAYS, "READY", timeout=0.2
+    )
+    assert obs_states(replay_backend) == [ObsState.EMPTY] * 3
+
+
+@pytest.mark.offline
+def test_no_seeding_when_disabled_or_inconsistent(replay_backend, monkeypatch):
+    """Commands have to be invoked when seeding is disabled or the
+    subsystems disagree with SubarrayNode"""
+    replay_backend.push(
+        SUBSYSTEM_SUBARRAYS["csp_subarray"], "obsState", ObsState.FAULT
+    )
+    assert not seed_subarray_obs_state(
+        SUBARRAY_NODE, SUBSYSTEM_SUBARRAYS, "IDLE"
+    )
+    monkeypatch.setattr(simulator_seeding, "SEED_SIMULATOR_STATES", False)
+    assert not seed_subarray_obs_state(
+        SUBARRAY_NODE, SUBSYSTEM_SUBARRAYS, "IDLE"
+    )
+    assert not replay_backend.commands
+
+
+def assign_input():
+    """Default AssignResources input"""
+    return JsonFactory().create_assign_resources_configuration(
+        "assign_resources_low"
+    )
+
+
+@pytest.mark.offline
+def test_seed_resources_again_in_same_obs_state(replay_backend):
+    """A subarray already IDLE is seeded the resources of a given
+    AssignResources input, only when reassigned"""
+    for device_name in [SUBARRAY_NODE, *SUBSYSTEM_SUBARRAYS.values()]:
+        replay_backend.push(device_name, "obsState", ObsState.IDLE)
+    assert seed_subarray_obs_state(
+        SUBARRAY_NODE, SUBSYSTEM_SUBARRAYS, "IDLE", assign_input()
+    )
+    assert not replay_backend.commands
+    assert seed_subarray_obs_state(
+        SUBARRAY_NODE,
+        SUBSYSTEM_SUBARRAYS,
+        "IDLE",
+        assign_input(),
+        reassign=True,
+    )
+    commands = [command for _, command, _ in replay_backend.commands]
+    assert commands[:2] == [
+        "SetDirectreceiveAddresses",
+        "SetDirectassignedResources",
+    ]
+    assert obs_states(replay_backend) == [ObsState.IDLE] * 3
+
+
+@pytest.mark.offline
+def test_undo_restores_seeded_resources(replay_backend):
+    """Undoing a seed restores the resources along with the obsState"""
+    replay_backend.push(
+        SUBSYSTEM_SUBARRAYS["sdp_subarray"], "receiveAddresses", "{}"
+    )
+    replay_backend.push(
+        SUBSYSTEM_SUBARRAYS["mccs_subarray"], "assignedResources", "{}"
+    )
+    assert not seed_subarray_obs_state(
+        SUBARRAY_NODE,
+        SUBSYSTEM_SUBARRAYS,
+        "IDLE",
+        assign_input(),
+        timeout=0.2,
+    )
+    assert obs_states(replay_backend) == [ObsState.EMPTY] * 3
+    for device_key, attribute_name in simulator_seeding.SEEDED_RESOURCES:
+        assert (
+            replay_backend.read(
+                SUBSYSTEM_SUBARRAYS[device_key], attribute_name
+            ).value
+            == "{}"
+        )
+    restored = [
+        command
+        for _, command, argin in replay_backend.commands
+        if argin == "{}"
+    ]
+    assert restored == [
+        "SetDirectreceiveAddresses",
+        "SetDirectassignedResources",
+    ]
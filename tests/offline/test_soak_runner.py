@@ -0,0 +1,129 @@
+"""Offline tests of the soak runner trends and resource sampling."""
+import json
+
+import pytest
+
+from tests.resources.test_harness.command_benchmark import LRCR_SOURCE
+from tests.resources.test_harness.event_replay import ReplayBackend
+from tests.resources.test_harness.soak_runner import (
+    ResourceSampler,
+    SoakRunner,
+    SoakSample,
+    trend,
+)
+from tests.resources.test_support.common_utils.event_hub import (
+    CHANGE_EVENT_HUB,
+)
+
+SUBARRAY_NODE = "ska_low/tm_subarray_node/1"
+
+
+class MeasuredCommands:
+    """Stands for the CommandLatencyBenchmark, recording the commands
+    measured"""
+
+    def __init__(self):
+        self.commands = []
+
+    def measure(self, command_name, obs_state, invoke, record=True):
+        """Record the command and its input"""
+        self.commands.append((command_name, invoke()))
+
+
+class CommandProxy:
+    """Returns the name and argument of the commands invoked"""
+
+    def __getattr__(self, command_name):
+        return lambda *args: (command_name, *args)
+
+
+@pytest.mark.offline
+def test_trends_fail_on_latency_and_memory_growth():
+    """A latency doubling over the run or a fast growing resident set size
+    fail the run, stable ones do not"""
+    assert trend([0, 1], [1.0, 2.0]) is None
+    fitted = trend(list(range(5)), [1.0, 1.25, 1.5, 1.75, 2.0])
+    assert fitted == pytest.approx({"slope": 0.25, "start": 1.0, "end": 2.0})
+    runner = SoakRunner(None, None, latency_growth_limit=0.5)
+    for latency in (1.0, 1.25, 1.5, 1.75, 2.0):
+        runner.benchmark.latencies.add("Configure", LRCR_SOURCE, latency)
+        runner.benchmark.latencies.add("End", LRCR_SOURCE, 1.0)
+    runner.sampler = ResourceSampler()
+    runner.sampler.close()
+    runner.sampler.samples = [
+        SoakSample(hour * 3600, hour, (100 + 200 * hour) * 2**20, 4, 1.0)
+        for hour in range(5)
+    ]
+    failures = runner.failures()
+    assert len(failures) == 2
+    assert failures[0].startswith("Configure latency grows by 100%")
+    assert failures[1].startswith("Resident set size grows by 200.0 MB/h")
+    report = json.loads(json.dumps(runner.report()))
+    assert report["trends"]["End"]["slope"] == 0.0
+
+
+@pytest.mark.offline
+def test_sampler_counts_events_and_subscriptions():
+    """The event rate counts the events dispatched since the previous
+    sample"""
+    backend = ReplayBackend()
+    with backend.install():
+        sampler = ResourceSampler()
+        handle = CHANGE_EVENT_HUB.subscribe(
+            SUBARRAY_NODE, "obsState", lambda event: None
+        )
+        for obs_state in range(3):
+            backend.push(SUBARRAY_NODE, "obsState", obs_state)
+        sample = sampler.sample(block=1)
+        sampler.close()
+        CHANGE_EVENT_HUB.unsubscribe(handle)
+    assert sample.subscriptions == 1
+    assert sample.event_rate > 0
+    assert sample.rss_bytes > 0
+
+
+@pytest.mark.offline
+def test_block_uses_fresh_ids():
+    """Each block assigns fresh eb and pb ids, each scan a rising scan id"""
+    runner = SoakRunner(None, None, scans_per_block=2)
+    runner.benchmark = MeasuredCommands()
+    runner.benchmark.central_node = runner.benchmark.subarray_node = type(
+        "Wrapper", (), {}
+    )()
+    runner.benchmark.central_node.central_node = CommandProxy()
+    runner.benchmark.subarray_node.subarray_node = CommandProxy()
+    assign_json = json.dumps(
+        {
+            "sdp": {
+                "execution_block": {"eb_id": "eb-1"},
+                "processing_blocks": [{"pb_id": "pb-1"}],
+            }
+        }
+    )
+    runner.scan_id = 0
+    for _ in range(2):
+        runner.run_block(assign_json, "{}", json.dumps({"scan_id": 1}), "{}")
+    commands = runner.benchmark.commands
+    assert [name for name, _ in commands[:8]] == [
+        "AssignResources",
+        "Configure",
+        "Scan",
+        "EndScan",
+        "Configure",
+        "Scan",
+        "EndScan",
+        "End",
+    ]
+    eb_ids = {
+        json.loads(result[1])["sdp"]["execution_block"]["eb_id"]
+        for name, result in commands
+        if name == "AssignResources"
+    }
+    assert len(eb_ids) == 2 and "eb-1" not in eb_ids
+    scan_ids = [
+        json.loads(result[1])["scan_id"]
+        for name, result in commands
+        if name == "Scan"
+    ]
+    assert scan_ids == [1, 2, 3, 4]
+    assert runner.block_count == 2
@@ -0,0 +1,145 @@
+"""Offline tests of the lease of a subarray per pytest-xdist worker."""
+import json
+import threading
+import time
+
+import pytest
+
+from tests.resources.test_harness import subarray_lease
+from tests.resources.test_harness.subarray_lease import (
+    SubarrayLeaseError,
+    SubarrayLeaseManager,
+    TelescopeLock,
+    subarray_device_names,
+    with_leased_resources,
+    worker_subarray_id,
+)
+
+
+@pytest.mark.offline
+def test_workers_lease_distinct_subarrays(tmp_path):
+    """Worker gw<N> leases subarray N + 1, which another run cannot lease
+    until it is released"""
+    manager = SubarrayLeaseManager(
+        subarray_count=2, lease_dir=str(tmp_path), mccs_simulated=True
+    )
+    other_run = SubarrayLeaseManager(
+        subarray_count=2, lease_dir=str(tmp_path), mccs_simulated=True
+    )
+    assert worker_subarray_id(None) == 1
+    assert worker_subarray_id(1) == 2
+    assert manager.lease_for_worker(None) == 1
+    assert manager.lease_for_worker(1) == 2
+    with pytest.raises(SubarrayLeaseError, match="leased by another run"):
+        other_run.lease_for_worker(1)
+    manager.release(2)
+    assert other_run.lease_for_worker(1) == 2
+    with pytest.raises(SubarrayLeaseError, match="not deployed"):
+        manager.lease_for_worker(2)
+
+
+@pytest.mark.offline
+def test_real_mccs_allows_a_single_worker(tmp_path):
+    """A real MCCS has the subarray beam and stations of one subarray"""
+    manager = SubarrayLeaseManager(
+        subarray_count=2, lease_dir=str(tmp_path), mccs_simulated=False
+    )
+    assert manager.lease_for_worker(0) == 1
+    with pytest.raises(SubarrayLeaseError, match="real MCCS"):
+        manager.lease_for_worker(1)
+
+
+@pytest.mark.offline
+def test_device_names_and_inputs_follow_the_lease(monkeypatch):
+    """Device names and command inputs refer to the leased subarray"""
+    assert subarray_device_names(2) == {
+        "tmc_subarraynode": "ska_low/tm_subarray_node/2",
+        "csp_subarray_leaf_node": "ska_low/tm_leaf_node/csp_subarray02",
+        "sdp_subarray_leaf_node": "ska_low/tm_leaf_node/sdp_subarray02",
+        "mccs_subarray_leaf_node": "ska_low/tm_leaf_node/mccs_subarray02",
+        "csp_subarray": "low-csp/subarray/02",
+        "sdp_subarray": "low-sdp/subarray/02",
+        "mccs_subarray": "low-mccs/subarray/02",
+        "cbf_subarray": "low-cbf/subarray/02",
+        "mccs_subarraybeam": "low-mccs/subarraybeam/02",
+    }
+    assign_input = json.dumps({"subarray_id": 1, "sdp": {}})
+    assert with_leased_resources(assign_input) == assign_input
+    monkeypatch.setattr(subarray_lease, "LEASED_SUBARRAY_ID", 3)
+    assert json.loads(with_leased_resources(assign_input)) == {
+        "subarray_id": 3,
+        "sdp": {},
+    }
+    assert subarray_lease.resolve_subarray_id("1") == 3
+    assert subarray_lease.resolve_subarray_id(2) == 2
+
+
+@pytest.mark.offline
+def test_inputs_use_the_mccs_resources_of_the_lease(monkeypatch):
+    """Each lease has its own subarray beam and station set"""
+    monkeypatch.setattr(subarray_lease, "LEASED_SUBARRAY_ID", 2)
+    monkeypatch.setattr(subarray_lease, "STATIONS_PER_SUBARRAY", 6)
+    command_input = {
+        "subarray_id": 1,
+        "mccs": {
+            "subarray_beams": [
+                {
+                    "subarray_beam_id": 1,
+                    "apertures": [
+                        {"station_id": 1, "aperture_id": "AP001.01"},
+                        {"aperture_id": "AP002.01"},
+                    ],
+                }
+            ]
+        },
+        "csp": {"lowcbf": {"stations": {"stns": [[1, 1], [6, 1]]}}},
+    }
+    leased_input = json.loads(with_leased_resources(json.dumps(command_input)))
+    assert leased_input["subarray_id"] == 2
+    subarray_beam = leased_input["mccs"]["subarray_beams"][0]
+    assert subarray_beam["subarray_beam_id"] == 2
+    assert subarray_beam["apertures"] == [
+        {"station_id": 7, "aperture_id": "AP007.01"},
+        {"aperture_id": "AP008.01"},
+    ]
+    assert leased_input["csp"]["lowcbf"]["stations"]["stns"] == [
+        [7, 1],
+        [12, 1],
+    ]
+    command_input["csp"]["lowcbf"]["stations"]["stns"] = [[7, 1]]
+    with pytest.raises(ValueError, match="STATIONS_PER_SUBARRAY"):
+        with_leased_resources(json.dumps(command_input))
+
+
+@pytest.mark.offline
+def test_telescope_lock_keeps_telescope_wide_tests_apart(tmp_path):
+    """An exclusive holder waits for the shared holders, and new shared
+    holders wait for it"""
+    telescope_lock = TelescopeLock(str(tmp_path))
+    timeline = []
+
+    def hold(mode: str, name: str) -> None:
+        with getattr(telescope_lock, mode)():
+            timeline.append(f"{name} in")
+            time.sleep(0.05)
+            timeline.append(f"{name} out")
+
+    exclusive = threading.Thread(target=hold, args=("exclusive", "telescope"))
+    shared = threading.Thread(target=hold, args=("shared", "subarray"))
+    with telescope_lock.shared():
+        with telescope_lock.shared():
+            timeline.append("shared alongside")
+        exclusive.start()
+        time.sleep(0.1)
+        shared.start()
+        time.sleep(0.1)
+        assert timeline == ["shared alongside"]
+    exclusive.join(timeout=5)
+    shared.join(timeout=5)
+    assert timeline == [
+        "shared alongside",
+        "telescope in",
+        "telescope out",
+        "subarray in",
+        "subarray out",
+    ]
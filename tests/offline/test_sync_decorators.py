@@ -0,0 +1,149 @@
+"""Offline tests of the completion of the sync decorators on the
+longRunningCommandResult of the command, the devices being served by the
+ReplayBackend."""
+import json
+
+import pytest
+from ska_control_model import ObsState
+
+from tests.resources.test_harness.event_replay import ReplayBackend, ReplayStep
+from tests.resources.test_harness.utils import sync_decorators
+from tests.resources.test_harness.utils.sync_decorators import (
+    LrcrCompletion,
+    get_unique_id,
+)
+from tests.resources.test_support.common_utils.result_code import ResultCode
+
+CENTRAL_NODE = "ska_low/tm_central/central_node"
+SUBARRAY_NODE = "ska_low/tm_subarray_node/1"
+SDP_SUBARRAY = "low-sdp/subarray/01"
+DEVICE_DICT = {
+    "central_node": CENTRAL_NODE,
+    "tmc_subarraynode": SUBARRAY_NODE,
+    "sdp_subarray": SDP_SUBARRAY,
+}
+UNIQUE_ID = "1_Configure"
+COMMAND_STARTED = ([ResultCode.QUEUED], [UNIQUE_ID])
+
+
+def lrcr_step(result_code: ResultCode, message: str = "") -> ReplayStep:
+    """Step pushing a longRunningCommandResult of the command"""
+    return ReplayStep(
+        0.01,
+        SUBARRAY_NODE,
+        "longRunningCommandResult",
+        (UNIQUE_ID, json.dumps((int(result_code), message))),
+    )
+
+
+@pytest.fixture()
+def replay_backend():
+    """ReplayBackend serving the pooled proxies, with idle devices"""
+    backend = ReplayBackend()
+    with backend.install():
+        for device_name in (SUBARRAY_NODE, SDP_SUBARRAY):
+            backend.push(device_name, "obsState", ObsState.IDLE)
+        for device_name in (CENTRAL_NODE, SUBARRAY_NODE):
+            backend.push(device_name, "longRunningCommandResult", ("", ""))
+        yield backend
+
+
+@pytest.mark.offline
+def test_completes_on_command_result(replay_backend):
+    """The command completes on its final result, the obsStates being
+    verified from the received events"""
+    with LrcrCompletion(DEVICE_DICT, "READY", timeout=5) as completion:
+        replay_backend.start(
+            [
+                lrcr_step(ResultCode.STARTED),
+                ReplayStep(0.01, SDP_SUBARRAY, "obsState", ObsState.READY),
+                ReplayStep(0.01, SUBARRAY_NODE, "obsState", ObsState.READY),
+                lrcr_step(ResultCode.OK, "Command Completed"),
+            ]
+        )
+        completion.wait(COMMAND_STARTED)
+
+
+@pytest.mark.offline
+def test_failed_or_missing_result_raises(replay_backend):
+    """A failed, unanswered or rejected command raises"""
+    with LrcrCompletion(DEVICE_DICT, "READY", timeout=5) as completion:
+        replay_backend.play([lrcr_step(ResultCode.FAILED, "Timeout")])
+        with pytest.raises(AssertionError, match="completed with"):
+            completion.wait(COMMAND_STARTED)
+    with LrcrCompletion(DEVICE_DICT, "READY", timeout=0.1) as completion:
+        with pytest.raises(AssertionError, match="No result"):
+            completion.wait(([ResultCode.QUEUED], ["2_Configure"]))
+        with pytest.raises(AssertionError, match="not accepted"):
+            completion.wait(([ResultCode.REJECTED], ["Not allowed"]))
+
+
+@pytest.mark.offline
+def test_obs_state_verification(replay_backend, monkeypatch):
+    """Subarrays not reaching the obsState fail the wait, unless the
+    verification is disabled"""
+    monkeypatch.setattr(
+        "tests.resources.test_harness.utils.sync_decorators."
+        "OBS_STATE_GRACE_PERIOD",
+        0.1,
+    )
+    with LrcrCompletion(DEVICE_DICT, "READY", timeout=5) as completion:
+        replay_backend.play([lrcr_step(ResultCode.OK)])
+        with pytest.raises(AssertionError, match="not in READY"):
+            completion.wait(COMMAND_STARTED)
+    with LrcrCompletion(
+        DEVICE_DICT, "READY", timeout=5, verify_obs_states=False
+    ) as completion:
+        replay_backend.play([lrcr_step(ResultCode.OK)])
+        completion.wait(COMMAND_STARTED)
+    assert get_unique_id(([ResultCode.OK], ["done"])) is None
+
+
+@pytest.mark.offline
+def test_subarray_already_in_obs_state(replay_backend, monkeypatch):
+    """A subarray found in the obsState once the command completes needs no
+    change event, the other ones are verified from their events"""
+    monkeypatch.setattr(sync_decorators, "OBS_STATE_GRACE_PERIOD", 0.1)
+    with LrcrCompletion(DEVICE_DICT, "IDLE", timeout=5) as completion:
+        replay_backend.play([lrcr_step(ResultCode.OK)])
+        completion.wait(COMMAND_STARTED)
+    assert completion.obs_state_events == {
+        "tmc_subarraynode": True,
+        "sdp_subarray": True,
+    }
+    with LrcrCompletion(DEVICE_DICT, "READY", timeout=5) as completion:
+        replay_backend.play(
+            [
+                ReplayStep(0.01, SDP_SUBARRAY, "obsState", ObsState.READY),
+                ReplayStep(0.01, SUBARRAY_NODE, "obsState", ObsState.READY),
+                lrcr_step(ResultCode.OK),
+            ]
+        )
+        completion.wait(COMMAND_STARTED)
+    assert all(
+        event_data["attribute_value"] == ObsState.READY
+        for event_data in completion.obs_state_events.values()
+    )
+
+
+@pytest.mark.offline
+@pytest.mark.parametrize(
+    "decorator, obs_state, timeout",
+    [
+        (sync_decorators.sync_release_resources, "EMPTY", 20),
+        (sync_decorators.sync_restart, "EMPTY", 50),
+        (sync_decorators.sync_configure, "READY", 80),
+        (sync_decorators.sync_end, "IDLE", 20),
+        (sync_decorators.sync_endscan, "READY", 20),
+    ],
+)
+def test_command_result_timeouts_are_seconds(
+    decorator, obs_state, timeout, monkeypatch
+):
+    """The timeouts are the seconds the Waiter ticks used to amount to"""
+    monkeypatch.setattr(
+        sync_decorators,
+        "sync_on_command_result",
+        lambda *args: args,
+    )
+    assert decorator(DEVICE_DICT) == (DEVICE_DICT, obs_state, timeout)
@@ -0,0 +1,64 @@
+"""Offline tests of the tear down dependency graph."""
+import threading
+import time
+
+import pytest
+
+from tests.resources.test_harness.teardown_graph import TeardownGraph
+
+
+@pytest.mark.offline
+def test_independent_steps_run_concurrently():
+    """Independent steps overlap, dependent steps wait for them"""
+    order = []
+    lock = threading.Lock()
+
+    def step(name):
+        time.sleep(0.2)
+        with lock:
+            order.append(name)
+
+    teardown = TeardownGraph("test")
+    resets = [
+        teardown.add_step(f"reset {index}", step, f"reset {index}")
+        for index in range(4)
+    ]
+    teardown.add_step("empty", step, "empty", depends_on=resets)
+    teardown.run()
+
+    assert order[-1] == "empty"
+    assert teardown.wall_clock < 0.7
+    assert all(
+        teardown_step.duration >= 0.2
+        for teardown_step in teardown.steps.values()
+    )
+
+
+@pytest.mark.offline
+def test_failed_step_skips_its_dependents():
+    """A failure skips the steps depending on it and is raised once the
+    other steps are done"""
+    done = []
+
+    def fail():
+        raise RuntimeError("reset failed")
+
+    teardown = TeardownGraph("test")
+    failing_step = teardown.add_step("failing", fail)
+    teardown.add_step("independent", done.append, "independent")
+    teardown.add_step(
+        "dependent", done.append, "dependent", depends_on=[failing_step]
+    )
+    with pytest.raises(RuntimeError, match="reset failed"):
+        teardown.run()
+
+    assert done == ["independent"]
+    assert teardown.steps["dependent"].skipped
+
+
+@pytest.mark.offline
+def test_unknown_dependency_is_rejected():
+    """Steps may only depend on steps added before"""
+    teardown = TeardownGraph("test")
+    with pytest.raises(ValueError):
+        teardown.add_step("empty", print, depends_on=["reset"])
@@ -0,0 +1,350 @@
+"""Asyncio variants of the CentralNode and SubarrayNode wrappers.
+
+Commands are invoked through PyTango asyncio green mode proxies and the
+waits of the sync decorators are awaited instead of blocking, so that a
+test can drive several subarrays, or overlap the teardown of a scenario
+with the setup of the next one, from a single event loop.
+"""
+import asyncio
+import json
+import logging
+from typing import Any, Callable, Dict, Optional
+
+from ska_control_model import AdminMode, ResultCode
+from ska_ser_logging import configure_logging
+from tango import DevState
+from tango.asyncio import DeviceProxy as AsyncDeviceProxy
+
+from tests.resources.test_harness.central_node_low import (
+    TIMEOUT,
+    CentralNodeWrapperLow,
+)
+from tests.resources.test_harness.constant import device_dict_low
+from tests.resources.test_harness.helpers import SIMULATED_DEVICES_DICT
+from tests.resources.test_harness.subarray_node_low import (
+    SubarrayNodeWrapperLow,
+)
+from tests.resources.test_harness.utils.sync_decorators import (
+    TIMEOUT as SYNC_TIMEOUT,
+)
+from tests.resources.test_harness.utils.wait_helpers import Waiter
+from tests.resources.test_support.common_utils.base_utils import DeviceUtils
+from tests.resources.test_support.common_utils.device_proxy_pool import (
+    get_device_name,
+)
+from tests.resources.test_support.common_utils.event_hub import (
+    next_event_async,
+    subscribed_events_async,
+    wait_for_event_async,
+)
+
+configure_logging(logging.DEBUG)
+LOGGER = logging.getLogger(__name__)
+
+# Seconds between two evaluations of the waits, as for Waiter.wait
+WAIT_RESOLUTION = 0.1
+
+
+class AsyncProxies:
+    """Asyncio green mode proxies, created once per device"""
+
+    def __init__(self, proxy_factory: Callable = AsyncDeviceProxy):
+        """
+        Args:
+            proxy_factory (Callable): returns an awaitable of the proxy of a
+                device name
+        """
+        self.proxy_factory = proxy_factory
+        self._proxies: Dict[str, Any] = {}
+
+    async def get(self, device: Any) -> Any:
+        """Return the asyncio proxy of given device
+
+        Args:
+            device (str | DeviceProxy): device name or Tango Device Proxy
+        Returns:
+            DeviceProxy: asyncio green mode Tango Device Proxy
+        """
+        device_name = get_device_name(device)
+        if device_name not in self._proxies:
+            self._proxies[device_name] = await self.proxy_factory(device_name)
+        return self._proxies[device_name]
+
+
+def check_obs_state_empty(device_dict: dict) -> None:
+    """Check that the subarrays are EMPTY, the precondition of
+    sync_assign_resources
+
+    Args:
+        device_dict (dict): device names, keyed as device_dict_low
+    Raises:
+        Exception: if a subarray is not EMPTY
+    """
+    DeviceUtils(
+        obs_state_device_names=[
+            device_dict.get("csp_subarray"),
+            device_dict.get("sdp_subarray"),
+            device_dict.get("tmc_subarraynode"),
+        ]
+    ).check_devices_obsState("EMPTY")
+
+
+async def invoke_and_wait(
+    command,
+    set_wait: str,
+    timeout: float,
+    set_wait_before: bool = True,
+    device_dict: dict = None,
+):
+    """Invoke a command coroutine and await the waits used by the matching
+    sync decorator. Initial values are read in the default executor.
+
+    Args:
+        command (Awaitable): command invocation
+        set_wait (str): name of the Waiter method setting the waits
+        timeout (float): time to wait in seconds
+        set_wait_before (bool): set the waits before invoking the command,
+            as the sync decorator does
+        device_dict (dict): devices used by the Waiter
+    Returns:
+        result of the command
+    """
+    loop = asyncio.get_running_loop()
+    the_waiter = Waiter(**(device_dict or device_dict_low))
+    if set_wait_before:
+        await loop.run_in_executor(None, getattr(the_waiter, set_wait))
+    result = await command
+    if not set_wait_before:
+        await loop.run_in_executor(None, getattr(the_waiter, set_wait))
+    await the_waiter.wait_async(timeout / WAIT_RESOLUTION, WAIT_RESOLUTION)
+    return result
+
+
+async def wait_for_command_completed(
+    device: Any,
+    unique_id: str,
+    timeout: float = TIMEOUT,
+    events: Optional[asyncio.Queue] = None,
+) -> Any:
+    """Await the longRunningCommandResult event reporting the successful
+    completion of given command
+
+    Args:
+        device (str | DeviceProxy): device name or Tango Device Proxy
+        unique_id (str): unique id of the command
+        timeout (float): time to wait in seconds
+        events (asyncio.Queue): longRunningCommandResult events subscribed
+            with subscribed_events_async before the command was invoked, so
+            that a completion pushed before the subscription is not missed
+    Returns:
+        EventData: the completion event
+    """
+    expected_result = json.dumps((int(ResultCode.OK), "Command Completed"))
+
+    def _is_completion(event) -> bool:
+        return tuple(event.attr_value.value) == (unique_id, expected_result)
+
+    if events is not None:
+        return await next_event_async(events, _is_completion, timeout)
+    return await wait_for_event_async(
+        device, "longRunningCommandResult", _is_completion, timeout
+    )
+
+
+class AsyncCentralNodeWrapperLow:
+    """Awaitable CentralNode commands, built on the state and simulator
+    handling of CentralNodeWrapperLow"""
+
+    def __init__(
+        self,
+        central_node: CentralNodeWrapperLow,
+        device_dict: dict = device_dict_low,
+        proxies: AsyncProxies = None,
+    ):
+        """
+        Args:
+            central_node (CentralNodeWrapperLow): wrapped sync wrapper
+            device_dict (dict): devices waited for, keyed as
+                device_dict_low
+            proxies (AsyncProxies): asyncio proxies of the devices
+        """
+        self.wrapper = central_node
+        self.device_dict = device_dict
+        self.proxies = proxies or AsyncProxies()
+
+    async def _set_admin_mode_online(self, devices: list) -> None:
+        """Set adminMode of given devices to ONLINE"""
+        for device in devices:
+            proxy = await self.proxies.get(device)
+            admin_mode = await proxy.read_attribute("adminMode")
+            if admin_mode.value != AdminMode.ONLINE:
+                await proxy.write_attribute("adminMode", AdminMode.ONLINE)
+
+    def _set_simulators_state(self, state: DevState) -> None:
+        """Set the state of the simulated devices as per deployment"""
+        if SIMULATED_DEVICES_DICT["all_mocks"]:
+            self.wrapper.set_values_with_all_mocks(state)
+        elif SIMULATED_DEVICES_DICT["csp_and_sdp"]:
+            self.wrapper.set_value_with_csp_sdp_mocks(state)
+        elif SIMULATED_DEVICES_DICT["csp_and_mccs"]:
+            self.wrapper.set_values_with_csp_mccs_mocks(state)
+        elif SIMULATED_DEVICES_DICT["sdp_and_mccs"]:
+            self.wrapper.set_values_with_sdp_mccs_mocks(state)
+
+    async def _telescope_on(self) -> None:
+        """Invoke TelescopeOn and await its completion, nothing is invoked if
+        the Telescope is kept ON and already is"""
+        loop = asyncio.get_running_loop()
+        if self.wrapper.keep_telescope_on and await loop.run_in_executor(
+            None, self.wrapper.is_telescope_on
+        ):
+            LOGGER.info("Telescope is already ON")
+            return
+        if SIMULATED_DEVICES_DICT["csp_and_sdp"]:
+            await self._set_admin_mode_online(
+                [self.wrapper.mccs_master, self.wrapper.mccs_subarray1]
+            )
+        elif SIMULATED_DEVICES_DICT["sdp_and_mccs"]:
+            await self._set_admin_mode_online(
+                [self.wrapper.csp_master, self.wrapper.csp_subarray1]
+            )
+            await asyncio.sleep(3)
+        central_node = await self.proxies.get(self.wrapper.central_node)
+        async with subscribed_events_async(
+            self.wrapper.central_node, "longRunningCommandResult"
+        ) as events:
+            _, unique_id = await central_node.TelescopeOn()
+            await loop.run_in_executor(
+                None, self._set_simulators_state, DevState.ON
+            )
+            await wait_for_command_completed(
+                self.wrapper.central_node, unique_id[0], events=events
+            )
+
+    async def move_to_on(self) -> None:
+        """Awaitable variant of CentralNodeWrapperLow.move_to_on"""
+        LOGGER.info("Starting up the Telescope")
+        # sync_set_to_on counts SYNC_TIMEOUT in Waiter resolution steps
+        await invoke_and_wait(
+            self._telescope_on(),
+            "set_wait_for_telescope_on",
+            SYNC_TIMEOUT * WAIT_RESOLUTION,
+            device_dict=self.device_dict,
+        )
+
+    async def _assign_resources(self, assign_json: str):
+        """Invoke AssignResources on CentralNode"""
+        central_node = await self.proxies.get(self.wrapper.central_node)
+        result, message = await central_node.AssignResources(assign_json)
+        LOGGER.info("Invoked AssignResources on CentralNode")
+        return result, message
+
+    async def store_resources(self, assign_json: str):
+        """Awaitable variant of CentralNodeWrapperLow.store_resources
+
+        Args:
+            assign_json (str): Assign resource input json
+        Raises:
+            Exception: if the subarrays are not EMPTY
+        """
+        await asyncio.get_running_loop().run_in_executor(
+            None, check_obs_state_empty, self.device_dict
+        )
+        return await invoke_and_wait(
+            self._assign_resources(assign_json),
+            "set_wait_for_assign_resources",
+            50,
+            set_wait_before=False,
+            device_dict=self.device_dict,
+        )
+
+
+class AsyncSubarrayNodeWrapperLow:
+    """Awaitable SubarrayNode commands of SubarrayNodeWrapperLow"""
+
+    def __init__(
+        self,
+        subarray_node: SubarrayNodeWrapperLow,
+        device_dict: dict = device_dict_low,
+        proxies: AsyncProxies = None,
+    ):
+        """
+        Args:
+            subarray_node (SubarrayNodeWrapperLow): wrapped sync wrapper
+            device_dict (dict): devices waited for, keyed as
+                device_dict_low
+            proxies (AsyncProxies): asyncio proxies of the devices
+        """
+        self.wrapper = subarray_node
+        self.device_dict = device_dict
+        self.proxies = proxies or AsyncProxies()
+
+    async def _command(self, command_name: str, *args):
+        """Invoke a command on SubarrayNode"""
+        subarray_node = await self.proxies.get(self.wrapper.subarray_node)
+        result, message = await subarray_node.command_inout(
+            command_name, *args
+        )
+        LOGGER.info("Invoked %s on SubarrayNode", command_name)
+        return result, message
+
+    async def store_resources(self, assign_json: str):
+        """Awaitable variant of SubarrayNodeWrapperLow.store_resources
+
+        Args:
+            assign_json (str): Assign resource input json
+        Raises:
+            Exception: if the subarrays are not EMPTY
+        """
+        await asyncio.get_running_loop().run_in_executor(
+            None, check_obs_state_empty, self.device_dict
+        )
+        central_node = await self.proxies.get(self.wrapper.central_node)
+        return await invoke_and_wait(
+            central_node.AssignResources(assign_json),
+            "set_wait_for_assign_resources",
+            50,
+            set_wait_before=False,
+            device_dict=self.device_dict,
+        )
+
+    async def store_configuration_data(self, input_json: str):
+        """Awaitable variant of SubarrayNodeWrapperLow.store_configuration_data
+
+        Args:
+            input_json (str): config input json
+        """
+        return await invoke_and_wait(
+            self._command("Configure", input_json),
+            "set_wait_for_configure",
+            80,
+            set_wait_before=False,
+            device_dict=self.device_dict,
+        )
+
+    async def end_observation(self):
+        """Awaitable variant of SubarrayNodeWrapperLow.end_observation"""
+        return await invoke_and_wait(
+            self._command("End"),
+            "set_wait_for_idle",
+            20,
+            device_dict=self.device_dict,
+        )
+
+    async def abort_subarray(self):
+        """Awaitable variant of SubarrayNodeWrapperLow.abort_subarray"""
+        return await invoke_and_wait(
+            self._command("Abort"),
+            "set_wait_for_aborted",
+            100,
+            device_dict=self.device_dict,
+        )
+
+    async def restart_subarray(self):
+        """Awaitable variant of SubarrayNodeWrapperLow.restart_subarray"""
+        return await invoke_and_wait(
+            self._command("Restart"),
+            "set_wait_for_going_to_empty",
+            50,
+            device_dict=self.device_dict,
+        )
@@ -1,13 +1,14 @@
 import json
 import logging
 import time
+from functools import cached_property
 from time import sleep
+from typing import Iterable, List
 
 from assertpy import assert_that
 from ska_control_model import AdminMode, ObsState, ResultCode
 from ska_ser_logging import configure_logging
 from ska_tango_base.control_model import HealthState
-from ska_tango_testing.integration import TangoEventTracer, log_events
 from tango import DeviceProxy, DevState
 
 from tests.resources.test_harness.constant import (
@@ -25,21 +26,51 @@ from tests.resources.test_harness.constant import (
     mccs_controller,
     mccs_master_leaf_node,
     mccs_subarray1,
+    mccs_subarray_leaf_node,
     pst,
     tmc_low_subarraynode1,
 )
-from tests.resources.test_harness.event_recorder import EventRecorder
-from tests.resources.test_harness.helpers import SIMULATED_DEVICES_DICT
+from tests.resources.test_harness.dirty_tracker import (
+    COMMAND_CALL_INFO,
+    DEFECTS,
+    DELAY_INFO,
+    DIRTY_TRACKER,
+    HEALTH_STATE,
+    TRANSITIONS,
+)
+from tests.resources.test_harness.event_recorder import IndexedEventRecorder
+from tests.resources.test_harness.event_tracer import (
+    SharedEventTracer,
+    log_events,
+)
+from tests.resources.test_harness.helpers import (
+    SIMULATED_DEVICES_DICT,
+    has_health_state_changed,
+    is_defect_set,
+    wait_for_ongoing_transition,
+    wait_for_subarray_ready,
+)
+from tests.resources.test_harness.subarray_lease import resolve_subarray_id
+from tests.resources.test_harness.teardown_graph import TeardownGraph
 from tests.resources.test_harness.utils.common_utils import JsonFactory
+from tests.resources.test_harness.utils.obs_state_planner import (
+    plan_obs_state_change,
+)
 from tests.resources.test_harness.utils.sync_decorators import (
     sync_abort,
     sync_assign_resources,
+    sync_end,
+    sync_endscan,
     sync_release_resources,
     sync_restart,
     sync_set_to_off,
     sync_set_to_on,
 )
 from tests.resources.test_support.common_utils.common_helpers import Resource
+from tests.resources.test_support.common_utils.device_proxy_pool import (
+    DEVICE_PROXY_POOL,
+    PooledProxy,
+)
 
 configure_logging(logging.DEBUG)
 LOGGER = logging.getLogger(__name__)
@@ -51,50 +82,69 @@ class CentralNodeWrapperLow(object):
     and standard set of commands for TMC Low CentralNode,
     defined by the SKA Control Model."""
 
+    # when set, tear_down leaves the Telescope ON and move_to_on does not
+    # power cycle it
+    keep_telescope_on = False
+
+    central_node = PooledProxy(low_centralnode)
+    subarray_node = PooledProxy(tmc_low_subarraynode1)
+    csp_master_leaf_node = PooledProxy(low_csp_master_leaf_node)
+    sdp_master_leaf_node = PooledProxy(low_sdp_master_leaf_node)
+    mccs_master_leaf_node = PooledProxy(mccs_master_leaf_node)
+    csp_subarray_leaf_node = PooledProxy(low_csp_subarray_leaf_node)
+    sdp_subarray_leaf_node = PooledProxy(low_sdp_subarray_leaf_node)
+    mccs_subarray_leaf_node = PooledProxy(mccs_subarray_leaf_node)
+    csp_subarray1 = PooledProxy(low_csp_subarray1)
+    sdp_subarray1 = PooledProxy(low_sdp_subarray1)
+    mccs_subarray1 = PooledProxy(mccs_subarray1)
+    sdp_master = PooledProxy(low_sdp_master)
+    csp_master = PooledProxy(low_csp_master)
+    mccs_master = PooledProxy(mccs_controller)
+    pst = PooledProxy(pst)
+
     def __init__(self) -> None:
-        self.central_node = DeviceProxy(low_centralnode)
-        self.subarray_node = DeviceProxy(tmc_low_subarraynode1)
-        self.csp_master_leaf_node = DeviceProxy(low_csp_master_leaf_node)
-        self.sdp_master_leaf_node = DeviceProxy(low_sdp_master_leaf_node)
-        self.mccs_master_leaf_node = DeviceProxy(mccs_master_leaf_node)
-        self.subarray_devices = {
-            "csp_subarray": DeviceProxy(low_csp_subarray1),
-            "sdp_subarray": DeviceProxy(low_sdp_subarray1),
-            "mccs_subarray": DeviceProxy(mccs_subarray1),
-        }
-        self.csp_subarray_leaf_node = DeviceProxy(low_csp_subarray_leaf_node)
-        self.sdp_subarray_leaf_node = DeviceProxy(low_sdp_subarray_leaf_node)
-        self.subarray_device_by_id: dict = {"1": self.subarray_devices}
-        self.csp_subarray1 = DeviceProxy(low_csp_subarray1)
-        self.sdp_subarray1 = DeviceProxy(low_sdp_subarray1)
-        self.mccs_subarray1 = DeviceProxy(mccs_subarray1)
-        self.sdp_master = DeviceProxy(low_sdp_master)
-        self.csp_master = DeviceProxy(low_csp_master)
-        self.mccs_master = DeviceProxy(mccs_controller)
+        # proxies, inputs and event subscriptions are created on first use
         self._state = DevState.OFF
-
         self.json_factory = JsonFactory()
-        self.release_input = (
-            self.json_factory.create_centralnode_configuration(
-                "release_resources_low"
-            )
+
+    @cached_property
+    def subarray_devices(self) -> dict:
+        """Subsystem subarrays of the subarray under test"""
+        return {
+            "csp_subarray": self.csp_subarray1,
+            "sdp_subarray": self.sdp_subarray1,
+            "mccs_subarray": self.mccs_subarray1,
+        }
+
+    @cached_property
+    def subarray_device_by_id(self) -> dict:
+        """Subsystem subarrays per subarray id"""
+        return {"1": self.subarray_devices}
+
+    @cached_property
+    def release_input(self) -> str:
+        """ReleaseResources input"""
+        return self.json_factory.create_centralnode_configuration(
+            "release_resources_low"
         )
-        self.assign_input = self.json_factory.create_centralnode_configuration(
+
+    @cached_property
+    def assign_input(self) -> str:
+        """AssignResources input"""
+        return self.json_factory.create_centralnode_configuration(
             "assign_resources_low"
         )
-        self.event_tracer = TangoEventTracer()
-        self.event_recorder = EventRecorder()
-        self.event_recorder.subscribe_event(
-            self.central_node, "longRunningCommandResult"
-        )
-        self.event_recorder.subscribe_event(
-            self.subarray_node, "longRunningCommandResult"
-        )
 
-        self.event_tracer.subscribe_event(
+    @cached_property
+    def event_tracer(self) -> SharedEventTracer:
+        """Tracer subscribed to the longRunningCommandResult of CentralNode
+        and SubarrayNode on first use. Subscribing after a command was
+        invoked is safe, the first event carries the current result."""
+        event_tracer = SharedEventTracer()
+        event_tracer.subscribe_event(
             self.central_node, "longRunningCommandResult"
         )
-        self.event_tracer.subscribe_event(
+        event_tracer.subscribe_event(
             self.subarray_node, "longRunningCommandResult"
         )
         log_events(
@@ -103,26 +153,43 @@ class CentralNodeWrapperLow(object):
                 self.subarray_node: ["longRunningCommandResult"],
             }
         )
-        if SIMULATED_DEVICES_DICT["sdp_and_mccs"]:
-            self.pst = DeviceProxy(pst)
+        return event_tracer
+
+    @cached_property
+    def event_recorder(self) -> IndexedEventRecorder:
+        """Recorder subscribed to the longRunningCommandResult of CentralNode
+        and SubarrayNode on first use"""
+        event_recorder = IndexedEventRecorder()
+        event_recorder.subscribe_event(
+            self.central_node, "longRunningCommandResult"
+        )
+        event_recorder.subscribe_event(
+            self.subarray_node, "longRunningCommandResult"
+        )
+        return event_recorder
 
     def set_subarray_id(self, subarray_id):
-        self.subarray_node = DeviceProxy(
-            f"ska_low/tm_subarray_node/{subarray_id}"
-        )
+        subarray_id = resolve_subarray_id(subarray_id)
+        self.subarray_node = f"ska_low/tm_subarray_node/{subarray_id}"
         subarray_id = "{:02d}".format(int(subarray_id))
         self.subarray_devices = {
-            "csp_subarray": DeviceProxy(f"low-csp/subarray/{subarray_id}"),
-            "sdp_subarray": DeviceProxy(f"low-sdp/subarray/{subarray_id}"),
-            "mccs_subarray": DeviceProxy(f"low-mccs/subarray/{subarray_id}"),
+            "csp_subarray": DEVICE_PROXY_POOL.get_proxy(
+                f"low-csp/subarray/{subarray_id}"
+            ),
+            "sdp_subarray": DEVICE_PROXY_POOL.get_proxy(
+                f"low-sdp/subarray/{subarray_id}"
+            ),
+            "mccs_subarray": DEVICE_PROXY_POOL.get_proxy(
+                f"low-mccs/subarray/{subarray_id}"
+            ),
         }
-        self.csp_subarray_leaf_node = DeviceProxy(
+        self.csp_subarray_leaf_node = (
             f"ska_low/tm_leaf_node/csp_subarray{subarray_id}"
         )
-        self.sdp_subarray_leaf_node = DeviceProxy(
+        self.sdp_subarray_leaf_node = (
             f"ska_low/tm_leaf_node/sdp_subarray{subarray_id}"
         )
-        self.mccs_subarray_leaf_node = DeviceProxy(
+        self.mccs_subarray_leaf_node = (
             f"ska_low/tm_leaf_node/mccs_subarray{subarray_id}"
         )
         self.subarray_device_by_id[subarray_id] = self.subarray_devices
@@ -298,123 +365,166 @@ class CentralNodeWrapperLow(object):
     def _clear_command_call_and_transition_data(self, clear_transition=False):
         """Clears the command call data"""
         if SIMULATED_DEVICES_DICT["all_mocks"]:
-            for sim_device in [
-                low_csp_subarray1,
-                low_sdp_subarray1,
-            ]:
-                device = DeviceProxy(sim_device)
-                device.ClearCommandCallInfo()
-                if clear_transition:
-                    device.ResetTransitions()
+            teardown = TeardownGraph("Simulator command call data clearing")
+            self._add_clear_steps(teardown, clear_transition)
+            teardown.run()
+
+    def _add_clear_steps(
+        self,
+        teardown: TeardownGraph,
+        clear_transition: bool,
+        depends_on: Iterable[str] = (),
+    ) -> List[str]:
+        """Add a step clearing the command call data per simulator"""
+        if not SIMULATED_DEVICES_DICT["all_mocks"]:
+            return []
+        return [
+            teardown.add_step(
+                f"clear {device.dev_name()}",
+                self._clear_simulator_device,
+                device,
+                clear_transition,
+                depends_on=depends_on,
+            )
+            for device in [self.csp_subarray1, self.sdp_subarray1]
+        ]
+
+    @staticmethod
+    def _clear_simulator_device(device, clear_transition: bool) -> None:
+        """Clear the command call data of a simulator, skipping the data the
+        test did not change"""
+        if DIRTY_TRACKER.needs_reset(device, COMMAND_CALL_INFO):
+            device.ClearCommandCallInfo()
+        if clear_transition and DIRTY_TRACKER.needs_reset(device, TRANSITIONS):
+            device.ResetTransitions()
 
     def tear_down(self):
         """Handle Tear down of central Node"""
         LOGGER.info("Calling Tear down for Central node.")
+        teardown = TeardownGraph("CentralNode tear down")
         # reset HealthState.UNKNOWN for mock devices
-        self._reset_health_state_for_mock_devices()
-        self.reset_defects_for_devices()
-        if self.subarray_node.obsState in [
-            ObsState.RESOURCING,
-        ]:
-            LOGGER.info("Calling Abort and Restart on SubarrayNode")
-            _, unique_id = self.subarray_abort()
-            assert_that(self.event_tracer).described_as(
-                "FAILED ASSUMPTION AFTER ABORT COMMAND: "
-                "Central Node device"
-                f"({self.subarray_node.dev_name()}) "
-                "is expected have longRunningCommand as"
-                '(unique_id,(ResultCode.STARTED,"Command Started"))',
-            ).within_timeout(TIMEOUT).has_change_event_occurred(
-                self.subarray_node,
-                "longRunningCommandResult",
-                (
-                    unique_id[0],
-                    json.dumps((int(ResultCode.STARTED), "Command Started")),
-                ),
+        reset_steps = self._add_health_state_reset_steps(
+            teardown
+        ) + self._add_defect_reset_steps(teardown)
+        last_step = teardown.add_step(
+            "obsState EMPTY",
+            self._bring_subarray_to_empty,
+            depends_on=reset_steps,
+        )
+        if SIMULATED_DEVICES_DICT["sdp_and_mccs"]:
+            last_step = teardown.add_step(
+                "PST obsState IDLE",
+                self._reset_pst_obs_state,
+                depends_on=[last_step],
             )
-
-            _, unique_id = self.subarray_restart()
+        if self.keep_telescope_on:
+            LOGGER.info("Keeping the Telescope ON for the next test")
+        else:
+            last_step = teardown.add_step(
+                "Telescope power down", self.power_down, depends_on=[last_step]
+            )
+        self._add_clear_steps(teardown, True, depends_on=[last_step])
+        teardown.run()
+        # only the subscriptions opened by the test have events to clear
+        for event_consumer in ("event_recorder", "event_tracer"):
+            if event_consumer in vars(self):
+                getattr(self, event_consumer).clear_events()
+        assert wait_for_subarray_ready(
+            self.subarray_node
+        ), "SubarrayNode is not available after the tear down"
+
+    def _reset_pst_obs_state(self):
+        """Bring back an aborted PST beam to IDLE"""
+        if self.pst.obsState == ObsState.ABORTED:
+            log_events({self.pst: ["obsState"]})
+            self.event_tracer.subscribe_event(self.pst, "obsState")
+            self.pst.obsreset()
             assert_that(self.event_tracer).described_as(
-                "FAILED ASSUMPTION AFTER RESTART COMMAND: "
-                "Central Node device"
-                f"({self.subarray_node.dev_name()}) "
-                "is expected have longRunningCommand as"
-                '(unique_id,(ResultCode.OK,"Command Completed"))',
+                "FAILED TEAR DOWN"
+                "PST device"
+                f"({self.pst.dev_name()}) "
+                f"is expected to be in IDLE obstate",
             ).within_timeout(TIMEOUT).has_change_event_occurred(
-                self.subarray_node,
-                "longRunningCommandResult",
-                (
-                    unique_id[0],
-                    json.dumps((int(ResultCode.OK), "Command Completed")),
-                ),
+                self.pst,
+                "obsState",
+                ObsState.IDLE,
             )
 
-        elif self.subarray_node.obsState == ObsState.ABORTED:
-            _, unique_id = self.subarray_restart()
-            assert_that(self.event_tracer).described_as(
-                "FAILED ASSUMPTION AFTER RESTART COMMAND: "
-                "Central Node device"
-                f"({self.subarray_node.dev_name()}) "
-                "is expected have longRunningCommand as"
-                '(unique_id,(ResultCode.OK,"Command Completed"))',
-            ).within_timeout(TIMEOUT).has_change_event_occurred(
-                self.subarray_node,
-                "longRunningCommandResult",
-                (
-                    unique_id[0],
-                    json.dumps((int(ResultCode.OK), "Command Completed")),
-                ),
-            )
-        elif self.subarray_node.obsState == ObsState.IDLE:
-            LOGGER.info("Calling Release Resource on centralnode")
-            _, unique_id = self.invoke_release_resources(self.release_input)
+    def _bring_subarray_to_empty(self):
+        """Release the resources of the SubarrayNode along the cheapest
+        sequence of commands from its current obsState"""
+        for transition in plan_obs_state_change(
+            self.subarray_node, "EMPTY", self.subarray_devices.values()
+        ):
+            LOGGER.info("Calling %s on SubarrayNode", transition.command)
+            device = self.subarray_node
+            result_code = ResultCode.OK
+            message = "Command Completed"
+            if transition.command is None:
+                wait_for_ongoing_transition(self.subarray_node, transition)
+                continue
+            if transition.command == "ReleaseAllResources":
+                device = self.central_node
+                _, unique_id = self.invoke_release_resources(
+                    self.release_input
+                )
+            elif transition.command == "Abort":
+                result_code = ResultCode.STARTED
+                message = "Command Started"
+                _, unique_id = self.subarray_abort()
+            elif transition.command == "Restart":
+                _, unique_id = self.subarray_restart()
+            elif transition.command == "End":
+                _, unique_id = self.subarray_end()
+            elif transition.command == "EndScan":
+                _, unique_id = self.subarray_end_scan()
+            else:
+                raise ValueError(
+                    f"Unexpected {transition!r} bringing SubarrayNode to "
+                    "EMPTY"
+                )
             assert_that(self.event_tracer).described_as(
-                "FAILED ASSUMPTION AFTER RELEASE_RESOURCES COMMAND: "
-                "Central Node device"
-                f"({self.central_node.dev_name()}) "
+                f"FAILED ASSUMPTION AFTER {transition.command} COMMAND: "
+                f"({device.dev_name()}) "
                 "is expected have longRunningCommand as"
-                '(unique_id,(ResultCode.OK,"Command Completed"))',
+                f'(unique_id,(ResultCode.{result_code.name},"{message}"))',
             ).within_timeout(TIMEOUT).has_change_event_occurred(
-                self.central_node,
+                device,
                 "longRunningCommandResult",
                 (
                     unique_id[0],
-                    json.dumps((int(ResultCode.OK), "Command Completed")),
+                    json.dumps((int(result_code), message)),
                 ),
             )
+
+    def is_telescope_on(self) -> bool:
+        """Check whether the Telescope and the SubarrayNode are ON"""
+        return (
+            self.central_node.telescopeState == DevState.ON
+            and self.subarray_node.State() == DevState.ON
+        )
+
+    def power_down(self):
+        """Put the Telescope in STANDBY or OFF as per deployment, as done
+        after each test when the Telescope is not kept ON"""
         if SIMULATED_DEVICES_DICT["sdp_and_mccs"]:
-            if self.pst.obsState == ObsState.ABORTED:
-                log_events({self.pst: ["obsState"]})
-                self.event_tracer.subscribe_event(self.pst, "obsState")
-                self.pst.obsreset()
-                assert_that(self.event_tracer).described_as(
-                    "FAILED TEAR DOWN"
-                    "PST device"
-                    f"({self.pst.dev_name()}) "
-                    f"is expected to be in IDLE obstate",
-                ).within_timeout(TIMEOUT).has_change_event_occurred(
-                    self.pst,
-                    "obsState",
-                    ObsState.IDLE,
-                )
             self.set_standby()
         elif (
             SIMULATED_DEVICES_DICT["csp_and_mccs"]
             or SIMULATED_DEVICES_DICT["all_mocks"]
         ):
             self.move_to_off()
-        self._clear_command_call_and_transition_data(clear_transition=True)
-        self.event_recorder.clear_events()
-        self.event_tracer.clear_events()
-        # Adding a small sleep to allow the systems to clean up processes
-        sleep(0.15)
 
     @sync_set_to_on(device_dict=device_dict_low)
     def move_to_on(self):
         """
         A method to invoke TelescopeOn command to
-        put telescope in ON state
+        put telescope in ON state, nothing is invoked if the Telescope is
+        kept ON and already is
         """
+        if self.keep_telescope_on and self.is_telescope_on():
+            LOGGER.info("Telescope is already ON")
+            return
         LOGGER.info(
             "Starting up the Telescope %s", self.central_node.telescopeState
         )
@@ -672,32 +782,59 @@ class CentralNodeWrapperLow(object):
         result, message = self.subarray_node.Restart()
         return result, message
 
-    def _reset_health_state_for_mock_devices(self):
-        """Reset Mock devices"""
+    @sync_end(device_dict=device_dict_low)
+    def subarray_end(self):
+        """Invoke End command on subarray Node"""
+        result, message = self.subarray_node.End()
+        return result, message
+
+    @sync_endscan(device_dict=device_dict_low)
+    def subarray_end_scan(self):
+        """Invoke EndScan command on subarray Node"""
+        result, message = self.subarray_node.EndScan()
+        return result, message
+
+    def _health_reset_devices(self) -> list:
+        """Return the Mock devices whose healthState is reset"""
         if (
             SIMULATED_DEVICES_DICT["csp_and_sdp"]
             or SIMULATED_DEVICES_DICT["all_mocks"]
         ):
-            for mock_device in [
-                self.sdp_master,
-                self.csp_master,
-            ]:
-                device = DeviceProxy(mock_device)
-                device.SetDirectHealthState(HealthState.UNKNOWN)
-        elif SIMULATED_DEVICES_DICT["csp_and_mccs"]:
-            for mock_device in [
-                self.csp_master,
-            ]:
-                device = DeviceProxy(mock_device)
-                device.SetDirectHealthState(HealthState.UNKNOWN)
-        elif SIMULATED_DEVICES_DICT["sdp_and_mccs"]:
-            for mock_device in [
-                self.sdp_master,
-            ]:
-                device = DeviceProxy(mock_device)
-                device.SetDirectHealthState(HealthState.UNKNOWN)
-        else:
+            return [self.sdp_master, self.csp_master]
+        if SIMULATED_DEVICES_DICT["csp_and_mccs"]:
+            return [self.csp_master]
+        if SIMULATED_DEVICES_DICT["sdp_and_mccs"]:
+            return [self.sdp_master]
+        return []
+
+    @staticmethod
+    def _reset_health_state(mock_device) -> None:
+        """Reset healthState of a Mock device if changed by the test"""
+        if DIRTY_TRACKER.needs_reset(
+            mock_device, HEALTH_STATE, has_health_state_changed
+        ):
+            mock_device.SetDirectHealthState(HealthState.UNKNOWN)
+
+    def _add_health_state_reset_steps(
+        self, teardown: TeardownGraph
+    ) -> List[str]:
+        """Add a healthState reset step per Mock device"""
+        return [
+            teardown.add_step(
+                f"healthState {mock_device.dev_name()}",
+                self._reset_health_state,
+                mock_device,
+            )
+            for mock_device in self._health_reset_devices()
+        ]
+
+    def _reset_health_state_for_mock_devices(self):
+        """Reset healthState of Mock devices changed by the test"""
+        teardown = TeardownGraph("Mock devices healthState reset")
+        if not self._add_health_state_reset_steps(teardown):
             LOGGER.info("No devices to reset healthState")
+            return
+        teardown.run()
 
     def perform_action(self, command_name: str, input_json: str = ""):
         """Execute provided command on centralnode
@@ -772,18 +909,38 @@ class CentralNodeWrapperLow(object):
         for device in device_to_on_list:
             device.SetDirectState(subarray_state)
 
-    def reset_defects_for_devices(self):
-        """Resets the defects for given devices."""
-        if SIMULATED_DEVICES_DICT["all_mocks"]:
+    def _reset_defects(self, mock_device) -> None:
+        """Reset the defects and the delay info of a Mock device"""
+        if DIRTY_TRACKER.needs_reset(mock_device, DEFECTS, is_defect_set):
+            mock_device.SetDefective(RESET_DEFECT)
+        if mock_device != self.mccs_master and DIRTY_TRACKER.needs_reset(
+            mock_device, DELAY_INFO
+        ):
+            mock_device.ResetDelayInfo()
+
+    def _add_defect_reset_steps(self, teardown: TeardownGraph) -> List[str]:
+        """Add a defect reset step per Mock device"""
+        if not SIMULATED_DEVICES_DICT["all_mocks"]:
+            return []
+        return [
+            teardown.add_step(
+                f"defects {mock_device.dev_name()}",
+                self._reset_defects,
+                mock_device,
+            )
             for mock_device in [
                 self.csp_subarray1,
                 self.sdp_subarray1,
                 self.mccs_master,
                 self.mccs_subarray1,
-            ]:
-                mock_device.SetDefective(RESET_DEFECT)
-                if mock_device != self.mccs_master:
-                    mock_device.ResetDelayInfo()
+            ]
+        ]
+
+    def reset_defects_for_devices(self):
+        """Resets the defects for given devices."""
+        teardown = TeardownGraph("Mock devices defect reset")
+        self._add_defect_reset_steps(teardown)
+        teardown.run()
 
     def set_serial_number_of_cbf_processor(self):
         """Sets serial number for cbf processor"""
@@ -2,12 +2,18 @@ import logging
 
 from ska_control_model import ObsState
 from ska_ser_logging import configure_logging
-from ska_tango_base.control_model import HealthState
 from tango import DeviceProxy, DevState
 
 from tests.resources.test_harness.central_node_low import CentralNodeWrapperLow
-from tests.resources.test_harness.constant import device_dict_low, processor1
+from tests.resources.test_harness.constant import (
+    device_dict_low,
+    low_cbf_subarray1,
+    processor1,
+)
 from tests.resources.test_harness.utils.wait_helpers import Waiter
+from tests.resources.test_support.common_utils.device_proxy_pool import (
+    PooledProxy,
+)
 
 configure_logging(logging.DEBUG)
 LOGGER = logging.getLogger(__name__)
@@ -18,10 +24,11 @@ class CentralNodeCspWrapperLow(CentralNodeWrapperLow):
     and standard set of commands for TMC Low CentralNode with real csp device,
     defined by the SKA Control Model."""
 
+    processor1 = PooledProxy(processor1)
+
     def __init__(self) -> None:
         super().__init__()
-        self.processor1 = DeviceProxy(processor1)
-        device_dict_low["cbf_subarray1"] = "low-cbf/subarray/01"
+        device_dict_low["cbf_subarray1"] = low_cbf_subarray1
         device_dict_low["cbf_controller"] = "low-cbf/control/0"
         self.wait = Waiter(**device_dict_low)
 
@@ -41,11 +48,9 @@ class CentralNodeCspWrapperLow(CentralNodeWrapperLow):
         self.wait.set_wait_for_telescope_on()
         self.wait.wait(300)
 
-    def _reset_health_state_for_mock_devices(self):
-        """Reset Mock devices"""
-        for mock_device in [self.sdp_master, self.mccs_master]:
-            device = DeviceProxy(mock_device)
-            device.SetDirectHealthState(HealthState.UNKNOWN)
+    def _health_reset_devices(self) -> list:
+        """Return the Mock devices whose healthState is reset"""
+        return [self.sdp_master, self.mccs_master]
 
     def tear_down(self):
         """Handle Tear down of central Node"""
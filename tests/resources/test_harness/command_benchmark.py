@@ -0,0 +1,259 @@
+"""Latency benchmark of the TMC Low observation commands.
+
+Each run of the benchmark drives the subarray through AssignResources,
+Configure, Scan, EndScan, End, ReleaseResources, then AssignResources,
+Abort and Restart. The commands are invoked on the proxies of the node
+wrappers. For each command the benchmark records the time from the
+invocation to:
+
+- the OK longRunningCommandResult of the command
+- the obsState event of SubarrayNode and of each subsystem subarray
+  reaching the expected obsState
+
+The percentiles of the latencies are written as JSON, keyed by the
+simulation mode of the deployment (SIMULATED_DEVICES_DICT). The report of
+the other modes is kept, so that one file holds the runs of every mode.
+"""
+import json
+import logging
+import math
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from ska_ser_logging import configure_logging
+
+from tests.resources.test_harness.helpers import SIMULATED_DEVICES_DICT
+from tests.resources.test_harness.utils.sync_decorators import LrcrCompletion
+
+configure_logging(logging.DEBUG)
+LOGGER = logging.getLogger(__name__)
+
+# Runs of the benchmark, 0 skips it
+BENCHMARK_RUNS = int(os.getenv("BENCHMARK_RUNS", "0"))
+# JSON report of the benchmark
+BENCHMARK_REPORT = os.getenv("BENCHMARK_REPORT", "build/command_latency.json")
+# Seconds to wait for the result of a command
+BENCHMARK_TIMEOUT = 200
+PERCENTILES = (50, 95, 99)
+# Latency source of the command result, the others being obsState events
+LRCR_SOURCE = "longRunningCommandResult"
+
+
+def percentile(samples: Sequence[float], percent: float) -> float:
+    """Return a percentile of samples, interpolating between the closest
+    ranks
+
+    Args:
+        samples (list[float]): samples, not empty
+        percent (float): percentile, from 0 to 100
+    Returns:
+        float: the percentile
+    """
+    ordered = sorted(samples)
+    rank = (len(ordered) - 1) * percent / 100
+    lower = math.floor(rank)
+    upper = math.ceil(rank)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def simulation_mode(
+    simulated_devices: Optional[Dict[str, bool]] = None
+) -> str:
+    """Return the simulation mode of the deployment
+
+    Args:
+        simulated_devices (dict): as SIMULATED_DEVICES_DICT, which is used
+            if None
+    Returns:
+        str: key of SIMULATED_DEVICES_DICT which is set, "no_mocks" if none
+    """
+    if simulated_devices is None:
+        simulated_devices = SIMULATED_DEVICES_DICT
+    for mode, enabled in simulated_devices.items():
+        if enabled:
+            return mode
+    return "no_mocks"
+
+
+class CommandLatencies:
+    """Latency samples per command and source"""
+
+    def __init__(self):
+        self.samples: Dict[str, Dict[str, List[float]]] = {}
+
+    def add(self, command_name: str, source: str, latency: float) -> None:
+        """Record a latency
+
+        Args:
+            command_name (str): command name
+            source (str): LRCR_SOURCE or the key of the subarray device
+            latency (float): seconds from the command invocation
+        """
+        self.samples.setdefault(command_name, {}).setdefault(
+            source, []
+        ).append(latency)
+
+    def summary(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Return count, percentiles and maximum of the latencies, in
+        seconds, per command and source"""
+        return {
+            command_name: {
+                source: {
+                    "count": len(latencies),
+                    **{
+                        f"p{percent}": percentile(latencies, percent)
+                        for percent in PERCENTILES
+                    },
+                    "max": max(latencies),
+                }
+                for source, latencies in sources.items()
+            }
+            for command_name, sources in self.samples.items()
+        }
+
+
+def write_report(
+    latencies: CommandLatencies,
+    mode: str,
+    path: str = BENCHMARK_REPORT,
+) -> dict:
+    """Write the summary of the latencies of a simulation mode, keeping the
+    report of the other modes
+
+    Args:
+        latencies (CommandLatencies): latencies measured
+        mode (str): simulation mode of the deployment
+        path (str): JSON report
+    Returns:
+        dict: the report written
+    """
+    report = {}
+    if os.path.exists(path):
+        with open(path, "r", encoding="UTF-8") as report_file:
+            report = json.load(report_file)
+    report[mode] = latencies.summary()
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="UTF-8") as report_file:
+        json.dump(report, report_file, indent=4, sort_keys=True)
+    LOGGER.info("Command latencies of %s written to %s", mode, path)
+    return report
+
+
+class CommandLatencyBenchmark:
+    """Measures the latency of the commands invoked through the node
+    wrappers"""
+
+    def __init__(
+        self,
+        central_node: Any,
+        subarray_node: Any,
+        timeout: float = BENCHMARK_TIMEOUT,
+    ):
+        """
+        Args:
+            central_node (CentralNodeWrapperLow): CentralNode wrapper
+            subarray_node (SubarrayNodeWrapperLow): SubarrayNode wrapper
+            timeout (float): seconds to wait for the result of a command
+        """
+        self.central_node = central_node
+        self.subarray_node = subarray_node
+        self.timeout = timeout
+        self.latencies = CommandLatencies()
+
+    @property
+    def device_dict(self) -> Dict[str, str]:
+        """Names of the devices reporting the command results and
+        obsStates, keyed as device_dict_low"""
+        return {
+            "central_node": self.central_node.central_node.dev_name(),
+            "tmc_subarraynode": self.subarray_node.subarray_node.dev_name(),
+            **{
+                key: device.dev_name()
+                for key, device in self.subarray_node.subarray_devices.items()
+            },
+        }
+
+    def measure(
+        self,
+        command_name: str,
+        obs_state: str,
+        invoke: Callable[[], Any],
+        record: bool = True,
+    ) -> None:
+        """Invoke a command and record its latencies
+
+        Args:
+            command_name (str): command name, as reported
+            obs_state (str): obsState of the subarrays once complete
+            invoke (Callable): invokes the command, returning its result
+            record (bool): whether to record the latencies, False for the
+                commands bringing the subarray to the state of the next one
+        Raises:
+            AssertionError: if the command does not complete successfully
+        """
+        with LrcrCompletion(
+            self.device_dict, obs_state, self.timeout, verify_obs_states=True
+        ) as completion:
+            invoked_at = time.time()
+            result = completion.wait(invoke())
+            if not record:
+                return
+            self.latencies.add(
+                command_name, LRCR_SOURCE, result.timestamp - invoked_at
+            )
+            for key, event_data in completion.obs_state_events.items():
+                if event_data is True:
+                    # already in obs_state, no event to time
+                    continue
+                self.latencies.add(
+                    command_name,
+                    key,
+                    event_data["arg0"].reception_date.totime() - invoked_at,
+                )
+
+    def run(
+        self,
+        assign_json: str,
+        configure_json: str,
+        scan_json: str,
+        release_json: str,
+    ) -> None:
+        """Run the commands once, from and back to obsState EMPTY
+
+        Args:
+            assign_json (str): AssignResources input
+            configure_json (str): Configure input
+            scan_json (str): Scan input
+            release_json (str): ReleaseResources input
+        """
+        central_node = self.central_node.central_node
+        subarray_node = self.subarray_node.subarray_node
+        self.measure(
+            "AssignResources",
+            "IDLE",
+            lambda: central_node.AssignResources(assign_json),
+        )
+        self.measure(
+            "Configure",
+            "READY",
+            lambda: subarray_node.Configure(configure_json),
+        )
+        self.measure("Scan", "SCANNING", lambda: subarray_node.Scan(scan_json))
+        self.measure("EndScan", "READY", subarray_node.EndScan)
+        self.measure("End", "IDLE", subarray_node.End)
+        self.measure(
+            "ReleaseResources",
+            "EMPTY",
+            lambda: central_node.ReleaseResources(release_json),
+        )
+        self.measure(
+            "AssignResources",
+            "IDLE",
+            lambda: central_node.AssignResources(assign_json),
+            record=False,
+        )
+        self.measure("Abort", "ABORTED", subarray_node.Abort)
+        self.measure("Restart", "EMPTY", subarray_node.Restart)
@@ -4,6 +4,11 @@ import json
 
 from ska_control_model import ObsState, ResultCode
 
+from tests.resources.test_harness.subarray_lease import (
+    LEASED_DEVICE_NAMES,
+    LEASED_SUBARRAY_ID,
+    subarray_device_names,
+)
 from tests.resources.test_harness.utils.enums import (
     FaultType,
     SimulatorDeviceType,
@@ -111,31 +116,37 @@ COMMAND_NOT_ALLOWED_DEFECT = json.dumps(
 )
 
 low_centralnode = "ska_low/tm_central/central_node"
-tmc_low_subarraynode1 = "ska_low/tm_subarray_node/1"
-tmc_low_subarraynode2 = "ska_low/tm_subarray_node/2"
-tmc_low_subarraynode3 = "ska_low/tm_subarray_node/3"
+# the devices of subarray 1 are those of the subarray leased by the
+# pytest-xdist worker, see subarray_lease. Subarrays 2 and 3 are leased by
+# the workers gw1 and gw2, tests using them are marked telescope_wide.
+SUBARRAY2_DEVICE_NAMES = subarray_device_names(2)
+SUBARRAY3_DEVICE_NAMES = subarray_device_names(3)
+tmc_low_subarraynode1 = LEASED_DEVICE_NAMES["tmc_subarraynode"]
+tmc_low_subarraynode2 = SUBARRAY2_DEVICE_NAMES["tmc_subarraynode"]
+tmc_low_subarraynode3 = SUBARRAY3_DEVICE_NAMES["tmc_subarraynode"]
 low_csp_master_leaf_node = "ska_low/tm_leaf_node/csp_master"
 low_sdp_master_leaf_node = "ska_low/tm_leaf_node/sdp_master"
 mccs_master_leaf_node = "ska_low/tm_leaf_node/mccs_master"
-low_csp_subarray_leaf_node = "ska_low/tm_leaf_node/csp_subarray01"
-low_sdp_subarray_leaf_node = "ska_low/tm_leaf_node/sdp_subarray01"
-mccs_subarray_leaf_node = "ska_low/tm_leaf_node/mccs_subarray01"
-low_sdp_subarray1 = "low-sdp/subarray/01"
-low_sdp_subarray2 = "low-sdp/subarray/02"
-low_sdp_subarray3 = "low-sdp/subarray/03"
-low_csp_subarray1 = "low-csp/subarray/01"
-low_csp_subarray2 = "low-csp/subarray/02"
-low_csp_subarray3 = "low-csp/subarray/03"
+low_csp_subarray_leaf_node = LEASED_DEVICE_NAMES["csp_subarray_leaf_node"]
+low_sdp_subarray_leaf_node = LEASED_DEVICE_NAMES["sdp_subarray_leaf_node"]
+mccs_subarray_leaf_node = LEASED_DEVICE_NAMES["mccs_subarray_leaf_node"]
+low_sdp_subarray1 = LEASED_DEVICE_NAMES["sdp_subarray"]
+low_sdp_subarray2 = SUBARRAY2_DEVICE_NAMES["sdp_subarray"]
+low_sdp_subarray3 = SUBARRAY3_DEVICE_NAMES["sdp_subarray"]
+low_csp_subarray1 = LEASED_DEVICE_NAMES["csp_subarray"]
+low_csp_subarray2 = SUBARRAY2_DEVICE_NAMES["csp_subarray"]
+low_csp_subarray3 = SUBARRAY3_DEVICE_NAMES["csp_subarray"]
 low_sdp_master = "low-sdp/control/0"
 low_csp_master = "low-csp/control/0"
 mccs_controller = "low-mccs/control/control"
-mccs_subarray1 = "low-mccs/subarray/01"
-mccs_subarray2 = "low-mccs/subarray/02"
-mccs_subarray3 = "low-mccs/subarray/03"
+mccs_subarray1 = LEASED_DEVICE_NAMES["mccs_subarray"]
+mccs_subarray2 = SUBARRAY2_DEVICE_NAMES["mccs_subarray"]
+mccs_subarray3 = SUBARRAY3_DEVICE_NAMES["mccs_subarray"]
 processor1 = "low-cbf/processor/0.0.0"
+low_cbf_subarray1 = LEASED_DEVICE_NAMES["cbf_subarray"]
 mccs_pasdbus_prefix = "low-mccs/pasdbus/*"
 mccs_prefix = "low-mccs/*"
-mccs_subarraybeam = "low-mccs/subarraybeam/01"
+mccs_subarraybeam = LEASED_DEVICE_NAMES["mccs_subarraybeam"]
 pst = "low-pst/beam/01"
 
 device_dict_low = {
@@ -171,7 +182,7 @@ INITIAL_LOW_DELAY_JSON = {
     "validity_period_sec": 0.1,
     "config_id": "",
     "station_beam": 1,
-    "subarray": 1,
+    "subarray": LEASED_SUBARRAY_ID,
     "station_beam_delays": [
         {
             "station_id": 1,
@@ -0,0 +1,342 @@
+"""Vectorised analysis of successive delay models.
+
+A delay model holds, for every station, the polynomial
+``xypol_coeffs_ns`` giving the delay in ns as a function of the seconds
+elapsed since ``start_validity_sec``, and the ``ypol_offset_ns`` of the Y
+polarisation. The DelayModelSeries loads successive models into NumPy
+arrays of shape (stations, coefficients, models) so that the checks run on
+every station at once, which keeps them cheap at full array station
+counts:
+
+- non-finite coefficients or offsets
+- continuity: the polynomial of a model evaluated at the start of validity
+  of the next model has to match the next polynomial at its start, within
+  a tolerance
+- coverage: the next model has to start before the validity of the
+  previous one ends
+- drift rates of the delays and of the Y polarisation offsets
+
+The DelayModelAnalyser applies the checks to each model published, against
+the previous one, as the models are received.
+"""
+import json
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from ska_ser_logging import configure_logging
+
+configure_logging(logging.DEBUG)
+LOGGER = logging.getLogger(__name__)
+
+# Largest delay jump between consecutive models, in ns
+CONTINUITY_TOLERANCE_NS = 1.0
+
+StationKey = Tuple[int, int]
+
+
+def _parse(payload: Union[str, dict]) -> dict:
+    """Return a delay model, decoding it if given as JSON"""
+    if isinstance(payload, str):
+        return json.loads(payload)
+    return payload
+
+
+def station_key(station_beam_delay: dict) -> StationKey:
+    """Return the (station_id, substation_id) of a station beam delay"""
+    return (
+        int(station_beam_delay["station_id"]),
+        int(station_beam_delay["substation_id"]),
+    )
+
+
+class DelayModelSeries:
+    """Successive delay models of the same stations as NumPy arrays"""
+
+    def __init__(
+        self,
+        stations: List[StationKey],
+        coefficients: np.ndarray,
+        offsets: np.ndarray,
+        start_validity: np.ndarray,
+        validity_period: np.ndarray,
+    ):
+        """
+        Args:
+            stations (list[tuple]): (station_id, substation_id) per row
+            coefficients (np.ndarray): xypol_coeffs_ns, shape (stations,
+                coefficients, models), missing high orders being 0
+            offsets (np.ndarray): ypol_offset_ns, shape (stations, models)
+            start_validity (np.ndarray): start_validity_sec per model
+            validity_period (np.ndarray): validity_period_sec per model
+        """
+        self.stations = stations
+        self.coefficients = coefficients
+        self.offsets = offsets
+        self.start_validity = start_validity
+        self.validity_period = validity_period
+
+    @classmethod
+    def from_payloads(
+        cls, payloads: Sequence[Union[str, dict]]
+    ) -> "DelayModelSeries":
+        """Load delay models, the stations being ordered as in the first
+        model
+
+        Args:
+            payloads (list[str | dict]): delay models, JSON or decoded, in
+                publication order
+        Returns:
+            DelayModelSeries: the models
+        Raises:
+            ValueError: if the models are not of the same stations, or a
+                model holds a station more than once
+        """
+        delay_models = [_parse(payload) for payload in payloads]
+        stations = [
+            station_key(delay)
+            for delay in delay_models[0]["station_beam_delays"]
+        ]
+        order = {station: row for row, station in enumerate(stations)}
+        if len(order) != len(stations):
+            raise ValueError(f"Delay model 0 repeats stations: {stations}")
+        # at least the constant term, evaluated at the model boundaries
+        coefficient_count = max(
+            (
+                len(delay["xypol_coeffs_ns"])
+                for delay_model in delay_models
+                for delay in delay_model["station_beam_delays"]
+            ),
+            default=1,
+        )
+        coefficient_count = max(coefficient_count, 1)
+        coefficients = np.zeros(
+            (len(stations), coefficient_count, len(delay_models))
+        )
+        offsets = np.zeros((len(stations), len(delay_models)))
+        for index, delay_model in enumerate(delay_models):
+            delays = delay_model["station_beam_delays"]
+            rows = [order.get(station_key(delay)) for delay in delays]
+            if len(delays) != len(stations) or None in rows:
+                raise ValueError(
+                    f"Delay model {index} is not of the stations {stations}"
+                )
+            if len(set(rows)) != len(rows):
+                raise ValueError(
+                    f"Delay model {index} repeats stations: "
+                    f"{[station_key(delay) for delay in delays]}"
+                )
+            for row, delay in zip(rows, delays):
+                xypol_coeffs = delay["xypol_coeffs_ns"]
+                coefficients[row, : len(xypol_coeffs), index] = xypol_coeffs
+                offsets[row, index] = delay["ypol_offset_ns"]
+        return cls(
+            stations,
+            coefficients,
+            offsets,
+            np.array([model["start_validity_sec"] for model in delay_models]),
+            np.array([model["validity_period_sec"] for model in delay_models]),
+        )
+
+    @property
+    def model_count(self) -> int:
+        """Number of models"""
+        return len(self.start_validity)
+
+    def evaluate(self, elapsed: np.ndarray) -> np.ndarray:
+        """Evaluate the polynomial of every station and model
+
+        Args:
+            elapsed (np.ndarray): seconds since the start of validity, per
+                model
+        Returns:
+            np.ndarray: delays in ns, shape (stations, models)
+        """
+        orders = np.arange(self.coefficients.shape[1])
+        powers = np.power.outer(elapsed, orders).T
+        return np.einsum("sck,ck->sk", self.coefficients, powers)
+
+    def non_finite(self) -> List[Tuple[int, StationKey]]:
+        """Return the (model index, station) having a non-finite
+        coefficient or offset"""
+        invalid = ~np.isfinite(self.coefficients).all(axis=1)
+        invalid |= ~np.isfinite(self.offsets)
+        rows, models = np.nonzero(invalid)
+        return [
+            (int(model), self.stations[row])
+            for row, model in sorted(zip(rows, models), key=lambda x: x[1])
+        ]
+
+    def boundary_jumps(self) -> np.ndarray:
+        """Return the delay jump at each model boundary, in ns
+
+        Returns:
+            np.ndarray: delay of the next model at its start minus the delay
+            of the previous model at that time, shape (stations, models - 1)
+        """
+        if self.model_count < 2:
+            return np.zeros((len(self.stations), 0))
+        elapsed = np.diff(self.start_validity)
+        previous = self.evaluate(np.append(elapsed, 0.0))[:, :-1]
+        following = self.coefficients[:, 0, 1:]
+        return following - previous
+
+    def discontinuities(
+        self, tolerance: float = CONTINUITY_TOLERANCE_NS
+    ) -> List[Tuple[int, StationKey, float]]:
+        """Return the (boundary index, station, jump in ns) of the jumps
+        larger than tolerance, boundary i being between models i and i + 1
+        """
+        jumps = self.boundary_jumps()
+        with np.errstate(invalid="ignore"):
+            rows, boundaries = np.nonzero(np.abs(jumps) > tolerance)
+        return [
+            (int(boundary), self.stations[row], float(jumps[row, boundary]))
+            for row, boundary in sorted(
+                zip(rows, boundaries), key=lambda x: x[1]
+            )
+        ]
+
+    def coverage_gaps(self) -> List[Tuple[int, float]]:
+        """Return the (boundary index, seconds) of the boundaries where the
+        next model starts after the validity of the previous one ended"""
+        gaps = self.start_validity[1:] - (
+            self.start_validity[:-1] + self.validity_period[:-1]
+        )
+        return [
+            (int(boundary), float(gaps[boundary]))
+            for boundary in np.nonzero(gaps > 0)[0]
+        ]
+
+    def drift_rates(self) -> np.ndarray:
+        """Return the delay drift rate at the start of each model, in ns/s,
+        shape (stations, models)"""
+        if self.coefficients.shape[1] < 2:
+            return np.zeros(self.offsets.shape)
+        return self.coefficients[:, 1, :]
+
+    def offset_drift_rates(self) -> np.ndarray:
+        """Return the drift rate of ypol_offset_ns between consecutive
+        models, in ns/s, shape (stations, models - 1)"""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.diff(self.offsets, axis=1) / np.diff(self.start_validity)
+
+
+class DelayModelAnalysis:
+    """Outcome of the checks of successive delay models"""
+
+    def __init__(
+        self,
+        series: DelayModelSeries,
+        tolerance: float = CONTINUITY_TOLERANCE_NS,
+    ):
+        """
+        Args:
+            series (DelayModelSeries): models to check
+            tolerance (float): largest delay jump at a boundary, in ns
+        """
+        self.model_count = series.model_count
+        self.station_count = len(series.stations)
+        self.non_finite = series.non_finite()
+        self.discontinuities = series.discontinuities(tolerance)
+        self.coverage_gaps = series.coverage_gaps()
+        drift_rates = series.drift_rates()
+        self.max_drift_rate = (
+            float(np.nanmax(np.abs(drift_rates))) if drift_rates.size else 0.0
+        )
+        offset_drift_rates = series.offset_drift_rates()
+        self.max_offset_drift_rate = (
+            float(np.nanmax(np.abs(offset_drift_rates)))
+            if offset_drift_rates.size
+            else 0.0
+        )
+
+    @property
+    def ok(self) -> bool:
+        """Whether the models are finite, continuous and without gaps"""
+        return not (
+            self.non_finite or self.discontinuities or self.coverage_gaps
+        )
+
+    def as_dict(self) -> dict:
+        """Return the analysis as a JSON serialisable dict"""
+        return {
+            "models": self.model_count,
+            "stations": self.station_count,
+            "non_finite": self.non_finite,
+            "discontinuities": self.discontinuities,
+            "coverage_gaps": self.coverage_gaps,
+            "max_drift_rate_ns_per_sec": self.max_drift_rate,
+            "max_offset_drift_rate_ns_per_sec": self.max_offset_drift_rate,
+        }
+
+
+def analyse(
+    payloads: Sequence[Union[str, dict]],
+    tolerance: float = CONTINUITY_TOLERANCE_NS,
+) -> DelayModelAnalysis:
+    """Check successive delay models
+
+    Args:
+        payloads (list[str | dict]): delay models in publication order
+        tolerance (float): largest delay jump at a boundary, in ns
+    Returns:
+        DelayModelAnalysis: outcome of the checks
+    """
+    return DelayModelAnalysis(
+        DelayModelSeries.from_payloads(payloads), tolerance
+    )
+
+
+class DelayModelAnalyser:
+    """Checks each delay model received against the previous one, the
+    problems found being accumulated"""
+
+    def __init__(self, tolerance: float = CONTINUITY_TOLERANCE_NS):
+        """
+        Args:
+            tolerance (float): largest delay jump at a boundary, in ns
+        """
+        self.tolerance = tolerance
+        self.model_count = 0
+        self.problems: List[Dict[str, Any]] = []
+        self._previous: Optional[dict] = None
+        self._lock = threading.Lock()
+
+    def add(self, payload: Union[str, dict]) -> Optional[DelayModelAnalysis]:
+        """Check a delay model against the previous one. A model which
+        cannot be analysed, e.g. repeating a station, is recorded as an
+        invalid model problem.
+
+        Args:
+            payload (str | dict): delay model, JSON or decoded
+        Returns:
+            DelayModelAnalysis: outcome of the checks of the model, and of
+            its boundary with the previous model, None if the model is
+            invalid
+        """
+        delay_model = _parse(payload)
+        with self._lock:
+            previous = self._previous
+            self._previous = delay_model
+            self.model_count += 1
+        payloads = (
+            [delay_model] if previous is None else [previous, delay_model]
+        )
+        try:
+            analysis = analyse(payloads, self.tolerance)
+        except ValueError:
+            # the stations changed, the model starts a new series
+            try:
+                analysis = analyse([delay_model], self.tolerance)
+            except ValueError as error:
+                LOGGER.warning("Invalid delay model: %s", error)
+                with self._lock:
+                    self.problems.append({"invalid_model": str(error)})
+                return None
+        if not analysis.ok:
+            LOGGER.warning("Delay model problems: %s", analysis.as_dict())
+            with self._lock:
+                self.problems.append(analysis.as_dict())
+        return analysis
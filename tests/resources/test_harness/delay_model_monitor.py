@@ -0,0 +1,363 @@
+"""Publication cadence and jitter of the delay models.
+
+CspSubarrayLeafNode publishes a delay model, delayModel for the station
+beams and delayModelPSTBeam<N> for the PST beams, every cadence_sec
+seconds. Each model is valid from start_validity_sec, so it has to be
+published ahead of that time. The DelayModelMonitor subscribes a delay
+model attribute for a window and measures, for every model published:
+
+- the interval since the previous model, against cadence_sec
+- the lead time of start_validity_sec over the reception time
+- the payload size
+
+The DelayModelReport summarises them as histograms, jitter, missed
+updates and late models. wait_for_delay_model waits for the first model
+generated, as the attribute holds an initial model until then.
+"""
+import json
+import logging
+import os
+import statistics
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from ska_ser_logging import configure_logging
+
+from tests.resources.test_harness.delay_model_analyser import (
+    DelayModelAnalyser,
+)
+from tests.resources.test_support.common_utils.event_hub import (
+    CHANGE_EVENT_HUB,
+    ChangeEventHub,
+)
+
+configure_logging(logging.DEBUG)
+LOGGER = logging.getLogger(__name__)
+
+# Seconds the delay model tests monitor the publications, 0 skips it
+DELAY_MONITOR_WINDOW = float(os.getenv("DELAY_MONITOR_WINDOW", "0"))
+# start_validity_sec counts TAI seconds since the SKA epoch,
+# 2000-01-01T00:00:00 TAI, that is 1999-12-31T23:59:28 UTC
+SKA_EPOCH_UNIX_TIME = 946684768.0
+# Leap seconds inserted since the SKA epoch
+LEAP_SECONDS_SINCE_SKA_EPOCH = 5
+# Interval histogram edges, as fractions of cadence_sec
+INTERVAL_EDGES = (0.5, 0.9, 1.1, 1.5, 2.5)
+# Lead time histogram edges, in seconds
+LEAD_TIME_EDGES = (0.0, 1.0, 2.0, 5.0, 10.0)
+
+
+def ska_epoch_seconds(unix_time: float) -> float:
+    """Convert a UNIX time to seconds since the SKA epoch, as
+    start_validity_sec
+
+    Args:
+        unix_time (float): seconds since the UNIX epoch
+    Returns:
+        float: TAI seconds since the SKA epoch
+    """
+    return unix_time - SKA_EPOCH_UNIX_TIME + LEAP_SECONDS_SINCE_SKA_EPOCH
+
+
+def histogram(values: Sequence[float], edges: Sequence[float]) -> dict:
+    """Count values per bin, the first and last bins being open
+
+    Args:
+        values (list[float]): values
+        edges (list[float]): increasing bin edges
+    Returns:
+        dict: count per bin label, e.g. "<0.5", "0.5-0.9", ">=2.5"
+    """
+    labels = [f"<{edges[0]}"]
+    labels += [f"{low}-{high}" for low, high in zip(edges, edges[1:])]
+    labels.append(f">={edges[-1]}")
+    counts = dict.fromkeys(labels, 0)
+    for value in values:
+        index = sum(1 for edge in edges if value >= edge)
+        counts[labels[index]] += 1
+    return counts
+
+
+class DelayModelSample:
+    """Delay model received from a change event"""
+
+    def __init__(
+        self,
+        timestamp: float,
+        payload_size: int,
+        cadence_sec: float,
+        start_validity_sec: float,
+    ):
+        """
+        Args:
+            timestamp (float): reception time, seconds since the epoch
+            payload_size (int): size of the JSON payload, in bytes
+            cadence_sec (float): publication cadence of the model
+            start_validity_sec (float): start of validity, seconds since
+                the SKA epoch
+        """
+        self.timestamp = timestamp
+        self.payload_size = payload_size
+        self.cadence_sec = cadence_sec
+        self.start_validity_sec = start_validity_sec
+
+    @property
+    def lead_time(self) -> float:
+        """Seconds from the reception to the start of validity, negative
+        if the model was received late"""
+        return self.start_validity_sec - ska_epoch_seconds(self.timestamp)
+
+    def __repr__(self):
+        return (
+            f"DelayModelSample({self.timestamp}, {self.payload_size}B, "
+            f"cadence={self.cadence_sec}, lead_time={self.lead_time:.3f})"
+        )
+
+
+class DelayModelReport:
+    """Timing of the delay models received during a window"""
+
+    def __init__(
+        self,
+        attribute_name: str,
+        samples: List[DelayModelSample],
+        window: float,
+        invalid_count: int = 0,
+    ):
+        """
+        Args:
+            attribute_name (str): delay model attribute
+            samples (list[DelayModelSample]): models in reception order
+            window (float): monitoring window, in seconds
+            invalid_count (int): payloads which are not a delay model
+        """
+        self.attribute_name = attribute_name
+        self.samples = samples
+        self.window = window
+        self.invalid_count = invalid_count
+
+    @property
+    def cadence(self) -> Optional[float]:
+        """Cadence announced by the models, None if none was received"""
+        if not self.samples:
+            return None
+        return statistics.median(sample.cadence_sec for sample in self.samples)
+
+    @property
+    def intervals(self) -> List[float]:
+        """Seconds between consecutive models"""
+        return [
+            later.timestamp - earlier.timestamp
+            for earlier, later in zip(self.samples, self.samples[1:])
+        ]
+
+    @property
+    def missed_updates(self) -> int:
+        """Publications missing between consecutive models, an interval of
+        n cadences missing n - 1 models"""
+        if not self.cadence:
+            return 0
+        return sum(
+            max(round(interval / self.cadence) - 1, 0)
+            for interval in self.intervals
+        )
+
+    @property
+    def late_count(self) -> int:
+        """Models received after their start of validity"""
+        return sum(1 for sample in self.samples if sample.lead_time < 0)
+
+    def jitter(self) -> Dict[str, float]:
+        """Deviation of the intervals from the cadence, in seconds"""
+        deviations = [
+            abs(interval - self.cadence) for interval in self.intervals
+        ]
+        if not deviations:
+            return {}
+        return {
+            "mean_abs": statistics.fmean(deviations),
+            "max_abs": max(deviations),
+            "stdev": statistics.pstdev(self.intervals),
+        }
+
+    def as_dict(self) -> dict:
+        """Return the report as a JSON serialisable dict"""
+        report = {
+            "attribute": self.attribute_name,
+            "window_sec": self.window,
+            "received": len(self.samples),
+            "invalid": self.invalid_count,
+            "cadence_sec": self.cadence,
+        }
+        if not self.cadence:
+            return report
+        lead_times = [sample.lead_time for sample in self.samples]
+        payload_sizes = [sample.payload_size for sample in self.samples]
+        report.update(
+            {
+                "expected": int(self.window / self.cadence),
+                "missed_updates": self.missed_updates,
+                "late": self.late_count,
+                "jitter_sec": self.jitter(),
+                "interval_histogram": histogram(
+                    [interval / self.cadence for interval in self.intervals],
+                    INTERVAL_EDGES,
+                ),
+                "lead_time_sec": {
+                    "min": min(lead_times),
+                    "median": statistics.median(lead_times),
+                    "histogram": histogram(lead_times, LEAD_TIME_EDGES),
+                },
+                "payload_bytes": {
+                    "min": min(payload_sizes),
+                    "max": max(payload_sizes),
+                    "mean": statistics.fmean(payload_sizes),
+                },
+            }
+        )
+        return report
+
+
+class DelayModelMonitor:
+    """Records the delay models published on an attribute.
+
+    Used as a context manager, the models received between entry and exit
+    being recorded, or through monitor for a fixed window.
+    """
+
+    def __init__(
+        self,
+        device: Any,
+        attribute_name: str = "delayModel",
+        hub: ChangeEventHub = CHANGE_EVENT_HUB,
+        analyser: Optional[DelayModelAnalyser] = None,
+    ):
+        """
+        Args:
+            device (str | DeviceProxy): CspSubarrayLeafNode
+            attribute_name (str): delayModel or delayModelPSTBeam<N>
+            hub (ChangeEventHub): hub the attribute is subscribed through
+            analyser (DelayModelAnalyser): checks the values of each model
+                received, if given
+        """
+        self.device = device
+        self.attribute_name = attribute_name
+        self.hub = hub
+        self.analyser = analyser
+        self.samples: List[DelayModelSample] = []
+        self.invalid_count = 0
+        self.started_at = 0.0
+        self._lock = threading.Lock()
+        self._handle: Optional[int] = None
+
+    def add_event(self, event: Any) -> None:
+        """Record a delay model change event, usable as event callback"""
+        timestamp = event.reception_date.totime()
+        if event.err or timestamp < self.started_at:
+            return
+        payload = event.attr_value.value
+        try:
+            delay_model = json.loads(payload)
+            sample = DelayModelSample(
+                timestamp,
+                len(payload.encode()),
+                float(delay_model["cadence_sec"]),
+                float(delay_model["start_validity_sec"]),
+            )
+        except (TypeError, ValueError, KeyError, AttributeError):
+            with self._lock:
+                self.invalid_count += 1
+            return
+        with self._lock:
+            self.samples.append(sample)
+        if self.analyser is not None:
+            self.analyser.add(delay_model)
+
+    def __enter__(self) -> "DelayModelMonitor":
+        # the model held when subscribing was published before the window
+        self.started_at = float("inf")
+        self._handle = self.hub.subscribe(
+            self.device, self.attribute_name, self.add_event
+        )
+        self.started_at = time.time()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._handle is not None:
+            self.hub.unsubscribe(self._handle)
+            self._handle = None
+
+    def report(self) -> DelayModelReport:
+        """Return the report of the models received so far"""
+        with self._lock:
+            samples = list(self.samples)
+            invalid_count = self.invalid_count
+        return DelayModelReport(
+            self.attribute_name,
+            samples,
+            time.time() - self.started_at,
+            invalid_count,
+        )
+
+    def monitor(self, window: float) -> DelayModelReport:
+        """Record the delay models published during a window
+
+        Args:
+            window (float): seconds to monitor
+        Returns:
+            DelayModelReport: timing of the models received
+        """
+        with self:
+            time.sleep(window)
+            report = self.report()
+        LOGGER.info(
+            "Delay model publications: %s", json.dumps(report.as_dict())
+        )
+        return report
+
+
+def wait_for_delay_model(
+    device: Any,
+    attribute_name: str = "delayModel",
+    initial: Optional[dict] = None,
+    timeout: float = 10.0,
+    hub: ChangeEventHub = CHANGE_EVENT_HUB,
+) -> dict:
+    """Wait for a change event of a delay model attribute holding a model
+    other than initial. The model held when subscribing counts, it may
+    already have been generated.
+
+    Args:
+        device (str | DeviceProxy): CspSubarrayLeafNode
+        attribute_name (str): delayModel or delayModelPSTBeam<N>
+        initial (dict): model published before any is generated
+        timeout (float): seconds to wait for
+        hub (ChangeEventHub): hub the attribute is subscribed through
+    Returns:
+        dict: the decoded delay model
+    Raises:
+        AssertionError: if no such model is received in time
+    """
+    received = threading.Event()
+    delay_models: List[dict] = []
+
+    def _on_event(event):
+        if event.err or received.is_set():
+            return
+        try:
+            delay_model = json.loads(event.attr_value.value)
+        except (TypeError, ValueError, AttributeError):
+            return
+        if delay_model != initial:
+            delay_models.append(delay_model)
+            received.set()
+
+    handle = hub.subscribe(device, attribute_name, _on_event)
+    try:
+        assert received.wait(
+            timeout
+        ), f"No {attribute_name} generated within {timeout}s"
+    finally:
+        hub.unsubscribe(handle)
+    return delay_models[0]
@@ -0,0 +1,172 @@
+"""Tracking of the simulator state changed by a test.
+
+The tear downs used to reset healthState, defects, delay info, command call
+info and transitions of every simulator after every test. The DirtyTracker
+intercepts the commands invoked through any DeviceProxy of the test process
+and records:
+
+- the setters invoked on a simulator, SetDirectHealthState, SetDefective and
+  SetDelayInfo, which dirty the state reset by the tear down
+- the commands invoked on a simulator, which may record transitions
+- whether a TMC command was invoked, as TMC forwards commands and delay
+  models to every simulator
+
+so that the tear downs only reset what a test changed. The tracker is
+installed for each test, the simulators being clean when it starts as the
+tear downs clear the command call data last. While the tracker is not
+installed every state is considered dirty.
+"""
+import functools
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Optional, Set
+
+from ska_ser_logging import configure_logging
+from tango import DeviceProxy
+
+from tests.resources.test_support.common_utils.device_proxy_pool import (
+    get_device_name,
+)
+
+configure_logging(logging.DEBUG)
+LOGGER = logging.getLogger(__name__)
+
+# Track the simulator state changed by each test, reset everything if not
+DIRTY_TRACKING = os.getenv("DIRTY_TRACKING", "true").lower() == "true"
+
+# Simulator states reset by the tear downs
+HEALTH_STATE = "healthState"
+DEFECTS = "defects"
+DELAY_INFO = "delayInfo"
+COMMAND_CALL_INFO = "commandCallInfo"
+TRANSITIONS = "transitions"
+# States a TMC command may change on every simulator
+TMC_DIRTIED_STATES = (DELAY_INFO, COMMAND_CALL_INFO, TRANSITIONS)
+
+# Setters of the helper devices and the state they change
+SETTER_STATES = {
+    "setdirecthealthstate": HEALTH_STATE,
+    "setdefective": DEFECTS,
+    "setdelayinfo": DELAY_INFO,
+}
+# Commands of the tear downs, which do not dirty a simulator
+RESET_COMMANDS = {
+    "resetdelayinfo",
+    "clearcommandcallinfo",
+    "resettransitions",
+}
+# TMC devices forward the commands they receive to the simulators
+TMC_DEVICE_PREFIX = "ska_low/tm_"
+
+
+class DirtyTracker:
+    """Records the simulator states changed through intercepted command
+    calls"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._dirty: Dict[str, Set[str]] = {}
+        self.tmc_command_invoked = False
+        self._original_methods: Dict[str, Callable] = {}
+
+    @property
+    def installed(self) -> bool:
+        """Whether command calls are intercepted"""
+        return bool(self._original_methods)
+
+    def install(self) -> None:
+        """Intercept the commands invoked through DeviceProxy"""
+        if self.installed:
+            return
+        for method_name in ("command_inout", "command_inout_asynch"):
+            original = getattr(DeviceProxy, method_name)
+            self._original_methods[method_name] = original
+            setattr(DeviceProxy, method_name, self._intercept(original))
+
+    def uninstall(self) -> None:
+        """Stop intercepting commands and forget the recorded states"""
+        for method_name, original in self._original_methods.items():
+            setattr(DeviceProxy, method_name, original)
+        self._original_methods = {}
+        self.reset()
+
+    def _intercept(self, method: Callable) -> Callable:
+        """Wrap a DeviceProxy command method to record its calls"""
+        tracker = self
+
+        @functools.wraps(method)
+        def intercepted(proxy, command_name, *args, **kwargs):
+            tracker.record(proxy, command_name)
+            return method(proxy, command_name, *args, **kwargs)
+
+        return intercepted
+
+    def record(self, device: Any, command_name: str) -> None:
+        """Record a command call
+
+        Args:
+            device (str | DeviceProxy): device the command is invoked on
+            command_name (str): command name
+        """
+        device_name = get_device_name(device)
+        command_name = command_name.lower()
+        if command_name in RESET_COMMANDS:
+            return
+        with self._lock:
+            if device_name.startswith(TMC_DEVICE_PREFIX):
+                self.tmc_command_invoked = True
+                return
+            states = self._dirty.setdefault(device_name, set())
+            states.update((COMMAND_CALL_INFO, TRANSITIONS))
+            if command_name in SETTER_STATES:
+                states.add(SETTER_STATES[command_name])
+
+    def reset(self) -> None:
+        """Forget the recorded states, e.g. once torn down"""
+        with self._lock:
+            self._dirty = {}
+            self.tmc_command_invoked = False
+
+    def is_dirty(self, device: Any, state: str) -> bool:
+        """Check whether a test may have changed a state of a simulator
+
+        Args:
+            device (str | DeviceProxy): simulator device
+            state (str): HEALTH_STATE, DEFECTS, DELAY_INFO,
+                COMMAND_CALL_INFO or TRANSITIONS
+        Returns:
+            bool: True if the state has to be reset, always True if the
+            tracker is not installed
+        """
+        if not self.installed:
+            return True
+        with self._lock:
+            if self.tmc_command_invoked and state in TMC_DIRTIED_STATES:
+                return True
+            return state in self._dirty.get(get_device_name(device), ())
+
+    def needs_reset(
+        self,
+        device: Any,
+        state: str,
+        check: Optional[Callable[[Any], bool]] = None,
+    ) -> bool:
+        """Check whether a state of a simulator has to be reset
+
+        Args:
+            device (str | DeviceProxy): simulator device
+            state (str): HEALTH_STATE, DEFECTS, DELAY_INFO,
+                COMMAND_CALL_INFO or TRANSITIONS
+            check (Callable): reads the device to tell whether the state
+                differs from its reset value, used if the tracker is not
+                installed
+        Returns:
+            bool: True if the state has to be reset
+        """
+        if not self.installed and check is not None:
+            return check(device)
+        return self.is_dirty(device, state)
+
+
+DIRTY_TRACKER = DirtyTracker()
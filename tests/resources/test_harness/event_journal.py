@@ -0,0 +1,253 @@
+"""Compact msgpack journal of the change events received during a test.
+
+Every event dispatched by the ChangeEventHub, hence every event captured by
+the EventRecorder and the event tracer, is appended to a per test journal
+file. A record is made of two consecutive msgpack objects:
+
+- the header ``[timestamp, device, attribute, quality, error]``
+- the attribute value, numpy arrays being encoded by msgpack_numpy from the
+  array buffer without copying it
+
+Keeping the value apart from the header lets the JournalReader index a
+journal by skipping over the values, which are only decoded for the records
+actually queried. The reader memory maps the journal so that a journal
+collected as CI artifact can be analysed offline.
+"""
+import logging
+import mmap
+import os
+import re
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import msgpack
+import msgpack_numpy
+from ska_ser_logging import configure_logging
+
+configure_logging(logging.DEBUG)
+LOGGER = logging.getLogger(__name__)
+
+# Directory where a journal is written per test, journaling is disabled if
+# not set.
+EVENT_JOURNAL_DIR = os.getenv("EVENT_JOURNAL_DIR")
+
+
+def _encode(obj: Any) -> Any:
+    """msgpack default hook: numpy data through msgpack_numpy, Tango enums
+    like DevState and AttrQuality as int and anything else as str"""
+    encoded = msgpack_numpy.encode(obj)
+    if encoded is not obj:
+        return encoded
+    try:
+        return int(obj)
+    except (TypeError, ValueError):
+        return str(obj)
+
+
+def journal_path(directory: str, test_name: str) -> str:
+    """Return the journal path of a test
+
+    Args:
+        directory (str): journal directory
+        test_name (str): pytest node id of the test
+    Returns:
+        str: path of the journal file
+    """
+    file_name = re.sub(r"[^\w.-]+", "_", test_name).strip("_")
+    return os.path.join(directory, f"{file_name}.msgpack")
+
+
+class EventJournal:
+    """Append only msgpack journal of change events, usable as a tap of the
+    ChangeEventHub"""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): journal file, created if missing
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._packer = msgpack.Packer(default=_encode, use_bin_type=True)
+        self._file = open(path, "ab")  # pylint: disable=consider-using-with
+        self.record_count = 0
+
+    def record(
+        self,
+        device_name: str,
+        attribute_name: str,
+        value: Any,
+        quality: Any = None,
+        timestamp: float = 0.0,
+        error: Optional[str] = None,
+    ) -> None:
+        """Append a record to the journal
+
+        Args:
+            device_name (str): device name
+            attribute_name (str): attribute name
+            value (Any): attribute value
+            quality (AttrQuality): attribute quality
+            timestamp (float): reception time, seconds since the epoch
+            error (str): error description of error events
+        """
+        header = self._packer.pack(
+            [timestamp, device_name, attribute_name, quality, error]
+        )
+        packed_value = self._packer.pack(value)
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(header)
+            self._file.write(packed_value)
+            self.record_count += 1
+
+    def tap(self, device_name: str, attribute_name: str, event: Any) -> None:
+        """Journal a tango change event, ChangeEventHub tap"""
+        timestamp = event.reception_date.totime()
+        if event.err:
+            self.record(
+                device_name,
+                attribute_name,
+                None,
+                timestamp=timestamp,
+                error=str(event.errors),
+            )
+            return
+        self.record(
+            device_name,
+            attribute_name,
+            event.attr_value.value,
+            event.attr_value.quality,
+            timestamp,
+        )
+
+    def close(self) -> None:
+        """Flush and close the journal"""
+        with self._lock:
+            self._file.close()
+        LOGGER.info("Journaled %s events to %s", self.record_count, self.path)
+
+
+class JournalRecord:
+    """Change event read back from a journal"""
+
+    def __init__(self, header: list, value: Any):
+        (
+            self.timestamp,
+            self.device_name,
+            self.attribute_name,
+            self.quality,
+            self.error,
+        ) = header
+        self.value = value
+
+    def __repr__(self):
+        return (
+            f"JournalRecord({self.timestamp}, {self.device_name}/"
+            f"{self.attribute_name}, {self.value!r})"
+        )
+
+
+class JournalReader:
+    """Memory mapped reader of an EventJournal. The journal is indexed on
+    opening, values are decoded only for the records read."""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): journal file
+        """
+        self.path = path
+        # header and value offsets of each record, in journal order
+        self._records: List[Tuple[list, int, int]] = []
+        self._by_attribute: Dict[Tuple[str, str], List[int]] = {}
+        with open(path, "rb") as journal:
+            if os.fstat(journal.fileno()).st_size == 0:
+                self._map = b""
+            else:
+                self._map = mmap.mmap(
+                    journal.fileno(), 0, access=mmap.ACCESS_READ
+                )
+        self._index()
+
+    def _index(self) -> None:
+        """Read the record headers, skipping over the values"""
+        if not self._map:
+            return
+        unpacker = msgpack.Unpacker(self._map, raw=False)
+        while True:
+            try:
+                header = unpacker.unpack()
+                value_start = unpacker.tell()
+                unpacker.skip()
+            except msgpack.OutOfData:
+                # a record cut short by an interrupted test is ignored
+                break
+            key = (header[1], header[2].lower())
+            self._by_attribute.setdefault(key, []).append(len(self._records))
+            self._records.append((header, value_start, unpacker.tell()))
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __iter__(self) -> Iterator[JournalRecord]:
+        for position in range(len(self._records)):
+            yield self[position]
+
+    def __getitem__(self, position: int) -> JournalRecord:
+        header, value_start, value_end = self._records[position]
+        return JournalRecord(
+            header,
+            msgpack.unpackb(
+                self._map[value_start:value_end],
+                object_hook=msgpack_numpy.decode,
+                raw=False,
+            ),
+        )
+
+    def attributes(self) -> List[Tuple[str, str]]:
+        """Return the journaled (device name, attribute name) pairs"""
+        return list(self._by_attribute)
+
+    def query(
+        self,
+        device_name: Optional[str] = None,
+        attribute_name: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+    ) -> List[JournalRecord]:
+        """Return the records matching all given criteria
+
+        Args:
+            device_name (str): device name
+            attribute_name (str): attribute name, case insensitive
+            since (float): earliest reception time, seconds since the epoch
+            until (float): latest reception time, seconds since the epoch
+        Returns:
+            list[JournalRecord]: matching records in journal order
+        """
+        positions = []
+        for (device, attribute), indexes in self._by_attribute.items():
+            if device_name is not None and device != device_name.lower():
+                continue
+            if (
+                attribute_name is not None
+                and attribute != attribute_name.lower()
+            ):
+                continue
+            positions.extend(indexes)
+        return [
+            self[position]
+            for position in sorted(positions)
+            if (since is None or self._records[position][0][0] >= since)
+            and (until is None or self._records[position][0][0] <= until)
+        ]
+
+    def close(self) -> None:
+        """Unmap the journal"""
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
@@ -1,18 +1,47 @@
 """Implement Event checker class which can be used to validate events
 """
+import json
 import logging
-from typing import Any
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from itertools import islice
+from typing import AbstractSet, Any, Dict, Optional, Sequence, Set
 
+from numpy import ndarray
 from ska_ser_logging import configure_logging
 from ska_tango_testing.mock.placeholders import Anything
 from ska_tango_testing.mock.tango.event_callback import (
     MockTangoEventCallbackGroup,
 )
-from tango import DeviceProxy, EventType
+from tango import DeviceProxy
+
+from tests.resources.test_harness.lrcr_index import (
+    LRCR_ATTRIBUTE_NAME,
+    LrcrIndex,
+)
+from tests.resources.test_support.common_utils.event_hub import (
+    CHANGE_EVENT_HUB,
+)
 
 configure_logging(logging.DEBUG)
 LOGGER = logging.getLogger(__name__)
 
+# Bounded event recording for long runs, events are kept per attribute up to
+# the given count and/or age in seconds. Unbounded if not set.
+EVENT_BUFFER_MAX_EVENTS = (
+    int(os.getenv("EVENT_BUFFER_MAX_EVENTS"))
+    if os.getenv("EVENT_BUFFER_MAX_EVENTS")
+    else None
+)
+EVENT_BUFFER_MAX_AGE = (
+    float(os.getenv("EVENT_BUFFER_MAX_AGE"))
+    if os.getenv("EVENT_BUFFER_MAX_AGE")
+    else None
+)
+
 
 class AttributeNotSubscribed(Exception):
     # Raise this exception when attribute is not subscribed
@@ -44,9 +73,9 @@ class EventRecorder(object):
             callable_name,
             timeout=timeout,
         )
-        event_id = device.subscribe_event(
+        event_id = CHANGE_EVENT_HUB.subscribe(
+            device,
             attribute_name,
-            EventType.CHANGE_EVENT,
             attribute_change_event_callback[callable_name],
         )
         self.subscribed_devices.append((device, event_id))
@@ -90,9 +119,9 @@ class EventRecorder(object):
 
     def clear_events(self):
         """Clear Subscribed Events"""
-        for device, event_id in self.subscribed_devices:
+        for _, event_id in self.subscribed_devices:
             try:
-                device.unsubscribe_event(event_id)
+                CHANGE_EVENT_HUB.unsubscribe(event_id)
             except KeyError:
                 # If event id is not subscribed then Key Error is raised
                 pass
@@ -138,3 +167,452 @@ class EventRecorder(object):
         raise AttributeNotSubscribed(
             f"Attribute {callable_name} is not subscribed"
         )
+
+
+def _index_key(value: Any) -> Any:
+    """Return a hashable representation of an attribute value"""
+    if isinstance(value, ndarray):
+        return tuple(value.tolist())
+    if isinstance(value, list):
+        return tuple(value)
+    return value
+
+
+def _has_placeholder(value: Any) -> bool:
+    """Check whether a queried value contains the Anything placeholder"""
+    if value is Anything:
+        return True
+    if isinstance(value, (tuple, list)):
+        return any(_has_placeholder(item) for item in value)
+    return False
+
+
+class EventStore:
+    """Change events of one device attribute, indexed by value.
+
+    Events are kept in arrival order and addressed by their position, the
+    first event received being at position 0. Queries never remove events.
+    In bounded mode the oldest events are evicted once more than max_events
+    are stored or once older than max_age seconds, evicted events are
+    counted in dropped_events.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 300.0,
+        max_events: Optional[int] = EVENT_BUFFER_MAX_EVENTS,
+        max_age: Optional[float] = EVENT_BUFFER_MAX_AGE,
+    ):
+        """
+        Args:
+            timeout (float): default time in seconds to wait for events
+            max_events (int): number of events kept, None for unbounded
+            max_age (float): age in seconds of events kept, None for
+                unbounded
+        """
+        self.timeout = timeout
+        self.max_events = max_events
+        self.max_age = max_age
+        self.dropped_events = 0
+        self._condition = threading.Condition()
+        self._events: deque = deque()
+        self._first_position = 0
+        self._index: dict = {}
+
+    def append(self, event: Any) -> Optional[int]:
+        """Store a received change event, used as event callback
+
+        Returns:
+            int: position of the event, None for error events
+        """
+        if event.err:
+            LOGGER.warning(
+                "Error event received for %s: %s",
+                event.attr_name,
+                event.errors,
+            )
+            return None
+        value = _index_key(event.attr_value.value)
+        received_at = time.monotonic()
+        with self._condition:
+            position = self._first_position + len(self._events)
+            self._events.append((value, event, received_at))
+            try:
+                self._index.setdefault(value, []).append(position)
+            except TypeError:
+                # unhashable values can only be found by scanning
+                pass
+            self._evict(received_at)
+            self._condition.notify_all()
+        return position
+
+    def _evict(self, now: float) -> None:
+        """Evict events beyond the bounds, must be called with the condition
+        held"""
+        while self._events and (
+            (
+                self.max_events is not None
+                and len(self._events) > self.max_events
+            )
+            or (
+                self.max_age is not None
+                and now - self._events[0][2] > self.max_age
+            )
+        ):
+            value, _, _ = self._events.popleft()
+            try:
+                positions = self._index.get(value)
+            except TypeError:
+                positions = None
+            if positions:
+                positions.pop(0)
+                if not positions:
+                    del self._index[value]
+            self._first_position += 1
+            self.dropped_events += 1
+
+    def __len__(self) -> int:
+        """Number of events received, including the evicted ones"""
+        with self._condition:
+            return self._first_position + len(self._events)
+
+    def assertion_data(self, position: int) -> dict:
+        """Return event details of given position, in the format returned by
+        MockTangoEventCallbackGroup.assert_change_event"""
+        with self._condition:
+            if position < self._first_position:
+                raise IndexError(f"Event {position} was evicted")
+            value, event, _ = self._events[position - self._first_position]
+        return {
+            "arg0": event,
+            "attribute_name": event.attr_value.name,
+            "attribute_value": value,
+            "attribute_quality": event.attr_value.quality,
+        }
+
+    @staticmethod
+    def lookahead_stop(
+        start: int, lookahead: int, skip: AbstractSet[int] = frozenset()
+    ) -> int:
+        """Return the position following the first lookahead positions from
+        start which are not skipped"""
+        stop = start + lookahead
+        while True:
+            skipped = sum(1 for position in skip if start <= position < stop)
+            if start + lookahead + skipped == stop:
+                return stop
+            stop = start + lookahead + skipped
+
+    def _find(
+        self,
+        values: tuple,
+        start: int,
+        stop: int,
+        skip: AbstractSet[int] = frozenset(),
+    ) -> Optional[int]:
+        """Return the first position in [start, stop), not skipped, having
+        one of the values, must be called with the condition held"""
+        start = max(start, self._first_position)
+        positions = []
+        for value in values:
+            if not _has_placeholder(value):
+                try:
+                    indexed = self._index.get(_index_key(value), [])
+                except TypeError:
+                    indexed = None
+                if indexed is not None:
+                    for position in islice(
+                        indexed, bisect_left(indexed, start), None
+                    ):
+                        if position >= stop:
+                            break
+                        if position not in skip:
+                            positions.append(position)
+                            break
+                    continue
+            for offset, stored in enumerate(
+                islice(
+                    self._events,
+                    start - self._first_position,
+                    max(start, stop) - self._first_position,
+                )
+            ):
+                if start + offset not in skip and value == stored[0]:
+                    positions.append(start + offset)
+                    break
+        return min(positions) if positions else None
+
+    def wait_for(
+        self,
+        values: tuple,
+        start: int,
+        lookahead: int,
+        timeout: Optional[float] = None,
+        skip: AbstractSet[int] = frozenset(),
+    ) -> Optional[int]:
+        """Return position of the first event having one of the values
+        within lookahead events from start, waiting for events not yet
+        received.
+
+        Args:
+            values (tuple): values to search, may contain Anything
+            start (int): position of the first event to consider
+            lookahead (int): number of events to consider, the skipped ones
+                excluded
+            timeout (float): time in seconds to wait for events
+            skip (set[int]): positions of the events not to consider
+        Returns:
+            int: position of the event, None if not found
+        """
+        deadline = time.monotonic() + (
+            self.timeout if timeout is None else timeout
+        )
+        stop = self.lookahead_stop(start, lookahead, skip)
+        searched = start
+        with self._condition:
+            while True:
+                received = min(stop, self._first_position + len(self._events))
+                position = self._find(values, searched, received, skip)
+                if position is not None:
+                    return position
+                searched = max(searched, received)
+                remaining_time = deadline - time.monotonic()
+                if searched >= stop or remaining_time <= 0:
+                    return None
+                self._condition.wait(remaining_time)
+
+
+class IndexedEventRecorder(EventRecorder):
+    """EventRecorder answering queries from an indexed event store.
+
+    As with EventRecorder, a query consumes the event it matched and only
+    that one: later queries on the same attribute skip it, while the events
+    it did not match remain available, whatever the order of the queries.
+    Each subscribed attribute has a read cursor, the position of its first
+    event not consumed, from which queries start unless given ``since``.
+
+    longRunningCommandResult events are also decoded once into an LrcrIndex,
+    see wait_for_command_result.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.event_stores: Dict[str, EventStore] = {}
+        self.lrcr_indexes: Dict[str, LrcrIndex] = {}
+        self.cursors: Dict[str, int] = {}
+        self.consumed: Dict[str, Set[int]] = {}
+
+    def subscribe_event(
+        self, device: Any, attribute_name: str, timeout: float = 300.0
+    ):
+        """Subscribe for change event for given attribute, subscribing an
+        attribute again keeps its recorded events
+        Args:
+            device: Tango Device Proxy Object
+            attribute_name (str): Name of the attribute
+            timeout (float): default number of seconds to wait for events
+        """
+        callable_name = self._generate_callable_name(device, attribute_name)
+        if callable_name in self.event_stores:
+            return
+        event_store = EventStore(timeout)
+        self.event_stores[callable_name] = event_store
+        self.cursors[callable_name] = 0
+        self.consumed[callable_name] = set()
+        callback = event_store.append
+        if attribute_name.lower() == LRCR_ATTRIBUTE_NAME:
+            lrcr_index = LrcrIndex()
+            self.lrcr_indexes[callable_name] = lrcr_index
+
+            def callback(event):
+                position = event_store.append(event)
+                if position is not None:
+                    lrcr_index.add(
+                        event.attr_value.value,
+                        event.reception_date.totime(),
+                        position,
+                    )
+
+        event_id = CHANGE_EVENT_HUB.subscribe(device, attribute_name, callback)
+        self.subscribed_devices.append((device, event_id))
+        LOGGER.info(f"{callable_name} is subscribed for {attribute_name}")
+
+    def cursor(self, device: Any, attribute_name: str) -> int:
+        """Return the read cursor of given attribute, the position of its
+        first event not consumed, can be passed as since to later queries"""
+        return self.cursors[self._get_callable_name(device, attribute_name)]
+
+    def _consume(self, callable_name: str, position: int) -> None:
+        """Mark the event at position as consumed, the read cursor is moved
+        over the consumed events it reaches"""
+        consumed = self.consumed[callable_name]
+        consumed.add(position)
+        while self.cursors[callable_name] in consumed:
+            consumed.discard(self.cursors[callable_name])
+            self.cursors[callable_name] += 1
+
+    def has_change_event_occurred(
+        self,
+        device: Any,
+        attribute_name: str,
+        attribute_value: Any,
+        lookahead: int = 7,
+        since: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> Any:
+        """Validate Change Event occurred for provided attribute
+        This method check attribute value changed within number of lookahead
+        events not consumed from the read cursor, or from since if given.
+        The matched event is consumed.
+        Args:
+            device: Tango Device Proxy Object
+            attribute_name (str): Name of the attribute
+            attribute_value : Value of attribute, may contain Anything
+            lookahead (int): number of events to consider
+            since (int): position of the first event to consider
+            timeout (float): time in seconds to wait for events
+        Returns:
+            dict: event details if the event occurred else False
+        """
+        return self._find_event(
+            device,
+            attribute_name,
+            (attribute_value,),
+            lookahead,
+            since,
+            timeout,
+        )
+
+    def has_change_event_occurred_for_given_values(
+        self,
+        device: DeviceProxy,
+        attribute_name: str,
+        attribute_values: list[Any],
+        lookahead: int = 7,
+    ) -> bool:
+        """Validate if a change event occurred for one of the given values"""
+        return bool(
+            self._find_event(
+                device, attribute_name, tuple(attribute_values), lookahead
+            )
+        )
+
+    def wait_for_command_result(
+        self,
+        device: Any,
+        unique_id: Optional[str] = None,
+        command_name: Optional[str] = None,
+        result_code: Optional[int] = None,
+        messages: Sequence[str] = (),
+        since: Optional[int] = None,
+        timeout: Optional[float] = None,
+        lookahead: Optional[int] = None,
+    ) -> Any:
+        """Wait for the longRunningCommandResult event of a command, looked
+        up by unique id or command name, and consume it
+        Args:
+            device: Tango Device Proxy Object
+            unique_id (str): unique id of the command
+            command_name (str): command name, used if unique_id is not given
+            result_code (int): expected result code, any if None
+            messages (list[str]): substrings expected in the message
+            since (int): position of the first event to consider, defaults
+                to the read cursor
+            timeout (float): time in seconds to wait for the event
+            lookahead (int): number of events not consumed to consider, all
+                if None
+        Returns:
+            dict: event details if the event occurred else False
+        """
+        callable_name = self._get_callable_name(
+            device, "longRunningCommandResult"
+        )
+        event_store = self.event_stores[callable_name]
+        start = self.cursors[callable_name] if since is None else since
+        consumed = frozenset(self.consumed[callable_name])
+        record = self.lrcr_indexes[callable_name].wait_for(
+            unique_id,
+            command_name,
+            result_code,
+            messages,
+            start,
+            event_store.timeout if timeout is None else timeout,
+            exclude=consumed,
+        )
+        if record is None or (
+            lookahead is not None
+            and record.position
+            >= event_store.lookahead_stop(start, lookahead, consumed)
+        ):
+            return False
+        self._consume(callable_name, record.position)
+        try:
+            return event_store.assertion_data(record.position)
+        except IndexError:
+            # the event itself was evicted in bounded mode
+            return {
+                "arg0": None,
+                "attribute_name": "longRunningCommandResult",
+                "attribute_value": (
+                    record.unique_id,
+                    json.dumps([record.result_code, record.message]),
+                ),
+                "attribute_quality": None,
+            }
+
+    def dropped_events(self) -> Dict[str, int]:
+        """Return the number of events evicted per attribute in bounded
+        mode"""
+        return {
+            callable_name: event_store.dropped_events
+            for callable_name, event_store in self.event_stores.items()
+        }
+
+    def clear_events(self):
+        """Clear Subscribed Events"""
+        dropped_events = {
+            callable_name: count
+            for callable_name, count in self.dropped_events().items()
+            if count
+        }
+        if dropped_events:
+            LOGGER.info("Events evicted from the buffers: %s", dropped_events)
+        super().clear_events()
+        self.event_stores = {}
+        self.lrcr_indexes = {}
+        self.cursors = {}
+        self.consumed = {}
+
+    def _find_event(
+        self,
+        device: Any,
+        attribute_name: str,
+        values: tuple,
+        lookahead: int,
+        since: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> Any:
+        """Find the first event not consumed having one of the values and
+        consume it"""
+        callable_name = self._get_callable_name(device, attribute_name)
+        event_store = self.event_stores[callable_name]
+        position = event_store.wait_for(
+            values,
+            self.cursors[callable_name] if since is None else since,
+            lookahead,
+            timeout,
+            frozenset(self.consumed[callable_name]),
+        )
+        if position is None:
+            return False
+        self._consume(callable_name, position)
+        return event_store.assertion_data(position)
+
+    def _get_callable_name(self, device: Any, attribute_name: str) -> str:
+        """Return callable name of a subscribed attribute"""
+        callable_name = self._generate_callable_name(device, attribute_name)
+        if callable_name not in self.event_stores:
+            raise AttributeNotSubscribed(
+                f"Attribute {callable_name} is not subscribed"
+            )
+        return callable_name
@@ -0,0 +1,508 @@
+"""Offline device layer replaying recorded or scripted change events.
+
+The ReplayBackend holds attribute values per device and pushes change events
+to the subscribers of ReplayDeviceProxy objects, which stand in for
+``tango.DeviceProxy`` for attribute reads and change event subscriptions.
+Once installed as proxy factory of the DEVICE_PROXY_POOL, everything going
+through the pool and the ChangeEventHub, i.e. the Waiter, the event recorder,
+the event tracer and the assertions built on them, runs in process without
+Tango devices.
+
+Events come either from an EventJournal, so that a test run recorded in CI
+can be replayed, or from a script of ReplayStep.
+"""
+import itertools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from ska_control_model import AdminMode, HealthState, ObsState
+from ska_ser_logging import configure_logging
+from tango import (
+    AttrQuality,
+    CmdArgType,
+    DeviceAttribute,
+    DevState,
+    Except,
+    TimeVal,
+)
+
+from tests.resources.test_harness.event_journal import JournalReader
+from tests.resources.test_support.common_utils.device_proxy_pool import (
+    DEVICE_PROXY_POOL,
+    DeviceProxyPool,
+    get_device_name,
+)
+from tests.resources.test_support.common_utils.event_hub import (
+    CHANGE_EVENT_HUB,
+    ChangeEventHub,
+)
+
+configure_logging(logging.DEBUG)
+LOGGER = logging.getLogger(__name__)
+
+# Types of the attributes whose replayed int values are enum labels or
+# DevState, keyed by lower case attribute name
+DEFAULT_ATTRIBUTE_TYPES = {
+    "state": DevState,
+    "telescopestate": DevState,
+    "obsstate": ObsState,
+    "cspsubarrayobsstate": ObsState,
+    "sdpsubarrayobsstate": ObsState,
+    "healthstate": HealthState,
+    "adminmode": AdminMode,
+}
+
+# Prefix of the commands of the helper devices setting an attribute
+SETTER_PREFIX = "SetDirect"
+
+
+class ReplayStep:
+    """Change event of a replay script, pushed delay seconds after the
+    previous step"""
+
+    def __init__(
+        self,
+        delay: float,
+        device_name: str,
+        attribute_name: str,
+        value: Any = None,
+        quality: AttrQuality = AttrQuality.ATTR_VALID,
+        error: Optional[str] = None,
+    ):
+        """
+        Args:
+            delay (float): time in seconds after the previous step
+            device_name (str): device name
+            attribute_name (str): attribute name
+            value (Any): attribute value
+            quality (AttrQuality): attribute quality
+            error (str): description of an error event, value is ignored
+        """
+        self.delay = delay
+        self.device_name = device_name
+        self.attribute_name = attribute_name
+        self.value = value
+        self.quality = quality
+        self.error = error
+
+    def __repr__(self):
+        return (
+            f"ReplayStep({self.delay}, {self.device_name}/"
+            f"{self.attribute_name}, {self.value!r})"
+        )
+
+
+def steps_from_journal(path: str) -> List[ReplayStep]:
+    """Return the replay script of an EventJournal, delays being the time
+    elapsed between the recorded events
+
+    Args:
+        path (str): journal file
+    Returns:
+        list[ReplayStep]: steps in journal order
+    """
+    reader = JournalReader(path)
+    try:
+        steps = []
+        previous_timestamp = None
+        for record in reader:
+            delay = (
+                0.0
+                if previous_timestamp is None
+                else max(0.0, record.timestamp - previous_timestamp)
+            )
+            previous_timestamp = record.timestamp
+            steps.append(
+                ReplayStep(
+                    delay,
+                    record.device_name,
+                    record.attribute_name,
+                    record.value,
+                    AttrQuality.ATTR_VALID
+                    if record.quality is None
+                    else AttrQuality(record.quality),
+                    record.error,
+                )
+            )
+        return steps
+    finally:
+        reader.close()
+
+
+class ReplayAttributeInfo:
+    """AttributeInfoEx look alike, carrying what Resource.convert_value
+    uses"""
+
+    def __init__(self, name: str, attribute_type: Any = None):
+        self.name = name
+        self.enum_labels: List[str] = []
+        if attribute_type is DevState:
+            self.data_type = CmdArgType.DevState
+        elif isinstance(attribute_type, type) and issubclass(
+            attribute_type, Enum
+        ):
+            self.data_type = CmdArgType.DevEnum
+            labels = {member.value: member.name for member in attribute_type}
+            self.enum_labels = [
+                labels.get(value, "") for value in range(max(labels) + 1)
+            ]
+        else:
+            self.data_type = CmdArgType.DevString
+
+
+class ReplayEvent:
+    """tango EventData look alike pushed by the ReplayBackend"""
+
+    def __init__(
+        self,
+        device: Any,
+        attribute_name: str,
+        attribute: Optional[DeviceAttribute],
+        error: Optional[str] = None,
+    ):
+        self.device = device
+        self.attr_name = f"{device.dev_name()}/{attribute_name}"
+        self.event = "change"
+        self.reception_date = TimeVal.now()
+        self.err = error is not None
+        self.attr_value = attribute
+        self.errors = (error,) if self.err else ()
+
+
+class ReplayDeviceProxy:
+    """DeviceProxy stand in serving attribute reads and change event
+    subscriptions from a ReplayBackend"""
+
+    def __init__(self, device_name: str, backend: "ReplayBackend"):
+        self._device_name = get_device_name(device_name)
+        self._backend = backend
+        self._requests: Dict[int, List[str]] = {}
+        self._request_counter = itertools.count(1)
+
+    def dev_name(self) -> str:
+        """Return the device name"""
+        return self._device_name
+
+    def name(self) -> str:
+        """Return the device name"""
+        return self._device_name
+
+    # pylint: disable=unused-argument
+    def set_timeout_millis(self, timeout: int) -> None:
+        """Nothing to configure offline"""
+
+    def attribute_list_query_ex(self) -> List[ReplayAttributeInfo]:
+        """Return configuration of the attributes having a value"""
+        return self._backend.attribute_infos(self._device_name)
+
+    def read_attribute(self, attribute_name: str) -> DeviceAttribute:
+        """Return the current value of an attribute
+
+        Raises:
+            DevFailed: if the attribute has no value
+        """
+        return self._backend.read(self._device_name, attribute_name)
+
+    def read_attributes(
+        self, attribute_names: List[str]
+    ) -> List[DeviceAttribute]:
+        """Return the current values of attributes"""
+        return [
+            self._backend.read(self._device_name, attribute_name)
+            for attribute_name in attribute_names
+        ]
+
+    def read_attributes_asynch(self, attribute_names: List[str]) -> int:
+        """Asynchronous read request, answered by read_attributes_reply"""
+        request_id = next(self._request_counter)
+        self._requests[request_id] = list(attribute_names)
+        return request_id
+
+    # pylint: disable=unused-argument
+    def read_attributes_reply(
+        self, request_id: int, timeout: int = 0
+    ) -> List[DeviceAttribute]:
+        """Return the values of an asynchronous read request"""
+        return [
+            self._backend.read(self._device_name, attribute_name)
+            for attribute_name in self._requests.pop(request_id)
+        ]
+
+    def command_inout(self, command_name: str, *args) -> Any:
+        """Invoke a command of the backend"""
+        return self._backend.command(self._device_name, command_name, *args)
+
+    def command_inout_asynch(self, command_name: str, *args) -> int:
+        """Asynchronous command request, answered by command_inout_reply"""
+        request_id = next(self._request_counter)
+        self._requests[request_id] = [self.command_inout(command_name, *args)]
+        return request_id
+
+    # pylint: disable=unused-argument
+    def command_inout_reply(self, request_id: int, timeout: int = 0) -> Any:
+        """Return the result of an asynchronous command request"""
+        return self._requests.pop(request_id)[0]
+
+    # pylint: disable=unused-argument
+    def subscribe_event(
+        self, attribute_name: str, event_type: Any, callback: Callable, *args
+    ) -> int:
+        """Subscribe callback to change events, the current value is
+        pushed before returning as Tango does"""
+        return self._backend.subscribe(self, attribute_name, callback)
+
+    def unsubscribe_event(self, event_id: int) -> None:
+        """Remove a subscription made with subscribe_event"""
+        self._backend.unsubscribe(event_id)
+
+
+class ReplayBackend:
+    """Attribute values and change event subscriptions of replayed devices"""
+
+    def __init__(self, attribute_types: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            attribute_types (dict): type per lower case attribute name,
+                enum class or DevState, defaults to DEFAULT_ATTRIBUTE_TYPES
+        """
+        self.attribute_types = (
+            DEFAULT_ATTRIBUTE_TYPES
+            if attribute_types is None
+            else attribute_types
+        )
+        self._lock = threading.RLock()
+        self._values: Dict[Tuple[str, str], Tuple[str, Any, Any]] = {}
+        self._subscribers: Dict[Tuple[str, str], Dict[int, Tuple]] = {}
+        self._subscriptions: Dict[int, Tuple[str, str]] = {}
+        self._subscription_counter = itertools.count(1)
+        self._proxies: Dict[str, ReplayDeviceProxy] = {}
+        # (device name, command name, argin) of the invoked commands
+        self.commands: List[Tuple[str, str, Any]] = []
+
+    def proxy(self, device: Any) -> ReplayDeviceProxy:
+        """Return the proxy of a device, usable as proxy factory"""
+        device_name = get_device_name(device)
+        with self._lock:
+            if device_name not in self._proxies:
+                self._proxies[device_name] = ReplayDeviceProxy(
+                    device_name, self
+                )
+            return self._proxies[device_name]
+
+    def _attribute(
+        self, attribute_name: str, value: Any, quality: Any
+    ) -> DeviceAttribute:
+        """Build the DeviceAttribute of a value, as read from a device"""
+        attribute = DeviceAttribute()
+        attribute.name = attribute_name
+        if (
+            self.attribute_types.get(attribute_name.lower()) is DevState
+            and value is not None
+        ):
+            value = DevState(int(value))
+        elif isinstance(value, list):
+            # spectrum values are journaled as msgpack arrays
+            value = tuple(value)
+        attribute.value = value
+        attribute.quality = quality
+        attribute.has_failed = False
+        return attribute
+
+    def push(
+        self,
+        device: Any,
+        attribute_name: str,
+        value: Any,
+        quality: AttrQuality = AttrQuality.ATTR_VALID,
+    ) -> None:
+        """Set an attribute value and push a change event to its
+        subscribers
+
+        Args:
+            device (str | DeviceProxy): device name or proxy
+            attribute_name (str): attribute name
+            value (Any): attribute value
+            quality (AttrQuality): attribute quality
+        """
+        key = (get_device_name(device), attribute_name.lower())
+        with self._lock:
+            self._values[key] = (attribute_name, value, quality)
+            subscribers = list(self._subscribers.get(key, {}).values())
+        for proxy, callback in subscribers:
+            callback(
+                ReplayEvent(
+                    proxy,
+                    attribute_name,
+                    self._attribute(attribute_name, value, quality),
+                )
+            )
+
+    def push_error(self, device: Any, attribute_name: str, error: str) -> None:
+        """Push an error event to the subscribers of an attribute
+
+        Args:
+            device (str | DeviceProxy): device name or proxy
+            attribute_name (str): attribute name
+            error (str): error description
+        """
+        key = (get_device_name(device), attribute_name.lower())
+        with self._lock:
+            subscribers = list(self._subscribers.get(key, {}).values())
+        for proxy, callback in subscribers:
+            callback(ReplayEvent(proxy, attribute_name, None, error))
+
+    def read(self, device: Any, attribute_name: str) -> DeviceAttribute:
+        """Return the current value of an attribute
+
+        Raises:
+            DevFailed: if the attribute has no value
+        """
+        key = (get_device_name(device), attribute_name.lower())
+        with self._lock:
+            if key not in self._values:
+                Except.throw_exception(
+                    "API_AttrNotFound",
+                    f"Attribute {attribute_name} has no replayed value",
+                    "ReplayBackend.read",
+                )
+            name, value, quality = self._values[key]
+        return self._attribute(name, value, quality)
+
+    def attribute_infos(self, device: Any) -> List[ReplayAttributeInfo]:
+        """Return configuration of the attributes of a device having a
+        value"""
+        device_name = get_device_name(device)
+        with self._lock:
+            return [
+                ReplayAttributeInfo(
+                    name, self.attribute_types.get(attribute_name)
+                )
+                for (
+                    value_device,
+                    attribute_name,
+                ), (name, _, _) in self._values.items()
+                if value_device == device_name
+            ]
+
+    def command(self, device: Any, command_name: str, *args) -> Any:
+        """Record a command invocation. The SetDirect<attribute> setters of
+        the helper devices push the attribute value.
+
+        Args:
+            device (str | DeviceProxy): device name or proxy
+            command_name (str): command name
+            args: command argument, if any
+        Returns:
+            None, like the setters of the helper devices
+        """
+        argin = args[0] if args else None
+        with self._lock:
+            self.commands.append(
+                (get_device_name(device), command_name, argin)
+            )
+        if command_name.startswith(SETTER_PREFIX) and args:
+            attribute_name = command_name.replace(SETTER_PREFIX, "", 1)
+            self.push(
+                device,
+                attribute_name[0].lower() + attribute_name[1:],
+                argin,
+            )
+        return None
+
+    def subscribe(
+        self, proxy: ReplayDeviceProxy, attribute_name: str, callback: Callable
+    ) -> int:
+        """Subscribe callback to change events of an attribute, the current
+        value is pushed to it before returning"""
+        key = (proxy.dev_name(), attribute_name.lower())
+        with self._lock:
+            subscription_id = next(self._subscription_counter)
+            self._subscribers.setdefault(key, {})[subscription_id] = (
+                proxy,
+                callback,
+            )
+            self._subscriptions[subscription_id] = key
+            current = self._values.get(key)
+        if current is not None:
+            name, value, quality = current
+            callback(
+                ReplayEvent(proxy, name, self._attribute(name, value, quality))
+            )
+        return subscription_id
+
+    def unsubscribe(self, subscription_id: int) -> None:
+        """Remove a subscription
+
+        Raises:
+            KeyError: if not subscribed, as DeviceProxy.unsubscribe_event
+        """
+        with self._lock:
+            key = self._subscriptions.pop(subscription_id)
+            self._subscribers[key].pop(subscription_id, None)
+
+    def play(
+        self, steps: Iterable[ReplayStep], time_scale: float = 0.0
+    ) -> None:
+        """Push the events of a script
+
+        Args:
+            steps (list[ReplayStep]): script to play
+            time_scale (float): factor applied to the step delays, 0 pushes
+                the events back to back
+        """
+        for step in steps:
+            if step.delay and time_scale:
+                time.sleep(step.delay * time_scale)
+            if step.error is not None:
+                self.push_error(
+                    step.device_name, step.attribute_name, step.error
+                )
+            else:
+                self.push(
+                    step.device_name,
+                    step.attribute_name,
+                    step.value,
+                    step.quality,
+                )
+
+    def start(
+        self, steps: Iterable[ReplayStep], time_scale: float = 1.0
+    ) -> threading.Thread:
+        """Play a script from a background thread, as Tango pushes events
+        while the test waits for them
+
+        Args:
+            steps (list[ReplayStep]): script to play
+            time_scale (float): factor applied to the step delays
+        Returns:
+            threading.Thread: the thread playing the script
+        """
+        player = threading.Thread(
+            target=self.play,
+            args=(list(steps), time_scale),
+            name="ReplayBackend",
+            daemon=True,
+        )
+        player.start()
+        return player
+
+    @contextmanager
+    def install(
+        self,
+        pool: DeviceProxyPool = DEVICE_PROXY_POOL,
+        hub: ChangeEventHub = CHANGE_EVENT_HUB,
+    ):
+        """Serve the proxies of the pool from this backend for the duration
+        of the context. Subscriptions of the hub are closed on entry and on
+        exit, so that none outlives the devices it was made on."""
+        hub.close()
+        previous_factory = pool.set_proxy_factory(self.proxy)
+        try:
+            yield self
+        finally:
+            hub.close()
+            pool.set_proxy_factory(previous_factory)
@@ -0,0 +1,240 @@
+"""Event tracer and event logger sharing change event subscriptions through
+the ChangeEventHub.
+
+The bounded mode of SharedEventTracer evicts events from the private
+``_events`` list of TangoEventTracer, holding its private ``_lock``, since
+the tracer has no public API to drop events. Both are those of
+ska-tango-testing 0.7.1, the version pinned in pyproject.toml, and have to
+be checked when upgrading it.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ska_ser_logging import configure_logging
+from ska_tango_testing.integration import TangoEventTracer
+
+from tests.resources.test_harness.event_recorder import (
+    EVENT_BUFFER_MAX_AGE,
+    EVENT_BUFFER_MAX_EVENTS,
+)
+from tests.resources.test_harness.lrcr_index import (
+    LRCR_ATTRIBUTE_NAME,
+    LrcrIndex,
+)
+from tests.resources.test_support.common_utils.device_proxy_pool import (
+    get_device_name,
+)
+from tests.resources.test_support.common_utils.event_hub import (
+    CHANGE_EVENT_HUB,
+    HubDeviceProxy,
+)
+
+configure_logging(logging.DEBUG)
+LOGGER = logging.getLogger(__name__)
+
+
+class SharedEventTracer(TangoEventTracer):
+    """TangoEventTracer subscribing through the ChangeEventHub, so that a
+    subscription already made by another consumer is reused.
+
+    In bounded mode the traced events are kept per attribute up to
+    max_events and/or max_age seconds, evicted events are counted in
+    dropped_events. Events are evicted when an event is traced and before
+    the traced events are read or queried, so that an attribute which
+    stopped changing does not keep its old events.
+
+    longRunningCommandResult events are decoded once into an LrcrIndex per
+    device, see lrcr_index.
+    """
+
+    def __init__(
+        self,
+        *args,
+        max_events: Optional[int] = EVENT_BUFFER_MAX_EVENTS,
+        max_age: Optional[float] = EVENT_BUFFER_MAX_AGE,
+        **kwargs,
+    ):
+        """
+        Args:
+            max_events (int): number of events kept per attribute, None for
+                unbounded
+            max_age (float): age in seconds of events kept, None for
+                unbounded
+        """
+        super().__init__(*args, **kwargs)
+        self.max_events = max_events
+        self.max_age = max_age
+        self.dropped_events: Dict[Tuple[str, str], int] = {}
+        self._received: Dict[Tuple[str, str], deque] = {}
+        self._lrcr_indexes: Dict[str, LrcrIndex] = {}
+        # serialises _add_event, so that the last traced event is the one
+        # added by the base class
+        self._add_lock = threading.Lock()
+
+    def subscribe_event(
+        self,
+        device_name: Any,
+        attribute_name: str,
+        dev_factory: Optional[Callable] = None,
+    ) -> None:
+        """Subscribe for change event for given attribute
+
+        Args:
+            device_name (str | DeviceProxy): device name or Tango Device Proxy
+            attribute_name (str): Name of the attribute
+            dev_factory (Callable): ignored, proxies come from the hub
+        """
+        super().subscribe_event(
+            get_device_name(device_name),
+            attribute_name,
+            dev_factory=HubDeviceProxy,
+        )
+
+    def _add_event(self, event: Any) -> None:
+        """Add an event, index it if it is a longRunningCommandResult event
+        and evict the events beyond the bounds"""
+        with self._add_lock:
+            super()._add_event(event)
+            with self._lock:
+                # the traced event is the one just appended by the base
+                # class
+                traced_event = self._events[-1]
+                if self.max_events is not None or self.max_age is not None:
+                    self._received.setdefault(
+                        (
+                            traced_event.device_name,
+                            traced_event.attribute_name.lower(),
+                        ),
+                        deque(),
+                    ).append((time.monotonic(), traced_event))
+        if traced_event.attribute_name.lower() == LRCR_ATTRIBUTE_NAME:
+            self.lrcr_index(traced_event.device_name).add(
+                traced_event.attribute_value,
+                traced_event.reception_time.timestamp(),
+            )
+        self._evict()
+
+    def _evict(self) -> None:
+        """Evict the events beyond the bounds"""
+        if self.max_events is None and self.max_age is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            evicted = set()
+            for received_key, received in self._received.items():
+                while received and (
+                    (
+                        self.max_events is not None
+                        and len(received) > self.max_events
+                    )
+                    or (
+                        self.max_age is not None
+                        and now - received[0][0] > self.max_age
+                    )
+                ):
+                    evicted.add(id(received.popleft()[1]))
+                    self.dropped_events[received_key] = (
+                        self.dropped_events.get(received_key, 0) + 1
+                    )
+            if evicted:
+                self._events[:] = [
+                    traced_event
+                    for traced_event in self._events
+                    if id(traced_event) not in evicted
+                ]
+
+    @property
+    def events(self) -> List[Any]:
+        """Traced events, the events beyond the bounds being evicted first"""
+        self._evict()
+        return super().events
+
+    def query_events(self, *args, **kwargs) -> List[Any]:
+        """Query the traced events, the events beyond the bounds being
+        evicted first, see TangoEventTracer.query_events"""
+        self._evict()
+        return super().query_events(*args, **kwargs)
+
+    def lrcr_index(self, device_name: Any) -> LrcrIndex:
+        """Return the longRunningCommandResult index of given device
+
+        Args:
+            device_name (str | DeviceProxy): device name or Tango Device Proxy
+        Returns:
+            LrcrIndex: records of the traced longRunningCommandResult events
+        """
+        device_name = get_device_name(device_name)
+        with self._lock:
+            if device_name not in self._lrcr_indexes:
+                self._lrcr_indexes[device_name] = LrcrIndex()
+            return self._lrcr_indexes[device_name]
+
+    def clear_events(self) -> None:
+        """Clear the traced events, the eviction bookkeeping and the
+        longRunningCommandResult indexes"""
+        super().clear_events()
+        with self._lock:
+            self._received = {}
+            self._lrcr_indexes = {}
+
+
+class EventLogger:
+    """Logs change events of device attributes received through the hub"""
+
+    def __init__(self):
+        self.handles: List[int] = []
+
+    def log_events_from_device(self, device: Any, attribute_name: str):
+        """Log every change event of given device attribute
+
+        Args:
+            device (str | DeviceProxy): device name or Tango Device Proxy
+            attribute_name (str): Name of the attribute
+        """
+        self.handles.append(
+            CHANGE_EVENT_HUB.subscribe(device, attribute_name, self._log_event)
+        )
+
+    @staticmethod
+    def _log_event(event: Any) -> None:
+        """Log a received event"""
+        if event.err:
+            LOGGER.info(
+                "EVENT_LOGGER:\tError event on %s: %s",
+                event.attr_name,
+                event.errors,
+            )
+            return
+        LOGGER.info(
+            "EVENT_LOGGER:\tAt %s, %s %s changed to %s.",
+            event.reception_date,
+            event.device.dev_name(),
+            event.attr_value.name,
+            event.attr_value.value,
+        )
+
+    def unsubscribe_all(self) -> None:
+        """Stop logging events"""
+        for handle in self.handles:
+            CHANGE_EVENT_HUB.unsubscribe(handle)
+        self.handles = []
+
+
+def log_events(device_attribute_map: Dict[Any, List[str]]) -> EventLogger:
+    """Log change events of given device attributes, drop in replacement of
+    ska_tango_testing log_events using the ChangeEventHub.
+
+    Args:
+        device_attribute_map (dict): device name or Tango Device Proxy to
+            list of attribute names
+    Returns:
+        EventLogger: logger which can be used to stop logging
+    """
+    event_logger = EventLogger()
+    for device, attribute_names in device_attribute_map.items():
+        for attribute_name in attribute_names:
+            event_logger.log_events_from_device(device, attribute_name)
+    return event_logger
@@ -29,11 +29,21 @@ from tests.resources.test_harness.constant import (
     mccs_subarray_leaf_node,
     tmc_low_subarraynode1,
 )
-from tests.resources.test_harness.event_recorder import EventRecorder
+from tests.resources.test_harness.event_recorder import (
+    EventRecorder,
+    IndexedEventRecorder,
+)
+from tests.resources.test_harness.lrcr_index import LRCR_ATTRIBUTE_NAME
 from tests.resources.test_harness.utils.common_utils import JsonFactory
 from tests.resources.test_harness.utils.enums import SimulatorDeviceType
+from tests.resources.test_harness.utils.obs_state_planner import (
+    ObsStateTransition,
+)
 from tests.resources.test_harness.utils.wait_helpers import Waiter, watch
 from tests.resources.test_support.common_utils.common_helpers import Resource
+from tests.resources.test_support.common_utils.device_proxy_pool import (
+    DEVICE_PROXY_POOL,
+)
 
 configure_logging(logging.DEBUG)
 LOGGER = logging.getLogger(__name__)
@@ -341,49 +351,58 @@ def check_for_device_event(
     device: DeviceProxy,
     attr_name: str,
     event_data: str,
-    event_recorder: EventRecorder,
+    event_recorder: IndexedEventRecorder,
     command_name: str = "",
     unique_id: str = "",
 ) -> bool:
-    """Method to check event from the device.
+    """Method to check event from the device. longRunningCommandResult
+    events of a command are looked up in the index of the recorder, other
+    attributes are scanned event by event.
 
     Args:
         device (DeviceProxy): device proxy
         attr_name (str): attribute name
         event_data (str): event data to be searched
-        event_recorder(EventRecorder): event recorder instance
+        event_recorder(IndexedEventRecorder): event recorder instance
         to check for events.
+        command_name (str): command name the unique id ends with
+        unique_id (str): unique id of the command
     """
-    event_found: bool = False
     timeout: int = 300
+    if attr_name.lower() == LRCR_ATTRIBUTE_NAME and (
+        command_name or unique_id
+    ):
+        return bool(
+            event_recorder.wait_for_command_result(
+                device,
+                unique_id=unique_id or None,
+                command_name=command_name or None,
+                messages=[event_data],
+                timeout=timeout,
+            )
+        )
     elapsed_time: float = 0
     start_time: float = time.time()
-    while not event_found and elapsed_time < timeout:
+    while elapsed_time < timeout:
         assertion_data = event_recorder.has_change_event_occurred(
             device,
             attribute_name=attr_name,
-            attribute_value=(Anything),
+            attribute_value=Anything,
             lookahead=1,
         )
+        elapsed_time = time.time() - start_time
+        if not assertion_data:
+            continue
+        event_unique_id, result = assertion_data["attribute_value"]
         if command_name:
-            is_command_event = assertion_data["attribute_value"][0].endswith(
-                command_name
-            )
+            is_command_event = event_unique_id.endswith(command_name)
         elif unique_id:
-            is_command_event = (
-                assertion_data["attribute_value"][0] == unique_id
-            )
-        if is_command_event:
-            if (
-                event_data
-                in json.loads(assertion_data["attribute_value"][1])[1]
-            ):
-                event_found = True
-                return event_found
-
-        elapsed_time = time.time() - start_time
-
-    return event_found
+            is_command_event = event_unique_id == unique_id
+        else:
+            is_command_event = True
+        if is_command_event and event_data in json.loads(result)[1]:
+            return True
+    return False
 
 
 def get_recorded_commands(device: Any):
@@ -553,9 +572,52 @@ def get_simulated_devices_info() -> dict:
 
 SIMULATED_DEVICES_DICT = get_simulated_devices_info()
 
+# Keep the telescope ON between tests, tests marked power_cycle still
+# start and end with the telescope powered down.
+KEEP_TELESCOPE_ON = os.getenv("KEEP_TELESCOPE_ON", "true").lower() == "true"
+
+
+def has_health_state_changed(
+    device: Any, baseline: HealthState = HealthState.UNKNOWN
+) -> bool:
+    """Check whether the healthState of a simulator differs from the value
+    set by the tear down.
+
+    Args:
+        device (str | DeviceProxy): simulator device
+        baseline (HealthState): healthState set by the tear down
+    Returns:
+        bool: True if healthState needs to be reset
+    """
+    try:
+        return (
+            DEVICE_PROXY_POOL.read_attribute(device, "healthState").value
+            != baseline
+        )
+    except tango.DevFailed:
+        return True
+
+
+def is_defect_set(device: Any) -> bool:
+    """Check whether a defect is set on a simulator, simulators which do not
+    expose their defect are assumed to have one.
+
+    Args:
+        device (str | DeviceProxy): simulator device
+    Returns:
+        bool: True if the defect needs to be reset
+    """
+    try:
+        if DEVICE_PROXY_POOL.get_attribute_config(device, "defective") is None:
+            return True
+        defect = DEVICE_PROXY_POOL.read_attribute(device, "defective").value
+        return bool(json.loads(defect).get("enabled", True))
+    except (tango.DevFailed, ValueError, TypeError, AttributeError):
+        return True
+
 
 def check_lrcr_events(
-    event_recorder,
+    event_recorder: IndexedEventRecorder,
     device,
     command_name: str,
     result_code: ResultCode = ResultCode.OK,
@@ -565,7 +627,7 @@ def check_lrcr_events(
        longRunningCommandResult event callbacks.
 
     Args:
-        event_recorder (EventRecorder):fixture used to
+        event_recorder (IndexedEventRecorder):fixture used to
         capture event callbacks
         device (str): device for which attribute needs to be checked
         command_name (str): command name to check
@@ -573,19 +635,17 @@ def check_lrcr_events(
         Defaults to ResultCode.OK.
         retries (int):number of events to check. Defaults to 10.
     """
-    COUNT = 0
-    while COUNT <= retries:
-        assertion_data = event_recorder.has_change_event_occurred(
-            device, "longRunningCommandResult", Anything, lookahead=1
-        )
-        unique_id, result = assertion_data["attribute_value"]
-        if unique_id.endswith(command_name):
-            if result == str(result_code.value):
-                LOGGER.debug("TRACKLOADSTATICOFF_UID: %s", unique_id)
-                break
-        COUNT = COUNT + 1
-        if COUNT >= retries:
-            pytest.fail("Assertion Failed")
+    assertion_data = event_recorder.wait_for_command_result(
+        device,
+        command_name=command_name,
+        result_code=result_code,
+        lookahead=retries,
+    )
+    if not assertion_data:
+        pytest.fail("Assertion Failed")
+    LOGGER.debug(
+        "TRACKLOADSTATICOFF_UID: %s", assertion_data["attribute_value"][0]
+    )
 
 
 def generate_id(prefix: str) -> str:
@@ -746,7 +806,20 @@ def set_receive_address(central_node) -> None:
     Returns:
         None
     """
-    receive_address = json.dumps(
+    central_node.subarray_devices["sdp_subarray"].SetDirectreceiveAddresses(
+        get_simulated_receive_addresses()
+    )
+
+
+def get_simulated_receive_addresses() -> str:
+    """
+    Returns the receiveAddresses set on the SDP Subarray simulator, for the
+    scan types of the default assign resources input.
+
+    Returns:
+        str: receive addresses JSON
+    """
+    return json.dumps(
         {
             "science_A": {
                 "host": [[0, "192.168.0.1"], [2000, "192.168.0.1"]],
@@ -790,9 +863,6 @@ def set_receive_address(central_node) -> None:
             },
         }
     )
-    central_node.subarray_devices["sdp_subarray"].SetDirectreceiveAddresses(
-        receive_address
-    )
 
 
 def updated_assign_str(assign_json: str, station_id: int) -> str:
@@ -957,3 +1027,58 @@ def wait_for_partial_or_complete_abort(timeout: int = 110) -> None:
                 attribute_name,
                 [ObsState.FAULT, ObsState.ABORTED, ObsState.EMPTY],
             )
+
+
+def wait_for_ongoing_transition(
+    subarray_node: Any, transition: ObsStateTransition, timeout: int = 110
+) -> None:
+    """Wait for the command in progress on SubarrayNode, i.e. a planned
+    transition without command, to bring it to the transition destination.
+
+    Args:
+        subarray_node (str | DeviceProxy): SubarrayNode
+        transition (ObsStateTransition): transition without command
+        timeout (int): time to wait in seconds
+    """
+    if transition.source == "ABORTING":
+        wait_for_partial_or_complete_abort(timeout)
+        return
+    assert device_attribute_changed(
+        DEVICE_PROXY_POOL.get_proxy(subarray_node),
+        ["obsState"],
+        [ObsState[transition.destination]],
+        timeout * 10,
+    ), (
+        f"SubarrayNode did not reach {transition.destination} from "
+        f"{transition.source} within {timeout} seconds"
+    )
+
+
+def wait_for_subarray_ready(
+    subarray_node: Any = tmc_low_subarraynode1,
+    timeout: float = 10.0,
+    poll_interval: float = 0.05,
+) -> bool:
+    """Wait for SubarrayNode to report its leaf nodes available, e.g. once
+    a tear down is complete, returning as soon as it does.
+
+    Args:
+        subarray_node (str | DeviceProxy): SubarrayNode
+        timeout (float): seconds to wait for
+        poll_interval (float): seconds between two reads
+    Returns:
+        bool: True if SubarrayNode is ready, False on timeout
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if DEVICE_PROXY_POOL.read_attribute(
+                subarray_node, "isSubarrayAvailable"
+            ).value:
+                return True
+        except tango.DevFailed as exception:
+            LOGGER.debug("SubarrayNode not ready: %s", exception)
+        if time.monotonic() >= deadline:
+            LOGGER.warning("SubarrayNode not ready after %s seconds", timeout)
+            return False
+        time.sleep(poll_interval)
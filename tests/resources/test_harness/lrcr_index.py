@@ -0,0 +1,258 @@
+"""Index of longRunningCommandResult events keyed by command unique id.
+
+A longRunningCommandResult event carries ``(unique_id, result)`` where
+result is the JSON encoded ``[result_code, message]``. Checks used to scan
+the recorded events and decode result again for every predicate evaluated.
+The index decodes every event once into an LrcrRecord and keeps the records
+by unique id, and the unique ids ending with each command name looked up,
+so completion checks are dictionary lookups.
+"""
+import json
+import logging
+import threading
+import time
+from typing import AbstractSet, Any, Dict, List, Optional, Sequence, Tuple
+
+from ska_ser_logging import configure_logging
+
+configure_logging(logging.DEBUG)
+LOGGER = logging.getLogger(__name__)
+
+LRCR_ATTRIBUTE_NAME = "longrunningcommandresult"
+
+
+def parse_lrcr_value(
+    value: Any,
+) -> Optional[Tuple[str, Optional[int], str]]:
+    """Decode a longRunningCommandResult value
+
+    Args:
+        value (tuple): attribute value, (unique_id, result)
+    Returns:
+        tuple: (unique_id, result_code, message), result_code is None if
+        result does not hold a result code. None if value is not a command
+        result, like the ("", "") value reported before any command.
+    """
+    try:
+        unique_id, result = value
+    except (TypeError, ValueError):
+        return None
+    if not unique_id:
+        return None
+    try:
+        decoded = json.loads(result)
+    except (TypeError, ValueError):
+        return unique_id, None, str(result)
+    if isinstance(decoded, list) and len(decoded) == 2:
+        result_code, message = decoded
+        if isinstance(result_code, int):
+            return unique_id, result_code, str(message)
+    if isinstance(decoded, int):
+        return unique_id, decoded, ""
+    return unique_id, None, str(result)
+
+
+class LrcrRecord:
+    """longRunningCommandResult event decoded once"""
+
+    def __init__(
+        self,
+        unique_id: str,
+        result_code: Optional[int],
+        message: str,
+        timestamp: float,
+        position: int,
+    ):
+        """
+        Args:
+            unique_id (str): unique id of the command
+            result_code (int): result code, None if not reported
+            message (str): result message
+            timestamp (float): reception time, seconds since the epoch
+            position (int): position of the event in arrival order
+        """
+        self.unique_id = unique_id
+        self.result_code = result_code
+        self.message = message
+        self.timestamp = timestamp
+        self.position = position
+
+    def matches(
+        self, result_code: Optional[int], messages: Sequence[str]
+    ) -> bool:
+        """Check result code, if given, and that message contains all of
+        the messages"""
+        if result_code is not None and self.result_code != result_code:
+            return False
+        return all(message in self.message for message in messages)
+
+    def __repr__(self):
+        return (
+            f"LrcrRecord({self.unique_id!r}, {self.result_code!r}, "
+            f"{self.message!r}, position={self.position})"
+        )
+
+
+class LrcrIndex:
+    """longRunningCommandResult records of one device, looked up by unique
+    id or command name"""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._by_unique_id: Dict[str, List[LrcrRecord]] = {}
+        self._by_command_name: Dict[str, List[str]] = {}
+        self._count = 0
+
+    def add(
+        self,
+        value: Any,
+        timestamp: Optional[float] = None,
+        position: Optional[int] = None,
+    ) -> Optional[LrcrRecord]:
+        """Decode and index a longRunningCommandResult value
+
+        Args:
+            value (tuple): attribute value, (unique_id, result)
+            timestamp (float): reception time, now if not given
+            position (int): position of the event in arrival order,
+                defaults to the number of values added before
+        Returns:
+            LrcrRecord: the record, None if value is not a command result
+        """
+        parsed = parse_lrcr_value(value)
+        with self._condition:
+            if position is None:
+                position = self._count
+            self._count = max(self._count, position + 1)
+            if parsed is None:
+                return None
+            unique_id, result_code, message = parsed
+            record = LrcrRecord(
+                unique_id,
+                result_code,
+                message,
+                time.time() if timestamp is None else timestamp,
+                position,
+            )
+            if unique_id not in self._by_unique_id:
+                self._by_unique_id[unique_id] = []
+                for command_name, unique_ids in self._by_command_name.items():
+                    if unique_id.endswith(command_name):
+                        unique_ids.append(unique_id)
+            self._by_unique_id[unique_id].append(record)
+            self._condition.notify_all()
+        return record
+
+    def add_event(self, event: Any) -> Optional[LrcrRecord]:
+        """Index a tango change event, usable as event callback"""
+        if event.err:
+            return None
+        return self.add(event.attr_value.value, event.reception_date.totime())
+
+    def records(self, unique_id: str) -> List[LrcrRecord]:
+        """Return the records of a command, in arrival order"""
+        with self._condition:
+            return list(self._by_unique_id.get(unique_id, []))
+
+    def unique_ids(self, command_name: str) -> List[str]:
+        """Return the unique ids of the commands ending with command_name,
+        in order of first result"""
+        with self._condition:
+            return list(self._command_unique_ids(command_name))
+
+    def find(
+        self,
+        unique_id: Optional[str] = None,
+        command_name: Optional[str] = None,
+        result_code: Optional[int] = None,
+        messages: Sequence[str] = (),
+        since: int = 0,
+        exclude: AbstractSet[int] = frozenset(),
+    ) -> Optional[LrcrRecord]:
+        """Return the first record, at or after position since, of given
+        command having the result code and messages
+
+        Args:
+            unique_id (str): unique id of the command
+            command_name (str): command name, used if unique_id is not given
+            result_code (int): expected result code, any if None
+            messages (list[str]): substrings expected in the message
+            since (int): position of the first record to consider
+            exclude (set[int]): positions of the records not to consider
+        Returns:
+            LrcrRecord: the record, None if not found
+        """
+        with self._condition:
+            return self._find(
+                unique_id, command_name, result_code, messages, since, exclude
+            )
+
+    def wait_for(
+        self,
+        unique_id: Optional[str] = None,
+        command_name: Optional[str] = None,
+        result_code: Optional[int] = None,
+        messages: Sequence[str] = (),
+        since: int = 0,
+        timeout: float = 0.0,
+        exclude: AbstractSet[int] = frozenset(),
+    ) -> Optional[LrcrRecord]:
+        """Blocking variant of find, waiting up to timeout seconds for the
+        record to be received"""
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                record = self._find(
+                    unique_id,
+                    command_name,
+                    result_code,
+                    messages,
+                    since,
+                    exclude,
+                )
+                remaining_time = deadline - time.monotonic()
+                if record is not None or remaining_time <= 0:
+                    return record
+                self._condition.wait(remaining_time)
+
+    def _find(
+        self,
+        unique_id: Optional[str],
+        command_name: Optional[str],
+        result_code: Optional[int],
+        messages: Sequence[str],
+        since: int,
+        exclude: AbstractSet[int] = frozenset(),
+    ) -> Optional[LrcrRecord]:
+        """find, must be called with the condition held"""
+        if unique_id is not None:
+            unique_ids = [unique_id]
+        elif command_name is not None:
+            unique_ids = self._command_unique_ids(command_name)
+        else:
+            raise ValueError("Either unique_id or command_name is required")
+        found = None
+        for candidate in unique_ids:
+            for record in self._by_unique_id.get(candidate, []):
+                if (
+                    record.position >= since
+                    and record.position not in exclude
+                    and record.matches(result_code, messages)
+                ):
+                    if found is None or record.position < found.position:
+                        found = record
+                    break
+        return found
+
+    def _command_unique_ids(self, command_name: str) -> List[str]:
+        """Unique ids ending with command_name, as checked by
+        ``unique_id.endswith(command_name)``, in order of first result. The
+        list is built on first lookup and extended by add, must be called
+        with the condition held"""
+        if command_name not in self._by_command_name:
+            self._by_command_name[command_name] = [
+                unique_id
+                for unique_id in self._by_unique_id
+                if unique_id.endswith(command_name)
+            ]
+        return self._by_command_name[command_name]
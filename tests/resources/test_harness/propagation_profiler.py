@@ -0,0 +1,371 @@
+"""obsState propagation timeline of a command.
+
+A command invoked on SubarrayNode, or on CentralNode for the subarray,
+propagates along one chain per subsystem:
+
+    SubarrayNode -> leaf node -> subsystem -> leaf node -> SubarrayNode
+
+The PropagationProfiler timestamps, using the event reception_date, the
+obsState and longRunningCommandResult events of SubarrayNode, of the CSP,
+SDP and MCCS subarray leaf nodes and of the subsystem subarrays. From them
+the PropagationTimeline derives the latency of each hop of each chain:
+
+- TMC->leaf node: from the invocation to the first longRunningCommandResult
+  event of the leaf node, SubarrayNode forwarding the command to it
+- dispatch: until the first obsState change of the subsystem subarray, the
+  leaf node invoking the command on the subsystem
+- subsystem: until the subsystem subarray reaches the expected obsState
+- leaf node: until the leaf node reports the subsystem obsState
+- aggregation: until SubarrayNode reaches the expected obsState
+- result: until SubarrayNode reports the command result
+
+SubarrayNode aggregates the obsStates once the last leaf node reports, so
+the chain whose leaf node reports last is the critical path. Its hops tell
+whether a slow command is spent in TMC or in a subsystem.
+"""
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from ska_control_model import ObsState
+from ska_ser_logging import configure_logging
+
+from tests.resources.test_support.common_utils.event_hub import (
+    CHANGE_EVENT_HUB,
+    ChangeEventHub,
+)
+
+configure_logging(logging.DEBUG)
+LOGGER = logging.getLogger(__name__)
+
+# Log the propagation timeline of the commands waited for by the sync
+# decorators
+PROPAGATION_PROFILING = (
+    os.getenv("PROPAGATION_PROFILING", "false").lower() == "true"
+)
+LRCR_ATTRIBUTE = "longRunningCommandResult"
+OBS_STATE_ATTRIBUTE = "obsState"
+# Leaf node key, obsState attribute reported by the leaf node and subsystem
+# subarray key of each chain, keyed as device_dict_low
+CHAINS = {
+    "csp": ("csp_subarray_leaf_node", "cspSubarrayObsState", "csp_subarray"),
+    "sdp": ("sdp_subarray_leaf_node", "sdpSubarrayObsState", "sdp_subarray"),
+    "mccs": ("mccs_subarray_leaf_node", "obsState", "mccs_subarray"),
+}
+HOPS = (
+    "TMC->leaf node",
+    "dispatch",
+    "subsystem",
+    "leaf node",
+    "aggregation",
+    "result",
+)
+
+
+class TimelineEvent:
+    """obsState or longRunningCommandResult event of a device"""
+
+    def __init__(
+        self, timestamp: float, device_key: str, attribute_name: str, value
+    ):
+        """
+        Args:
+            timestamp (float): reception time, seconds since the epoch
+            device_key (str): device key, as in device_dict_low
+            attribute_name (str): attribute name
+            value (Any): attribute value
+        """
+        self.timestamp = timestamp
+        self.device_key = device_key
+        self.attribute_name = attribute_name
+        self.value = value
+
+    def __repr__(self):
+        return (
+            f"TimelineEvent({self.timestamp}, {self.device_key}/"
+            f"{self.attribute_name}, {self.value!r})"
+        )
+
+
+class PropagationTimeline:
+    """Events received from the invocation of a command, broken down into
+    hops"""
+
+    def __init__(
+        self,
+        command_name: str,
+        obs_state: str,
+        invoked_at: float,
+        events: List[TimelineEvent],
+    ):
+        """
+        Args:
+            command_name (str): command name
+            obs_state (str): obsState reached once the command is complete
+            invoked_at (float): invocation time, seconds since the epoch
+            events (list[TimelineEvent]): events received since then
+        """
+        self.command_name = command_name
+        self.obs_state = ObsState[obs_state]
+        self.invoked_at = invoked_at
+        self.events = sorted(events, key=lambda event: event.timestamp)
+
+    def first_event(
+        self,
+        device_key: str,
+        attribute_name: str,
+        obs_state: Optional[ObsState] = None,
+        after: float = 0.0,
+    ) -> Optional[float]:
+        """Return the time of the first event of an attribute, having
+        obs_state if given, received at or after a time
+
+        Args:
+            device_key (str): device key, as in device_dict_low
+            attribute_name (str): attribute name
+            obs_state (ObsState): expected value, any if None
+            after (float): earliest reception time
+        Returns:
+            float: reception time of the event, None if not received
+        """
+        for event in self.events:
+            if (
+                event.device_key == device_key
+                and event.attribute_name == attribute_name
+                and event.timestamp >= after
+                and (obs_state is None or event.value == obs_state)
+            ):
+                return event.timestamp
+        return None
+
+    def milestones(self, chain: str) -> Dict[str, Optional[float]]:
+        """Return the reception time of the end of each hop of a chain
+
+        Args:
+            chain (str): "csp", "sdp" or "mccs"
+        Returns:
+            dict: time per hop, None if the event was not received
+        """
+        leaf_node_key, leaf_node_attribute, subsystem_key = CHAINS[chain]
+        leaf_node_invoked = self.first_event(leaf_node_key, LRCR_ATTRIBUTE)
+        subsystem_started = self.first_event(
+            subsystem_key, OBS_STATE_ATTRIBUTE
+        )
+        subsystem_done = self.first_event(
+            subsystem_key, OBS_STATE_ATTRIBUTE, self.obs_state
+        )
+        leaf_node_done = self.first_event(
+            leaf_node_key,
+            leaf_node_attribute,
+            self.obs_state,
+            subsystem_done or 0.0,
+        )
+        aggregated = self.first_event(
+            "tmc_subarraynode",
+            OBS_STATE_ATTRIBUTE,
+            self.obs_state,
+            leaf_node_done or 0.0,
+        )
+        return {
+            "TMC->leaf node": leaf_node_invoked,
+            "dispatch": subsystem_started,
+            "subsystem": subsystem_done,
+            "leaf node": leaf_node_done,
+            "aggregation": aggregated,
+            "result": self.first_event(
+                "tmc_subarraynode", LRCR_ATTRIBUTE, after=aggregated or 0.0
+            ),
+        }
+
+    def hops(self) -> Dict[str, Dict[str, Optional[float]]]:
+        """Return the latency of each hop, in seconds, per chain having
+        received events. A hop whose start or end was not received is
+        None."""
+        breakdown = {}
+        for chain in CHAINS:
+            milestones = self.milestones(chain)
+            if milestones["dispatch"] is None:
+                continue
+            latencies = {}
+            start: Optional[float] = self.invoked_at
+            for hop in HOPS:
+                end = milestones[hop]
+                latencies[hop] = (
+                    end - start
+                    if start is not None and end is not None
+                    else None
+                )
+                start = end
+            breakdown[chain] = latencies
+        return breakdown
+
+    def critical_path(self) -> Optional[str]:
+        """Return the chain whose leaf node reported last, the one
+        SubarrayNode waited for, None if no leaf node reported"""
+        reported = {}
+        for chain in CHAINS:
+            timestamp = self.milestones(chain)["leaf node"]
+            if timestamp is not None:
+                reported[chain] = timestamp
+        if not reported:
+            return None
+        return max(reported, key=reported.get)
+
+    def as_dict(self) -> dict:
+        """Return the breakdown as a JSON serialisable dict"""
+        return {
+            "command": self.command_name,
+            "obs_state": self.obs_state.name,
+            "hops": self.hops(),
+            "critical_path": self.critical_path(),
+        }
+
+    def render(self) -> str:
+        """Return the per hop latency breakdown as a text table, in
+        milliseconds, the critical path being marked with *"""
+        critical_path = self.critical_path()
+        lines = [
+            f"{self.command_name} -> {self.obs_state.name}, critical path: "
+            f"{critical_path}",
+            f"  {'chain':6}" + "".join(f"{hop:>15}" for hop in HOPS),
+        ]
+        for chain, latencies in self.hops().items():
+            marker = "*" if chain == critical_path else " "
+            cells = "".join(
+                f"{latency * 1000:>15.1f}"
+                if latency is not None
+                else f"{'-':>15}"
+                for latency in latencies.values()
+            )
+            lines.append(f"{marker} {chain:6}{cells}")
+        return "\n".join(lines)
+
+
+class PropagationProfiler:
+    """Records the obsState and longRunningCommandResult events of the
+    devices a command propagates through.
+
+    Used as a context manager around the command invocation: the events
+    are subscribed on entry, which marks the invocation time, and
+    unsubscribed on exit.
+    """
+
+    def __init__(
+        self,
+        device_dict: Dict[str, str],
+        command_name: str,
+        obs_state: str,
+        hub: ChangeEventHub = CHANGE_EVENT_HUB,
+    ):
+        """
+        Args:
+            device_dict (dict): device names, keyed as device_dict_low
+            command_name (str): command name
+            obs_state (str): obsState reached once the command is complete
+            hub (ChangeEventHub): hub the events are subscribed through
+        """
+        self.command_name = command_name
+        self.obs_state = obs_state
+        self.hub = hub
+        self.attributes = {
+            "tmc_subarraynode": [OBS_STATE_ATTRIBUTE, LRCR_ATTRIBUTE]
+        }
+        for (
+            leaf_node_key,
+            leaf_node_attribute,
+            subsystem_key,
+        ) in CHAINS.values():
+            self.attributes[leaf_node_key] = [
+                leaf_node_attribute,
+                LRCR_ATTRIBUTE,
+            ]
+            self.attributes[subsystem_key] = [OBS_STATE_ATTRIBUTE]
+        self.device_names = {
+            key: device_dict[key]
+            for key in self.attributes
+            if device_dict.get(key)
+        }
+        self.invoked_at = 0.0
+        self._events: List[TimelineEvent] = []
+        self._lock = threading.Lock()
+        self._handles: List[int] = []
+
+    def _callback(self, device_key: str, attribute_name: str):
+        """Return the callback recording the events of an attribute"""
+
+        def record(event: Any) -> None:
+            if event.err:
+                return
+            with self._lock:
+                self._events.append(
+                    TimelineEvent(
+                        event.reception_date.totime(),
+                        device_key,
+                        attribute_name,
+                        event.attr_value.value,
+                    )
+                )
+
+        return record
+
+    def __enter__(self) -> "PropagationProfiler":
+        for device_key, device_name in self.device_names.items():
+            for attribute_name in self.attributes[device_key]:
+                self._handles.append(
+                    self.hub.subscribe(
+                        device_name,
+                        attribute_name,
+                        self._callback(device_key, attribute_name),
+                    )
+                )
+        self.invoked_at = time.time()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        for handle in self._handles:
+            self.hub.unsubscribe(handle)
+        self._handles = []
+
+    def timeline(self) -> PropagationTimeline:
+        """Return the timeline of the events received since the
+        invocation"""
+        with self._lock:
+            events = [
+                event
+                for event in self._events
+                if event.timestamp >= self.invoked_at
+            ]
+        return PropagationTimeline(
+            self.command_name, self.obs_state, self.invoked_at, events
+        )
+
+
+@contextmanager
+def profile_propagation(
+    device_dict: Dict[str, str],
+    command_name: str,
+    obs_state: str,
+    enabled: bool = PROPAGATION_PROFILING,
+):
+    """Log the propagation timeline of the command invoked within the
+    context, if enabled
+
+    Args:
+        device_dict (dict): device names, keyed as device_dict_low
+        command_name (str): command name
+        obs_state (str): obsState reached once the command is complete
+        enabled (bool): whether to profile the command
+    """
+    if not enabled:
+        yield None
+        return
+    with PropagationProfiler(device_dict, command_name, obs_state) as profiler:
+        try:
+            yield profiler
+        finally:
+            LOGGER.info(
+                "Propagation timeline:\n%s", profiler.timeline().render()
+            )
@@ -0,0 +1,259 @@
+"""Direct seeding of the simulator states for the preconditions of a test.
+
+With all the subsystems simulated, bringing a subarray to IDLE or READY
+through the TMC command chain only serves the precondition of a test whose
+subject is the next transition. When SEED_SIMULATOR_STATES is set, the
+SubarrayNodeWrapperLow instead sets the obsState and the attributes the
+commands would have produced directly on the helper devices, and waits for
+SubarrayNode to aggregate the seeded obsState.
+
+The helper devices have one setter command per attribute, so a seed is
+applied in phases: the setters of a phase are invoked asynchronously on all
+the devices and their replies collected before the next phase starts, the
+obsState setters forming the last phase.
+"""
+import logging
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from ska_control_model import ObsState
+from ska_ser_logging import configure_logging
+from tango import DevFailed, DevState
+
+from tests.resources.test_harness.event_recorder import IndexedEventRecorder
+from tests.resources.test_harness.helpers import (
+    SIMULATED_DEVICES_DICT,
+    generate_and_get_assign_resource_json,
+    get_simulated_receive_addresses,
+)
+from tests.resources.test_harness.utils.obs_state_planner import (
+    read_obs_states,
+)
+from tests.resources.test_support.common_utils.device_proxy_pool import (
+    DEVICE_PROXY_POOL,
+    get_device_name,
+)
+
+configure_logging(logging.DEBUG)
+LOGGER = logging.getLogger(__name__)
+
+# Seed the simulators instead of invoking TMC commands to reach the
+# precondition obsState, effective when all the subsystems are simulated
+SEED_SIMULATOR_STATES = (
+    os.getenv("SEED_SIMULATOR_STATES", "false").lower() == "true"
+)
+
+# obsStates a subarray can be seeded in, and from
+SEEDABLE_OBS_STATES = ("IDLE", "READY")
+SEED_SOURCE_OBS_STATES = ("EMPTY", "IDLE", "READY")
+
+# (subsystem subarray key, attribute) of the seeded resources, set by the
+# SetDirect<attribute> command of the helper device
+SEEDED_RESOURCES = (
+    ("sdp_subarray", "receiveAddresses"),
+    ("mccs_subarray", "assignedResources"),
+)
+
+
+def is_seeding_enabled() -> bool:
+    """Check whether simulator states are seeded"""
+    return SEED_SIMULATOR_STATES and SIMULATED_DEVICES_DICT["all_mocks"]
+
+
+class SimulatorSeed:
+    """Setter commands of the helper devices, applied in phases"""
+
+    def __init__(self):
+        self.phases: List[Dict[str, List[Tuple[str, Any]]]] = []
+
+    def add(
+        self,
+        device: Any,
+        command_name: str,
+        argin: Any = None,
+        phase: int = 0,
+    ) -> "SimulatorSeed":
+        """Add a setter command
+
+        Args:
+            device (str | DeviceProxy): helper device
+            command_name (str): setter command, like SetDirectObsState
+            argin (Any): command argument, None for commands without one
+            phase (int): phase of the command, commands of a device within
+                a phase are invoked in order of addition
+        Returns:
+            SimulatorSeed: the seed, for chaining
+        """
+        while len(self.phases) <= phase:
+            self.phases.append({})
+        self.phases[phase].setdefault(get_device_name(device), []).append(
+            (command_name, argin)
+        )
+        return self
+
+    def apply(self, timeout: float = 10.0) -> None:
+        """Invoke the setter commands
+
+        Args:
+            timeout (float): seconds to wait for the reply of each command
+        Raises:
+            DevFailed: if a setter fails
+        """
+        for phase in self.phases:
+            requests = []
+            for device_name, commands in phase.items():
+                proxy = DEVICE_PROXY_POOL.get_proxy(device_name)
+                for command_name, argin in commands:
+                    if argin is None:
+                        request_id = proxy.command_inout_asynch(command_name)
+                    else:
+                        request_id = proxy.command_inout_asynch(
+                            command_name, argin
+                        )
+                    requests.append((proxy, request_id))
+            for proxy, request_id in requests:
+                proxy.command_inout_reply(request_id, int(timeout * 1000))
+
+
+def subarray_seed(
+    subsystem_subarrays: Dict[str, Any],
+    obs_state: str,
+    assign_input: Optional[str] = None,
+    resources: Optional[Dict[Tuple[str, str], Any]] = None,
+) -> SimulatorSeed:
+    """Return the seed bringing the subsystem subarray simulators to
+    obs_state
+
+    Args:
+        subsystem_subarrays (dict): subsystem subarray devices, keyed as
+            SubarrayNodeWrapperLow.subarray_devices
+        obs_state (str): obsState name
+        assign_input (str): AssignResources input the seeded resources are
+            derived from, resources are not seeded if not given
+        resources (dict): values of the resources keyed as
+            SEEDED_RESOURCES, seeded instead of the ones derived from
+            assign_input, e.g. to restore them
+    Returns:
+        SimulatorSeed: the seed
+    """
+    seed = SimulatorSeed()
+    if resources is None and obs_state in SEEDABLE_OBS_STATES and assign_input:
+        resources = {
+            ("sdp_subarray", "receiveAddresses"): (
+                get_simulated_receive_addresses()
+            ),
+            ("mccs_subarray", "assignedResources"): (
+                generate_and_get_assign_resource_json(assign_input)
+            ),
+        }
+    for (device_key, attribute_name), value in (resources or {}).items():
+        seed.add(
+            subsystem_subarrays[device_key],
+            f"SetDirect{attribute_name}",
+            value,
+        )
+    for device in subsystem_subarrays.values():
+        seed.add(device, "SetDirectObsState", ObsState[obs_state], phase=1)
+    return seed
+
+
+def read_seeded_resources(
+    subsystem_subarrays: Dict[str, Any]
+) -> Dict[Tuple[str, str], Any]:
+    """Read the current values of the resources a seed may set
+
+    Args:
+        subsystem_subarrays (dict): subsystem subarray devices, keyed as
+            SubarrayNodeWrapperLow.subarray_devices
+    Returns:
+        dict: values keyed as SEEDED_RESOURCES, the resources not readable
+        are left out
+    """
+    resources = {}
+    for device_key, attribute_name in SEEDED_RESOURCES:
+        try:
+            resources[
+                (device_key, attribute_name)
+            ] = DEVICE_PROXY_POOL.read_attribute(
+                subsystem_subarrays[device_key], attribute_name
+            ).value
+        except DevFailed as exception:
+            LOGGER.warning(
+                "%s of %s cannot be restored: %s",
+                attribute_name,
+                device_key,
+                exception,
+            )
+    return resources
+
+
+def seed_subarray_obs_state(
+    subarray_node: Any,
+    subsystem_subarrays: Dict[str, Any],
+    obs_state: str,
+    assign_input: Optional[str] = None,
+    timeout: float = 10.0,
+    reassign: bool = False,
+) -> bool:
+    """Seed the subsystem subarray simulators in obs_state and wait for
+    SubarrayNode to follow. If it does not, the simulators are seeded back
+    in the obsState of SubarrayNode with the resources they had.
+
+    Args:
+        subarray_node (str | DeviceProxy): SubarrayNode
+        subsystem_subarrays (dict): subsystem subarray devices, keyed as
+            SubarrayNodeWrapperLow.subarray_devices
+        obs_state (str): obsState name
+        assign_input (str): AssignResources input the seeded resources are
+            derived from
+        timeout (float): seconds to wait for SubarrayNode
+        reassign (bool): whether the resources derived from assign_input
+            are seeded even if SubarrayNode already is in obs_state, as a
+            given AssignResources input would be assigned again
+    Returns:
+        bool: True if SubarrayNode is in obs_state, False if seeding is
+        disabled or not possible, in which case the caller has to invoke
+        the commands
+    """
+    if not is_seeding_enabled() or obs_state not in SEEDABLE_OBS_STATES:
+        return False
+    try:
+        if (
+            DEVICE_PROXY_POOL.read_attribute(subarray_node, "State").value
+            != DevState.ON
+        ):
+            return False
+        source, consistent = read_obs_states(
+            subarray_node, subsystem_subarrays.values()
+        )
+    except DevFailed as exception:
+        LOGGER.warning("Not seeding simulators: %s", exception)
+        return False
+    if not consistent or source not in SEED_SOURCE_OBS_STATES:
+        return False
+    if source == obs_state:
+        if reassign and assign_input:
+            LOGGER.info("Seeding the resources of simulators in %s", source)
+            subarray_seed(subsystem_subarrays, obs_state, assign_input).apply()
+        return True
+    subarray_node = DEVICE_PROXY_POOL.get_proxy(subarray_node)
+    resources = (
+        read_seeded_resources(subsystem_subarrays) if assign_input else {}
+    )
+    event_recorder = IndexedEventRecorder()
+    event_recorder.subscribe_event(subarray_node, "obsState", timeout=timeout)
+    try:
+        LOGGER.info("Seeding simulators from %s to %s", source, obs_state)
+        subarray_seed(subsystem_subarrays, obs_state, assign_input).apply()
+        if event_recorder.has_change_event_occurred(
+            subarray_node, "obsState", ObsState[obs_state], timeout=timeout
+        ):
+            return True
+        LOGGER.warning(
+            "SubarrayNode did not follow the simulators seeded in %s",
+            obs_state,
+        )
+        subarray_seed(subsystem_subarrays, source, resources=resources).apply()
+        return False
+    finally:
+        event_recorder.clear_events()
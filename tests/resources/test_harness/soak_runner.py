@@ -0,0 +1,338 @@
+"""Soak runs of long observing sequences.
+
+The SoakRunner repeats observing blocks for a duration. Each block is:
+
+    AssignResources -> (Configure -> Scan -> EndScan) x K -> End -> Release
+
+Each block assigns fresh eb and pb ids, and every scan uses a new, rising
+scan id. The latency of each command is measured as by the command latency
+benchmark. After each block the runner samples the resources of the test
+process:
+
+- resident set size
+- event subscriptions held by the ChangeEventHub
+- rate of the events dispatched by the ChangeEventHub
+
+Once the run is over, the trend of the latencies and of the resident set
+size is fitted. A latency growing by more than SOAK_LATENCY_GROWTH_LIMIT
+over the run, or a resident set size growing faster than
+SOAK_RSS_GROWTH_LIMIT_MB_PER_HOUR, fails the run. This shows a degradation
+before it reaches an observing night.
+"""
+import json
+import logging
+import os
+import resource
+import statistics
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from ska_ser_logging import configure_logging
+
+from tests.resources.test_harness.command_benchmark import (
+    LRCR_SOURCE,
+    CommandLatencyBenchmark,
+)
+from tests.resources.test_harness.helpers import (
+    update_eb_pb_ids,
+    update_scan_id,
+)
+from tests.resources.test_support.common_utils.event_hub import (
+    CHANGE_EVENT_HUB,
+    ChangeEventHub,
+)
+
+configure_logging(logging.DEBUG)
+LOGGER = logging.getLogger(__name__)
+
+# Seconds the soak run lasts, 0 skips it
+SOAK_DURATION = float(os.getenv("SOAK_DURATION", "0"))
+# Configure/Scan/EndScan cycles per observing block
+SOAK_SCANS_PER_BLOCK = int(os.getenv("SOAK_SCANS_PER_BLOCK", "3"))
+# Largest relative growth of a command latency over the run
+SOAK_LATENCY_GROWTH_LIMIT = float(
+    os.getenv("SOAK_LATENCY_GROWTH_LIMIT", "0.5")
+)
+# Largest growth rate of the resident set size
+SOAK_RSS_GROWTH_LIMIT_MB_PER_HOUR = float(
+    os.getenv("SOAK_RSS_GROWTH_LIMIT_MB_PER_HOUR", "100")
+)
+# JSON report of the soak run
+SOAK_REPORT = os.getenv("SOAK_REPORT", "build/soak_report.json")
+# Samples needed to fit a trend
+MIN_TREND_SAMPLES = 5
+
+
+def resident_set_size() -> int:
+    """Return the resident set size of the test process, in bytes, its
+    peak where /proc is not available"""
+    try:
+        with open("/proc/self/statm", "r", encoding="UTF-8") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def trend(times: Sequence[float], values: Sequence[float]) -> Optional[dict]:
+    """Fit a line to values
+
+    Args:
+        times (list[float]): abscissae, e.g. seconds or sample indexes
+        values (list[float]): values
+    Returns:
+        dict: slope, and the fitted values at the first and last time, None
+        if there are fewer than MIN_TREND_SAMPLES values or times are all
+        equal
+    """
+    if len(values) < MIN_TREND_SAMPLES or len(set(times)) < 2:
+        return None
+    slope, intercept = statistics.linear_regression(times, values)
+    return {
+        "slope": slope,
+        "start": intercept + slope * times[0],
+        "end": intercept + slope * times[-1],
+    }
+
+
+class SoakSample:
+    """Resources of the test process after an observing block"""
+
+    def __init__(
+        self,
+        elapsed: float,
+        block: int,
+        rss_bytes: int,
+        subscriptions: int,
+        event_rate: float,
+    ):
+        """
+        Args:
+            elapsed (float): seconds since the start of the run
+            block (int): observing blocks completed
+            rss_bytes (int): resident set size
+            subscriptions (int): event subscriptions held by the hub
+            event_rate (float): events per second since the previous sample
+        """
+        self.elapsed = elapsed
+        self.block = block
+        self.rss_bytes = rss_bytes
+        self.subscriptions = subscriptions
+        self.event_rate = event_rate
+
+    def as_dict(self) -> dict:
+        """Return the sample as a JSON serialisable dict"""
+        return dict(vars(self))
+
+
+class ResourceSampler:
+    """Samples the resources of the test process, counting the events
+    dispatched by the ChangeEventHub through a tap"""
+
+    def __init__(self, hub: ChangeEventHub = CHANGE_EVENT_HUB):
+        """
+        Args:
+            hub (ChangeEventHub): hub whose subscriptions and events are
+                sampled
+        """
+        self.hub = hub
+        self.started_at = time.monotonic()
+        self.samples: List[SoakSample] = []
+        self._event_count = 0
+        self._lock = threading.Lock()
+        self._last_sample = (self.started_at, 0)
+        self._tap_handle = hub.add_tap(self._count_event)
+
+    def _count_event(self, *_) -> None:
+        """ChangeEventHub tap counting the events"""
+        with self._lock:
+            self._event_count += 1
+
+    def sample(self, block: int) -> SoakSample:
+        """Sample the resources
+
+        Args:
+            block (int): observing blocks completed
+        Returns:
+            SoakSample: the sample, also appended to samples
+        """
+        now = time.monotonic()
+        with self._lock:
+            event_count = self._event_count
+        last_time, last_count = self._last_sample
+        self._last_sample = (now, event_count)
+        sample = SoakSample(
+            now - self.started_at,
+            block,
+            resident_set_size(),
+            self.hub.subscription_count(),
+            (event_count - last_count) / max(now - last_time, 1e-9),
+        )
+        self.samples.append(sample)
+        return sample
+
+    def close(self) -> None:
+        """Stop counting the events"""
+        self.hub.remove_tap(self._tap_handle)
+
+
+class SoakRunner:
+    """Repeats observing blocks, measuring the command latencies and
+    sampling the resources of the test process"""
+
+    def __init__(
+        self,
+        central_node: Any,
+        subarray_node: Any,
+        scans_per_block: int = SOAK_SCANS_PER_BLOCK,
+        latency_growth_limit: float = SOAK_LATENCY_GROWTH_LIMIT,
+        rss_growth_limit: float = SOAK_RSS_GROWTH_LIMIT_MB_PER_HOUR,
+    ):
+        """
+        Args:
+            central_node (CentralNodeWrapperLow): CentralNode wrapper
+            subarray_node (SubarrayNodeWrapperLow): SubarrayNode wrapper
+            scans_per_block (int): Configure/Scan/EndScan cycles per block
+            latency_growth_limit (float): largest relative growth of a
+                command latency over the run
+            rss_growth_limit (float): largest growth rate of the resident
+                set size, in MB per hour
+        """
+        self.benchmark = CommandLatencyBenchmark(central_node, subarray_node)
+        self.scans_per_block = scans_per_block
+        self.latency_growth_limit = latency_growth_limit
+        self.rss_growth_limit = rss_growth_limit
+        self.block_count = 0
+        self.scan_id = 0
+        self.sampler: Optional[ResourceSampler] = None
+
+    def run_block(
+        self,
+        assign_json: str,
+        configure_json: str,
+        scan_json: str,
+        release_json: str,
+    ) -> None:
+        """Run an observing block, from and back to obsState EMPTY
+
+        Args:
+            assign_json (str): AssignResources input, eb and pb ids being
+                replaced
+            configure_json (str): Configure input
+            scan_json (str): Scan input, scan id being replaced
+            release_json (str): ReleaseResources input
+        """
+        central_node = self.benchmark.central_node.central_node
+        subarray_node = self.benchmark.subarray_node.subarray_node
+        block_assign_json = update_eb_pb_ids(assign_json)
+        self.benchmark.measure(
+            "AssignResources",
+            "IDLE",
+            lambda: central_node.AssignResources(block_assign_json),
+        )
+        for _ in range(self.scans_per_block):
+            self.benchmark.measure(
+                "Configure",
+                "READY",
+                lambda: subarray_node.Configure(configure_json),
+            )
+            self.scan_id += 1
+            block_scan_json = update_scan_id(scan_json, self.scan_id)
+            self.benchmark.measure(
+                "Scan",
+                "SCANNING",
+                lambda: subarray_node.Scan(block_scan_json),
+            )
+            self.benchmark.measure("EndScan", "READY", subarray_node.EndScan)
+        self.benchmark.measure("End", "IDLE", subarray_node.End)
+        self.benchmark.measure(
+            "ReleaseResources",
+            "EMPTY",
+            lambda: central_node.ReleaseResources(release_json),
+        )
+        self.block_count += 1
+
+    def run(
+        self,
+        duration: float,
+        assign_json: str,
+        configure_json: str,
+        scan_json: str,
+        release_json: str,
+    ) -> dict:
+        """Run observing blocks until duration has elapsed
+
+        Args:
+            duration (float): seconds to run for, the block running when
+                it elapses being completed
+            assign_json (str): AssignResources input
+            configure_json (str): Configure input
+            scan_json (str): Scan input, its scan id being the first one
+            release_json (str): ReleaseResources input
+        Returns:
+            dict: report of the run
+        """
+        self.scan_id = int(json.loads(scan_json)["scan_id"]) - 1
+        self.sampler = ResourceSampler()
+        try:
+            self.sampler.sample(self.block_count)
+            while self.sampler.samples[-1].elapsed < duration:
+                self.run_block(
+                    assign_json, configure_json, scan_json, release_json
+                )
+                sample = self.sampler.sample(self.block_count)
+                LOGGER.info("Soak sample: %s", sample.as_dict())
+        finally:
+            self.sampler.close()
+        return self.report()
+
+    def trends(self) -> Dict[str, Optional[dict]]:
+        """Return the trend of the latency of each command, over its
+        invocations, and of the resident set size, over hours"""
+        trends = {}
+        for command_name, sources in self.benchmark.latencies.samples.items():
+            latencies = sources[LRCR_SOURCE]
+            trends[command_name] = trend(
+                list(range(len(latencies))), latencies
+            )
+        samples = self.sampler.samples if self.sampler else []
+        trends["rss_mb"] = trend(
+            [sample.elapsed / 3600 for sample in samples],
+            [sample.rss_bytes / 2**20 for sample in samples],
+        )
+        return trends
+
+    def failures(self) -> List[str]:
+        """Return the latency and memory trends beyond their limits"""
+        failures = []
+        for name, fitted in self.trends().items():
+            if fitted is None:
+                continue
+            if name == "rss_mb":
+                if fitted["slope"] > self.rss_growth_limit:
+                    failures.append(
+                        f"Resident set size grows by {fitted['slope']:.1f} "
+                        f"MB/h, limit {self.rss_growth_limit} MB/h"
+                    )
+                continue
+            growth = (fitted["end"] - fitted["start"]) / max(
+                fitted["start"], 1e-3
+            )
+            if growth > self.latency_growth_limit:
+                failures.append(
+                    f"{name} latency grows by {growth:.0%} over the run, "
+                    f"limit {self.latency_growth_limit:.0%}"
+                )
+        return failures
+
+    def report(self) -> dict:
+        """Return the report of the run as a JSON serialisable dict"""
+        samples = self.sampler.samples if self.sampler else []
+        return {
+            "blocks": self.block_count,
+            "scans_per_block": self.scans_per_block,
+            "latencies": self.benchmark.latencies.summary(),
+            "samples": [sample.as_dict() for sample in samples],
+            "trends": self.trends(),
+            "failures": self.failures(),
+        }
@@ -0,0 +1,329 @@
+"""Lease of a subarray per pytest-xdist worker.
+
+The deployment has SUBARRAY_COUNT subarrays. When the tests are distributed
+over pytest-xdist workers, each worker leases its own subarray: the
+SubarrayNode, its leaf nodes and the CSP, SDP and MCCS subarrays. The
+device names of constant.py, and the device dicts, waiters and simulators
+derived from them, then refer to the leased subarray, so that independent
+scenarios run in parallel on one deployment.
+
+Worker gw<N> leases subarray N + 1. Importing this module only derives
+the subarray from the worker id; the lease itself, a lock file held for the
+lifetime of the worker so that two runs against the same deployment do not
+lease the same subarray, is taken by pytest_configure. Without xdist
+subarray 1 is used and nothing is locked.
+
+Command inputs are written for subarray 1 and for MCCS subarray beam 1 and
+stations 1 to STATIONS_PER_SUBARRAY. with_leased_resources moves them to
+the subarray beam and station set of the lease, so that the AssignResources
+of two workers do not compete for the same MCCS resources.
+
+Telescope wide tests, which power the Telescope or change a simulator
+shared by all subarrays, hold the TELESCOPE_LOCK exclusively while the
+tests of the leased subarrays hold it shared, so that they never overlap.
+"""
+import fcntl
+import json
+import logging
+import os
+import re
+import tempfile
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, TextIO
+
+from ska_ser_logging import configure_logging
+
+configure_logging(logging.DEBUG)
+LOGGER = logging.getLogger(__name__)
+
+# Number of subarrays deployed, at least the number of xdist workers
+SUBARRAY_COUNT = int(os.getenv("SUBARRAY_COUNT", "1"))
+# Directory of the lease lock files, shared by the runs on a deployment
+SUBARRAY_LEASE_DIR = os.getenv(
+    "SUBARRAY_LEASE_DIR",
+    os.path.join(tempfile.gettempdir(), "tmc-low-subarray-leases"),
+)
+# Stations of the subarray beam of each lease, lease N using the stations
+# (N - 1) * STATIONS_PER_SUBARRAY + 1 to N * STATIONS_PER_SUBARRAY
+STATIONS_PER_SUBARRAY = int(os.getenv("STATIONS_PER_SUBARRAY", "6"))
+# A real MCCS is deployed with a single subarray, subarray beam and station
+# set, so that a single subarray can be leased
+MCCS_SIMULATION_ENABLED = (
+    os.getenv("MCCS_SIMULATION_ENABLED", "true").lower() == "true"
+)
+APERTURE_ID = re.compile(r"AP(\d+)\.(\d+)")
+
+
+class SubarrayLeaseError(RuntimeError):
+    """Raised when the subarray of a worker is leased by another run"""
+
+
+def xdist_worker_index() -> Optional[int]:
+    """Return the index of the pytest-xdist worker, None outside of a
+    worker"""
+    worker_id = os.getenv("PYTEST_XDIST_WORKER")
+    if not worker_id:
+        return None
+    return int(worker_id.lstrip("gw"))
+
+
+def worker_subarray_id(worker_index: Optional[int]) -> int:
+    """Return the subarray of a pytest-xdist worker, without leasing it
+
+    Args:
+        worker_index (int): worker index, None outside of a worker
+    Returns:
+        int: subarray id, 1 outside of a worker
+    """
+    if worker_index is None:
+        return 1
+    return worker_index + 1
+
+
+def subarray_device_names(subarray_id: int) -> Dict[str, str]:
+    """Return the names of the devices of a subarray, keyed as
+    device_dict_low
+
+    Args:
+        subarray_id (int): subarray id, from 1
+    Returns:
+        dict: device names
+    """
+    padded_id = f"{int(subarray_id):02d}"
+    return {
+        "tmc_subarraynode": f"ska_low/tm_subarray_node/{int(subarray_id)}",
+        "csp_subarray_leaf_node": (
+            f"ska_low/tm_leaf_node/csp_subarray{padded_id}"
+        ),
+        "sdp_subarray_leaf_node": (
+            f"ska_low/tm_leaf_node/sdp_subarray{padded_id}"
+        ),
+        "mccs_subarray_leaf_node": (
+            f"ska_low/tm_leaf_node/mccs_subarray{padded_id}"
+        ),
+        "csp_subarray": f"low-csp/subarray/{padded_id}",
+        "sdp_subarray": f"low-sdp/subarray/{padded_id}",
+        "mccs_subarray": f"low-mccs/subarray/{padded_id}",
+        "cbf_subarray": f"low-cbf/subarray/{padded_id}",
+        "mccs_subarraybeam": f"low-mccs/subarraybeam/{padded_id}",
+    }
+
+
+class SubarrayLeaseManager:
+    """Hands out subarrays through lock files, one per subarray"""
+
+    def __init__(
+        self,
+        subarray_count: int = SUBARRAY_COUNT,
+        lease_dir: str = SUBARRAY_LEASE_DIR,
+        mccs_simulated: bool = MCCS_SIMULATION_ENABLED,
+    ):
+        """
+        Args:
+            subarray_count (int): number of subarrays deployed
+            lease_dir (str): directory of the lock files
+            mccs_simulated (bool): whether MCCS is simulated, a real MCCS
+                having the resources of a single subarray
+        """
+        self.subarray_count = subarray_count
+        self.lease_dir = lease_dir
+        self.mccs_simulated = mccs_simulated
+        self._lock_files: Dict[int, TextIO] = {}
+
+    def lock_file_path(self, subarray_id: int) -> str:
+        """Return the lock file of a subarray, per Kubernetes namespace"""
+        namespace = os.getenv("KUBE_NAMESPACE", "default")
+        return os.path.join(
+            self.lease_dir, f"{namespace}-subarray-{subarray_id}.lock"
+        )
+
+    def acquire(self, subarray_id: int) -> int:
+        """Lease a subarray
+
+        Args:
+            subarray_id (int): subarray id, from 1
+        Returns:
+            int: the leased subarray id
+        Raises:
+            SubarrayLeaseError: if the subarray is not deployed, has no
+                MCCS resources of its own or is leased by another run
+        """
+        if not 1 <= subarray_id <= self.subarray_count:
+            raise SubarrayLeaseError(
+                f"Subarray {subarray_id} is not deployed, SUBARRAY_COUNT is "
+                f"{self.subarray_count}: use at most as many xdist workers"
+            )
+        if subarray_id > 1 and not self.mccs_simulated:
+            raise SubarrayLeaseError(
+                f"Subarray {subarray_id} has no MCCS subarray beam and "
+                "stations of its own with a real MCCS: use a single xdist "
+                "worker"
+            )
+        if subarray_id in self._lock_files:
+            return subarray_id
+        os.makedirs(self.lease_dir, exist_ok=True)
+        # pylint: disable=consider-using-with
+        lock_file = open(self.lock_file_path(subarray_id), "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError as exception:
+            lock_file.close()
+            raise SubarrayLeaseError(
+                f"Subarray {subarray_id} is leased by another run"
+            ) from exception
+        self._lock_files[subarray_id] = lock_file
+        LOGGER.info("Leased subarray %s", subarray_id)
+        return subarray_id
+
+    def release(self, subarray_id: int) -> None:
+        """Release a leased subarray
+
+        Args:
+            subarray_id (int): subarray id
+        """
+        lock_file = self._lock_files.pop(subarray_id, None)
+        if lock_file is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+            lock_file.close()
+
+    def lease_for_worker(self, worker_index: Optional[int]) -> int:
+        """Lease the subarray of a pytest-xdist worker
+
+        Args:
+            worker_index (int): worker index, None outside of a worker
+        Returns:
+            int: the leased subarray id, 1 outside of a worker
+        """
+        if worker_index is None:
+            return 1
+        return self.acquire(worker_subarray_id(worker_index))
+
+
+class TelescopeLock:
+    """Readers-writer lock over the runs on a deployment, through lock
+    files. The tests of the leased subarrays hold it shared, the telescope
+    wide tests exclusively. A turnstile taken by the exclusive holder while
+    it waits keeps new shared holders out, so that a telescope wide test is
+    not starved by the tests of the other workers."""
+
+    def __init__(self, lease_dir: str = SUBARRAY_LEASE_DIR):
+        """
+        Args:
+            lease_dir (str): directory of the lock files
+        """
+        self.lease_dir = lease_dir
+
+    def lock_file_path(self, name: str) -> str:
+        """Return a lock file of the Telescope, per Kubernetes namespace"""
+        namespace = os.getenv("KUBE_NAMESPACE", "default")
+        return os.path.join(self.lease_dir, f"{namespace}-telescope-{name}")
+
+    @contextmanager
+    def _locked(self, name: str, operation: int) -> Iterator[None]:
+        """Hold a lock file for the duration of the context"""
+        os.makedirs(self.lease_dir, exist_ok=True)
+        with open(self.lock_file_path(name), "a") as lock_file:
+            fcntl.flock(lock_file, operation)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @contextmanager
+    def shared(self) -> Iterator[None]:
+        """Hold the lock alongside the other tests of leased subarrays"""
+        with self._locked("turnstile.lock", fcntl.LOCK_EX):
+            pass
+        with self._locked("state.lock", fcntl.LOCK_SH):
+            yield
+
+    @contextmanager
+    def exclusive(self) -> Iterator[None]:
+        """Hold the lock alone, once the running tests are done"""
+        with self._locked("turnstile.lock", fcntl.LOCK_EX):
+            with self._locked("state.lock", fcntl.LOCK_EX):
+                yield
+
+
+SUBARRAY_LEASE_MANAGER = SubarrayLeaseManager()
+TELESCOPE_LOCK = TelescopeLock()
+# Subarray of this process, leased by pytest_configure until the worker
+# exits
+LEASED_SUBARRAY_ID = worker_subarray_id(xdist_worker_index())
+LEASED_DEVICE_NAMES = subarray_device_names(LEASED_SUBARRAY_ID)
+
+
+def resolve_subarray_id(subarray_id) -> int:
+    """Map the subarray id of a scenario to the subarray of the worker.
+    Scenarios are written for subarray 1, which stands for the leased
+    subarray, other ids are kept.
+
+    Args:
+        subarray_id (int | str): subarray id of the scenario
+    Returns:
+        int: subarray id to use
+    """
+    if int(subarray_id) == 1:
+        return LEASED_SUBARRAY_ID
+    return int(subarray_id)
+
+
+def leased_station_id(station_id: int) -> int:
+    """Map a station of a command input to the station set of the lease
+
+    Args:
+        station_id (int): station id, from 1 to STATIONS_PER_SUBARRAY
+    Returns:
+        int: station id to use
+    Raises:
+        ValueError: if the station is outside of the station set of a lease
+    """
+    if not 1 <= int(station_id) <= STATIONS_PER_SUBARRAY:
+        raise ValueError(
+            f"Station {station_id} is outside of the {STATIONS_PER_SUBARRAY} "
+            "stations of a lease, see STATIONS_PER_SUBARRAY"
+        )
+    return int(station_id) + (LEASED_SUBARRAY_ID - 1) * STATIONS_PER_SUBARRAY
+
+
+def _lease_aperture(aperture: dict) -> None:
+    """Move an MCCS aperture to the station set of the lease"""
+    if "station_id" in aperture:
+        aperture["station_id"] = leased_station_id(aperture["station_id"])
+    match = APERTURE_ID.fullmatch(aperture.get("aperture_id", ""))
+    if match:
+        station_id = leased_station_id(int(match.group(1)))
+        aperture[
+            "aperture_id"
+        ] = f"AP{station_id:0{len(match.group(1))}d}.{match.group(2)}"
+
+
+def with_leased_resources(input_json: str) -> str:
+    """Move a command input written for subarray 1 to the leased subarray:
+    its subarray_id, MCCS subarray beam 1 and the stations of the MCCS
+    apertures and of the Low CBF configuration
+
+    Args:
+        input_json (str): command input
+    Returns:
+        str: command input, unchanged when subarray 1 is leased
+    """
+    if LEASED_SUBARRAY_ID == 1:
+        return input_json
+    input_dict = json.loads(input_json)
+    if not isinstance(input_dict, dict):
+        return input_json
+    if input_dict.get("subarray_id") == 1:
+        input_dict["subarray_id"] = LEASED_SUBARRAY_ID
+    for subarray_beam in input_dict.get("mccs", {}).get("subarray_beams", []):
+        if subarray_beam.get("subarray_beam_id") == 1:
+            subarray_beam["subarray_beam_id"] = LEASED_SUBARRAY_ID
+        for aperture in subarray_beam.get("apertures", []):
+            _lease_aperture(aperture)
+    stations = input_dict.get("csp", {}).get("lowcbf", {}).get("stations", {})
+    if "stns" in stations:
+        stations["stns"] = [
+            [leased_station_id(station_id), substation_id]
+            for station_id, substation_id in stations["stns"]
+        ]
+    return json.dumps(input_dict, indent=4)
@@ -1,11 +1,11 @@
 import json
 import logging
-from time import sleep
+from functools import cached_property
 
 from ska_control_model import ObsState
 from ska_ser_logging import configure_logging
 from ska_tango_base.control_model import HealthState
-from tango import DeviceProxy, DevState
+from tango import DevState
 
 from tests.resources.test_harness.constant import (
     device_dict_low,
@@ -21,13 +21,28 @@ from tests.resources.test_harness.constant import (
     pst,
     tmc_low_subarraynode1,
 )
-from tests.resources.test_harness.event_recorder import EventRecorder
+from tests.resources.test_harness.dirty_tracker import (
+    COMMAND_CALL_INFO,
+    DEFECTS,
+    DELAY_INFO,
+    DIRTY_TRACKER,
+    HEALTH_STATE,
+    TRANSITIONS,
+)
+from tests.resources.test_harness.event_recorder import IndexedEventRecorder
 from tests.resources.test_harness.helpers import (
     SIMULATED_DEVICES_DICT,
     check_subarray_obs_state,
+    has_health_state_changed,
+    is_defect_set,
     update_eb_pb_ids,
-    wait_for_partial_or_complete_abort,
+    wait_for_subarray_ready,
+)
+from tests.resources.test_harness.simulator_seeding import (
+    seed_subarray_obs_state,
 )
+from tests.resources.test_harness.subarray_lease import resolve_subarray_id
+from tests.resources.test_harness.teardown_graph import TeardownGraph
 from tests.resources.test_harness.utils.common_utils import JsonFactory
 from tests.resources.test_harness.utils.constant import (
     ABORTED,
@@ -49,6 +64,10 @@ from tests.resources.test_harness.utils.sync_decorators import (
     sync_restart,
 )
 from tests.resources.test_support.common_utils.common_helpers import Resource
+from tests.resources.test_support.common_utils.device_proxy_pool import (
+    DEVICE_PROXY_POOL,
+    PooledProxy,
+)
 
 configure_logging(logging.DEBUG)
 LOGGER = logging.getLogger(__name__)
@@ -74,41 +93,53 @@ class SubarrayNodeWrapperLow:
     to test subarray node.
     """
 
+    # when set, tear_down leaves the SubarrayNode ON along with the Telescope
+    keep_telescope_on = False
+
+    central_node = PooledProxy(low_centralnode)
+    subarray_node = PooledProxy(tmc_low_subarraynode1)
+    csp_subarray_leaf_node = PooledProxy(low_csp_subarray_leaf_node)
+    sdp_subarray_leaf_node = PooledProxy(low_sdp_subarray_leaf_node)
+    mccs_subarray_leaf_node = PooledProxy(mccs_subarray_leaf_node)
+    csp_subarray1 = PooledProxy(low_csp_subarray1)
+    sdp_subarray1 = PooledProxy(low_sdp_subarray1)
+    mccs_subarray1 = PooledProxy(mccs_subarray1)
+    pst = PooledProxy(pst)
+
     def __init__(self) -> None:
+        # proxies and inputs are created on first use, the pooled proxies
+        # having a 5 sec timeout as commands sometimes time out with the
+        # default 3 sec
         self.tmc_subarraynode1 = tmc_low_subarraynode1
-        self.central_node = DeviceProxy(low_centralnode)
-        self.subarray_node = DeviceProxy(tmc_low_subarraynode1)
-        # Set timeout to 5 sec.
-        # Sometimes command timeout with default 3 sec time
-        self.subarray_node.set_timeout_millis(5000)
-        self.csp_subarray_leaf_node = DeviceProxy(low_csp_subarray_leaf_node)
-        self.sdp_subarray_leaf_node = DeviceProxy(low_sdp_subarray_leaf_node)
-        self.mccs_subarray_leaf_node = DeviceProxy(mccs_subarray_leaf_node)
         self._state = DevState.OFF
         self._obs_state = SubarrayObsState.EMPTY
-        self.csp_subarray1 = DeviceProxy(low_csp_subarray1)
-        self.sdp_subarray1 = DeviceProxy(low_sdp_subarray1)
-        self.mccs_subarray1 = DeviceProxy(mccs_subarray1)
-        self.subarray_devices = {
-            "csp_subarray": DeviceProxy(low_csp_subarray1),
-            "sdp_subarray": DeviceProxy(low_sdp_subarray1),
-            "mccs_subarray": DeviceProxy(mccs_subarray1),
-        }
         self.json_factory = JsonFactory()
-        self.release_input = (
-            self.json_factory.create_centralnode_configuration(
-                "release_resources_low"
-            )
-        )
         # Subarray state
         self.ON_STATE = ON
         self.IDLE_OBS_STATE = IDLE
         self.READY_OBS_STATE = READY
         self.ABORTED_OBS_STATE = ABORTED
-        if SIMULATED_DEVICES_DICT["sdp_and_mccs"]:
-            self.pst = DeviceProxy(pst)
 
-        self.event_recorder = EventRecorder()
+    @cached_property
+    def subarray_devices(self) -> dict:
+        """Subsystem subarrays of the subarray under test"""
+        return {
+            "csp_subarray": self.csp_subarray1,
+            "sdp_subarray": self.sdp_subarray1,
+            "mccs_subarray": self.mccs_subarray1,
+        }
+
+    @cached_property
+    def release_input(self) -> str:
+        """ReleaseResources input"""
+        return self.json_factory.create_centralnode_configuration(
+            "release_resources_low"
+        )
+
+    @cached_property
+    def event_recorder(self) -> IndexedEventRecorder:
+        """Recorder of the events the wrapper waits for"""
+        return IndexedEventRecorder()
 
     @property
     def state(self) -> DevState:
@@ -263,19 +294,24 @@ class SubarrayNodeWrapperLow:
 
     def set_subarray_id(self, requested_subarray_id: str) -> None:
         """This method creates subarray devices for the requested subarray
-        id"""
-        self.subarray_node = DeviceProxy(
+        id, subarray 1 standing for the subarray leased by the worker"""
+        requested_subarray_id = resolve_subarray_id(requested_subarray_id)
+        self.subarray_node = (
             f"ska_low/tm_subarray_node/{requested_subarray_id}"
         )
         subarray_id = str(requested_subarray_id).zfill(2)
         self.subarray_devices = {
-            "csp_subarray": DeviceProxy(f"low-csp/subarray/{subarray_id}"),
-            "sdp_subarray": DeviceProxy(f"low-sdp/subarray/{subarray_id}"),
+            "csp_subarray": DEVICE_PROXY_POOL.get_proxy(
+                f"low-csp/subarray/{subarray_id}"
+            ),
+            "sdp_subarray": DEVICE_PROXY_POOL.get_proxy(
+                f"low-sdp/subarray/{subarray_id}"
+            ),
         }
-        self.csp_subarray_leaf_node = DeviceProxy(
+        self.csp_subarray_leaf_node = (
             f"ska_low/tm_leaf_node/csp_subarray{subarray_id}"
         )
-        self.sdp_subarray_leaf_node = DeviceProxy(
+        self.sdp_subarray_leaf_node = (
             f"ska_low/tm_leaf_node/sdp_subarray{subarray_id}"
         )
 
@@ -292,28 +328,61 @@ class SubarrayNodeWrapperLow:
         LOGGER.info("Invoked OFF on SubarrayNode")
         return result, message
 
-    def _reset_simulator_devices(self):
-        """Reset Simulator devices to it's original state"""
+    def _simulator_devices(self) -> list:
+        """Return the proxies of the simulated subsystem subarrays"""
         if SIMULATED_DEVICES_DICT["all_mocks"]:
-            sim_device_proxy_list = [
+            return [
                 self.sdp_subarray1,
                 self.csp_subarray1,
                 self.mccs_subarray1,
             ]
-        elif SIMULATED_DEVICES_DICT["csp_and_sdp"]:
-            sim_device_proxy_list = [self.sdp_subarray1, self.csp_subarray1]
-        elif SIMULATED_DEVICES_DICT["csp_and_mccs"]:
-            sim_device_proxy_list = [self.csp_subarray1, self.mccs_subarray1]
-        elif SIMULATED_DEVICES_DICT["sdp_and_mccs"]:
-            sim_device_proxy_list = [self.sdp_subarray1, self.mccs_subarray1]
-        else:
-            sim_device_proxy_list = []
-
-        for sim_device_proxy in sim_device_proxy_list:
+        if SIMULATED_DEVICES_DICT["csp_and_sdp"]:
+            return [self.sdp_subarray1, self.csp_subarray1]
+        if SIMULATED_DEVICES_DICT["csp_and_mccs"]:
+            return [self.csp_subarray1, self.mccs_subarray1]
+        if SIMULATED_DEVICES_DICT["sdp_and_mccs"]:
+            return [self.sdp_subarray1, self.mccs_subarray1]
+        return []
+
+    def _simulator_devices_to_reset(self) -> list:
+        """Return the proxies of the simulators reset by the tear down"""
+        return self._simulator_devices()
+
+    @staticmethod
+    def _reset_simulator_device(sim_device_proxy) -> None:
+        """Reset a Simulator device to it's original state, skipping the
+        states the test did not change"""
+        if DIRTY_TRACKER.needs_reset(sim_device_proxy, DELAY_INFO):
             sim_device_proxy.ResetDelayInfo()
+        if DIRTY_TRACKER.needs_reset(
+            sim_device_proxy, HEALTH_STATE, has_health_state_changed
+        ):
             sim_device_proxy.SetDirectHealthState(HealthState.UNKNOWN)
+        if DIRTY_TRACKER.needs_reset(sim_device_proxy, DEFECTS, is_defect_set):
             sim_device_proxy.SetDefective(json.dumps({"enabled": False}))
 
+    @staticmethod
+    def _clear_simulator_device(sim_device_proxy, clear_transition) -> None:
+        """Clear the command call data of a Simulator device, skipping the
+        data the test did not change"""
+        if DIRTY_TRACKER.needs_reset(sim_device_proxy, COMMAND_CALL_INFO):
+            sim_device_proxy.ClearCommandCallInfo()
+        if clear_transition and DIRTY_TRACKER.needs_reset(
+            sim_device_proxy, TRANSITIONS
+        ):
+            sim_device_proxy.ResetTransitions()
+
+    def _reset_simulator_devices(self):
+        """Reset Simulator devices to it's original state"""
+        teardown = TeardownGraph("Simulator reset")
+        for sim_device_proxy in self._simulator_devices_to_reset():
+            teardown.add_step(
+                f"reset {sim_device_proxy.dev_name()}",
+                self._reset_simulator_device,
+                sim_device_proxy,
+            )
+        teardown.run()
+
     def force_change_of_obs_state(
         self,
         dest_state_name: str,
@@ -324,8 +393,12 @@ class SubarrayNodeWrapperLow:
         """Forces a change in the SubarrayNode's obsState to the provided
           obsState.
         This method creates an ObsStateResetter object using the provided
-        destination obsState name and resets the SubarrayNode's state
-        accordingly.
+        destination obsState name, which brings the SubarrayNode to it along
+        the cheapest sequence of commands from its current obsState. The
+        commands given an input JSON are invoked even if the SubarrayNode
+        already is in the destination obsState. When SEED_SIMULATOR_STATES
+        is set and all the subsystems are simulated, IDLE and READY are
+        seeded directly on the simulators instead.
         Args:
             dest_state_name (str): The destination obsState to set for the
               SubarrayNode.
@@ -350,10 +423,27 @@ class SubarrayNodeWrapperLow:
         if assign_input_json:
             assign_input_json = update_eb_pb_ids(assign_input_json)
             obs_state_resetter.assign_input = assign_input_json
+            obs_state_resetter.custom_input_commands.add("AssignResources")
         if configure_input_json:
             obs_state_resetter.configure_input = configure_input_json
+            obs_state_resetter.custom_input_commands.add("Configure")
         if scan_input_json:
             obs_state_resetter.scan_input = scan_input_json
+            obs_state_resetter.custom_input_commands.add("Scan")
+        # with all the subsystems simulated, IDLE and READY preconditions
+        # may be seeded on the simulators unless a configuration is given
+        if not obs_state_resetter.custom_input_commands - {
+            "AssignResources"
+        } and seed_subarray_obs_state(
+            self.subarray_node,
+            self.subarray_devices,
+            dest_state_name,
+            obs_state_resetter.assign_input,
+            reassign="AssignResources"
+            in obs_state_resetter.custom_input_commands,
+        ):
+            self._clear_command_call_and_transition_data()
+            return
         obs_state_resetter.reset()
         self._clear_command_call_and_transition_data()
 
@@ -374,90 +464,89 @@ class SubarrayNodeWrapperLow:
 
     def _clear_command_call_and_transition_data(self, clear_transition=False):
         """Clears the command call data"""
-        if SIMULATED_DEVICES_DICT["csp_and_sdp"]:
-            for sim_device in [
-                self.sdp_subarray1,
-                self.csp_subarray1,
-            ]:
-                sim_device.ClearCommandCallInfo()
-                if clear_transition:
-                    sim_device.ResetTransitions()
-        elif SIMULATED_DEVICES_DICT["csp_and_mccs"]:
-            for sim_device in [
-                self.csp_subarray1,
-                self.mccs_subarray1,
-            ]:
-                sim_device.ClearCommandCallInfo()
-                if clear_transition:
-                    sim_device.ResetTransitions()
-        elif SIMULATED_DEVICES_DICT["sdp_and_mccs"]:
-            for sim_device in [
-                self.sdp_subarray1,
-                self.mccs_subarray1,
-            ]:
-                sim_device.ClearCommandCallInfo()
-                if clear_transition:
-                    sim_device.ResetTransitions()
-        elif SIMULATED_DEVICES_DICT["all_mocks"]:
-            for sim_device in [
-                self.sdp_subarray1,
-                self.csp_subarray1,
-                self.mccs_subarray1,
-            ]:
-                sim_device.ClearCommandCallInfo()
-                if clear_transition:
-                    sim_device.ResetTransitions()
-        else:
+        sim_device_proxies = self._simulator_devices()
+        if not sim_device_proxies:
             LOGGER.info("Devices deployed are real")
+            return
+        teardown = TeardownGraph("Simulator command call data clearing")
+        for sim_device_proxy in sim_device_proxies:
+            teardown.add_step(
+                f"clear {sim_device_proxy.dev_name()}",
+                self._clear_simulator_device,
+                sim_device_proxy,
+                clear_transition,
+            )
+        teardown.run()
+
+    def _reset_pst_obs_state(self):
+        """Bring back an aborted PST beam to IDLE"""
+        if self.pst.obsState == ObsState.ABORTED:
+            self.event_recorder.subscribe_event(self.pst, "obsState")
+            self.pst.obsreset()
+            assert self.event_recorder.has_change_event_occurred(
+                self.pst,
+                "obsState",
+                ObsState.IDLE,
+                lookahead=4,
+            )
 
     def tear_down(self):
-        """Tear down after each test run"""
+        """Tear down after each test run, the simulators being reset
+        concurrently"""
 
         LOGGER.info("Calling Tear down for subarray")
-        self._reset_simulator_devices()
-        self._clear_command_call_and_transition_data(clear_transition=True)
-
-        if self.subarray_node.obsState in [
-            ObsState.SCANNING,
-            ObsState.CONFIGURING,
-            ObsState.RESOURCING,
-        ]:
-            # Invoke Abort and Restart
-            LOGGER.info("Invoking Abort on Subarray")
-            self.execute_transition("Abort")
-            wait_for_partial_or_complete_abort()
-            self.restart_subarray()
-        elif self.subarray_node.obsState in [ObsState.ABORTED, ObsState.FAULT]:
-            # Invoke Restart
-            LOGGER.info("Invoking Restart on Subarray")
-            self.restart_subarray()
-        elif self.subarray_node.obsState == ObsState.IDLE:
-            # Invoke Release
-            LOGGER.info("Invoking Release Resources on Subarray")
-            self.release_resources(self.release_input)
-        elif self.subarray_node.obsState == ObsState.READY:
-            # Invoke End
-            LOGGER.info("Invoking End command on Subarray")
-            self.end_observation()
-            self.release_resources(self.release_input)
-        else:
-            self.force_change_of_obs_state("EMPTY")
+        teardown = TeardownGraph("SubarrayNode tear down")
+        reset_steps = [
+            teardown.add_step(
+                f"reset {sim_device_proxy.dev_name()}",
+                self._reset_simulator_device,
+                sim_device_proxy,
+            )
+            for sim_device_proxy in self._simulator_devices_to_reset()
+        ]
+        # End, EndScan and ReleaseResources where possible, Abort and
+        # Restart when a command is in progress
+        empty_step = teardown.add_step(
+            "obsState EMPTY",
+            self.force_change_of_obs_state,
+            "EMPTY",
+            depends_on=reset_steps,
+        )
+        last_steps = [empty_step]
         if SIMULATED_DEVICES_DICT["sdp_and_mccs"]:
-            if self.pst.obsState == ObsState.ABORTED:
-                self.event_recorder.subscribe_event(self.pst, "obsState")
-                self.pst.obsreset()
-                assert self.event_recorder.has_change_event_occurred(
-                    self.pst,
-                    "obsState",
-                    ObsState.IDLE,
-                    lookahead=4,
+            last_steps.append(
+                teardown.add_step(
+                    "PST obsState IDLE",
+                    self._reset_pst_obs_state,
+                    depends_on=[empty_step],
                 )
-
-        # Move Subarray to OFF state
-        self.move_to_off()
+            )
+        if self.keep_telescope_on:
+            LOGGER.info("Keeping the SubarrayNode ON for the next test")
+        else:
+            # Move Subarray to OFF state
+            last_steps.append(
+                teardown.add_step(
+                    "SubarrayNode OFF",
+                    self.move_to_off,
+                    depends_on=[empty_step],
+                )
+            )
+        # the command call data is cleared last, the next test starting with
+        # clean simulators
+        for sim_device_proxy in self._simulator_devices():
+            teardown.add_step(
+                f"clear {sim_device_proxy.dev_name()}",
+                self._clear_simulator_device,
+                sim_device_proxy,
+                True,
+                depends_on=last_steps,
+            )
+        teardown.run()
         assert check_subarray_obs_state("EMPTY")
-        # Adding a small sleep to allow the systems to clean up processes
-        sleep(1)
+        assert wait_for_subarray_ready(
+            self.subarray_node
+        ), "SubarrayNode is not available after the tear down"
 
     def set_scan_id(self, scan_id: int, input_str: str) -> str:
         """
@@ -1,14 +1,16 @@
-import json
 import logging
 
 from ska_ser_logging import configure_logging
-from ska_tango_base.control_model import HealthState
 from tango import DeviceProxy
 
+from tests.resources.test_harness.subarray_lease import resolve_subarray_id
 from tests.resources.test_harness.subarray_node_low import (
     SubarrayNodeWrapperLow,
 )
 from tests.resources.test_harness.utils.enums import SubarrayObsState
+from tests.resources.test_support.common_utils.device_proxy_pool import (
+    DEVICE_PROXY_POOL,
+)
 
 configure_logging(logging.DEBUG)
 LOGGER = logging.getLogger(__name__)
@@ -20,32 +22,33 @@ class SubarrayNodeCspWrapperLow(SubarrayNodeWrapperLow):
     """
 
     def set_subarray_id(self, subarray_id):
-        self.subarray_node = DeviceProxy(
-            f"ska_low/tm_subarray_node/{subarray_id}"
-        )
+        subarray_id = resolve_subarray_id(subarray_id)
+        self.subarray_node = f"ska_low/tm_subarray_node/{subarray_id}"
         subarray_id = "{:02d}".format(int(subarray_id))
         self.subarray_devices = {
-            "csp_subarray": DeviceProxy(f"low-csp/subarray/{subarray_id}"),
-            "sdp_subarray": DeviceProxy(f"low-sdp/subarray/{subarray_id}"),
-            "mccs_subarray": DeviceProxy(f"low-mccs/subarray/{subarray_id}"),
+            "csp_subarray": DEVICE_PROXY_POOL.get_proxy(
+                f"low-csp/subarray/{subarray_id}"
+            ),
+            "sdp_subarray": DEVICE_PROXY_POOL.get_proxy(
+                f"low-sdp/subarray/{subarray_id}"
+            ),
+            "mccs_subarray": DEVICE_PROXY_POOL.get_proxy(
+                f"low-mccs/subarray/{subarray_id}"
+            ),
         }
-        self.csp_subarray_leaf_node = DeviceProxy(
+        self.csp_subarray_leaf_node = (
             f"ska_low/tm_leaf_node/csp_subarray{subarray_id}"
         )
-        self.sdp_subarray_leaf_node = DeviceProxy(
+        self.sdp_subarray_leaf_node = (
             f"ska_low/tm_leaf_node/sdp_subarray{subarray_id}"
         )
-        self.mccs_subarray_leaf_node = DeviceProxy(
+        self.mccs_subarray_leaf_node = (
             f"ska_low/tm_leaf_node/mccs_subarray{subarray_id}"
         )
 
-    def _reset_simulator_devices(self):
-        """Reset Simulator devices to it's original state"""
-        for sim_device_fqdn in [self.sdp_subarray1]:
-            device = DeviceProxy(sim_device_fqdn)
-            device.ResetDelayInfo()
-            device.SetDirectHealthState(HealthState.UNKNOWN)
-            device.SetDefective(json.dumps({"enabled": False}))
+    def _simulator_devices_to_reset(self) -> list:
+        """Return the proxies of the simulators reset by the tear down"""
+        return [self.sdp_subarray1]
 
     def force_change_of_obs_state_mock(
         self, device_name: str, obs_state: SubarrayObsState
@@ -0,0 +1,167 @@
+"""Tear down described as a dependency graph of steps.
+
+The tear downs of the node wrappers reset every simulator with a few
+commands each. Commands on distinct devices do not depend on each other, so
+each device gets its own step and the steps whose dependencies are done run
+concurrently on a thread pool. Steps which have to follow others, like
+bringing the subarray back to EMPTY once the defects are cleared, depend on
+them.
+
+The duration of every step and the wall clock of the tear down are logged
+once the graph has run.
+"""
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from ska_ser_logging import configure_logging
+
+configure_logging(logging.DEBUG)
+LOGGER = logging.getLogger(__name__)
+
+# Number of tear down steps run at the same time
+TEARDOWN_MAX_WORKERS = int(os.getenv("TEARDOWN_MAX_WORKERS", "8"))
+
+
+class TeardownStep:
+    """Step of a TeardownGraph"""
+
+    def __init__(
+        self,
+        name: str,
+        action: Callable,
+        args: tuple,
+        depends_on: List[str],
+    ):
+        """
+        Args:
+            name (str): step name, unique within the graph
+            action (Callable): function run by the step
+            args (tuple): arguments of action
+            depends_on (list[str]): names of the steps to complete first
+        """
+        self.name = name
+        self.action = action
+        self.args = args
+        self.depends_on = depends_on
+        self.duration: Optional[float] = None
+        self.error: Optional[BaseException] = None
+        self.skipped = False
+
+    def execute(self) -> None:
+        """Run the action, recording its duration and error"""
+        start_time = time.monotonic()
+        try:
+            self.action(*self.args)
+        except BaseException as exception:
+            self.error = exception
+            raise
+        finally:
+            self.duration = time.monotonic() - start_time
+
+
+class TeardownGraph:
+    """Steps run concurrently as soon as the steps they depend on are
+    complete"""
+
+    def __init__(self, name: str):
+        """
+        Args:
+            name (str): graph name, used in the timing report
+        """
+        self.name = name
+        self.steps: Dict[str, TeardownStep] = {}
+        self.wall_clock: Optional[float] = None
+
+    def add_step(
+        self,
+        name: str,
+        action: Callable,
+        *args: Any,
+        depends_on: Iterable[str] = (),
+    ) -> str:
+        """Add a step
+
+        Args:
+            name (str): step name, unique within the graph
+            action (Callable): function run by the step
+            args: arguments of action
+            depends_on (list[str]): names of steps added before, to complete
+                before this one starts
+        Returns:
+            str: the step name, to be used in depends_on of later steps
+        Raises:
+            ValueError: if the name is taken or a dependency is unknown
+        """
+        depends_on = list(depends_on)
+        if name in self.steps:
+            raise ValueError(f"Tear down step {name} already added")
+        unknown = [
+            dependency
+            for dependency in depends_on
+            if dependency not in self.steps
+        ]
+        if unknown:
+            raise ValueError(f"Tear down step {name} depends on {unknown}")
+        self.steps[name] = TeardownStep(name, action, args, depends_on)
+        return name
+
+    def run(self, max_workers: int = TEARDOWN_MAX_WORKERS) -> None:
+        """Run the steps. A failed step does not stop the steps not
+        depending on it, the steps depending on it are skipped.
+
+        Args:
+            max_workers (int): number of steps run at the same time
+        Raises:
+            BaseException: error of the first step which failed
+        """
+        pending = list(self.steps.values())
+        running = {}
+        completed = set()
+        failed = set()
+        start_time = time.monotonic()
+        with ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="teardown"
+        ) as executor:
+            while pending or running:
+                for step in list(pending):
+                    if failed.intersection(step.depends_on):
+                        step.skipped = True
+                        failed.add(step.name)
+                        pending.remove(step)
+                    elif completed.issuperset(step.depends_on):
+                        running[executor.submit(step.execute)] = step
+                        pending.remove(step)
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    step = running.pop(future)
+                    if future.exception() is None:
+                        completed.add(step.name)
+                    else:
+                        failed.add(step.name)
+        self.wall_clock = time.monotonic() - start_time
+        self.log_report()
+        for step in self.steps.values():
+            if step.error is not None:
+                raise step.error
+
+    def log_report(self) -> None:
+        """Log the duration of the steps and the wall clock of the graph"""
+        lines = [
+            f"{self.name} took {self.wall_clock:.3f}s for "
+            f"{sum(step.duration or 0.0 for step in self.steps.values()):.3f}s"
+            " of steps:"
+        ]
+        for step in self.steps.values():
+            if step.skipped:
+                outcome = "skipped"
+            elif step.error is not None:
+                outcome = f"failed after {step.duration:.3f}s: {step.error}"
+            else:
+                outcome = f"{step.duration:.3f}s"
+            lines.append(f"  {step.name}: {outcome}")
+        LOGGER.info("\n".join(lines))
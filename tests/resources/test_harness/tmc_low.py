@@ -4,6 +4,9 @@ import tango
 from tango import DeviceProxy
 
 from tests.resources.test_harness.constant import mccs_subarraybeam
+from tests.resources.test_support.common_utils.device_proxy_pool import (
+    DEVICE_PROXY_POOL,
+)
 
 from .central_node_low import CentralNodeWrapperLow
 from .subarray_node_low import SubarrayNodeWrapperLow
@@ -19,15 +22,14 @@ class TMCLow:
     def delete_device_from_db(self, server_type):
         if server_type == "MCCS_SUBARRAYBEAM":
             self.mccs_subarraybeam = DeviceProxy(mccs_subarraybeam)
-            self.mccs_subarraybeam_server = DeviceProxy(
-                f"dserver/{self.mccs_subarraybeam.info().server_id}"
-            )
+            server_id = self.mccs_subarraybeam.info().server_id
+            self.mccs_subarraybeam_server = DeviceProxy(f"dserver/{server_id}")
             db = tango.Database()
             # Delete mccs subarraybeam Device
             db.delete_device(mccs_subarraybeam)
             self.deleted_device[mccs_subarraybeam] = {
                 "device_name": mccs_subarraybeam,
-                "server_name": "MccsSubarrayBeam/subarraybeam-01",
+                "server_name": server_id,
                 "class_name": "MccsSubarrayBeam",
             }
 
@@ -46,6 +48,7 @@ class TMCLow:
         """Restart server based on provided server type"""
         if server_type == "MCCS_SUBARRAYBEAM":
             self.mccs_subarraybeam_server.RestartServer()
+            DEVICE_PROXY_POOL.invalidate(mccs_subarraybeam)
         time.sleep(3)
 
     def tear_down(self):
@@ -65,6 +68,8 @@ class TMCLow:
             # Clear the deleted_device dictionary after devices have
             # been added back
             self.deleted_device.clear()
+            # restarted devices are brought back through a power cycle
+            self.central_node.keep_telescope_on = False
 
         self.central_node.tear_down()
 
@@ -106,18 +106,29 @@ def has_desired_result_code_message_in_lrcr_event(
     # start time is needed in case of error
     run_query_time = datetime.now()
 
-    result = tracer.query_events(
-        lambda e: e.has_device(device_name)
-        and e.has_attribute("longRunningCommandResult")
-        and is_attribute_value_valid(e)
-        and e.attribute_value[0] == unique_id
-        and json.loads(e.attribute_value[1])[0] == result_code
-        and all(
-            exception_message in json.loads(e.attribute_value[1])[1]
-            for exception_message in exception_messages
-        ),
-        timeout=getattr(assertpy_context, "event_timeout", None),
-    )
+    timeout = getattr(assertpy_context, "event_timeout", None)
+    if hasattr(tracer, "lrcr_index"):
+        # events are decoded once when traced, the check is a lookup
+        record = tracer.lrcr_index(device_name).wait_for(
+            unique_id=unique_id,
+            result_code=result_code,
+            messages=exception_messages,
+            timeout=timeout or 0.0,
+        )
+        result = [] if record is None else [record]
+    else:
+        result = tracer.query_events(
+            lambda e: e.has_device(device_name)
+            and e.has_attribute("longRunningCommandResult")
+            and is_attribute_value_valid(e)
+            and e.attribute_value[0] == unique_id
+            and json.loads(e.attribute_value[1])[0] == result_code
+            and all(
+                exception_message in json.loads(e.attribute_value[1])[1]
+                for exception_message in exception_messages
+            ),
+            timeout=timeout,
+        )
     if len(result) == 0:
         event_list = "\n".join([str(event) for event in tracer.events])
         msg = "Expected to find an event matching the predicate"
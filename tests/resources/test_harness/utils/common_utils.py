@@ -6,6 +6,7 @@ from typing import List
 
 from ska_control_model import ObsState
 
+from tests.resources.test_harness.subarray_lease import with_leased_resources
 from tests.resources.test_harness.utils.wait_helpers import Waiter
 from tests.resources.test_support.common_utils.result_code import ResultCode
 
@@ -137,7 +138,9 @@ def get_subarray_input_json(slug):
     )
     with open(assign_json_file_path, "r", encoding="UTF-8") as f:
         assign_json = f.read()
-    return assign_json
+    # inputs are written for the MCCS resources of subarray 1, standing for
+    # those of the leased subarray
+    return with_leased_resources(assign_json)
 
 
 def get_centralnode_input_json(slug):
@@ -158,7 +161,8 @@ def get_centralnode_input_json(slug):
     )
     with open(assign_json_file_path, "r", encoding="UTF-8") as f:
         assign_json = f.read()
-    return assign_json
+    # inputs are written for subarray 1, standing for the leased subarray
+    return with_leased_resources(assign_json)
 
 
 def update_receptors_in_assign_json(
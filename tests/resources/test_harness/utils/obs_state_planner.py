@@ -0,0 +1,282 @@
+"""Shortest path planner over the obsState transition graph of SubarrayNode.
+
+Bringing a subarray to an obsState used to go through Abort and Restart to
+EMPTY and then replay AssignResources, Configure and Scan. The planner
+instead searches the transition graph with Dijkstra's algorithm, the edges
+being weighted with the expected latency of their command, so that READY to
+IDLE is a single End.
+
+Transient obsStates (RESOURCING, CONFIGURING, ABORTING) are reached by
+invoking the command without waiting for its completion, so the search does
+not continue from them. They can still be source states, a tear down may
+start while a command is in progress. RESTARTING and RESETTING are only
+source states, their ongoing command is waited for.
+"""
+import heapq
+import itertools
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ska_control_model import ObsState
+from ska_ser_logging import configure_logging
+from tango import DevFailed
+
+from tests.resources.test_support.common_utils.device_proxy_pool import (
+    DEVICE_PROXY_POOL,
+)
+
+configure_logging(logging.DEBUG)
+LOGGER = logging.getLogger(__name__)
+
+TRANSIENT_OBS_STATES = (
+    "RESOURCING",
+    "CONFIGURING",
+    "ABORTING",
+    "RESTARTING",
+    "RESETTING",
+)
+
+# Expected latency in seconds of the commands, used as edge weights
+COMMAND_LATENCY = {
+    "AssignResources": 10.0,
+    "ReleaseAllResources": 6.0,
+    "Configure": 10.0,
+    "End": 3.0,
+    "Scan": 2.0,
+    "EndScan": 3.0,
+    "Abort": 8.0,
+    "Restart": 10.0,
+    # waiting for an ongoing Abort, Restart or ObsReset to complete
+    None: 5.0,
+}
+
+# (source obsState, command, destination obsState) of the SubarrayNode
+# obsState machine, a None command waits for an ongoing transition
+OBS_STATE_TRANSITIONS = (
+    ("EMPTY", "AssignResources", "IDLE"),
+    ("EMPTY", "AssignResources", "RESOURCING"),
+    ("IDLE", "ReleaseAllResources", "EMPTY"),
+    ("IDLE", "Configure", "READY"),
+    ("IDLE", "Configure", "CONFIGURING"),
+    ("READY", "Configure", "READY"),
+    ("READY", "Configure", "CONFIGURING"),
+    ("READY", "End", "IDLE"),
+    ("READY", "Scan", "SCANNING"),
+    ("SCANNING", "EndScan", "READY"),
+    ("IDLE", "Abort", "ABORTED"),
+    ("READY", "Abort", "ABORTED"),
+    ("SCANNING", "Abort", "ABORTED"),
+    ("RESOURCING", "Abort", "ABORTED"),
+    ("CONFIGURING", "Abort", "ABORTED"),
+    ("IDLE", "Abort", "ABORTING"),
+    ("READY", "Abort", "ABORTING"),
+    ("SCANNING", "Abort", "ABORTING"),
+    ("ABORTING", None, "ABORTED"),
+    ("RESTARTING", None, "EMPTY"),
+    ("RESETTING", None, "IDLE"),
+    ("ABORTED", "Restart", "EMPTY"),
+    ("FAULT", "Restart", "EMPTY"),
+)
+
+# Commands bringing back a subarray whose devices disagree on the obsState
+RECOVERY_COMMANDS = ("Abort", "Restart", None)
+
+
+class ObsStateTransition:
+    """Edge of the obsState transition graph"""
+
+    def __init__(
+        self,
+        source: str,
+        command: Optional[str],
+        destination: str,
+        latency: float,
+    ):
+        """
+        Args:
+            source (str): obsState the command is invoked in
+            command (str): command name, None to wait for an ongoing
+                transition
+            destination (str): obsState reached
+            latency (float): expected latency of the command in seconds
+        """
+        self.source = source
+        self.command = command
+        self.destination = destination
+        self.latency = latency
+
+    @property
+    def wait_for_completion(self) -> bool:
+        """Whether the command completion is waited for, False when the
+        destination is a transient obsState"""
+        return self.destination not in TRANSIENT_OBS_STATES
+
+    def __repr__(self):
+        return (
+            f"ObsStateTransition({self.source} -{self.command}-> "
+            f"{self.destination})"
+        )
+
+
+class ObsStatePlanner:
+    """Plans the cheapest sequence of commands between two obsStates"""
+
+    def __init__(self, latencies: Optional[Dict[Any, float]] = None):
+        """
+        Args:
+            latencies (dict): expected latency of the commands overriding
+                COMMAND_LATENCY
+        """
+        command_latency = dict(COMMAND_LATENCY)
+        command_latency.update(latencies or {})
+        self.transitions: Dict[str, List[ObsStateTransition]] = {}
+        for source, command, destination in OBS_STATE_TRANSITIONS:
+            self.transitions.setdefault(source, []).append(
+                ObsStateTransition(
+                    source, command, destination, command_latency[command]
+                )
+            )
+
+    def plan(
+        self,
+        source: str,
+        destination: str,
+        required_commands: Iterable[str] = (),
+        consistent: bool = True,
+    ) -> List[ObsStateTransition]:
+        """Return the cheapest transitions from source to destination
+
+        Args:
+            source (str): current obsState
+            destination (str): obsState to reach
+            required_commands (list[str]): commands the plan must invoke,
+                e.g. Configure when a given configuration has to be applied
+                even if the subarray already is READY
+            consistent (bool): whether the subarray devices agree on the
+                obsState, if not the plan starts with Abort or Restart when
+                source allows it
+        Returns:
+            list[ObsStateTransition]: transitions in execution order, empty
+            if there is nothing to do
+        Raises:
+            ValueError: if destination cannot be reached
+        """
+        required = frozenset(required_commands)
+        recover = not consistent and any(
+            transition.command in RECOVERY_COMMANDS
+            for transition in self.transitions.get(source, [])
+        )
+        start = (source, frozenset(), recover)
+        # the counter keeps the heap from comparing the paths
+        counter = itertools.count()
+        queue: List[Tuple[float, int, Tuple, List[ObsStateTransition]]] = [
+            (0.0, next(counter), start, [])
+        ]
+        settled = set()
+        while queue:
+            cost, _, node, path = heapq.heappop(queue)
+            if node in settled:
+                continue
+            settled.add(node)
+            obs_state, invoked, recovering = node
+            if (
+                obs_state == destination
+                and invoked == required
+                and not recovering
+            ):
+                return path
+            if path and obs_state in TRANSIENT_OBS_STATES:
+                continue
+            for transition in self.transitions.get(obs_state, []):
+                if recovering and transition.command not in RECOVERY_COMMANDS:
+                    continue
+                next_node = (
+                    transition.destination,
+                    invoked | (required & {transition.command}),
+                    False,
+                )
+                if next_node not in settled:
+                    heapq.heappush(
+                        queue,
+                        (
+                            cost + transition.latency,
+                            next(counter),
+                            next_node,
+                            path + [transition],
+                        ),
+                    )
+        raise ValueError(
+            f"obsState {destination} cannot be reached from {source}"
+            + (f" invoking {sorted(required)}" if required else "")
+        )
+
+
+def read_obs_states(
+    subarray_node: Any, subsystem_subarrays: Iterable[Any] = ()
+) -> Tuple[str, bool]:
+    """Read the obsState of SubarrayNode and of the subsystem subarrays
+
+    Args:
+        subarray_node (str | DeviceProxy): SubarrayNode
+        subsystem_subarrays (list): subsystem subarray devices
+    Returns:
+        tuple: (obsState name of SubarrayNode, whether all the subsystem
+        subarrays readable are in the same obsState)
+    """
+    obs_state = ObsState(
+        DEVICE_PROXY_POOL.read_attribute(subarray_node, "obsState").value
+    ).name
+    consistent = True
+    for subsystem_subarray in subsystem_subarrays:
+        try:
+            subsystem_obs_state = ObsState(
+                DEVICE_PROXY_POOL.read_attribute(
+                    subsystem_subarray, "obsState"
+                ).value
+            ).name
+        except DevFailed:
+            LOGGER.warning("obsState of %s not readable", subsystem_subarray)
+            continue
+        if subsystem_obs_state != obs_state:
+            LOGGER.info(
+                "%s is %s while SubarrayNode is %s",
+                subsystem_subarray,
+                subsystem_obs_state,
+                obs_state,
+            )
+            consistent = False
+    return obs_state, consistent
+
+
+def plan_obs_state_change(
+    subarray_node: Any,
+    destination: str,
+    subsystem_subarrays: Iterable[Any] = (),
+    required_commands: Iterable[str] = (),
+    planner: Optional[ObsStatePlanner] = None,
+) -> List[ObsStateTransition]:
+    """Plan the transitions bringing SubarrayNode from its current obsState
+    to destination
+
+    Args:
+        subarray_node (str | DeviceProxy): SubarrayNode
+        destination (str): obsState to reach
+        subsystem_subarrays (list): subsystem subarray devices checked for
+            consistency with SubarrayNode
+        required_commands (list[str]): commands the plan must invoke
+        planner (ObsStatePlanner): planner, one with the default latencies
+            if not given
+    Returns:
+        list[ObsStateTransition]: transitions in execution order
+    """
+    source, consistent = read_obs_states(subarray_node, subsystem_subarrays)
+    plan = (planner or ObsStatePlanner()).plan(
+        source, destination, required_commands, consistent
+    )
+    LOGGER.info(
+        "obsState plan from %s to %s: %s",
+        source,
+        destination,
+        [transition.command for transition in plan],
+    )
+    return plan
@@ -1,13 +1,26 @@
-from typing import Any
+from typing import Any, Set
 
+from tests.resources.test_harness.helpers import (
+    wait_for_ongoing_transition,
+    wait_for_partial_or_complete_abort,
+)
 from tests.resources.test_harness.utils.common_utils import JsonFactory
+from tests.resources.test_harness.utils.obs_state_planner import (
+    ObsStateTransition,
+    plan_obs_state_change,
+)
 
 
 class ObsStateResetter:
     """
-    Class to reset the obsState of Device
+    Class to reset the obsState of Device along the cheapest sequence of
+    commands planned by the ObsStatePlanner
     """
 
+    state_name = ""
+    # commands whose input is kept by the subarray in state_name
+    input_commands: tuple = ()
+
     def __init__(self, name: str, device: Any):
         self.name = name
         self.device = device
@@ -24,6 +37,60 @@ class ObsStateResetter:
         self.scan_input = self.json_factory.create_subarray_configuration(
             "scan_low"
         )
+        # commands given a specific input, they are invoked even if the
+        # subarray already is in state_name
+        self.custom_input_commands: Set[str] = set()
+
+    def reset(self):
+        """Bring self.device to state_name"""
+        for transition in plan_obs_state_change(
+            self.device.subarray_node,
+            self.state_name,
+            self.device.subarray_devices.values(),
+            self.custom_input_commands.intersection(self.input_commands),
+        ):
+            self.execute(transition)
+
+    def execute(self, transition: ObsStateTransition):
+        """Invoke the command of a transition on self.device, waiting for
+        its completion unless the destination is a transient obsState
+
+        Args:
+            transition (ObsStateTransition): planned transition
+        Raises:
+            ValueError: if the command is not a SubarrayNode command
+        """
+        command = transition.command
+        if command is None:
+            wait_for_ongoing_transition(self.device.subarray_node, transition)
+        elif not transition.wait_for_completion:
+            argin = {
+                "AssignResources": self.assign_input,
+                "Configure": self.configure_input,
+            }.get(command)
+            self.device.execute_transition(command_name=command, argin=argin)
+        elif command == "AssignResources":
+            self.device.store_resources(self.assign_input)
+        elif command == "Configure":
+            self.device.store_configuration_data(self.configure_input)
+        elif command == "Scan":
+            self.device.store_scan_data(self.scan_input)
+        elif command == "EndScan":
+            self.device.remove_scan_data()
+        elif command == "End":
+            self.device.end_observation()
+        elif command == "ReleaseAllResources":
+            self.device.release_resources(self.device.release_input)
+        elif command == "Abort" and transition.source in ("IDLE", "READY"):
+            self.device.abort_subarray()
+        elif command == "Abort":
+            # a command in progress may be partially aborted
+            self.device.execute_transition(command_name="Abort")
+            wait_for_partial_or_complete_abort()
+        elif command == "Restart":
+            self.device.restart_subarray()
+        else:
+            raise ValueError(f"Unexpected {transition!r}")
 
 
 class ReadyObsStateResetter(ObsStateResetter):
@@ -33,11 +100,7 @@ class ReadyObsStateResetter(ObsStateResetter):
     """
 
     state_name = "READY"
-
-    def reset(self):
-        self.device.clear_all_data()
-        self.device.store_resources(self.assign_input)
-        self.device.store_configuration_data(self.configure_input)
+    input_commands = ("AssignResources", "Configure")
 
 
 class IdleObsStateResetter(ObsStateResetter):
@@ -47,10 +110,7 @@ class IdleObsStateResetter(ObsStateResetter):
     """
 
     state_name = "IDLE"
-
-    def reset(self):
-        self.device.clear_all_data()
-        self.device.store_resources(self.assign_input)
+    input_commands = ("AssignResources",)
 
 
 class EmptyObsStateResetter(ObsStateResetter):
@@ -60,9 +120,6 @@ class EmptyObsStateResetter(ObsStateResetter):
 
     state_name = "EMPTY"
 
-    def reset(self):
-        self.device.clear_all_data()
-
 
 class ResourcingObsStateResetter(ObsStateResetter):
     """
@@ -70,12 +127,7 @@ class ResourcingObsStateResetter(ObsStateResetter):
     """
 
     state_name = "RESOURCING"
-
-    def reset(self):
-        self.device.clear_all_data()
-        self.device.execute_transition(
-            command_name="AssignResources", argin=self.assign_input
-        )
+    input_commands = ("AssignResources",)
 
 
 class ConfiguringObsStateResetter(ObsStateResetter):
@@ -84,13 +136,7 @@ class ConfiguringObsStateResetter(ObsStateResetter):
     """
 
     state_name = "CONFIGURING"
-
-    def reset(self):
-        self.device.clear_all_data()
-        self.device.store_resources(self.assign_input)
-        self.device.execute_transition(
-            command_name="Configure", argin=self.configure_input
-        )
+    input_commands = ("AssignResources", "Configure")
 
 
 class AbortingObsStateResetter(ObsStateResetter):
@@ -99,11 +145,7 @@ class AbortingObsStateResetter(ObsStateResetter):
     """
 
     state_name = "ABORTING"
-
-    def reset(self):
-        self.device.clear_all_data()
-        self.device.store_resources(self.assign_input)
-        self.device.execute_transition(command_name="Abort", argin=None)
+    input_commands = ("AssignResources",)
 
 
 class AbortedObsStateResetter(ObsStateResetter):
@@ -112,11 +154,7 @@ class AbortedObsStateResetter(ObsStateResetter):
     """
 
     state_name = "ABORTED"
-
-    def reset(self):
-        self.device.clear_all_data()
-        self.device.store_resources(self.assign_input)
-        self.device.abort_subarray()
+    input_commands = ("AssignResources",)
 
 
 class ScanningObsStateResetter(ObsStateResetter):
@@ -125,12 +163,7 @@ class ScanningObsStateResetter(ObsStateResetter):
     """
 
     state_name = "SCANNING"
-
-    def reset(self):
-        self.device.clear_all_data()
-        self.device.store_resources(self.assign_input)
-        self.device.store_configuration_data(self.configure_input)
-        self.device.store_scan_data(self.scan_input)
+    input_commands = ("AssignResources", "Configure", "Scan")
 
 
 class ObsStateResetterFactory:
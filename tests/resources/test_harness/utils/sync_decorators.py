@@ -1,10 +1,31 @@
 import functools
+import logging
 import os
+import time
 from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
 
+from ska_control_model import ObsState
+from ska_ser_logging import configure_logging
+from tango import DevFailed
+
+from tests.resources.test_harness.event_recorder import IndexedEventRecorder
+from tests.resources.test_harness.lrcr_index import LrcrIndex, LrcrRecord
+from tests.resources.test_harness.propagation_profiler import (
+    profile_propagation,
+)
 from tests.resources.test_harness.utils.wait_helpers import Waiter
 from tests.resources.test_support.common_utils.base_utils import DeviceUtils
-from tests.resources.test_support.common_utils.common_helpers import Resource
+from tests.resources.test_support.common_utils.device_proxy_pool import (
+    DEVICE_PROXY_POOL,
+)
+from tests.resources.test_support.common_utils.event_hub import (
+    CHANGE_EVENT_HUB,
+)
+from tests.resources.test_support.common_utils.result_code import ResultCode
+
+configure_logging(logging.DEBUG)
+LOGGER = logging.getLogger(__name__)
 
 MCCS_SIMULATION_ENABLED = os.getenv("MCCS_SIMULATION_ENABLED")
 if MCCS_SIMULATION_ENABLED.lower() == "false":
@@ -12,6 +33,228 @@ if MCCS_SIMULATION_ENABLED.lower() == "false":
 else:
     TIMEOUT = 500
 
+# Verify the obsState of the subarrays once TMC reports the completion of a
+# command, from the events received meanwhile
+SYNC_VERIFY_OBS_STATES = (
+    os.getenv("SYNC_VERIFY_OBS_STATES", "true").lower() == "true"
+)
+# Seconds the obsState events may lag the longRunningCommandResult event
+OBS_STATE_GRACE_PERIOD = 10
+# Devices reporting the result of the commands invoked by the wrappers
+LRCR_DEVICE_KEYS = ("central_node", "tmc_subarraynode")
+# Devices whose obsState is verified
+OBS_STATE_DEVICE_KEYS = (
+    "tmc_subarraynode",
+    "csp_subarray",
+    "sdp_subarray",
+    "mccs_subarray",
+)
+# Result codes reported before a command completes
+PENDING_RESULT_CODES = (ResultCode.STARTED, ResultCode.QUEUED)
+
+
+def get_unique_id(command_result: Any) -> Optional[str]:
+    """Return the unique id of a long running command from the value
+    returned by the command, None if there is none
+
+    Args:
+        command_result (tuple): ([result_code], [unique_id or message])
+    """
+    try:
+        result_code, message = command_result
+        if int(result_code[0]) not in PENDING_RESULT_CODES:
+            return None
+        return str(message[0])
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+class LrcrCompletion:
+    """Completion of a command detected on its longRunningCommandResult
+    event instead of polling obsStates.
+
+    Used as a context manager around the command invocation: the
+    longRunningCommandResult of CentralNode and SubarrayNode, and the obsState
+    of the subarrays if verified, are subscribed through the ChangeEventHub
+    before the command is invoked so that no event is missed.
+    """
+
+    def __init__(
+        self,
+        device_dict: dict,
+        obs_state: str,
+        timeout: float,
+        verify_obs_states: bool = SYNC_VERIFY_OBS_STATES,
+    ):
+        """
+        Args:
+            device_dict (dict): device names, keyed as device_dict_low
+            obs_state (str): obsState of the subarrays once the command is
+                complete
+            timeout (float): seconds to wait for the command result
+            verify_obs_states (bool): whether to verify the subarray
+                obsStates from the received events
+        """
+        self.obs_state = obs_state
+        self.timeout = timeout
+        self.lrcr_index = LrcrIndex()
+        self.lrcr_devices = [
+            device_dict[key]
+            for key in LRCR_DEVICE_KEYS
+            if device_dict.get(key)
+        ]
+        self.obs_state_devices = (
+            {
+                key: DEVICE_PROXY_POOL.get_proxy(device_dict[key])
+                for key in OBS_STATE_DEVICE_KEYS
+                if device_dict.get(key)
+            }
+            if verify_obs_states
+            else {}
+        )
+        self.event_recorder = IndexedEventRecorder()
+        # obsState event of each device reaching obs_state, True for a
+        # device found in obs_state without one, keyed as obs_state_devices
+        self.obs_state_events: Dict[str, Any] = {}
+        self._handles: List[int] = []
+
+    def __enter__(self) -> "LrcrCompletion":
+        for device in self.obs_state_devices.values():
+            self.event_recorder.subscribe_event(device, "obsState")
+        for device in self.lrcr_devices:
+            self._handles.append(
+                CHANGE_EVENT_HUB.subscribe(
+                    device,
+                    "longRunningCommandResult",
+                    self.lrcr_index.add_event,
+                )
+            )
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        for handle in self._handles:
+            CHANGE_EVENT_HUB.unsubscribe(handle)
+        self._handles = []
+        self.event_recorder.clear_events()
+
+    def wait_for_result(self, unique_id: str) -> Optional[LrcrRecord]:
+        """Wait for the final result of a command
+
+        Args:
+            unique_id (str): unique id of the command
+        Returns:
+            LrcrRecord: the result, None on timeout
+        """
+        deadline = time.monotonic() + self.timeout
+        since = 0
+        while True:
+            record = self.lrcr_index.wait_for(
+                unique_id,
+                since=since,
+                timeout=max(deadline - time.monotonic(), 0.0),
+            )
+            if record is None or record.result_code not in (
+                None,
+                *PENDING_RESULT_CODES,
+            ):
+                return record
+            since = record.position + 1
+
+    def obs_state_event(self, device: Any, timeout: float = 0.0) -> Any:
+        """Return the first event of a subarray reaching the obsState since
+        the command was invoked. The obsState is read first, as a subarray
+        already in the obsState may not push a change event.
+
+        Args:
+            device (DeviceProxy): one of obs_state_devices
+            timeout (float): seconds to wait for the event
+        Returns:
+            dict: event details if the event occurred, True if the subarray
+            is in the obsState without one, else False
+        """
+        try:
+            in_obs_state = (
+                DEVICE_PROXY_POOL.read_attribute(device, "obsState").value
+                == ObsState[self.obs_state]
+            )
+        except DevFailed as exception:
+            LOGGER.warning(
+                "obsState of %s not readable: %s", device.dev_name(), exception
+            )
+            in_obs_state = False
+        return (
+            self.event_recorder.has_change_event_occurred(
+                device,
+                "obsState",
+                ObsState[self.obs_state],
+                lookahead=100,
+                # the first event holds the obsState when subscribed
+                since=1,
+                timeout=0.0 if in_obs_state else timeout,
+            )
+            or in_obs_state
+        )
+
+    def wait(self, command_result: Any) -> LrcrRecord:
+        """Wait for the command to complete
+
+        Args:
+            command_result (tuple): value returned by the command
+        Returns:
+            LrcrRecord: the result of the command
+        Raises:
+            AssertionError: if the command does not complete successfully
+                within the timeout, or the subarrays do not reach obsState
+        """
+        unique_id = get_unique_id(command_result)
+        assert unique_id, f"Command not accepted: {command_result}"
+        record = self.wait_for_result(unique_id)
+        assert (
+            record is not None
+        ), f"No result for {unique_id} within {self.timeout}s"
+        assert (
+            record.result_code == ResultCode.OK
+        ), f"{unique_id} completed with {record}"
+        LOGGER.info("%s completed", unique_id)
+        for key, device in self.obs_state_devices.items():
+            self.obs_state_events[key] = self.obs_state_event(
+                device, OBS_STATE_GRACE_PERIOD
+            )
+        not_in_obs_state = [
+            self.obs_state_devices[key].dev_name()
+            for key, event_data in self.obs_state_events.items()
+            if not event_data
+        ]
+        assert (
+            not not_in_obs_state
+        ), f"{not_in_obs_state} not in {self.obs_state} after {unique_id}"
+        return record
+
+
+def sync_on_command_result(device_dict: dict, obs_state: str, timeout: float):
+    """Decorator waiting for the command invoked by the decorated method to
+    complete, the method returning the command result
+
+    Args:
+        device_dict (dict): device names, keyed as device_dict_low
+        obs_state (str): obsState of the subarrays once complete
+        timeout (float): seconds to wait for the command result
+    """
+
+    def decorator_sync_on_command_result(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with profile_propagation(
+                device_dict, func.__name__, obs_state
+            ), LrcrCompletion(device_dict, obs_state, timeout) as completion:
+                result = func(*args, **kwargs)
+                completion.wait(result)
+            return result
+
+        return wrapper
+
+    return decorator_sync_on_command_result
+
 
 def sync_set_to_on(device_dict: dict):
     def decorator_sync_set_to_on(func):
@@ -64,19 +307,8 @@ def sync_set_to_standby(func):
     return wrapper
 
 
-def sync_release_resources(device_dict, timeout=200):
-    def decorator_sync_release_resources(func):
-        @functools.wraps(func)
-        def wrapper(*args, **kwargs):
-            the_waiter = Waiter(**device_dict)
-            the_waiter.set_wait_for_going_to_empty()
-            result = func(*args, **kwargs)
-            the_waiter.wait(timeout)
-            return result
-
-        return wrapper
-
-    return decorator_sync_release_resources
+def sync_release_resources(device_dict, timeout=20):
+    return sync_on_command_result(device_dict, "EMPTY", timeout)
 
 
 def sync_assign_resources(device_dict):
@@ -93,11 +325,13 @@ def sync_assign_resources(device_dict):
             )
             device.check_devices_obsState("EMPTY")
             set_wait_for_obsstate = kwargs.get("set_wait_for_obsstate", True)
-            result = func(*args, **kwargs)
-            if set_wait_for_obsstate:
-                the_waiter = Waiter(**device_dict)
-                the_waiter.set_wait_for_assign_resources()
-                the_waiter.wait(500)
+            if not set_wait_for_obsstate:
+                return func(*args, **kwargs)
+            with profile_propagation(
+                device_dict, func.__name__, "IDLE"
+            ), LrcrCompletion(device_dict, "IDLE", 50) as completion:
+                result = func(*args, **kwargs)
+                completion.wait(result)
             return result
 
         return wrapper
@@ -121,71 +355,19 @@ def sync_abort(device_dict, timeout=1000):
     return decorator_sync_abort
 
 
-def sync_restart(device_dict, timeout=500):
-    # define as a decorator
-    def decorator_sync_restart(func):
-        @functools.wraps(func)
-        def wrapper(*args, **kwargs):
-            the_waiter = Waiter(**device_dict)
-            the_waiter.set_wait_for_going_to_empty()
-            result = func(*args, **kwargs)
-            the_waiter.wait(timeout)
-            return result
-
-        return wrapper
-
-    return decorator_sync_restart
+def sync_restart(device_dict, timeout=50):
+    return sync_on_command_result(device_dict, "EMPTY", timeout)
 
 
 def sync_configure(device_dict):
-    # defined as a decorator
-    def decorator_sync_configure(func):
-        @functools.wraps(func)
-        def wrapper(*args, **kwargs):
-            invoked_from_ready = False
-            the_waiter = Waiter(**device_dict)
-            if Resource(device_dict.get("tmc_subarraynode")) == "READY":
-                invoked_from_ready = True
-            result = func(*args, **kwargs)
-            if invoked_from_ready:
-                the_waiter.set_wait_for_configuring()
-                the_waiter.wait(500)
-            the_waiter.set_wait_for_configure()
-            the_waiter.wait(800)
-            return result
-
-        return wrapper
-
-    return decorator_sync_configure
+    # Configure from READY goes through CONFIGURING, the result is only
+    # reported once READY again
+    return sync_on_command_result(device_dict, "READY", 80)
 
 
 def sync_end(device_dict):
-    # defined as a decorator
-    def decorator_sync_end(func):
-        @functools.wraps(func)
-        def wrapper(*args, **kwargs):
-            the_waiter = Waiter(**device_dict)
-            the_waiter.set_wait_for_idle()
-            result = func(*args, **kwargs)
-            the_waiter.wait(200)
-            return result
-
-        return wrapper
-
-    return decorator_sync_end
+    return sync_on_command_result(device_dict, "IDLE", 20)
 
 
 def sync_endscan(device_dict):
-    # defined as a decorator
-    def decorator_sync_endscan(func):
-        @functools.wraps(func)
-        def wrapper(*args, **kwargs):
-            the_waiter = Waiter(**device_dict)
-            the_waiter.set_wait_for_ready()
-            result = func(*args, **kwargs)
-            the_waiter.wait(200)
-            return result
-
-        return wrapper
-
-    return decorator_sync_endscan
+    return sync_on_command_result(device_dict, "READY", 20)
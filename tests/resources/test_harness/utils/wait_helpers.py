@@ -4,10 +4,10 @@ from datetime import datetime
 from ska_ser_logging import configure_logging
 
 from tests.resources.test_support.common_utils.common_helpers import (
-    AttributeWatcher,
     Resource,
     watch,
 )
+from tests.resources.test_support.common_utils.wait_engine import WaitEngine
 
 configure_logging(logging.DEBUG)
 LOGGER = logging.getLogger(__name__)
@@ -406,49 +406,67 @@ class Waiter:
         )
 
     def wait(self, timeout=30, resolution=0.1):
+        """Waits for all the set waits together against one deadline of
+        timeout * resolution seconds.
+
+        Returns:
+            list[WaitOutcome]: outcome of each wait with completion time
+        """
         self.logs = ""
-        while self.waits:
-            wait = self.waits.pop()
-            if isinstance(wait, AttributeWatcher):
-                timeout = timeout * resolution
-            try:
-                result = wait.wait_until_conditions_met(timeout=timeout)
-            except Exception as ex:
-                self.timed_out = True
-                future_value_shim = ""
-                timeout_shim = timeout * resolution
-                if isinstance(wait, AttributeWatcher):
-                    timeout_shim = timeout
-                if wait.future_value is not None:
-                    future_value_shim = f" to {wait.future_value} \
-                        (current val={wait.current_value})"
-                self.error_logs += "{} timed out whilst waiting for {} to \
-                change from {}{} in {:f}s and raised {}\n".format(
-                    wait.device_name,
-                    wait.attr,
-                    wait.previous_value,
-                    future_value_shim,
-                    timeout_shim,
-                    ex,
-                )
-                LOGGER.error(
-                    "Exception occurred at %s with error: %s",
-                    datetime.utcnow().strftime("%d/%m/%Y %H:%M:%S:%f"),
-                    self.error_logs,
-                )
-            else:
-                timeout_shim = (timeout - result) * resolution
-                if isinstance(wait, AttributeWatcher):
-                    timeout_shim = result
+        timeout_shim = timeout * resolution
+        outcomes = WaitEngine(self.waits, resolution).run(timeout_shim)
+        self.waits = []
+        return self._report(outcomes, timeout_shim)
+
+    async def wait_async(self, timeout=30, resolution=0.1):
+        """Awaitable variant of wait, lets other coroutines run while the
+        set waits are pending.
+
+        Returns:
+            list[WaitOutcome]: outcome of each wait with completion time
+        """
+        self.logs = ""
+        timeout_shim = timeout * resolution
+        outcomes = await WaitEngine(self.waits, resolution).run_async(
+            timeout_shim
+        )
+        self.waits = []
+        return self._report(outcomes, timeout_shim)
+
+    def _report(self, outcomes, timeout_shim):
+        """Logs the outcomes of the waits and raises if any timed out"""
+        for outcome in outcomes:
+            wait = outcome.wait
+            if outcome.completed:
                 self.logs += (
                     "{} changed {} from {} to {} after {:f}s \n".format(
                         wait.device_name,
                         wait.attr,
                         wait.previous_value,
                         wait.current_value,
-                        timeout_shim,
+                        outcome.elapsed_time,
                     )
                 )
+                continue
+            self.timed_out = True
+            future_value_shim = ""
+            if wait.future_value is not None:
+                future_value_shim = f" to {wait.future_value} \
+                    (current val={wait.current_value})"
+            self.error_logs += "{} timed out whilst waiting for {} to \
+            change from {}{} in {:f}s and raised {}\n".format(
+                wait.device_name,
+                wait.attr,
+                wait.previous_value,
+                future_value_shim,
+                timeout_shim,
+                outcome.error or "timeout",
+            )
+            LOGGER.error(
+                "Exception occurred at %s with error: %s",
+                datetime.utcnow().strftime("%d/%m/%Y %H:%M:%S:%f"),
+                self.error_logs,
+            )
         if self.timed_out:
             raise Exception(
                 "timed out, the following timeouts ocurred:\n{} Successful\
@@ -456,3 +474,4 @@ class Waiter:
                     self.error_logs, self.logs
                 )
             )
+        return outcomes
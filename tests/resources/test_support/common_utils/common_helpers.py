@@ -1,6 +1,5 @@
 """Common helpers for ska-tmc-low-integration """
 import logging
-import signal
 import threading
 from time import sleep
 
@@ -8,11 +7,29 @@ from numpy import ndarray
 from ska_ser_logging import configure_logging
 
 # SUT frameworks
-from tango import CmdArgType, DeviceProxy, EventType
+from tango import CmdArgType, DevFailed, DeviceAttribute
+
+from tests.resources.test_support.common_utils.device_proxy_pool import (
+    DEVICE_PROXY_POOL,
+)
+from tests.resources.test_support.common_utils.event_hub import (
+    CHANGE_EVENT_HUB,
+)
+from tests.resources.test_support.common_utils.polling_scheduler import (
+    CLIENT_SIDE_POLLER,
+)
+from tests.resources.test_support.common_utils.wait_engine import WaitEngine
 
 configure_logging(logging.DEBUG)
 LOGGER = logging.getLogger(__name__)
 
+# DevFailed reasons raised on subscription when the device neither polls the
+# attribute nor pushes change events for it
+EVENTS_NOT_PUSHED_REASONS = (
+    "API_AttributePollingNotStarted",
+    "API_EventPropertiesNotSet",
+)
+
 
 class Resource:
     """Resources class for common helpers"""
@@ -24,24 +41,34 @@ class Resource:
 
     def get(self, attr):
         """Method for getting attributes"""
-        device_proxy = DeviceProxy(self.device_name)
-        # Set timeout to 5 sec.
-        # Sometimes read attribute timeout with default 3 sec time
-        device_proxy.set_timeout_millis(5000)
-        attrs = device_proxy.get_attribute_list()
-        if attr not in attrs:
+        attr_config = DEVICE_PROXY_POOL.get_attribute_config(
+            self.device_name, attr
+        )
+        if attr_config is None:
             return "attribute not found"
-        # pylint: disable=protected-access
-        attr_data_type = device_proxy._get_attribute_config(attr).data_type
-        if attr_data_type == CmdArgType.DevEnum:
-            return getattr(device_proxy, attr).name
-        if attr_data_type == CmdArgType.DevState:
-            return str(device_proxy.read_attribute(attr).value)
-
-        value = getattr(device_proxy, attr)
+        value = DEVICE_PROXY_POOL.read_attribute(self.device_name, attr).value
+        return self.convert_value(attr_config, value)
+
+    @staticmethod
+    def convert_value(attr_config, value):
+        """Converts a read attribute value as per attribute data type
+
+        Args:
+            attr_config (AttributeInfoEx): configuration of the attribute
+            value: value read from the device
+        Returns:
+            Enum label for DevEnum, state name for DevState, tuple for
+            spectrum attributes else the read value
+        """
+        if value is None:
+            return value
+        if attr_config.data_type == CmdArgType.DevEnum:
+            return attr_config.enum_labels[value]
+        if attr_config.data_type == CmdArgType.DevState:
+            return str(value)
         if isinstance(value, ndarray):
             return tuple(value)
-        return getattr(device_proxy, attr)
+        return value
 
     def assert_attribute(self, attr):
         """Method for asserting"""
@@ -113,6 +140,8 @@ class Monitor:
     attr = None
     device_name = None
     current_value = None
+    # refreshed by the PollingScheduler when used within a WaitEngine
+    batched_polling = True
 
     def __init__(
         self,
@@ -165,6 +194,37 @@ class Monitor:
                 is_eq_to_future_comparison = is_eq_to_future_comparison.all()
         return (not self.data_ready) or (not is_eq_to_future_comparison)
 
+    def refresh(self):
+        """Refreshes the current value, used by WaitEngine"""
+        self._update()
+
+    def apply_sample(self, sample):
+        """Updates the current value from a sample shared with other
+        monitors, used by WaitEngine
+
+        Args:
+            sample: DeviceAttribute read by the PollingScheduler, the
+                "attribute not found" marker or the exception raised while
+                reading the attribute
+        """
+        if isinstance(sample, Exception):
+            raise sample
+        if isinstance(sample, DeviceAttribute):
+            sample = self.resource.convert_value(
+                DEVICE_PROXY_POOL.get_attribute_config(
+                    self.device_name, self.attr
+                ),
+                sample.value,
+            )
+        self.current_value = sample
+
+    def is_condition_met(self) -> bool:
+        """Non blocking check of the wait condition, used by WaitEngine"""
+        return not self._conditions_not_met()
+
+    def stop(self):
+        """Nothing to release for a polling monitor"""
+
     def _compare(self, desired):
         """Compare the current value with desired value"""
         comparison = self.current_value == desired
@@ -591,39 +651,36 @@ class Waiter:
         ).not_equals([""])
 
     def wait(self, timeout: int = 30, resolution: float = 0.1):
-        """Delay method subscriber class"""
-        self.logs = ""
-        while self.waits:
-            wait = self.waits.pop()
-            if isinstance(wait, AttributeWatcher):
-                timeout = timeout * resolution
-            try:
-                result = wait.wait_until_conditions_met(timeout=timeout)
-            # pylint: disable= broad-exception-caught
-            except Exception as ex:
-                self.timed_out = True
-                future_value_shim = ""
-                timeout_shim = timeout * resolution
-                if isinstance(wait, AttributeWatcher):
-                    timeout_shim = timeout
-                if wait.future_value is not None:
-                    future_value_shim = f" to {wait.future_value} \
-                        (current val={wait.current_value})"
-                self.error_logs += f"{wait.device_name} timed\
-                      out whilst waiting for {wait.attr} to\
-                      change from\
-                      {wait.previous_value}{future_value_shim} in\
-                      {timeout_shim:f}s and raised\
-                      {ex}\n"
+        """Delay method subscriber class. All waits are evaluated together
+        against one deadline of timeout * resolution seconds.
 
-            else:
-                timeout_shim = (timeout - result) * resolution
-                if isinstance(wait, AttributeWatcher):
-                    timeout_shim = result
+        Returns:
+            list[WaitOutcome]: outcome of each wait with completion time
+        """
+        self.logs = ""
+        timeout_shim = timeout * resolution
+        outcomes = WaitEngine(self.waits, resolution).run(timeout_shim)
+        self.waits = []
+        for outcome in outcomes:
+            wait = outcome.wait
+            if outcome.completed:
                 self.logs += f"{wait.device_name} changed\
                           {wait.attr} from {wait.previous_value} to\
                             {wait.current_value} after\
-                                  {timeout_shim:.2f}s \n"
+                                  {outcome.elapsed_time:.2f}s \n"
+                continue
+            self.timed_out = True
+            future_value_shim = ""
+            if wait.future_value is not None:
+                future_value_shim = f" to {wait.future_value} \
+                    (current val={wait.current_value})"
+            reason = outcome.error or "timeout"
+            self.error_logs += f"{wait.device_name} timed\
+                  out whilst waiting for {wait.attr} to\
+                  change from\
+                  {wait.previous_value}{future_value_shim} in\
+                  {timeout_shim:f}s and raised\
+                  {reason}\n"
         if self.timed_out:
             # pylint: disable= broad-exception-raised
             raise Exception(
@@ -631,6 +688,7 @@ class Waiter:
                       timeouts occurred:\n{self.error_logs}\
                           Successful changes:\n{self.logs}"
             )
+        return outcomes
 
 
 class WaitForScan(Waiter):
@@ -641,15 +699,6 @@ class WaitForScan(Waiter):
         self.sdp_subarray1 = kwargs.get("sdp_subarray")
         self.csp_subarray1 = kwargs.get("csp_subarray")
         self.tmc_subarraynode1 = kwargs.get("tmc_subarraynode")
-        self.tmc_subarraynode = watch(
-            Resource(kwargs.get("tmc_subarraynode"))
-        ).for_a_change_on("obsState")
-        self.csp_subarray = watch(
-            Resource(kwargs.get("csp_subarray"))
-        ).for_a_change_on("obsState")
-        self.sdp_subarray = watch(
-            Resource(kwargs.get("sdp_subarray"))
-        ).for_a_change_on("obsState")
 
     # pylint:disable=arguments-differ
     def wait(self, timeout):
@@ -658,15 +707,18 @@ class WaitForScan(Waiter):
             "scan command dispatched, checking that the state transitioned to \
                 SCANNING"
         )
-        self.tmc_subarraynode.wait_until_value_changed_to("SCANNING", timeout)
-        self.csp_subarray.wait_until_value_changed_to("SCANNING", timeout)
-        self.sdp_subarray.wait_until_value_changed_to("SCANNING", timeout)
+        scan_devices = [
+            self.tmc_subarraynode1,
+            self.csp_subarray1,
+            self.sdp_subarray1,
+        ]
+        self.set_wait_for_specific_obsstate("SCANNING", scan_devices)
+        super().wait(timeout)
         logging.info(
             "state transitioned to SCANNING, waiting for it to return to READY"
         )
-        self.tmc_subarraynode.wait_until_value_changed_to("READY", timeout)
-        self.csp_subarray.wait_until_value_changed_to("READY", timeout)
-        self.sdp_subarray.wait_until_value_changed_to("READY", timeout)
+        self.set_wait_for_specific_obsstate("READY", scan_devices)
+        super().wait(timeout)
 
 
 # Waiters based on tango DeviceProxy's ability to subscribe to events
@@ -704,9 +756,11 @@ class AttributeWatcher:
         start_now=True,
         polling=100,
     ):
-        self.device_proxy = DeviceProxy(resource.device_name)
+        self.device_proxy = DEVICE_PROXY_POOL.get_proxy(resource.device_name)
         self.device_name = resource.device_name
         self.future_value = desired
+        # server polling is never changed, attributes without change events
+        # are polled by the shared client side poller
         self.polling = polling
         self.attribute = attribute
         self.attr = attribute
@@ -715,12 +769,15 @@ class AttributeWatcher:
         self.is_changed = False
         self.require_transition = require_transition
         self.result_available = threading.Event()
+        # events are pushed by the Tango event thread while the conditions
+        # are checked from the waiting thread
+        self._lock = threading.Lock()
         self.current_subscription = None
-        self.original_polling = None
+        self.polled = False
         self.waiting = False
         self.start_time: float = 0.0
         self.elapsed_time: float = 0.0
-        self.timeout: int = 0
+        self.timeout: float = 0.0
         self.desired = None
         self._waiting: bool = False
         if predicate is None:
@@ -738,17 +795,44 @@ class AttributeWatcher:
         return comparison
 
     def start_listening(self):
-        """This method start to monitor the attributes"""
-        if self.device_proxy.is_attribute_polled(self.attribute):
-            # must be reset to original when finished
-            self.original_polling = self.device_proxy.get_attribute_poll_period
-        self.device_proxy.poll_attribute(self.attribute, self.polling)
-        self.current_subscription = self.device_proxy.subscribe_event(
-            self.attribute, EventType.CHANGE_EVENT, self._cb
-        )
+        """This method start to monitor the attributes. The attribute is
+        subscribed for change events without changing the polling
+        configuration of the device, if the device does not push events for
+        the attribute it is polled from the client side instead."""
+        try:
+            self.current_subscription = CHANGE_EVENT_HUB.subscribe(
+                self.device_proxy, self.attribute, self._cb
+            )
+        except DevFailed as exception:
+            if not any(
+                error.reason in EVENTS_NOT_PUSHED_REASONS
+                for error in exception.args
+            ):
+                raise
+            LOGGER.info(
+                "%s/%s does not push change events, polling from client",
+                self.device_name,
+                self.attribute,
+            )
+            self.polled = True
+            self.current_subscription = CLIENT_SIDE_POLLER.watch(
+                self.device_proxy, self.attribute, self._cb
+            )
 
     def _cb(self, event):
         """This method will be called by a thread"""
+        with self._lock:
+            self._evaluate_event(event)
+
+    def _evaluate_event(self, event):
+        """Evaluates the wait conditions against a received event"""
+        if event.err:
+            LOGGER.warning(
+                "Error event received for %s: %s",
+                event.attr_name,
+                event.errors,
+            )
+            return
         self.current_value = str(event.attr_value.value)
         if self.previous_value is None:
             # this implies it is the first event and is always treated as the
@@ -780,7 +864,6 @@ class AttributeWatcher:
 
     def _handle_timeout(self):
         """This method handles timeout"""
-        self.stop_listening()
         # pylint: disable= broad-exception-raised
         raise Exception(
             f"Timed out waiting for an change on {self.device_proxy.name()}.\
@@ -789,30 +872,55 @@ class AttributeWatcher:
             {self.current_value}"
         )
 
-    def _wait(self, timeout):
-        """Delay method for attributeWather class"""
+    def _wait(self, timeout: float):
+        """Delay method for attributeWather class, blocks the calling thread
+        only, so that several watchers can wait at once from any thread.
+
+        Args:
+            timeout (float): time to wait in seconds
+        """
         self.timeout = timeout
-        signal.signal(signal.SIGALRM, self._handle_timeout)
-        signal.alarm(timeout)
-        self.result_available.wait()
-        signal.signal(0)
+        try:
+            if not self.result_available.wait(timeout):
+                self._handle_timeout()
+        finally:
+            self.stop()
+
+    def refresh(self):
+        """Values are pushed by events, nothing to refresh"""
+
+    def is_condition_met(self) -> bool:
+        """Non blocking check of the wait condition, used by WaitEngine"""
+        return self.result_available.is_set()
+
+    def stop(self):
+        """Stops listening once done with the watcher"""
         self.stop_listening()
 
     def stop_listening(self):
-        """Stops polling for current attribute"""
-        if self.original_polling is not None:
-            self.device_proxy.poll_attribute(self.original_polling)
-        self.device_proxy.unsubscribe_event(self.current_subscription)
+        """Stops polling for current attribute, can be called more than
+        once"""
+        # the subscription is released outside of the lock as the hub holds
+        # its own lock while delivering events to _cb
+        with self._lock:
+            subscription = self.current_subscription
+            self.current_subscription = None
+        if subscription is None:
+            return
+        if self.polled:
+            CLIENT_SIDE_POLLER.unwatch(subscription)
+        else:
+            CHANGE_EVENT_HUB.unsubscribe(subscription)
 
-    def wait_until_value_changed_to(self, desired, timeout: int = 2):
+    def wait_until_value_changed_to(self, desired, timeout: float = 2):
         """Waits for value changed to desired value"""
         self.desired = desired
         self.waiting = True
-        self._wait(int(timeout))
+        self._wait(float(timeout))
         return self.elapsed_time
 
-    def wait_until_conditions_met(self, timeout: int = 2):
+    def wait_until_conditions_met(self, timeout: float = 2):
         """Waits until conditions is satisfied"""
         self._waiting = True
-        self._wait(int(timeout))
+        self._wait(float(timeout))
         return self.elapsed_time
@@ -0,0 +1,252 @@
+"""Process wide pool of Tango DeviceProxy objects.
+
+Creating a DeviceProxy and querying the attribute configuration are network
+round trips to the Tango database and to the device server. The pool keeps a
+single proxy per device and caches the attribute configuration per
+(device, attribute), so that reading a value costs one round trip.
+"""
+import logging
+import threading
+from typing import Any, Callable, Optional
+
+from ska_ser_logging import configure_logging
+from tango import AttributeInfoEx, DevFailed, DeviceAttribute, DeviceProxy
+
+configure_logging(logging.DEBUG)
+LOGGER = logging.getLogger(__name__)
+
+# Sometimes read attribute timeout with default 3 sec time
+PROXY_TIMEOUT_MILLIS = 5000
+
+# DevFailed reasons which indicate that the device has been restarted or
+# redeployed, in which case the cached proxy and metadata are discarded.
+# API_AttrNotFound is not one of them, a missing attribute is not fixed by a
+# new proxy.
+DEVICE_RESTART_REASONS = (
+    "API_DeviceNotExported",
+    "API_CantConnectToDevice",
+    "API_DeviceNotDefined",
+    "API_CorbaException",
+)
+
+
+def get_device_name(device: Any) -> str:
+    """Return the normalised name of a device.
+
+    Args:
+        device (str | DeviceProxy): device name or Tango Device Proxy Object,
+            any object implementing dev_name() is accepted
+    Returns:
+        str: lower case device name used as pool key
+    """
+    if isinstance(device, str):
+        return device.lower()
+    return device.dev_name().lower()
+
+
+def is_device_restart_error(error: DevFailed) -> bool:
+    """Check whether a DevFailed error is caused by a device restart"""
+    return any(
+        error_item.reason in DEVICE_RESTART_REASONS
+        for error_item in error.args
+    )
+
+
+class DeviceProxyPool:
+    """Keeps one DeviceProxy per device and the attribute configuration
+    per (device, attribute) for the lifetime of the process.
+    """
+
+    def __init__(self, proxy_factory: Callable = DeviceProxy):
+        """
+        Args:
+            proxy_factory (Callable): creates the proxy of a device name
+        """
+        self.proxy_factory = proxy_factory
+        self._lock = threading.RLock()
+        self._proxies: dict = {}
+        self._attribute_configs: dict = {}
+        self._queried_devices: set = set()
+
+    def get_proxy(self, device: Any) -> DeviceProxy:
+        """Return the pooled proxy for given device, create it if needed
+
+        Args:
+            device (str | DeviceProxy): device name or Tango Device Proxy
+        Returns:
+            DeviceProxy: pooled Tango Device Proxy Object
+        """
+        device_name = get_device_name(device)
+        with self._lock:
+            device_proxy = self._proxies.get(device_name)
+            if device_proxy is None:
+                device_proxy = self.proxy_factory(device_name)
+                device_proxy.set_timeout_millis(PROXY_TIMEOUT_MILLIS)
+                self._proxies[device_name] = device_proxy
+            return device_proxy
+
+    def get_attribute_config(
+        self, device: Any, attribute_name: str
+    ) -> Optional[AttributeInfoEx]:
+        """Return cached attribute configuration of given device attribute.
+        The configuration of all attributes of a device is fetched with a
+        single query the first time the device is used.
+
+        Args:
+            device (str | DeviceProxy): device name or Tango Device Proxy
+            attribute_name (str): Name of the attribute
+        Returns:
+            AttributeInfoEx: attribute configuration, None if the device does
+            not have the attribute
+        """
+        device_name = get_device_name(device)
+        with self._lock:
+            queried = device_name in self._queried_devices
+        if not queried:
+            self._query_attribute_configs(device_name)
+        with self._lock:
+            return self._attribute_configs.get(
+                (device_name, attribute_name.lower())
+            )
+
+    def _query_attribute_configs(self, device_name: str) -> None:
+        """Fetch configuration of all attributes of the device. The query is
+        made without holding the pool lock, a slow device does not stall
+        the other devices, and its result stored under it."""
+        device_proxy = self.get_proxy(device_name)
+        attribute_configs = device_proxy.attribute_list_query_ex()
+        with self._lock:
+            if self._proxies.get(device_name) is not device_proxy:
+                # invalidated meanwhile, the configuration may be stale
+                return
+            for attribute_config in attribute_configs:
+                self._attribute_configs[
+                    (device_name, attribute_config.name.lower())
+                ] = attribute_config
+            self._queried_devices.add(device_name)
+
+    def read_attribute(
+        self, device: Any, attribute_name: str
+    ) -> DeviceAttribute:
+        """Read attribute through the pooled proxy. If the device was
+        restarted in between the pooled entries are invalidated and the
+        read is retried once with a fresh proxy.
+
+        Args:
+            device (str | DeviceProxy): device name or Tango Device Proxy
+            attribute_name (str): Name of the attribute
+        Returns:
+            DeviceAttribute: attribute value read from the device
+        """
+        try:
+            return self.get_proxy(device).read_attribute(attribute_name)
+        except DevFailed as exception:
+            return self.retry_after_restart(
+                device,
+                exception,
+                lambda device_proxy: device_proxy.read_attribute(
+                    attribute_name
+                ),
+            )
+
+    def retry_after_restart(
+        self,
+        device: Any,
+        exception: DevFailed,
+        call: Callable[[DeviceProxy], Any],
+    ) -> Any:
+        """Retry a call which failed on the pooled proxy. If the device was
+        restarted the pooled entries are invalidated and the call is retried
+        once with a fresh proxy, otherwise the exception is raised again.
+
+        Args:
+            device (str | DeviceProxy): device name or Tango Device Proxy
+            exception (DevFailed): error raised by the call
+            call (Callable): called with the proxy of the device
+        Returns:
+            Any: value returned by the retried call
+        Raises:
+            DevFailed: exception if not caused by a restart, or the error of
+                the retried call
+        """
+        if not is_device_restart_error(exception):
+            raise exception
+        LOGGER.info(
+            "Device %s seems to be restarted, invalidating pool entry",
+            get_device_name(device),
+        )
+        self.invalidate(device)
+        return call(self.get_proxy(device))
+
+    def invalidate(self, device: Any) -> None:
+        """Drop pooled proxy and cached attribute configuration of device.
+        Used when a device or its server is restarted.
+
+        Args:
+            device (str | DeviceProxy): device name or Tango Device Proxy
+        """
+        device_name = get_device_name(device)
+        with self._lock:
+            self._proxies.pop(device_name, None)
+            self._queried_devices.discard(device_name)
+            for key in list(self._attribute_configs):
+                if key[0] == device_name:
+                    del self._attribute_configs[key]
+
+    def set_proxy_factory(self, proxy_factory: Callable) -> Callable:
+        """Replace the factory creating proxies, e.g. by an offline device
+        layer. The pooled entries are dropped.
+
+        Args:
+            proxy_factory (Callable): creates the proxy of a device name
+        Returns:
+            Callable: the previous factory
+        """
+        with self._lock:
+            previous_factory = self.proxy_factory
+            self.proxy_factory = proxy_factory
+            self.clear()
+        return previous_factory
+
+    def clear(self) -> None:
+        """Drop all pooled proxies and cached attribute configurations"""
+        with self._lock:
+            self._proxies = {}
+            self._attribute_configs = {}
+            self._queried_devices = set()
+
+
+DEVICE_PROXY_POOL = DeviceProxyPool()
+
+
+class PooledProxy:
+    """Wrapper attribute resolving to the pooled proxy of a device, so that
+    no proxy is created before a test uses it.
+
+    The proxy is looked up in DEVICE_PROXY_POOL on every access, a device
+    restart invalidating it is therefore picked up. Assigning a device name
+    or a proxy to the attribute overrides the device for that wrapper
+    instance, e.g. when switching to another subarray.
+    """
+
+    def __init__(self, device_name: str):
+        """
+        Args:
+            device_name (str): default device of the attribute
+        """
+        self.device_name = device_name
+        self.attribute_name = ""
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.attribute_name = f"_{name}_device"
+
+    def __get__(self, instance: Any, owner: Optional[type] = None) -> Any:
+        if instance is None:
+            return self
+        device = instance.__dict__.get(self.attribute_name, self.device_name)
+        if isinstance(device, str):
+            return DEVICE_PROXY_POOL.get_proxy(device)
+        return device
+
+    def __set__(self, instance: Any, device: Any) -> None:
+        instance.__dict__[self.attribute_name] = device
@@ -0,0 +1,387 @@
+"""Shared change event subscriptions.
+
+EventRecorder, the event tracer, AttributeWatcher and the event logger used
+to open their own CHANGE_EVENT subscription each, so the same attribute was
+subscribed several times within a test. The hub keeps a single reference
+counted subscription per (device, attribute) and fans every event out to all
+of its consumers.
+
+Tango pushes the current value when a subscription is made; consumers
+joining an existing subscription get the last received event replayed so
+that they observe the same behaviour.
+
+Taps receive every event dispatched by the hub exactly once, whatever the
+number of consumers, e.g. to journal the events of a test.
+"""
+import asyncio
+import itertools
+import logging
+import threading
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Set, Tuple
+
+from ska_ser_logging import configure_logging
+from tango import EventType
+
+from tests.resources.test_support.common_utils.device_proxy_pool import (
+    DEVICE_PROXY_POOL,
+    get_device_name,
+)
+
+configure_logging(logging.DEBUG)
+LOGGER = logging.getLogger(__name__)
+
+
+class SharedSubscription:
+    """Tango change event subscription shared by several consumers"""
+
+    def __init__(
+        self,
+        device_name: str,
+        attribute_name: str,
+        taps: Optional[Dict[int, Callable]] = None,
+    ):
+        self.device_name = device_name
+        self.attribute_name = attribute_name
+        self.event_id = None
+        self.consumers: Dict[int, Callable] = {}
+        self.taps = {} if taps is None else taps
+        self.last_event = None
+        # Reentrant since Tango delivers the first event from within
+        # subscribe_event on the subscribing thread
+        self.lock = threading.RLock()
+        # set once the Tango subscription is made, or failed with error
+        self.subscribed = threading.Event()
+        self.error: Optional[Exception] = None
+
+    def add_consumer(self, handle: int, callback: Callable) -> None:
+        """Add a consumer and replay the last received event to it"""
+        with self.lock:
+            self.consumers[handle] = callback
+            if self.last_event is not None:
+                self._notify(callback, self.last_event)
+
+    def dispatch(self, event: Any) -> None:
+        """Tango callback, forwards the event to every consumer"""
+        with self.lock:
+            self.last_event = event
+            for tap in list(self.taps.values()):
+                self._notify(
+                    partial(tap, self.device_name, self.attribute_name), event
+                )
+            for callback in list(self.consumers.values()):
+                self._notify(callback, event)
+
+    def _notify(self, callback: Callable, event: Any) -> None:
+        """Call a consumer, a failing consumer does not affect the others"""
+        try:
+            callback(event)
+        # pylint: disable=broad-exception-caught
+        except Exception as exception:
+            LOGGER.exception(
+                "Consumer of %s/%s failed with: %s",
+                self.device_name,
+                self.attribute_name,
+                exception,
+            )
+
+
+class ChangeEventHub:
+    """Keeps one change event subscription per (device, attribute) for all
+    consumers. The Tango subscription is made by the first consumer and
+    removed once the last consumer unsubscribes.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._subscriptions: Dict[Tuple[str, str], SharedSubscription] = {}
+        self._handles: Dict[int, Tuple[str, str]] = {}
+        self._taps: Dict[int, Callable] = {}
+        self._handle_counter = itertools.count(1)
+
+    def subscribe(
+        self, device: Any, attribute_name: str, callback: Callable
+    ) -> int:
+        """Subscribe callback for change events of given attribute. The
+        Tango subscription is made without holding the hub lock, consumers
+        joining it meanwhile wait for it to be made.
+
+        Args:
+            device (str | DeviceProxy): device name or Tango Device Proxy
+            attribute_name (str): Name of the attribute
+            callback (Callable): called with the tango EventData
+        Returns:
+            int: handle to be used to unsubscribe
+        Raises:
+            DevFailed: if the Tango subscription fails
+        """
+        key = (get_device_name(device), attribute_name.lower())
+        with self._lock:
+            handle = next(self._handle_counter)
+            subscription = self._subscriptions.get(key)
+            is_new = subscription is None
+            if is_new:
+                subscription = SharedSubscription(
+                    key[0], attribute_name, self._taps
+                )
+                subscription.consumers[handle] = callback
+                self._subscriptions[key] = subscription
+            else:
+                subscription.add_consumer(handle, callback)
+            self._handles[handle] = key
+        if is_new:
+            self._subscribe(key, subscription)
+        else:
+            subscription.subscribed.wait()
+        if subscription.error is not None:
+            raise subscription.error
+        return handle
+
+    def _subscribe(
+        self, key: Tuple[str, str], subscription: SharedSubscription
+    ) -> None:
+        """Make the Tango subscription of a new shared subscription, then
+        publish its event id under the hub lock"""
+        try:
+            event_id = DEVICE_PROXY_POOL.get_proxy(key[0]).subscribe_event(
+                subscription.attribute_name,
+                EventType.CHANGE_EVENT,
+                subscription.dispatch,
+            )
+        except Exception as exception:
+            with self._lock:
+                subscription.error = exception
+                if self._subscriptions.get(key) is subscription:
+                    del self._subscriptions[key]
+                for handle in subscription.consumers:
+                    self._handles.pop(handle, None)
+            subscription.subscribed.set()
+            raise
+        with self._lock:
+            subscription.event_id = event_id
+            # every consumer may have unsubscribed meanwhile
+            removed = self._subscriptions.get(key) is not subscription
+        subscription.subscribed.set()
+        if removed:
+            self._unsubscribe(subscription)
+        else:
+            LOGGER.debug("Subscribed %s/%s", *key)
+
+    def unsubscribe(self, handle: int) -> None:
+        """Remove a consumer, the Tango subscription is removed with the last
+        consumer. No lock is held while removing it, since the Tango
+        callbacks of the subscription may need them meanwhile.
+
+        Args:
+            handle (int): handle returned by subscribe
+        Raises:
+            KeyError: if the handle is not subscribed, same as
+            DeviceProxy.unsubscribe_event
+        """
+        with self._lock:
+            key = self._handles.pop(handle)
+            subscription = self._subscriptions[key]
+            # dispatch iterates over a copy of the consumers
+            subscription.consumers.pop(handle, None)
+            if subscription.consumers:
+                return
+            del self._subscriptions[key]
+            if subscription.event_id is None:
+                # removed by _subscribe once the subscription is made
+                return
+        self._unsubscribe(subscription)
+
+    def add_tap(self, tap: Callable) -> int:
+        """Add a tap receiving every event dispatched by the hub
+
+        Args:
+            tap (Callable): called with device name, attribute name and
+                the tango EventData
+        Returns:
+            int: handle to be used to remove the tap
+        """
+        with self._lock:
+            handle = next(self._handle_counter)
+            self._taps[handle] = tap
+        return handle
+
+    def remove_tap(self, handle: int) -> None:
+        """Remove a tap added with add_tap
+
+        Args:
+            handle (int): handle returned by add_tap
+        """
+        with self._lock:
+            self._taps.pop(handle, None)
+
+    def subscription_count(self) -> int:
+        """Number of Tango subscriptions currently held by the hub"""
+        with self._lock:
+            return len(self._subscriptions)
+
+    def close(self) -> None:
+        """Remove all Tango subscriptions and consumers"""
+        with self._lock:
+            # the pending subscriptions are removed by _subscribe
+            subscriptions = [
+                subscription
+                for subscription in self._subscriptions.values()
+                if subscription.event_id is not None
+            ]
+            self._subscriptions = {}
+            self._handles = {}
+        for subscription in subscriptions:
+            self._unsubscribe(subscription)
+
+    @staticmethod
+    def _unsubscribe(subscription: SharedSubscription) -> None:
+        """Remove the Tango subscription"""
+        try:
+            DEVICE_PROXY_POOL.get_proxy(
+                subscription.device_name
+            ).unsubscribe_event(subscription.event_id)
+        # pylint: disable=broad-exception-caught
+        except Exception as exception:
+            LOGGER.warning(
+                "Failed to unsubscribe %s/%s: %s",
+                subscription.device_name,
+                subscription.attribute_name,
+                exception,
+            )
+
+
+CHANGE_EVENT_HUB = ChangeEventHub()
+
+
+@asynccontextmanager
+async def subscribed_events_async(
+    device: Any, attribute_name: str, hub: ChangeEventHub = CHANGE_EVENT_HUB
+) -> AsyncIterator[asyncio.Queue]:
+    """Subscribe to the change events of given attribute for the duration of
+    the context, e.g. before invoking the command whose events are awaited.
+    Events are received on the Tango event thread and handed over to the
+    running event loop.
+
+    Args:
+        device (str | DeviceProxy): device name or Tango Device Proxy
+        attribute_name (str): Name of the attribute
+        hub (ChangeEventHub): hub used to subscribe
+    Yields:
+        asyncio.Queue: the received events, error events excluded
+    """
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+
+    def _on_event(event):
+        if not event.err:
+            loop.call_soon_threadsafe(events.put_nowait, event)
+
+    handle = await loop.run_in_executor(
+        None, hub.subscribe, device, attribute_name, _on_event
+    )
+    try:
+        yield events
+    finally:
+        hub.unsubscribe(handle)
+
+
+async def next_event_async(
+    events: asyncio.Queue, predicate: Callable[[Any], bool], timeout: float
+) -> Any:
+    """Await the first event of subscribed_events_async satisfying predicate
+
+    Args:
+        events (asyncio.Queue): events yielded by subscribed_events_async
+        predicate (Callable): called with each event
+        timeout (float): time to wait in seconds
+    Returns:
+        EventData: the first event satisfying predicate
+    Raises:
+        asyncio.TimeoutError: if no such event is received in time
+    """
+
+    async def _next_matching_event():
+        while True:
+            event = await events.get()
+            if predicate(event):
+                return event
+
+    return await asyncio.wait_for(_next_matching_event(), timeout)
+
+
+async def wait_for_event_async(
+    device: Any,
+    attribute_name: str,
+    predicate: Callable[[Any], bool],
+    timeout: float,
+    hub: ChangeEventHub = CHANGE_EVENT_HUB,
+) -> Any:
+    """Await the first change event of given attribute satisfying predicate
+
+    Args:
+        device (str | DeviceProxy): device name or Tango Device Proxy
+        attribute_name (str): Name of the attribute
+        predicate (Callable): called with each event, error events excluded
+        timeout (float): time to wait in seconds
+        hub (ChangeEventHub): hub used to subscribe
+    Returns:
+        EventData: the first event satisfying predicate
+    Raises:
+        asyncio.TimeoutError: if no such event is received in time
+    """
+    async with subscribed_events_async(device, attribute_name, hub) as events:
+        return await next_event_async(events, predicate, timeout)
+
+
+class HubDeviceProxy:
+    """DeviceProxy look alike routing change event subscriptions through the
+    hub. Everything else is delegated to the pooled DeviceProxy. Used as
+    device factory for consumers which subscribe through a proxy object, like
+    TangoEventTracer.
+    """
+
+    def __init__(self, device: Any, hub: ChangeEventHub = CHANGE_EVENT_HUB):
+        """
+        Args:
+            device (str | DeviceProxy): device name or Tango Device Proxy
+            hub (ChangeEventHub): hub used for change events
+        """
+        self._device_name = get_device_name(device)
+        self._hub = hub
+        self._hub_handles: Set[int] = set()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(DEVICE_PROXY_POOL.get_proxy(self._device_name), name)
+
+    def dev_name(self) -> str:
+        """Return the device name"""
+        return self._device_name
+
+    def name(self) -> str:
+        """Return the device name"""
+        return self._device_name
+
+    def subscribe_event(
+        self, attribute_name: str, event_type: Any, callback: Callable, *args
+    ) -> int:
+        """Subscribe to an event, change events go through the hub"""
+        if event_type != EventType.CHANGE_EVENT:
+            return DEVICE_PROXY_POOL.get_proxy(
+                self._device_name
+            ).subscribe_event(attribute_name, event_type, callback, *args)
+        handle = self._hub.subscribe(
+            self._device_name, attribute_name, callback
+        )
+        self._hub_handles.add(handle)
+        return handle
+
+    def unsubscribe_event(self, event_id: int) -> None:
+        """Unsubscribe an event subscribed with subscribe_event"""
+        if event_id in self._hub_handles:
+            self._hub_handles.discard(event_id)
+            self._hub.unsubscribe(event_id)
+            return
+        DEVICE_PROXY_POOL.get_proxy(self._device_name).unsubscribe_event(
+            event_id
+        )
@@ -0,0 +1,297 @@
+"""Batched polling of attributes watched by Monitors.
+
+When several Monitors watch the same device each one used to read its
+attribute on its own. The scheduler groups all watched attributes by device
+and reads them with one ``read_attributes_asynch`` call per device and tick.
+The requests to all devices are sent before any reply is collected, so the
+devices are polled in parallel, and every Monitor is fed from the shared
+sample through ``apply_sample``.
+
+The ClientSidePoller uses the scheduler from a background thread to emulate
+change events for attributes for which the device does not push events.
+"""
+import itertools
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from numpy import array_equal
+from ska_ser_logging import configure_logging
+from tango import DevFailed, DeviceAttribute, TimeVal
+
+from tests.resources.test_support.common_utils.device_proxy_pool import (
+    DEVICE_PROXY_POOL,
+    PROXY_TIMEOUT_MILLIS,
+    get_device_name,
+)
+
+configure_logging(logging.DEBUG)
+LOGGER = logging.getLogger(__name__)
+
+ATTRIBUTE_NOT_FOUND = "attribute not found"
+
+
+class PollingScheduler:
+    """Reads the attributes watched by a set of Monitors, one request per
+    device per tick.
+    """
+
+    def __init__(self, reply_timeout_millis: int = PROXY_TIMEOUT_MILLIS):
+        """
+        Args:
+            reply_timeout_millis (int): time to wait for a device to reply
+        """
+        self.reply_timeout_millis = reply_timeout_millis
+
+    @staticmethod
+    def key(monitor: Any) -> Tuple[str, str]:
+        """Return the sample key of the attribute watched by a monitor
+
+        Args:
+            monitor: object having device_name and attr
+        Returns:
+            tuple: (device name, attribute name) in lower case
+        """
+        return (get_device_name(monitor.device_name), monitor.attr.lower())
+
+    def sample(self, monitors: List[Any]) -> Dict[Tuple[str, str], Any]:
+        """Read the attributes watched by the monitors, one asynchronous
+        request per device. All requests are sent before the replies are
+        collected so that the devices are read in parallel.
+
+        Args:
+            monitors (list): objects having device_name and attr
+        Returns:
+            dict: sample key to DeviceAttribute read from the device,
+            "attribute not found" if the device does not have the attribute
+            or the DevFailed raised while reading it
+        """
+        attributes_per_device: Dict[str, List[str]] = {}
+        for monitor in monitors:
+            device_name, attribute_name = self.key(monitor)
+            attributes = attributes_per_device.setdefault(device_name, [])
+            if attribute_name not in attributes:
+                attributes.append(attribute_name)
+        samples: Dict[Tuple[str, str], Any] = {}
+        requests = {}
+        for device_name, attributes in attributes_per_device.items():
+            readable = self._readable_attributes(
+                device_name, attributes, samples
+            )
+            if not readable:
+                continue
+            try:
+                device_proxy = DEVICE_PROXY_POOL.get_proxy(device_name)
+                requests[device_name] = (
+                    readable,
+                    device_proxy,
+                    device_proxy.read_attributes_asynch(readable),
+                )
+            except DevFailed as exception:
+                self._read_after_failure(
+                    device_name, readable, exception, samples
+                )
+        for device_name, (
+            attributes,
+            device_proxy,
+            request_id,
+        ) in requests.items():
+            try:
+                replies = device_proxy.read_attributes_reply(
+                    request_id, self.reply_timeout_millis
+                )
+            except DevFailed as exception:
+                self._read_after_failure(
+                    device_name, attributes, exception, samples
+                )
+                continue
+            self._record_replies(device_name, attributes, replies, samples)
+        return samples
+
+    @staticmethod
+    def _readable_attributes(
+        device_name: str, attributes: List[str], samples: dict
+    ) -> List[str]:
+        """Return the attributes exposed by the device, the missing ones are
+        sampled the same way Resource.get reports them"""
+        readable = []
+        for attribute_name in attributes:
+            try:
+                attr_config = DEVICE_PROXY_POOL.get_attribute_config(
+                    device_name, attribute_name
+                )
+            except DevFailed as exception:
+                samples[(device_name, attribute_name)] = exception
+                continue
+            if attr_config is None:
+                samples[(device_name, attribute_name)] = ATTRIBUTE_NOT_FOUND
+            else:
+                readable.append(attribute_name)
+        return readable
+
+    @staticmethod
+    def _record_replies(
+        device_name: str,
+        attributes: List[str],
+        replies: List[DeviceAttribute],
+        samples: dict,
+    ) -> None:
+        """Record the attributes read from a device, failed reads as the
+        DevFailed they hold"""
+        for attribute_name, reply in zip(attributes, replies):
+            if reply.has_failed:
+                reply = DevFailed(*reply.get_err_stack())
+            samples[(device_name, attribute_name)] = reply
+
+    def _read_after_failure(
+        self,
+        device_name: str,
+        attributes: List[str],
+        exception: DevFailed,
+        samples: dict,
+    ) -> None:
+        """Read the attributes again through a fresh proxy if the device was
+        restarted, as DeviceProxyPool.read_attribute does, otherwise record
+        the failure for every attribute of the device"""
+        try:
+            replies = DEVICE_PROXY_POOL.retry_after_restart(
+                device_name,
+                exception,
+                lambda device_proxy: device_proxy.read_attributes(attributes),
+            )
+        except DevFailed as failure:
+            for attribute_name in attributes:
+                samples[(device_name, attribute_name)] = failure
+            return
+        self._record_replies(device_name, attributes, replies, samples)
+
+
+POLLING_SCHEDULER = PollingScheduler()
+
+
+class PolledEvent:
+    """Change event look alike built from a client side read, carrying the
+    attributes of tango EventData used by event consumers"""
+
+    def __init__(self, device_name: str, attribute_name: str, sample: Any):
+        self.device = DEVICE_PROXY_POOL.get_proxy(device_name)
+        self.attr_name = f"{device_name}/{attribute_name}"
+        self.event = "change"
+        self.reception_date = TimeVal.now()
+        self.err = not isinstance(sample, DeviceAttribute)
+        self.attr_value = None if self.err else sample
+        self.errors = sample.args if isinstance(sample, DevFailed) else ()
+
+
+class PolledWatch:
+    """Attribute watched by the ClientSidePoller on behalf of a consumer"""
+
+    def __init__(self, device: Any, attr: str, callback: Callable):
+        self.device_name = get_device_name(device)
+        self.attr = attr
+        self.callback = callback
+        self.last_sample = None
+
+    def deliver(self, sample: Any) -> None:
+        """Push an event to the consumer if the sample differs from the last
+        one, the first sample is always pushed like Tango does on subscribe
+        """
+        if self.last_sample is not None and not self._has_changed(sample):
+            return
+        self.last_sample = sample
+        try:
+            self.callback(PolledEvent(self.device_name, self.attr, sample))
+        # pylint: disable=broad-exception-caught
+        except Exception as exception:
+            LOGGER.exception(
+                "Consumer of %s/%s failed with: %s",
+                self.device_name,
+                self.attr,
+                exception,
+            )
+
+    def _has_changed(self, sample: Any) -> bool:
+        """Compare a sample with the last delivered one, read failures are
+        reported once until a value is read again"""
+        is_value = isinstance(sample, DeviceAttribute)
+        was_value = isinstance(self.last_sample, DeviceAttribute)
+        if is_value and was_value:
+            return not array_equal(sample.value, self.last_sample.value)
+        return is_value or was_value
+
+
+class ClientSidePoller:
+    """Polls attributes which do not push change events from the client
+    side, using a single background thread and the PollingScheduler so that
+    the configuration of the device servers is never changed.
+    """
+
+    def __init__(
+        self,
+        period: float = 0.1,
+        scheduler: PollingScheduler = POLLING_SCHEDULER,
+    ):
+        """
+        Args:
+            period (float): time in seconds between two polls
+            scheduler (PollingScheduler): reads the watched attributes
+        """
+        self.period = period
+        self.scheduler = scheduler
+        self._lock = threading.Lock()
+        self._watches: Dict[int, PolledWatch] = {}
+        self._handle_counter = itertools.count(1)
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, device: Any, attribute_name: str, callback: Callable):
+        """Poll given attribute and push change events to callback. The
+        current value is pushed before returning.
+
+        Args:
+            device (str | DeviceProxy): device name or Tango Device Proxy
+            attribute_name (str): Name of the attribute
+            callback (Callable): called with a PolledEvent
+        Returns:
+            int: handle to be used to stop watching
+        """
+        polled_watch = PolledWatch(device, attribute_name, callback)
+        polled_watch.deliver(
+            self.scheduler.sample([polled_watch])[
+                self.scheduler.key(polled_watch)
+            ]
+        )
+        with self._lock:
+            handle = next(self._handle_counter)
+            self._watches[handle] = polled_watch
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="ClientSidePoller", daemon=True
+                )
+                self._thread.start()
+        return handle
+
+    def unwatch(self, handle: int) -> None:
+        """Stop polling for a consumer
+
+        Args:
+            handle (int): handle returned by watch
+        """
+        with self._lock:
+            self._watches.pop(handle, None)
+
+    def _run(self) -> None:
+        """Poll all watched attributes until nothing is watched"""
+        while True:
+            time.sleep(self.period)
+            with self._lock:
+                watches = list(self._watches.values())
+                if not watches:
+                    self._thread = None
+                    return
+            samples = self.scheduler.sample(watches)
+            for polled_watch in watches:
+                polled_watch.deliver(samples[self.scheduler.key(polled_watch)])
+
+
+CLIENT_SIDE_POLLER = ClientSidePoller()
@@ -0,0 +1,164 @@
+"""Engine evaluating a set of wait conditions against a single deadline.
+
+A wait condition is any object implementing ``refresh()``,
+``is_condition_met()`` and ``stop()``, i.e. the polling ``Monitor`` and the
+event based ``AttributeWatcher``. All pending conditions are evaluated
+together on every tick, so waiting for N devices costs the longest of the
+individual waits instead of their sum. Conditions supporting batched
+polling (``batched_polling = True`` and ``apply_sample(sample)``) are
+refreshed together by the PollingScheduler, one read request per device.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, List, Optional
+
+from ska_ser_logging import configure_logging
+
+from tests.resources.test_support.common_utils.polling_scheduler import (
+    POLLING_SCHEDULER,
+    PollingScheduler,
+)
+
+configure_logging(logging.DEBUG)
+LOGGER = logging.getLogger(__name__)
+
+
+class WaitOutcome:
+    """Outcome of a single condition evaluated by the WaitEngine"""
+
+    def __init__(self, wait: Any):
+        self.wait = wait
+        self.completed: bool = False
+        self.elapsed_time: float = 0.0
+        self.error: Optional[Exception] = None
+
+    def __repr__(self):
+        return (
+            f"WaitOutcome({self.wait.device_name}.{self.wait.attr}, "
+            f"completed={self.completed}, "
+            f"elapsed_time={self.elapsed_time:.3f})"
+        )
+
+
+class WaitEngine:
+    """Evaluates all pending wait conditions together until all of them are
+    met or the wall clock deadline is reached.
+    """
+
+    def __init__(
+        self,
+        waits: List[Any],
+        resolution: float = 0.1,
+        scheduler: PollingScheduler = POLLING_SCHEDULER,
+    ):
+        """
+        Args:
+            waits (list): wait conditions to evaluate
+            resolution (float): time in seconds between two evaluations
+            scheduler (PollingScheduler): batches reads of polled conditions
+        """
+        self.waits = list(waits)
+        self.resolution = resolution
+        self.scheduler = scheduler
+
+    def run(self, timeout: float) -> List[WaitOutcome]:
+        """Wait until all conditions are met or timeout occurs
+
+        Args:
+            timeout (float): deadline in seconds shared by all conditions
+        Returns:
+            list[WaitOutcome]: outcome per condition, in the order given
+        """
+        outcomes = [WaitOutcome(wait) for wait in self.waits]
+        start_time = time.monotonic()
+        deadline = start_time + timeout
+        pending = list(outcomes)
+        try:
+            while True:
+                pending = self._evaluate(pending, start_time)
+                remaining_time = deadline - time.monotonic()
+                if not pending or remaining_time <= 0:
+                    break
+                time.sleep(min(self.resolution, remaining_time))
+                pending = self._refresh(pending)
+        finally:
+            for outcome in outcomes:
+                outcome.wait.stop()
+        LOGGER.debug("Wait engine outcomes: %s", outcomes)
+        return outcomes
+
+    async def run_async(self, timeout: float) -> List[WaitOutcome]:
+        """Awaitable variant of run, other coroutines of the event loop run
+        between two evaluations. Device reads are done in the default
+        executor so that the event loop is never blocked.
+
+        Args:
+            timeout (float): deadline in seconds shared by all conditions
+        Returns:
+            list[WaitOutcome]: outcome per condition, in the order given
+        """
+        loop = asyncio.get_running_loop()
+        outcomes = [WaitOutcome(wait) for wait in self.waits]
+        start_time = time.monotonic()
+        deadline = start_time + timeout
+        pending = list(outcomes)
+        try:
+            while True:
+                pending = self._evaluate(pending, start_time)
+                remaining_time = deadline - time.monotonic()
+                if not pending or remaining_time <= 0:
+                    break
+                await asyncio.sleep(min(self.resolution, remaining_time))
+                pending = await loop.run_in_executor(
+                    None, self._refresh, pending
+                )
+        finally:
+            for outcome in outcomes:
+                outcome.wait.stop()
+        LOGGER.debug("Wait engine outcomes: %s", outcomes)
+        return outcomes
+
+    def _evaluate(
+        self, pending: List[WaitOutcome], start_time: float
+    ) -> List[WaitOutcome]:
+        """Check conditions and return the ones still pending"""
+        still_pending = []
+        for outcome in pending:
+            try:
+                condition_met = outcome.wait.is_condition_met()
+            # pylint: disable=broad-exception-caught
+            except Exception as exception:
+                outcome.error = exception
+                continue
+            if condition_met:
+                outcome.completed = True
+                outcome.elapsed_time = time.monotonic() - start_time
+            else:
+                still_pending.append(outcome)
+        return still_pending
+
+    def _refresh(self, pending: List[WaitOutcome]) -> List[WaitOutcome]:
+        """Refresh values of pending conditions, conditions failing to
+        refresh are not evaluated any further"""
+        batched = [
+            outcome.wait
+            for outcome in pending
+            if getattr(outcome.wait, "batched_polling", False)
+        ]
+        samples = self.scheduler.sample(batched) if batched else {}
+        still_pending = []
+        for outcome in pending:
+            try:
+                if getattr(outcome.wait, "batched_polling", False):
+                    outcome.wait.apply_sample(
+                        samples[self.scheduler.key(outcome.wait)]
+                    )
+                else:
+                    outcome.wait.refresh()
+            # pylint: disable=broad-exception-caught
+            except Exception as exception:
+                outcome.error = exception
+                continue
+            still_pending.append(outcome)
+        return still_pending
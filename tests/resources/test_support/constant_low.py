@@ -1,22 +1,28 @@
 """This module contain constants for low devices"""
 from ska_control_model import ObsState, ResultCode
 
+from tests.resources.test_harness.subarray_lease import (
+    LEASED_DEVICE_NAMES,
+    subarray_device_names,
+)
 from tests.resources.test_support.common_utils.result_code import FaultType
 
 centralnode = "ska_low/tm_central/central_node"
-tmc_subarraynode1 = "ska_low/tm_subarray_node/1"
-tmc_subarraynode2 = "ska_low/tm_subarray_node/2"
-tmc_subarraynode3 = "ska_low/tm_subarray_node/3"
+tmc_subarraynode1 = LEASED_DEVICE_NAMES["tmc_subarraynode"]
+# subarrays 2 and 3 are leased by the pytest-xdist workers gw1 and gw2,
+# tests using them are marked telescope_wide
+tmc_subarraynode2 = subarray_device_names(2)["tmc_subarraynode"]
+tmc_subarraynode3 = subarray_device_names(3)["tmc_subarraynode"]
 tmc_csp_master_leaf_node = "ska_low/tm_leaf_node/csp_master"
 tmc_sdp_master_leaf_node = "ska_low/tm_leaf_node/sdp_master"
-tmc_csp_subarray_leaf_node = "ska_low/tm_leaf_node/csp_subarray01"
-tmc_sdp_subarray_leaf_node = "ska_low/tm_leaf_node/sdp_subarray01"
-sdp_subarray1 = "low-sdp/subarray/01"
-sdp_subarray2 = "low-sdp/subarray/02"
-sdp_subarray3 = "low-sdp/subarray/03"
-csp_subarray1 = "low-csp/subarray/01"
-csp_subarray2 = "low-csp/subarray/02"
-csp_subarray3 = "low-csp/subarray/03"
+tmc_csp_subarray_leaf_node = LEASED_DEVICE_NAMES["csp_subarray_leaf_node"]
+tmc_sdp_subarray_leaf_node = LEASED_DEVICE_NAMES["sdp_subarray_leaf_node"]
+sdp_subarray1 = LEASED_DEVICE_NAMES["sdp_subarray"]
+sdp_subarray2 = subarray_device_names(2)["sdp_subarray"]
+sdp_subarray3 = subarray_device_names(3)["sdp_subarray"]
+csp_subarray1 = LEASED_DEVICE_NAMES["csp_subarray"]
+csp_subarray2 = subarray_device_names(2)["csp_subarray"]
+csp_subarray3 = subarray_device_names(3)["csp_subarray"]
 sdp_master = "low-sdp/control/0"
 csp_master = "low-csp/control/0"
 TIMEOUT = 80
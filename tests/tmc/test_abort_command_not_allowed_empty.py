@@ -10,9 +10,10 @@ import pytest
 from assertpy import assert_that
 from pytest_bdd import given, scenario, then, when
 from ska_control_model import ObsState
-from ska_tango_testing.integration import TangoEventTracer, log_events
+from ska_tango_testing.integration import TangoEventTracer
 from tango import DevFailed
 
+from tests.resources.test_harness.event_tracer import log_events
 from tests.resources.test_harness.subarray_node_low import (
     SubarrayNodeWrapperLow,
 )
@@ -5,14 +5,16 @@ import json
 import pytest
 from assertpy import assert_that
 from ska_control_model import ObsState, ResultCode
-from ska_tango_testing.integration import TangoEventTracer, log_events
+from ska_tango_testing.integration import TangoEventTracer
 from tango import DevState
 
 from tests.resources.test_harness.central_node_low import CentralNodeWrapperLow
 from tests.resources.test_harness.constant import (
     COMMAND_FAILED_WITH_EXCEPTION_OBSSTATE_EMPTY,
     TIMEOUT,
+    tmc_low_subarraynode1,
 )
+from tests.resources.test_harness.event_tracer import log_events
 from tests.resources.test_harness.helpers import (
     get_device_simulators,
     prepare_json_args_for_centralnode_commands,
@@ -85,7 +87,7 @@ def test_assign_release_defective_csp(
     assert unique_id[0].endswith("AssignResources")
     assert result[0] == ResultCode.QUEUED
     exception_message = (
-        " ska_low/tm_subarray_node/1:"
+        f" {tmc_low_subarraynode1}:"
         + " Exception occurred on the following devices:"
     )
     log_events({central_node_low.central_node: ["longRunningCommandResult"]})
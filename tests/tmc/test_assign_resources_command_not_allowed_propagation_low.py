@@ -3,17 +3,19 @@
 
 import pytest
 from assertpy import assert_that
-from ska_tango_testing.integration import TangoEventTracer, log_events
+from ska_tango_testing.integration import TangoEventTracer
 from tango import DevState
 
 from tests.resources.test_harness.central_node_low import CentralNodeWrapperLow
 from tests.resources.test_harness.constant import (
     COMMAND_NOT_ALLOWED_DEFECT,
     TIMEOUT,
+    low_csp_subarray1,
     low_sdp_subarray_leaf_node,
     mccs_controller,
     mccs_master_leaf_node,
 )
+from tests.resources.test_harness.event_tracer import log_events
 from tests.resources.test_harness.simulator_factory import SimulatorFactory
 from tests.resources.test_harness.utils.common_utils import JsonFactory
 from tests.resources.test_harness.utils.enums import SimulatorDeviceType
@@ -75,7 +77,7 @@ class TestAssignCommandNotAllowedPropagation:
 
         exception_message = (
             "The invocation of the AssignResources command failed on Csp "
-            + "Subarray Device low-csp/subarray/01"
+            + f"Subarray Device {low_csp_subarray1}"
         )
         log_events(
             {central_node_low.central_node: ["longRunningCommandResult"]}
@@ -167,6 +169,7 @@ class TestAssignCommandNotAllowedPropagation:
         )
 
     @pytest.mark.SKA_low
+    @pytest.mark.telescope_wide
     def test_assign_command_not_allowed_propagation_mccs_ln_low(
         self,
         central_node_low: CentralNodeWrapperLow,
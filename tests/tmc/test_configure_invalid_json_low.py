@@ -12,12 +12,13 @@ import pytest
 from assertpy import assert_that
 from pytest_bdd import given, parsers, scenario, then, when
 from ska_control_model import ObsState
-from ska_tango_testing.integration import TangoEventTracer, log_events
+from ska_tango_testing.integration import TangoEventTracer
 from tango import DevState
 
 from tests.conftest import LOGGER
 from tests.resources.test_harness.central_node_low import CentralNodeWrapperLow
 from tests.resources.test_harness.constant import TIMEOUT
+from tests.resources.test_harness.event_tracer import log_events
 from tests.resources.test_harness.helpers import set_receive_address
 from tests.resources.test_harness.subarray_node_low import (
     SubarrayNodeWrapperLow,
@@ -4,7 +4,7 @@ import json
 import pytest
 from assertpy import assert_that
 from ska_control_model import ObsState, ResultCode
-from ska_tango_testing.integration import TangoEventTracer, log_events
+from ska_tango_testing.integration import TangoEventTracer
 from tango import DevState
 
 from tests.resources.test_harness.central_node_low import CentralNodeWrapperLow
@@ -15,6 +15,7 @@ from tests.resources.test_harness.constant import (
     INTERMEDIATE_CONFIGURING_STATE_DEFECT,
     TIMEOUT,
 )
+from tests.resources.test_harness.event_tracer import log_events
 from tests.resources.test_harness.helpers import set_receive_address
 from tests.resources.test_harness.simulator_factory import SimulatorFactory
 from tests.resources.test_harness.subarray_node_low import (
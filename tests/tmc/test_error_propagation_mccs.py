@@ -11,7 +11,7 @@ import pytest
 from assertpy import assert_that
 from pytest_bdd import given, scenario, then, when
 from ska_control_model import ObsState, ResultCode
-from ska_tango_testing.integration import TangoEventTracer, log_events
+from ska_tango_testing.integration import TangoEventTracer
 from tango import DevState
 
 from tests.resources.test_harness.central_node_low import CentralNodeWrapperLow
@@ -21,6 +21,7 @@ from tests.resources.test_harness.constant import (
     mccs_subarray1,
     mccs_subarray_leaf_node,
 )
+from tests.resources.test_harness.event_tracer import log_events
 from tests.resources.test_harness.simulator_factory import SimulatorFactory
 from tests.resources.test_harness.subarray_node_low import (
     SubarrayNodeWrapperLow,
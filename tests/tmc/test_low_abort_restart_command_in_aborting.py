@@ -8,11 +8,12 @@ import pytest
 from assertpy import assert_that
 from ska_control_model import ObsState
 from ska_tango_base.commands import ResultCode
-from ska_tango_testing.integration import TangoEventTracer, log_events
+from ska_tango_testing.integration import TangoEventTracer
 from tango import DevState
 
 from tests.resources.test_harness.central_node_low import CentralNodeWrapperLow
 from tests.resources.test_harness.constant import TIMEOUT
+from tests.resources.test_harness.event_tracer import log_events
 from tests.resources.test_harness.helpers import (
     prepare_json_args_for_centralnode_commands,
 )
@@ -36,6 +36,7 @@ from tests.resources.test_support.constant_low import (
     " implemented on mccs master leaf node."
 )
 @pytest.mark.SKA_low
+@pytest.mark.telescope_wide
 def test_low_abort_restart_in_restarting(json_factory):
     """Abort and Restart is executed."""
     telescope_control = BaseTelescopeControl()
@@ -12,11 +12,12 @@ import logging
 import pytest
 from assertpy import assert_that
 from ska_ser_logging import configure_logging
-from ska_tango_testing.integration import TangoEventTracer, log_events
+from ska_tango_testing.integration import TangoEventTracer
 from tango import DevState
 
 from tests.resources.test_harness.central_node_low import CentralNodeWrapperLow
 from tests.resources.test_harness.constant import TIMEOUT
+from tests.resources.test_harness.event_tracer import log_events
 from tests.resources.test_harness.simulator_factory import SimulatorFactory
 from tests.resources.test_harness.utils.enums import SimulatorDeviceType
 
@@ -30,6 +31,7 @@ class TestLowCentralNodeOnCommand:
       telescope state."""
 
     @pytest.mark.SKA_low
+    @pytest.mark.power_cycle
     def test_low_central_node_on_command(
         self,
         central_node_low: CentralNodeWrapperLow,
@@ -5,10 +5,11 @@ import json
 import pytest
 from assertpy import assert_that
 from ska_control_model import ObsState, ResultCode
-from ska_tango_testing.integration import TangoEventTracer, log_events
+from ska_tango_testing.integration import TangoEventTracer
 from tango import DevState
 
 from tests.resources.test_harness.central_node_low import CentralNodeWrapperLow
+from tests.resources.test_harness.event_tracer import log_events
 from tests.resources.test_harness.helpers import (
     get_device_simulators,
     prepare_json_args_for_centralnode_commands,
@@ -23,6 +24,7 @@ from tests.resources.test_harness.utils.enums import SimulatorDeviceType
 from tests.resources.test_support.constant_low import (
     FAILED_RESULT_DEFECT,
     TIMEOUT,
+    tmc_subarraynode1,
 )
 
 
@@ -436,8 +438,7 @@ def test_abort_with_mccs_in_empty(
     )
 
     exception_message = (
-        " ska_low/tm_subarray_node/1: "
-        + "Timeout has occurred, command failed"
+        f" {tmc_subarraynode1}: " + "Timeout has occurred, command failed"
     )
 
     assert_that(event_tracer).described_as(
@@ -12,10 +12,11 @@ from assertpy import assert_that
 from pytest_bdd import given, parsers, scenario, then, when
 from ska_control_model import ObsState
 from ska_tango_base.commands import ResultCode
-from ska_tango_testing.integration import TangoEventTracer, log_events
+from ska_tango_testing.integration import TangoEventTracer
 from tango import DevState
 
 from tests.resources.test_harness.central_node_low import CentralNodeWrapperLow
+from tests.resources.test_harness.event_tracer import log_events
 from tests.resources.test_harness.helpers import remove_timing_beams
 from tests.resources.test_harness.subarray_node_low import (
     SubarrayNodeWrapperLow,
@@ -12,7 +12,7 @@ from assertpy import assert_that
 from pytest_bdd import given, scenario, then, when
 from ska_control_model import ObsState
 from ska_tango_base.commands import ResultCode
-from ska_tango_testing.integration import TangoEventTracer, log_events
+from ska_tango_testing.integration import TangoEventTracer
 from ska_telmodel.schema import validate as telmodel_validate
 from tango import DevState
 
@@ -22,6 +22,16 @@ from tests.resources.test_harness.constant import (
     LOW_DELAYMODEL_VERSION,
     TIMEOUT,
 )
+from tests.resources.test_harness.delay_model_analyser import (
+    DelayModelAnalyser,
+    analyse,
+)
+from tests.resources.test_harness.delay_model_monitor import (
+    DELAY_MONITOR_WINDOW,
+    DelayModelMonitor,
+    wait_for_delay_model,
+)
+from tests.resources.test_harness.event_tracer import log_events
 from tests.resources.test_harness.helpers import (
     prepare_json_args_for_centralnode_commands,
     prepare_json_args_for_commands,
@@ -175,15 +185,25 @@ def invoke_configure_command(
 @then("CSP Subarray Leaf Node starts generating delay values")
 def check_if_delay_values_are_generating(subarray_node_low) -> None:
     """Check if delay values are generating."""
-    generated_delay_model = (
-        subarray_node_low.csp_subarray_leaf_node.read_attribute(
-            "delayModel"
-        ).value
+    generated_delay_model_json = wait_for_delay_model(
+        subarray_node_low.csp_subarray_leaf_node,
+        "delayModel",
+        initial=INITIAL_LOW_DELAY_JSON,
+        timeout=TIMEOUT,
     )
-    generated_delay_model_json = json.loads(generated_delay_model)
-    assert generated_delay_model_json != json.dumps(INITIAL_LOW_DELAY_JSON)
     telmodel_validate(
         version=LOW_DELAYMODEL_VERSION,
         config=generated_delay_model_json,
         strictness=2,
     )
+    if DELAY_MONITOR_WINDOW:
+        analysis = analyse([generated_delay_model_json])
+        assert analysis.ok, analysis.as_dict()
+        analyser = DelayModelAnalyser()
+        report = DelayModelMonitor(
+            subarray_node_low.csp_subarray_leaf_node,
+            "delayModel",
+            analyser=analyser,
+        ).monitor(DELAY_MONITOR_WINDOW)
+        assert report.samples, "No delay model published during the window"
+        assert not analyser.problems, analyser.problems
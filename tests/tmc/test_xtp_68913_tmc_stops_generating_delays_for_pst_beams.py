@@ -10,7 +10,7 @@ from assertpy import assert_that
 from pytest_bdd import given, scenario, then, when
 from ska_control_model import ObsState
 from ska_tango_base.commands import ResultCode
-from ska_tango_testing.integration import TangoEventTracer, log_events
+from ska_tango_testing.integration import TangoEventTracer
 from ska_telmodel.schema import validate as telmodel_validate
 from tango import DevState
 
@@ -20,6 +20,7 @@ from tests.resources.test_harness.constant import (
     LOW_DELAYMODEL_VERSION,
     TIMEOUT,
 )
+from tests.resources.test_harness.event_tracer import log_events
 from tests.resources.test_harness.helpers import (
     prepare_json_args_for_centralnode_commands,
     prepare_json_args_for_commands,
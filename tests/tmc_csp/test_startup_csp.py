@@ -7,6 +7,7 @@ from tests.resources.test_harness.helpers import get_master_device_simulators
 
 
 @pytest.mark.tmc_csp
+@pytest.mark.power_cycle
 @scenario(
     "../features/tmc_csp/xtp-29685_startup.feature",
     "Start up the telescope having TMC and CSP subsystems",
@@ -8,6 +8,7 @@ from tests.resources.test_harness.helpers import get_master_device_simulators
 
 
 @pytest.mark.tmc_mccs
+@pytest.mark.power_cycle
 @scenario(
     "../features/tmc_mccs/xtp-33991_tmc_mccs_on.feature",
     "StartUp Telescope with TMC and MCCS devices",
@@ -6,6 +6,7 @@ from tango import DevState
 
 
 @pytest.mark.tmc_mccs
+@pytest.mark.power_cycle
 @scenario(
     "../features/tmc_mccs/xtp-33992_tmc_mccs_off.feature",
     "Switch off the telescope having TMC and MCCS subsystems",
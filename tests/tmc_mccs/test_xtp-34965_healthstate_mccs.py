@@ -16,6 +16,7 @@ from tests.resources.test_harness.simulator_factory import SimulatorFactory
 
 
 @pytest.mark.tmc_mccs
+@pytest.mark.telescope_wide
 @scenario(
     "../features/tmc_mccs/xtp-34965_healthstate_mccs.feature",
     "Verify CentralNode TelescopeHealthState",
@@ -8,6 +8,7 @@ from tests.resources.test_harness.helpers import get_master_device_simulators
 
 
 @pytest.mark.tmc_sdp
+@pytest.mark.power_cycle
 @scenario(
     "../features/tmc_sdp/xtp-29228_start_up_tmc_sdp.feature",
     "Start up the telescope having TMC and SDP subsystems",
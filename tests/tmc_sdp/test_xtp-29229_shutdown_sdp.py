@@ -9,6 +9,7 @@ from tests.resources.test_harness.helpers import get_master_device_simulators
 
 
 @pytest.mark.tmc_sdp
+@pytest.mark.power_cycle
 @scenario(
     "../features/tmc_sdp/xtp-29229_shutdown_tmc_sdp.feature",
     "Switch off the telescope having TMC and SDP subsystems",
@@ -7,6 +7,7 @@ from tests.resources.test_harness.helpers import get_master_device_simulators
 
 
 @pytest.mark.tmc_sdp
+@pytest.mark.power_cycle
 @scenario(
     "../features/tmc_sdp/xtp-29234_standby_tmc_sdp.feature",
     "Standby the telescope having TMC and SDP subsystems",
@@ -14,6 +14,7 @@ from tests.resources.test_harness.simulator_factory import SimulatorFactory
 
 
 @pytest.mark.tmc_sdp_unhappy_path
+@pytest.mark.telescope_wide
 @scenario(
     "../features/tmc_sdp/xtp-34895_health_state_sdp.feature",
     "Verify TMC TelescopeHealthState transition based on SDP Controller"